@@ -1,7 +1,15 @@
 """Adapter-Package"""
-from adapter.datenadapter import DatenAdapter
-from adapter.manager import DatenManager
 
 __all__ = ["DatenAdapter", "DatenManager"]
 
 
+def __getattr__(name):
+    # Erst bei Bedarf importieren, damit leichte Module wie adapter.startprofil
+    # vor den Datenklassen geladen werden können (Importzeiten beim Start)
+    if name == "DatenAdapter":
+        from adapter.datenadapter import DatenAdapter
+        return DatenAdapter
+    if name == "DatenManager":
+        from adapter.manager import DatenManager
+        return DatenManager
+    raise AttributeError(f"module 'adapter' has no attribute {name!r}")
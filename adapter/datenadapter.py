@@ -3,8 +3,9 @@ Adapter-Klasse für Datenpersistenz (JSON)
 """
 import json
 import os
-from typing import List, Optional, Dict, Any, TypeVar, Type
+from typing import List, Optional, Dict, Any, Tuple, TypeVar, Type
 from pathlib import Path
+from adapter import startprofil
 
 T = TypeVar('T')
 
@@ -17,6 +18,7 @@ class DatenAdapter:
         self.config_path = config_path
         self.config = self._lade_config()
         self.manager = manager  # Referenz zum Manager für Zugriff auf Aufträge
+        self._rechnungsindex = None  # Lazy, siehe get_rechnungsindex()
         self._erstelle_datenverzeichnis()
     
     def _lade_config(self) -> Dict[str, Any]:
@@ -113,26 +115,13 @@ class DatenAdapter:
             alle_nachweise.extend(nachweise)
         return alle_nachweise
     
-    def speichere_stundennachweise(self, nachweise: List[Dict[str, Any]]):
-        """Speichert Stundennachweise nach Auftrag gruppiert"""
-        # Gruppiere nach auftrag_id
-        nachweise_nach_auftrag = {}
-        for nachweis in nachweise:
-            auftrag_id = nachweis.get("auftrag_id")
-            if auftrag_id:
-                auftrag = self.manager.get_auftrag(auftrag_id) if hasattr(self, 'manager') else None
-                if auftrag:
-                    auftragsnummer = auftrag.auftragsnummer
-                    if auftragsnummer not in nachweise_nach_auftrag:
-                        nachweise_nach_auftrag[auftragsnummer] = []
-                    nachweise_nach_auftrag[auftragsnummer].append(nachweis)
-        
-        # Speichere pro Auftrag
-        for auftragsnummer, auftrag_nachweise in nachweise_nach_auftrag.items():
+    def speichere_stundennachweise_fuer_auftraege(self, nachweise_nach_auftrag: Dict[str, List[Dict[str, Any]]]):
+        """Speichert die Stundennachweise mehrerer Aufträge (bereits nach Auftragsnummer gruppiert)"""
+        for auftragsnummer, nachweise in nachweise_nach_auftrag.items():
             auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
             if auftragsordner:
                 datei = Path(auftragsordner) / "stundennachweise.json"
-                self._speichere_datei(str(datei), auftrag_nachweise)
+                self._speichere_datei(str(datei), nachweise)
     
     def lade_stundennachweise_fuer_auftrag(self, auftragsnummer: str) -> List[Dict[str, Any]]:
         """Lädt Stundennachweise für einen spezifischen Auftrag"""
@@ -144,10 +133,7 @@ class DatenAdapter:
     
     def speichere_stundennachweise_fuer_auftrag(self, auftragsnummer: str, nachweise: List[Dict[str, Any]]):
         """Speichert Stundennachweise für einen spezifischen Auftrag"""
-        auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
-        if auftragsordner:
-            datei = Path(auftragsordner) / "stundennachweise.json"
-            self._speichere_datei(str(datei), nachweise)
+        self.speichere_stundennachweise_fuer_auftraege({auftragsnummer: nachweise})
     
     def lade_stuecklisten(self) -> List[Dict[str, Any]]:
         """Lädt alle Stücklisten aus allen Aufträgen"""
@@ -159,26 +145,13 @@ class DatenAdapter:
             alle_stuecklisten.extend(stuecklisten)
         return alle_stuecklisten
     
-    def speichere_stuecklisten(self, stuecklisten: List[Dict[str, Any]]):
-        """Speichert Stücklisten nach Auftrag gruppiert"""
-        # Gruppiere nach auftrag_id
-        stuecklisten_nach_auftrag = {}
-        for stueckliste in stuecklisten:
-            auftrag_id = stueckliste.get("auftrag_id")
-            if auftrag_id:
-                auftrag = self.manager.get_auftrag(auftrag_id) if hasattr(self, 'manager') else None
-                if auftrag:
-                    auftragsnummer = auftrag.auftragsnummer
-                    if auftragsnummer not in stuecklisten_nach_auftrag:
-                        stuecklisten_nach_auftrag[auftragsnummer] = []
-                    stuecklisten_nach_auftrag[auftragsnummer].append(stueckliste)
-        
-        # Speichere pro Auftrag
-        for auftragsnummer, auftrag_stuecklisten in stuecklisten_nach_auftrag.items():
+    def speichere_stuecklisten_fuer_auftraege(self, stuecklisten_nach_auftrag: Dict[str, List[Dict[str, Any]]]):
+        """Speichert die Stücklisten mehrerer Aufträge (bereits nach Auftragsnummer gruppiert)"""
+        for auftragsnummer, stuecklisten in stuecklisten_nach_auftrag.items():
             auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
             if auftragsordner:
                 datei = Path(auftragsordner) / "stuecklisten.json"
-                self._speichere_datei(str(datei), auftrag_stuecklisten)
+                self._speichere_datei(str(datei), stuecklisten)
     
     def lade_stuecklisten_fuer_auftrag(self, auftragsnummer: str) -> List[Dict[str, Any]]:
         """Lädt Stücklisten für einen spezifischen Auftrag"""
@@ -190,10 +163,7 @@ class DatenAdapter:
     
     def speichere_stuecklisten_fuer_auftrag(self, auftragsnummer: str, stuecklisten: List[Dict[str, Any]]):
         """Speichert Stücklisten für einen spezifischen Auftrag"""
-        auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
-        if auftragsordner:
-            datei = Path(auftragsordner) / "stuecklisten.json"
-            self._speichere_datei(str(datei), stuecklisten)
+        self.speichere_stuecklisten_fuer_auftraege({auftragsnummer: stuecklisten})
     
     def lade_rechnungen_fuer_auftrag(self, auftragsnummer: str) -> List[Dict[str, Any]]:
         """Lädt Rechnungen für einen spezifischen Auftrag"""
@@ -205,10 +175,91 @@ class DatenAdapter:
     
     def speichere_rechnungen_fuer_auftrag(self, auftragsnummer: str, rechnungen: List[Dict[str, Any]]):
         """Speichert Rechnungen für einen spezifischen Auftrag"""
-        auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
-        if auftragsordner:
-            datei = Path(auftragsordner) / "rechnungen.json"
-            self._speichere_datei(str(datei), rechnungen)
+        self.speichere_rechnungen_fuer_auftraege({auftragsnummer: rechnungen})
+    
+    def speichere_rechnungen_fuer_auftraege(self, rechnungen_nach_auftrag: Dict[str, List[Dict[str, Any]]]):
+        """Speichert die Rechnungen mehrerer Aufträge; der Rechnungsindex wird danach einmal geschrieben"""
+        index = self.get_rechnungsindex()
+        index_geaendert = False
+        for auftragsnummer, rechnungen in rechnungen_nach_auftrag.items():
+            auftragsordner = self.get_auftragsordner_pfad(auftragsnummer)
+            if auftragsordner:
+                datei = Path(auftragsordner) / "rechnungen.json"
+                self._speichere_datei(str(datei), rechnungen)
+                index_geaendert |= index.aktualisiere(auftragsnummer, rechnungen)
+        if index_geaendert:
+            index.speichere()
+    
+    def get_rechnungsindex(self) -> "Rechnungsindex":
+        """
+        Gibt den Datumsindex der Rechnungen zurück
+        
+        Fehlt die Indexdatei (Datenbestand aus einer älteren Version), wird sie
+        einmalig aus allen Auftragsordnern aufgebaut.
+        """
+        if self._rechnungsindex is None:
+            from adapter.rechnungsindex import Rechnungsindex, INDEX_DATEI
+            index = Rechnungsindex(os.path.join(self._get_daten_pfad(), INDEX_DATEI))
+            if not index.vorhanden:
+                self._baue_rechnungsindex_auf(index)
+            self._rechnungsindex = index
+        return self._rechnungsindex
+    
+    def baue_rechnungsindex_neu(self) -> int:
+        """Baut den Rechnungsindex aus allen Auftragsordnern neu auf und gibt die Anzahl der Aufträge zurück"""
+        from adapter.rechnungsindex import Rechnungsindex, INDEX_DATEI
+        index = self._rechnungsindex or Rechnungsindex(os.path.join(self._get_daten_pfad(), INDEX_DATEI))
+        self._baue_rechnungsindex_auf(index)
+        self._rechnungsindex = index
+        return index.anzahl()
+    
+    def entferne_aus_rechnungsindex(self, auftragsnummer: str):
+        """Nimmt einen gelöschten Auftrag aus dem Rechnungsindex (der Ordner bleibt erhalten)"""
+        index = self.get_rechnungsindex()
+        if index.aktualisiere(auftragsnummer, []):
+            index.speichere()
+    
+    def _baue_rechnungsindex_auf(self, index):
+        # Ordner gelöschter Aufträge bleiben liegen, zählen aber nicht mehr
+        # Gesperrt vom Lesen bis zum Schreiben, sonst könnte ein anderer Prozess
+        # dazwischen speichern und sein Eintrag würde überschrieben
+        with index.gesperrt():
+            auftragsnummern = {a.get("auftragsnummer") for a in self.lade_auftraege()}
+            eintraege = ((os.path.basename(ordner), self._lade_datei(os.path.join(ordner, "rechnungen.json")))
+                         for ordner in self._get_alle_auftragsordner()
+                         if os.path.basename(ordner) in auftragsnummern)
+            index.neu_aufbauen(eintraege)
+            index.speichere()
+    
+    def pruefe_dateien(self) -> List[Tuple[str, str]]:
+        """
+        Liest alle Datendateien direkt und meldet unlesbare
+        
+        Beim normalen Laden ergibt eine beschädigte Datei eine leere Liste
+        (siehe _lade_datei), der Fehler fällt also sonst nicht auf.
+        
+        Returns:
+            (Pfad, Fehlermeldung) je Datei, die kein gültiges JSON-Array enthält
+        """
+        dateien = [self._get_datei_pfad(schluessel) for schluessel in ("kunden_datei", "auftraege_datei")]
+        auftragsnummern = {a.get("auftragsnummer") for a in self.lade_auftraege()}
+        for ordner in self._get_alle_auftragsordner():
+            if os.path.basename(ordner) in auftragsnummern:
+                dateien.extend(os.path.join(ordner, name) for name in
+                               ("rechnungen.json", "stundennachweise.json", "stuecklisten.json"))
+        fehler = []
+        for datei in dateien:
+            if not os.path.exists(datei):
+                continue
+            try:
+                with open(datei, 'r', encoding='utf-8') as f:
+                    daten = json.load(f)
+            except (OSError, ValueError) as e:
+                fehler.append((datei, str(e)))
+                continue
+            if not isinstance(daten, list):
+                fehler.append((datei, "kein JSON-Array"))
+        return fehler
     
     def _get_alle_auftragsordner(self) -> List[str]:
         """Gibt alle Auftragsordner zurück"""
@@ -217,13 +268,14 @@ class DatenAdapter:
         auftragsordner = []
         
         # Durchsuche alle Jahresordner
-        if basis_pfad.exists():
-            for jahresordner in basis_pfad.iterdir():
-                if jahresordner.is_dir() and jahresordner.name.isdigit():
-                    # Durchsuche alle Auftragsordner im Jahresordner
-                    for auftrag_ordner in jahresordner.iterdir():
-                        if auftrag_ordner.is_dir() and "-" in auftrag_ordner.name:
-                            auftragsordner.append(str(auftrag_ordner))
+        with startprofil.phase("Auftragsordner suchen"):
+            if basis_pfad.exists():
+                for jahresordner in basis_pfad.iterdir():
+                    if jahresordner.is_dir() and jahresordner.name.isdigit():
+                        # Durchsuche alle Auftragsordner im Jahresordner
+                        for auftrag_ordner in jahresordner.iterdir():
+                            if auftrag_ordner.is_dir() and "-" in auftrag_ordner.name:
+                                auftragsordner.append(str(auftrag_ordner))
         
         return auftragsordner
     
@@ -353,6 +405,42 @@ class DatenAdapter:
         
         return str(teilauftrag_ordner)
     
+    # Unterordner jedes Teilauftrags (siehe erstelle_teilauftrag_ordnerstruktur)
+    TEILAUFTRAG_UNTERORDNER = ("Dokumentation/Fotos", "Dokumentation/Skizzen", "Dokumentation/Berechnungen",
+                               "Rechnungen/Belege", "Rechnungen/Kundenrechnungen")
+    
+    def erstelle_teilauftrag_ordnerstrukturen(self, auftragsnummer: str, beschreibungen: List[str]) -> int:
+        """
+        Erstellt die Teilauftragsordner aller Positionen eines Auftrags in einem Durchgang
+        
+        Der Auftragsordner wird nur einmal gelesen. Fehlende Unterordner werden
+        auch in bereits vorhandenen Teilauftragsordnern angelegt (z.B. nach
+        einem Abbruch oder wenn ein Ordner von Hand gelöscht wurde).
+        
+        Args:
+            auftragsnummer: Die Auftragsnummer (YYYY-XXXX)
+            beschreibungen: Beschreibungen der Positionen in Reihenfolge (Nummer 1, 2, 3, ...)
+        
+        Returns:
+            Anzahl der neu angelegten Teilauftragsordner
+        """
+        jahr = auftragsnummer.split("-")[0]
+        auftragsordner = os.path.join(self._get_daten_pfad(), jahr, auftragsnummer)
+        try:
+            vorhanden = set(os.listdir(auftragsordner))
+        except FileNotFoundError:
+            vorhanden = set()
+        
+        neu = 0
+        ungueltig = str.maketrans({z: "_" for z in '/\\:*?"<>|'})
+        for positionsnummer, beschreibung in enumerate(beschreibungen, start=1):
+            name = f"{positionsnummer:02d}_{beschreibung.translate(ungueltig)}"
+            for unterordner in self.TEILAUFTRAG_UNTERORDNER:
+                os.makedirs(os.path.join(auftragsordner, name, unterordner), exist_ok=True)
+            if name not in vorhanden:
+                neu += 1
+        return neu
+    
     def get_auftragsordner_pfad(self, auftragsnummer: str) -> Optional[str]:
         """
         Gibt den Pfad zum Auftragsordner zurück
@@ -379,4 +467,24 @@ class DatenAdapter:
             return str(auftragsordner)
         
         return None
+    
+    def get_rechnung_pdf_pfad(self, auftragsnummer: str, rechnungsnummer: str, rechnungsdatum) -> str:
+        """
+        Gibt den Standard-Pfad des Rechnungs-PDFs im Auftragsordner zurück
+        
+        Der Pfad ist deterministisch (Rechnungen/Rechnung_<Nr>_<YYYYMMDD>.pdf),
+        der Ordner muss noch nicht existieren.
+        
+        Args:
+            auftragsnummer: Die Auftragsnummer (YYYY-XXXX)
+            rechnungsnummer: Die Rechnungsnummer
+            rechnungsdatum: Rechnungsdatum (datetime)
+        
+        Returns:
+            Der vollständige Pfad zur PDF-Datei
+        """
+        jahr = auftragsnummer.split("-")[0]
+        auftragsordner = Path(self._get_daten_pfad()) / jahr / auftragsnummer
+        dateiname = f"Rechnung_{rechnungsnummer}_{rechnungsdatum.strftime('%Y%m%d')}.pdf"
+        return str(auftragsordner / "Rechnungen" / dateiname)
 
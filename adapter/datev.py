@@ -0,0 +1,276 @@
+"""
+DATEV-Export: Rechnungen und Zahlungen eines Zeitraums als Buchungsstapel (EXTF)
+
+Der Export ist eine Generator-Kette, es liegt nie mehr als eine Rechnung im
+Speicher:
+    
+    lade_rechnungen()  - nur die Auftragsordner, die laut Rechnungsindex im
+                         Zeitraum eine Rechnung oder Zahlung haben
+    buchungen()        - Erlösbuchungen je Steuersatz, Zahlungsbuchungen
+    datev_zeilen()     - Kopfzeile, Spaltenüberschriften, Buchungszeilen
+
+Die Konten stehen im Abschnitt 'datev' der Konfiguration (Voreinstellung SKR03
+mit Automatik-Erlöskonten, Sammeldebitor 10000). Stornierte Rechnungen werden
+nicht exportiert.
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from model.rechnung import steueranteile as rechnung_steueranteile
+
+# Voreinstellung, falls die Konfiguration keinen Abschnitt 'datev' enthält
+STANDARD_KONTEN = {
+    "beraternummer": 0,
+    "mandantennummer": 0,
+    "wj_beginn": 1,  # Monat, in dem das Wirtschaftsjahr beginnt
+    "sachkontenlaenge": 4,
+    "debitorenkonto": 10000,
+    "debitoren": {},  # Kunden-ID -> Personenkonto (sonst debitorenkonto)
+    "erloeskonten": {"19": 8400, "7": 8300, "0": 8120},
+    "bankkonto": 1200,
+    "diktatkuerzel": "",
+}
+EXPORT_ORDNER = "DATEV"
+KODIERUNG = "cp1252"
+CENT = Decimal("0.01")
+
+# Erste Spalten des Buchungsstapels (Formatversion 13); weitere Spalten sind optional
+SPALTEN = ["Umsatz (ohne Soll/Haben-Kz)", "Soll/Haben-Kennzeichen", "WKZ Umsatz", "Kurs", "Basis-Umsatz",
+           "WKZ Basis-Umsatz", "Konto", "Gegenkonto (ohne BU-Schlüssel)", "BU-Schlüssel", "Belegdatum",
+           "Belegfeld 1", "Belegfeld 2", "Skonto", "Buchungstext"]
+
+
+class Buchung(NamedTuple):
+    """Eine Zeile des Buchungsstapels"""
+    betrag: Decimal  # Immer positiv, Richtung über soll_haben
+    soll_haben: str
+    konto: int
+    gegenkonto: int
+    datum: date
+    belegfeld: str
+    text: str
+
+
+def lade_konten(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Gibt die DATEV-Einstellungen der Konfiguration zurück (mit Standardwerten ergänzt)"""
+    return {**STANDARD_KONTEN, **config.get("datev", {})}
+
+
+def _datum(wert) -> date:
+    if isinstance(wert, datetime):
+        return wert.date()
+    if isinstance(wert, date):
+        return wert
+    return datetime.fromisoformat(wert).date()
+
+
+def _betrag(wert) -> Decimal:
+    return Decimal(str(wert or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def wirtschaftsjahr(tag: date, wj_beginn: int) -> Tuple[date, date]:
+    """Beginn und Ende des Wirtschaftsjahres, in dem tag liegt"""
+    jahr = tag.year if tag.month >= wj_beginn else tag.year - 1
+    beginn = date(jahr, wj_beginn, 1)
+    ende = date(jahr + 1, wj_beginn, 1) - timedelta(days=1)
+    return beginn, ende
+
+
+def steueranteile(rechnung: Dict[str, Any]) -> Dict[Decimal, Tuple[Decimal, Decimal]]:
+    """
+    Netto und Steuer einer Rechnung je Steuersatz
+    
+    Positionen ohne eigenen Satz ('mwst_satz') haben den Satz der Rechnung.
+    Gerundet wird wie beim Rechnungsbetrag (model.rechnung.steueranteile).
+    """
+    satz_rechnung = rechnung.get("mwst_satz", 19)
+    
+    def positionen():
+        for position in rechnung.get("positionen", []):
+            gesamt = position.get("gesamtpreis")
+            if gesamt is None:
+                gesamt = position.get("menge", 0) * position.get("einzelpreis", 0)
+            yield position.get("mwst_satz", satz_rechnung), gesamt
+    
+    return rechnung_steueranteile(positionen())
+
+
+def lade_rechnungen(adapter, von: date, bis: date) -> Iterator[Dict[str, Any]]:
+    """Rechnungen der Aufträge, die im Zeitraum eine Rechnung oder Zahlung haben"""
+    for auftragsnummer in adapter.get_rechnungsindex().auftraege_im_zeitraum(von, bis):
+        yield from adapter.lade_rechnungen_fuer_auftrag(auftragsnummer)
+
+
+def _kundenname(kunde: Dict[str, Any]) -> str:
+    return kunde.get("firma") or f"{kunde.get('vorname', '')} {kunde.get('name', '')}".strip()
+
+
+def buchungen(rechnungen: Iterable[Dict[str, Any]], von: date, bis: date, konten: Dict[str, Any],
+              kunden: Dict[str, str], mit_zahlungen: bool = True) -> Iterator[Buchung]:
+    """
+    Erlös- und Zahlungsbuchungen der Rechnungen im Zeitraum
+    
+    Args:
+        rechnungen: Rechnungen (Dictionaries wie in rechnungen.json)
+        von, bis: Zeitraum (jeweils einschließlich)
+        konten: DATEV-Einstellungen aus lade_konten()
+        kunden: Kunden-ID -> Name (für den Buchungstext)
+        mit_zahlungen: Zahlungseingänge ('zahlungen' der Rechnungen) mit exportieren
+    """
+    erloeskonten = {Decimal(str(satz)): konto for satz, konto in konten["erloeskonten"].items()}
+    for rechnung in rechnungen:
+        if rechnung.get("status") == "Storniert":
+            continue
+        debitor = int(konten["debitoren"].get(rechnung["kunde_id"], konten["debitorenkonto"]))
+        nummer = rechnung.get("rechnungsnummer", "")
+        name = kunden.get(rechnung["kunde_id"], "")
+        
+        rechnungsdatum = _datum(rechnung["rechnungsdatum"])
+        if von <= rechnungsdatum <= bis:
+            for satz, (netto, steuer) in sorted(steueranteile(rechnung).items(), reverse=True):
+                brutto = netto + steuer
+                if not brutto:
+                    continue
+                if satz not in erloeskonten:
+                    raise ValueError(f"Kein Erlöskonto für {satz:g} % (Rechnung {nummer}), "
+                                     f"bitte unter 'datev' → 'erloeskonten' eintragen")
+                yield Buchung(abs(brutto), "S" if brutto > 0 else "H", debitor, int(erloeskonten[satz]),
+                              rechnungsdatum, nummer, f"{name} {nummer}")
+        
+        if mit_zahlungen:
+            for zahlung in rechnung.get("zahlungen", []):
+                zahlungsdatum = _datum(zahlung["datum"])
+                betrag = _betrag(zahlung.get("betrag"))
+                if von <= zahlungsdatum <= bis and betrag:
+                    yield Buchung(abs(betrag), "S" if betrag > 0 else "H", int(konten["bankkonto"]), debitor,
+                                  zahlungsdatum, nummer, f"Zahlung {name} {nummer}")
+
+
+def _text(wert: str, laenge: int) -> str:
+    return '"' + wert[:laenge].replace('"', '""') + '"'
+
+
+def _zahl(wert: Decimal) -> str:
+    return str(wert).replace(".", ",")
+
+
+def datev_zeilen(buchungen: Iterable[Buchung], von: date, bis: date, konten: Dict[str, Any],
+                 bezeichnung: str = "Rechnungsausgang") -> Iterator[str]:
+    """Zeilen der EXTF-Datei (Kopf, Spaltenüberschriften, je Buchung eine Zeile)"""
+    wj_beginn, wj_ende = wirtschaftsjahr(von, int(konten["wj_beginn"]))
+    if bis > wj_ende:
+        raise ValueError("Ein Buchungsstapel darf nur ein Wirtschaftsjahr umfassen "
+                         f"(bis {wj_ende.strftime('%d.%m.%Y')})")
+    kopf = ['"EXTF"', "700", "21", '"Buchungsstapel"', "13", datetime.now().strftime("%Y%m%d%H%M%S%f")[:17],
+            "", '"RE"', '""', '""', str(konten["beraternummer"]), str(konten["mandantennummer"]),
+            wj_beginn.strftime("%Y%m%d"), str(konten["sachkontenlaenge"]),
+            von.strftime("%Y%m%d"), bis.strftime("%Y%m%d"), _text(bezeichnung, 30),
+            _text(konten["diktatkuerzel"], 2), "1", "0", "0", '"EUR"', "", '""', "", "", '""', "", "", '""', '""']
+    yield ";".join(kopf)
+    yield ";".join(_text(spalte, 60) for spalte in SPALTEN)
+    for b in buchungen:
+        yield ";".join([_zahl(b.betrag), _text(b.soll_haben, 1), '"EUR"', "", "", '""', str(b.konto),
+                        str(b.gegenkonto), '""', b.datum.strftime("%d%m"), _text(b.belegfeld, 36), '""', "",
+                        _text(b.text, 60)])
+
+
+def exportiere(adapter, ziel: str, von: date, bis: date, mit_zahlungen: bool = True) -> Dict[str, Any]:
+    """
+    Schreibt den Buchungsstapel eines Zeitraums
+    
+    Args:
+        adapter: DatenAdapter (es werden nur die betroffenen Auftragsordner gelesen)
+        ziel: Pfad der CSV-Datei (wird erst nach vollständigem Schreiben ersetzt)
+        von, bis: Zeitraum (jeweils einschließlich, höchstens ein Wirtschaftsjahr)
+        mit_zahlungen: Zahlungseingänge mit exportieren
+    
+    Returns:
+        {'buchungen', 'erloese', 'zahlungen', 'datei'} (Beträge als Decimal)
+    """
+    konten = lade_konten(adapter.get_config())
+    kunden = {k["id"]: _kundenname(k) for k in adapter.lade_kunden()}
+    ergebnis = {"buchungen": 0, "erloese": Decimal(0), "zahlungen": Decimal(0), "datei": ziel}
+    
+    def zaehle(quelle: Iterable[Buchung]) -> Iterator[Buchung]:
+        for b in quelle:
+            ergebnis["buchungen"] += 1
+            vorzeichen = 1 if b.soll_haben == "S" else -1
+            ergebnis["zahlungen" if b.konto == int(konten["bankkonto"]) else "erloese"] += vorzeichen * b.betrag
+            yield b
+    
+    kette = zaehle(buchungen(lade_rechnungen(adapter, von, bis), von, bis, konten, kunden, mit_zahlungen))
+    os.makedirs(os.path.dirname(os.path.abspath(ziel)), exist_ok=True)
+    temp_pfad = f"{ziel}.{os.getpid()}.tmp"
+    try:
+        with open(temp_pfad, "w", encoding=KODIERUNG, errors="replace", newline="") as f:
+            for zeile in datev_zeilen(kette, von, bis, konten):
+                f.write(zeile + "\r\n")
+        os.replace(temp_pfad, ziel)
+    finally:
+        if os.path.exists(temp_pfad):
+            os.remove(temp_pfad)
+    return ergebnis
+
+
+def standard_ziel(adapter, von: date, bis: date) -> str:
+    """Dateiname im Datenverzeichnis (<Datenordner>/DATEV/EXTF_Buchungsstapel_<von>_<bis>.csv)"""
+    return os.path.join(adapter.get_daten_pfad(), EXPORT_ORDNER,
+                        f"EXTF_Buchungsstapel_{von:%Y%m%d}_{bis:%Y%m%d}.csv")
+
+
+def vormonat(heute: Optional[date] = None) -> Tuple[date, date]:
+    """Erster und letzter Tag des Vormonats"""
+    erster = (heute or date.today()).replace(day=1)
+    ende = erster - timedelta(days=1)
+    return ende.replace(day=1), ende
+
+
+def zusammenfassung(ergebnis: Dict[str, Any]) -> str:
+    """Text für Meldungen und Konsolenausgabe"""
+    return (f"{ergebnis['buchungen']} Buchungen exportiert\n"
+            f"Erlöse (brutto): {ergebnis['erloese']:.2f} €\n"
+            f"Zahlungseingänge: {ergebnis['zahlungen']:.2f} €\n"
+            f"Datei: {ergebnis['datei']}")
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rechnungen und Zahlungen als DATEV-Buchungsstapel exportieren "
+                                                 "(ohne Angabe: Vormonat)")
+    parser.add_argument("--config", default="config/config.json", help="Pfad der Konfiguration")
+    parser.add_argument("--monat", help="Monat (JJJJ-MM)")
+    parser.add_argument("--von", type=date.fromisoformat, help="Erster Tag (JJJJ-MM-TT)")
+    parser.add_argument("--bis", type=date.fromisoformat, help="Letzter Tag (JJJJ-MM-TT)")
+    parser.add_argument("--ausgabe", help="Zieldatei (Standard: im Datenverzeichnis unter DATEV)")
+    parser.add_argument("--ohne-zahlungen", action="store_true", help="Nur Rechnungsausgang exportieren")
+    args = parser.parse_args(argumente)
+    
+    if args.monat:
+        von = date.fromisoformat(args.monat + "-01")
+        bis = vormonat((von + timedelta(days=32)).replace(day=1))[1]
+    elif args.von or args.bis:
+        if not (args.von and args.bis):
+            parser.error("--von und --bis gehören zusammen")
+        von, bis = args.von, args.bis
+    else:
+        von, bis = vormonat()
+    if bis < von:
+        parser.error("--bis liegt vor --von")
+    
+    from adapter.datenadapter import DatenAdapter
+    adapter = DatenAdapter(args.config)
+    try:
+        ergebnis = exportiere(adapter, args.ausgabe or standard_ziel(adapter, von, bis), von, bis,
+                              mit_zahlungen=not args.ohne_zahlungen)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    print(zusammenfassung(ergebnis))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,582 @@
+"""
+Export von E-Rechnungen nach EN 16931 (XRechnung, ZUGFeRD/Factur-X)
+
+Erzeugt aus Rechnung.to_dict(), Kunde.to_dict() und den Unternehmensdaten der
+Konfiguration eine strukturierte Rechnung in einer der beiden zulässigen
+Syntaxen: UN/CEFACT CII ("cii") oder OASIS UBL 2.1 ("ubl"). Die XML-Dateien
+werden mit einem inkrementellen Writer direkt in die Datei geschrieben (kein
+DOM), der Speicherbedarf hängt daher nicht von der Anzahl der Positionen ab.
+In CII folgen die Summen auf die Positionen und werden beim Schreiben
+aufaddiert; UBL verlangt die Summen vorher und liest die Positionen zweimal.
+
+Das Einbetten in ein PDF (ZUGFeRD) übernimmt adapter/zugferd.py.
+"""
+import io
+import os
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from xml.sax.saxutils import XMLGenerator
+
+from model.rechnung import auf_cent
+
+
+SYNTAXEN = ("cii", "ubl")
+PROFILE = ("xrechnung", "en16931")
+
+# BT-24 Spezifikationskennung je Profil
+SPEZIFIKATION = {
+    "xrechnung": "urn:cen.eu:en16931:2017#compliant#urn:xeinkauf.de:kosit:xrechnung_3.0",
+    "en16931": "urn:cen.eu:en16931:2017",
+}
+# BT-23 Geschäftsprozess (von XRechnung empfohlen)
+GESCHAEFTSPROZESS = "urn:fdc:peppol.eu:2017:poacc:billing:01:1.0"
+
+NAMENSRAEUME = {
+    "cii": {
+        "rsm": "urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100",
+        "ram": "urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100",
+        "udt": "urn:un:unece:uncefact:data:standard:UnqualifiedDataType:100",
+        "qdt": "urn:un:unece:uncefact:data:standard:QualifiedDataType:100",
+    },
+    "ubl": {
+        "": "urn:oasis:names:specification:ubl:schema:xsd:Invoice-2",
+        "cac": "urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2",
+        "cbc": "urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2",
+    },
+}
+
+WAEHRUNG = "EUR"
+RECHNUNG_TYP = "380"  # UNTDID 1001: Handelsrechnung
+
+# Einheiten der Positionen -> UN/ECE Recommendation 20
+EINHEITEN = {
+    "stk": "H87", "stück": "H87", "st": "H87",
+    "h": "HUR", "std": "HUR", "std.": "HUR", "stunde": "HUR", "stunden": "HUR",
+    "tag": "DAY", "tage": "DAY",
+    "m": "MTR", "lfm": "MTR", "km": "KMT",
+    "m²": "MTK", "m2": "MTK", "qm": "MTK",
+    "m³": "MTQ", "m3": "MTQ", "cbm": "MTQ",
+    "kg": "KGM", "t": "TNE", "l": "LTR",
+    "psch": "LS", "pauschal": "LS", "pausch.": "LS",
+}
+EINHEIT_STANDARD = "C62"  # "Eins"
+
+# Zahlungsart -> UNTDID 4461
+ZAHLUNGSARTEN = {"Überweisung": "58", "Bar": "10", "Scheck": "20", "Lastschrift": "59"}
+ZAHLUNGSART_STANDARD = "1"  # nicht festgelegt
+
+CENT = Decimal("0.01")
+
+
+class XmlSchreiber:
+    """
+    Inkrementeller XML-Writer auf Basis von XMLGenerator
+    
+    Elemente werden sofort in den Ausgabestrom geschrieben; es wird nur der
+    Pfad der offenen Elemente gehalten. Leere Felder lässt feld() aus.
+    """
+    
+    EINRUECKUNG = "  "
+    
+    def __init__(self, ausgabe: BinaryIO):
+        self._xml = XMLGenerator(ausgabe, encoding="utf-8", short_empty_elements=True)
+        self._offen: List[str] = []
+        self._hat_kinder = False
+    
+    def beginne_dokument(self):
+        self._xml.startDocument()
+    
+    def beende_dokument(self):
+        self._xml.ignorableWhitespace("\n")
+        self._xml.endDocument()
+    
+    def oeffne(self, name: str, attribute: Optional[Dict[str, str]] = None):
+        if self._offen:
+            self._xml.ignorableWhitespace("\n" + self.EINRUECKUNG * len(self._offen))
+        self._xml.startElement(name, attribute or {})
+        self._offen.append(name)
+        self._hat_kinder = False
+    
+    def schliesse(self):
+        name = self._offen.pop()
+        if self._hat_kinder:
+            self._xml.ignorableWhitespace("\n" + self.EINRUECKUNG * len(self._offen))
+        self._xml.endElement(name)
+        self._hat_kinder = True
+    
+    def feld(self, name: str, text: Any, attribute: Optional[Dict[str, str]] = None):
+        """Schreibt ein Element mit Text (nichts bei None oder leerem Text)"""
+        if text is None or text == "":
+            return
+        self._xml.ignorableWhitespace("\n" + self.EINRUECKUNG * len(self._offen))
+        self._xml.startElement(name, attribute or {})
+        self._xml.characters(str(text))
+        self._xml.endElement(name)
+        self._hat_kinder = True
+    
+    def element(self, name: str, attribute: Optional[Dict[str, str]] = None) -> "_Element":
+        """Kontextmanager: with schreiber.element('ram:X'): ..."""
+        return _Element(self, name, attribute)
+
+
+class _Element:
+    def __init__(self, schreiber: XmlSchreiber, name: str, attribute: Optional[Dict[str, str]]):
+        self.schreiber = schreiber
+        self.name = name
+        self.attribute = attribute
+    
+    def __enter__(self):
+        self.schreiber.oeffne(self.name, self.attribute)
+        return self.schreiber
+    
+    def __exit__(self, *_):
+        self.schreiber.schliesse()
+
+
+def _dezimal(wert: Any) -> Decimal:
+    """Wandelt einen Betrag (float aus to_dict) ohne Binärrundungsfehler in Decimal"""
+    return Decimal(str(wert or 0))
+
+
+def _betrag(wert: Decimal) -> str:
+    return str(wert.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _zahl(wert: Decimal) -> str:
+    """Menge, Preis oder Prozentsatz ohne überflüssige Nachkommastellen (höchstens 4)"""
+    text = f"{wert.quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP):f}"
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+def _datum(iso: str) -> datetime:
+    return datetime.fromisoformat(iso)
+
+
+def einheit_code(einheit: str) -> str:
+    """Gibt den UN/ECE-Code einer Mengeneinheit zurück (C62, wenn unbekannt)"""
+    return EINHEITEN.get((einheit or "").strip().lower(), EINHEIT_STANDARD)
+
+
+def _zeilen(rechnung: Dict[str, Any]) -> Iterator[Tuple[int, str, Decimal, str, Decimal, Decimal]]:
+    """Liefert die Positionen als (Nr, Bezeichnung, Menge, Einheit, Einzelpreis, Nettobetrag)"""
+    for nr, pos in enumerate(rechnung.get("positionen", []), 1):
+        bezeichnung = pos.get("beschreibung") or pos.get("bezeichnung") or f"Position {nr}"
+        yield (nr, bezeichnung, _dezimal(pos.get("menge")), einheit_code(pos.get("einheit", "")),
+               _dezimal(pos.get("einzelpreis")), auf_cent(pos.get("gesamtpreis")))
+
+
+def _summen(netto: Decimal, satz: Decimal) -> Tuple[Decimal, Decimal]:
+    """Gibt (Steuerbetrag, Bruttobetrag) zur Summe der Positionsbeträge zurück (Rundung wie model.rechnung.steueranteile)"""
+    steuer = auf_cent(netto * satz / 100)
+    return steuer, netto + steuer
+
+
+def _steuerkategorie(satz: Decimal) -> str:
+    """UNTDID 5305: S (Normalsatz/ermäßigt) oder E (steuerbefreit)"""
+    return "S" if satz > 0 else "E"
+
+
+def _kunde_name(kunde: Dict[str, Any]) -> str:
+    if kunde.get("firma"):
+        return kunde["firma"]
+    return f"{kunde.get('vorname', '')} {kunde.get('name', '')}".strip()
+
+
+def _iban(text: str) -> str:
+    return (text or "").replace(" ", "").upper()
+
+
+def pruefe_pflichtangaben(rechnung: Dict[str, Any], kunde: Dict[str, Any], config: Dict[str, Any],
+                          profil: str = "xrechnung") -> List[str]:
+    """
+    Prüft Angaben, die EN 16931 bzw. XRechnung verlangen, aber in den Stammdaten fehlen können
+    
+    Returns:
+        Hinweise (leer, wenn alle Angaben vorhanden sind). Die Rechnung wird trotzdem exportiert.
+    """
+    unternehmen = config.get("unternehmen", {})
+    hinweise = []
+    if not unternehmen.get("ust_id") and not unternehmen.get("steuernummer"):
+        hinweise.append("USt-IdNr. oder Steuernummer des Unternehmens fehlt (BR-CO-26)")
+    for feld, text in (("name", "Name"), ("strasse", "Straße"), ("plz", "PLZ"), ("ort", "Ort")):
+        if not unternehmen.get(feld):
+            hinweise.append(f"{text} des Unternehmens fehlt")
+    if not _kunde_name(kunde):
+        hinweise.append("Name des Kunden fehlt (BT-44)")
+    if not rechnung.get("positionen"):
+        hinweise.append("Rechnung hat keine Positionen (BG-25)")
+    if ZAHLUNGSARTEN.get(rechnung.get("zahlungsart")) == "58" and not unternehmen.get("iban"):
+        hinweise.append("IBAN für Überweisung fehlt (BT-84)")
+    if profil == "xrechnung":
+        if not unternehmen.get("email"):
+            hinweise.append("E-Mail des Unternehmens fehlt (elektronische Adresse BT-34)")
+        if not kunde.get("email"):
+            hinweise.append("E-Mail des Kunden fehlt (elektronische Adresse BT-49)")
+        if not (unternehmen.get("telefon") and unternehmen.get("email")):
+            hinweise.append("Telefon und E-Mail des Verkäuferkontakts fehlen (BR-DE-5/-6/-7)")
+    return hinweise
+
+
+def _zahlungstext(rechnung: Dict[str, Any]) -> str:
+    return f"Zahlbar bis {_datum(rechnung['faelligkeitsdatum']).strftime('%d.%m.%Y')} ohne Abzug"
+
+
+def _schreibe_cii(s: XmlSchreiber, rechnung: Dict[str, Any], kunde: Dict[str, Any], config: Dict[str, Any],
+                  profil: str):
+    """Schreibt eine CrossIndustryInvoice (CII D16B) in einem Durchlauf über die Positionen"""
+    unternehmen = config.get("unternehmen", {})
+    rechnung_config = config.get("rechnung", {})
+    satz = _dezimal(rechnung.get("mwst_satz"))
+    kategorie = _steuerkategorie(satz)
+    
+    def datum(name: str, iso: str):
+        with s.element(name):
+            s.feld("udt:DateTimeString", _datum(iso).strftime("%Y%m%d"), {"format": "102"})
+    
+    attribute = {f"xmlns:{p}": uri for p, uri in NAMENSRAEUME["cii"].items()}
+    with s.element("rsm:CrossIndustryInvoice", attribute):
+        with s.element("rsm:ExchangedDocumentContext"):
+            if profil == "xrechnung":
+                with s.element("ram:BusinessProcessSpecifiedDocumentContextParameter"):
+                    s.feld("ram:ID", GESCHAEFTSPROZESS)
+            with s.element("ram:GuidelineSpecifiedDocumentContextParameter"):
+                s.feld("ram:ID", SPEZIFIKATION[profil])
+        
+        with s.element("rsm:ExchangedDocument"):
+            s.feld("ram:ID", rechnung["rechnungsnummer"])
+            s.feld("ram:TypeCode", RECHNUNG_TYP)
+            datum("ram:IssueDateTime", rechnung["rechnungsdatum"])
+            if rechnung.get("notizen"):
+                with s.element("ram:IncludedNote"):
+                    s.feld("ram:Content", rechnung["notizen"])
+        
+        with s.element("rsm:SupplyChainTradeTransaction"):
+            netto = Decimal(0)
+            for nr, bezeichnung, menge, einheit, preis, betrag in _zeilen(rechnung):
+                netto += betrag
+                with s.element("ram:IncludedSupplyChainTradeLineItem"):
+                    with s.element("ram:AssociatedDocumentLineDocument"):
+                        s.feld("ram:LineID", nr)
+                    with s.element("ram:SpecifiedTradeProduct"):
+                        s.feld("ram:Name", bezeichnung)
+                    with s.element("ram:SpecifiedLineTradeAgreement"):
+                        with s.element("ram:NetPriceProductTradePrice"):
+                            s.feld("ram:ChargeAmount", _zahl(preis))
+                    with s.element("ram:SpecifiedLineTradeDelivery"):
+                        s.feld("ram:BilledQuantity", _zahl(menge), {"unitCode": einheit})
+                    with s.element("ram:SpecifiedLineTradeSettlement"):
+                        with s.element("ram:ApplicableTradeTax"):
+                            s.feld("ram:TypeCode", "VAT")
+                            s.feld("ram:CategoryCode", kategorie)
+                            s.feld("ram:RateApplicablePercent", _zahl(satz))
+                        with s.element("ram:SpecifiedTradeSettlementLineMonetarySummation"):
+                            s.feld("ram:LineTotalAmount", _betrag(betrag))
+            
+            with s.element("ram:ApplicableHeaderTradeAgreement"):
+                s.feld("ram:BuyerReference", rechnung.get("auftragsnummer") or kunde.get("id"))
+                with s.element("ram:SellerTradeParty"):
+                    s.feld("ram:Name", unternehmen.get("name"))
+                    if unternehmen.get("telefon") or unternehmen.get("email"):
+                        with s.element("ram:DefinedTradeContact"):
+                            s.feld("ram:PersonName", unternehmen.get("name"))
+                            if unternehmen.get("telefon"):
+                                with s.element("ram:TelephoneUniversalCommunication"):
+                                    s.feld("ram:CompleteNumber", unternehmen["telefon"])
+                            if unternehmen.get("email"):
+                                with s.element("ram:EmailURIUniversalCommunication"):
+                                    s.feld("ram:URIID", unternehmen["email"])
+                    _cii_adresse(s, unternehmen)
+                    if unternehmen.get("email"):
+                        with s.element("ram:URIUniversalCommunication"):
+                            s.feld("ram:URIID", unternehmen["email"], {"schemeID": "EM"})
+                    for schema, nummer in (("FC", unternehmen.get("steuernummer")), ("VA", unternehmen.get("ust_id"))):
+                        if nummer:
+                            with s.element("ram:SpecifiedTaxRegistration"):
+                                s.feld("ram:ID", nummer, {"schemeID": schema})
+                with s.element("ram:BuyerTradeParty"):
+                    s.feld("ram:ID", kunde.get("id"))
+                    s.feld("ram:Name", _kunde_name(kunde))
+                    _cii_adresse(s, kunde)
+                    if kunde.get("email"):
+                        with s.element("ram:URIUniversalCommunication"):
+                            s.feld("ram:URIID", kunde["email"], {"schemeID": "EM"})
+                    if kunde.get("ust_id"):
+                        with s.element("ram:SpecifiedTaxRegistration"):
+                            s.feld("ram:ID", kunde["ust_id"], {"schemeID": "VA"})
+            
+            with s.element("ram:ApplicableHeaderTradeDelivery"):
+                with s.element("ram:ActualDeliverySupplyChainEvent"):
+                    datum("ram:OccurrenceDateTime", rechnung["leistungsdatum"])
+            
+            steuer, brutto = _summen(netto, satz)
+            with s.element("ram:ApplicableHeaderTradeSettlement"):
+                s.feld("ram:PaymentReference", rechnung["rechnungsnummer"])
+                s.feld("ram:InvoiceCurrencyCode", WAEHRUNG)
+                zahlungsart = ZAHLUNGSARTEN.get(rechnung.get("zahlungsart"), ZAHLUNGSART_STANDARD)
+                with s.element("ram:SpecifiedTradeSettlementPaymentMeans"):
+                    s.feld("ram:TypeCode", zahlungsart)
+                    if zahlungsart == "58" and unternehmen.get("iban"):
+                        with s.element("ram:PayeePartyCreditorFinancialAccount"):
+                            s.feld("ram:IBANID", _iban(unternehmen["iban"]))
+                            s.feld("ram:AccountName", unternehmen.get("name"))
+                        if unternehmen.get("bic"):
+                            with s.element("ram:PayeeSpecifiedCreditorFinancialInstitution"):
+                                s.feld("ram:BICID", unternehmen["bic"])
+                with s.element("ram:ApplicableTradeTax"):
+                    s.feld("ram:CalculatedAmount", _betrag(steuer))
+                    s.feld("ram:TypeCode", "VAT")
+                    if kategorie == "E":
+                        s.feld("ram:ExemptionReason", rechnung_config.get("steuerbefreiung_grund", "Steuerbefreit"))
+                    s.feld("ram:BasisAmount", _betrag(netto))
+                    s.feld("ram:CategoryCode", kategorie)
+                    s.feld("ram:RateApplicablePercent", _zahl(satz))
+                with s.element("ram:SpecifiedTradePaymentTerms"):
+                    s.feld("ram:Description", _zahlungstext(rechnung))
+                    datum("ram:DueDateDateTime", rechnung["faelligkeitsdatum"])
+                with s.element("ram:SpecifiedTradeSettlementHeaderMonetarySummation"):
+                    s.feld("ram:LineTotalAmount", _betrag(netto))
+                    s.feld("ram:TaxBasisTotalAmount", _betrag(netto))
+                    s.feld("ram:TaxTotalAmount", _betrag(steuer), {"currencyID": WAEHRUNG})
+                    s.feld("ram:GrandTotalAmount", _betrag(brutto))
+                    s.feld("ram:DuePayableAmount", _betrag(brutto))
+
+
+def _cii_adresse(s: XmlSchreiber, daten: Dict[str, Any]):
+    with s.element("ram:PostalTradeAddress"):
+        s.feld("ram:PostcodeCode", daten.get("plz"))
+        s.feld("ram:LineOne", daten.get("strasse"))
+        s.feld("ram:CityName", daten.get("ort"))
+        s.feld("ram:CountryID", daten.get("land") or "DE")
+
+
+def _schreibe_ubl(s: XmlSchreiber, rechnung: Dict[str, Any], kunde: Dict[str, Any], config: Dict[str, Any],
+                  profil: str):
+    """Schreibt eine UBL-Invoice; die Summen stehen vor den Positionen (zwei Durchläufe)"""
+    unternehmen = config.get("unternehmen", {})
+    rechnung_config = config.get("rechnung", {})
+    satz = _dezimal(rechnung.get("mwst_satz"))
+    kategorie = _steuerkategorie(satz)
+    netto = sum((zeile[5] for zeile in _zeilen(rechnung)), Decimal(0))
+    steuer, brutto = _summen(netto, satz)
+    waehrung = {"currencyID": WAEHRUNG}
+    
+    def steuerkategorie(name: str, mit_grund: bool):
+        with s.element(name):
+            s.feld("cbc:ID", kategorie)
+            s.feld("cbc:Percent", _zahl(satz))
+            if mit_grund and kategorie == "E":
+                s.feld("cbc:TaxExemptionReason", rechnung_config.get("steuerbefreiung_grund", "Steuerbefreit"))
+            with s.element("cac:TaxScheme"):
+                s.feld("cbc:ID", "VAT")
+    
+    attribute = {("xmlns:" + p if p else "xmlns"): uri for p, uri in NAMENSRAEUME["ubl"].items()}
+    with s.element("Invoice", attribute):
+        s.feld("cbc:CustomizationID", SPEZIFIKATION[profil])
+        if profil == "xrechnung":
+            s.feld("cbc:ProfileID", GESCHAEFTSPROZESS)
+        s.feld("cbc:ID", rechnung["rechnungsnummer"])
+        s.feld("cbc:IssueDate", _datum(rechnung["rechnungsdatum"]).date().isoformat())
+        s.feld("cbc:DueDate", _datum(rechnung["faelligkeitsdatum"]).date().isoformat())
+        s.feld("cbc:InvoiceTypeCode", RECHNUNG_TYP)
+        s.feld("cbc:Note", rechnung.get("notizen"))
+        s.feld("cbc:DocumentCurrencyCode", WAEHRUNG)
+        s.feld("cbc:BuyerReference", rechnung.get("auftragsnummer") or kunde.get("id"))
+        
+        with s.element("cac:AccountingSupplierParty"):
+            with s.element("cac:Party"):
+                s.feld("cbc:EndpointID", unternehmen.get("email"), {"schemeID": "EM"})
+                _ubl_adresse(s, unternehmen)
+                for nummer, schema in ((unternehmen.get("ust_id"), "VAT"), (unternehmen.get("steuernummer"), "FC")):
+                    if nummer:
+                        with s.element("cac:PartyTaxScheme"):
+                            s.feld("cbc:CompanyID", nummer)
+                            with s.element("cac:TaxScheme"):
+                                s.feld("cbc:ID", schema)
+                with s.element("cac:PartyLegalEntity"):
+                    s.feld("cbc:RegistrationName", unternehmen.get("name"))
+                if unternehmen.get("telefon") or unternehmen.get("email"):
+                    with s.element("cac:Contact"):
+                        s.feld("cbc:Name", unternehmen.get("name"))
+                        s.feld("cbc:Telephone", unternehmen.get("telefon"))
+                        s.feld("cbc:ElectronicMail", unternehmen.get("email"))
+        
+        with s.element("cac:AccountingCustomerParty"):
+            with s.element("cac:Party"):
+                s.feld("cbc:EndpointID", kunde.get("email"), {"schemeID": "EM"})
+                if kunde.get("id"):
+                    with s.element("cac:PartyIdentification"):
+                        s.feld("cbc:ID", kunde["id"])
+                _ubl_adresse(s, kunde)
+                if kunde.get("ust_id"):
+                    with s.element("cac:PartyTaxScheme"):
+                        s.feld("cbc:CompanyID", kunde["ust_id"])
+                        with s.element("cac:TaxScheme"):
+                            s.feld("cbc:ID", "VAT")
+                with s.element("cac:PartyLegalEntity"):
+                    s.feld("cbc:RegistrationName", _kunde_name(kunde))
+        
+        with s.element("cac:Delivery"):
+            s.feld("cbc:ActualDeliveryDate", _datum(rechnung["leistungsdatum"]).date().isoformat())
+        
+        zahlungsart = ZAHLUNGSARTEN.get(rechnung.get("zahlungsart"), ZAHLUNGSART_STANDARD)
+        with s.element("cac:PaymentMeans"):
+            s.feld("cbc:PaymentMeansCode", zahlungsart)
+            s.feld("cbc:PaymentID", rechnung["rechnungsnummer"])
+            if zahlungsart == "58" and unternehmen.get("iban"):
+                with s.element("cac:PayeeFinancialAccount"):
+                    s.feld("cbc:ID", _iban(unternehmen["iban"]))
+                    s.feld("cbc:Name", unternehmen.get("name"))
+                    if unternehmen.get("bic"):
+                        with s.element("cac:FinancialInstitutionBranch"):
+                            s.feld("cbc:ID", unternehmen["bic"])
+        with s.element("cac:PaymentTerms"):
+            s.feld("cbc:Note", _zahlungstext(rechnung))
+        
+        with s.element("cac:TaxTotal"):
+            s.feld("cbc:TaxAmount", _betrag(steuer), waehrung)
+            with s.element("cac:TaxSubtotal"):
+                s.feld("cbc:TaxableAmount", _betrag(netto), waehrung)
+                s.feld("cbc:TaxAmount", _betrag(steuer), waehrung)
+                steuerkategorie("cac:TaxCategory", True)
+        with s.element("cac:LegalMonetaryTotal"):
+            s.feld("cbc:LineExtensionAmount", _betrag(netto), waehrung)
+            s.feld("cbc:TaxExclusiveAmount", _betrag(netto), waehrung)
+            s.feld("cbc:TaxInclusiveAmount", _betrag(brutto), waehrung)
+            s.feld("cbc:PayableAmount", _betrag(brutto), waehrung)
+        
+        for nr, bezeichnung, menge, einheit, preis, betrag in _zeilen(rechnung):
+            with s.element("cac:InvoiceLine"):
+                s.feld("cbc:ID", nr)
+                s.feld("cbc:InvoicedQuantity", _zahl(menge), {"unitCode": einheit})
+                s.feld("cbc:LineExtensionAmount", _betrag(betrag), waehrung)
+                with s.element("cac:Item"):
+                    s.feld("cbc:Name", bezeichnung)
+                    steuerkategorie("cac:ClassifiedTaxCategory", False)
+                with s.element("cac:Price"):
+                    s.feld("cbc:PriceAmount", _zahl(preis), waehrung)
+
+
+def _ubl_adresse(s: XmlSchreiber, daten: Dict[str, Any]):
+    with s.element("cac:PostalAddress"):
+        s.feld("cbc:StreetName", daten.get("strasse"))
+        s.feld("cbc:CityName", daten.get("ort"))
+        s.feld("cbc:PostalZone", daten.get("plz"))
+        with s.element("cac:Country"):
+            s.feld("cbc:IdentificationCode", daten.get("land") or "DE")
+
+
+def schreibe_erechnung(ziel: Union[str, BinaryIO],
+                       rechnung: Dict[str, Any],
+                       kunde: Dict[str, Any],
+                       config: Dict[str, Any],
+                       syntax: str = "cii",
+                       profil: str = "xrechnung"):
+    """
+    Schreibt eine Rechnung als E-Rechnung (XML)
+    
+    Args:
+        ziel: Dateipfad oder binärer Ausgabestrom
+        rechnung: Rechnungsdaten (Dict aus Rechnung.to_dict(auftragsnummer=...))
+        kunde: Kundendaten (Dict aus Kunde.to_dict())
+        config: Konfiguration mit 'unternehmen' und 'rechnung'
+        syntax: "cii" oder "ubl"
+        profil: "xrechnung" (XRechnung 3.0) oder "en16931" (ZUGFeRD/Factur-X EN 16931)
+    """
+    if syntax not in SYNTAXEN:
+        raise ValueError(f"Unbekannte Syntax: {syntax}")
+    if profil not in PROFILE:
+        raise ValueError(f"Unbekanntes Profil: {profil}")
+    if isinstance(ziel, str):
+        # In eine temporäre Datei schreiben, damit abgebrochene Exporte keine halbe Datei hinterlassen
+        temp_pfad = f"{ziel}.{os.getpid()}.tmp"
+        try:
+            with open(temp_pfad, "wb") as f:
+                schreibe_erechnung(f, rechnung, kunde, config, syntax, profil)
+            os.replace(temp_pfad, ziel)
+        finally:
+            if os.path.exists(temp_pfad):
+                os.remove(temp_pfad)
+        return
+    
+    schreiber = XmlSchreiber(ziel)
+    schreiber.beginne_dokument()
+    if syntax == "cii":
+        _schreibe_cii(schreiber, rechnung, kunde, config, profil)
+    else:
+        _schreibe_ubl(schreiber, rechnung, kunde, config, profil)
+    schreiber.beende_dokument()
+
+
+def erechnung_bytes(rechnung: Dict[str, Any], kunde: Dict[str, Any], config: Dict[str, Any],
+                    syntax: str = "cii", profil: str = "en16931") -> bytes:
+    """Gibt die E-Rechnung als Bytes zurück (z.B. zum Einbetten in ein PDF)"""
+    puffer = io.BytesIO()
+    schreibe_erechnung(puffer, rechnung, kunde, config, syntax, profil)
+    return puffer.getvalue()
+
+
+def erechnung_pfad(pdf_pfad: str, syntax: str = "cii") -> str:
+    """Leitet den Ablageort der XML-Datei vom Rechnungs-PDF ab (XRechnung_<Nr>_<YYYYMMDD>_<syntax>.xml)"""
+    ordner, dateiname = os.path.split(pdf_pfad)
+    basis = os.path.splitext(dateiname)[0].replace("Rechnung_", "XRechnung_", 1)
+    return os.path.join(ordner, f"{basis}_{syntax}.xml")
+
+
+def exportiere_stapel(config: Dict[str, Any],
+                      stapel: List[Dict[str, Any]],
+                      ordner: Optional[str] = None,
+                      syntax: str = "cii",
+                      profil: str = "xrechnung",
+                      pruefen: bool = True,
+                      bei_fortschritt: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                      abgebrochen: Optional[Callable[[], bool]] = None) -> List[Dict[str, Any]]:
+    """
+    Exportiert viele Rechnungen nacheinander als E-Rechnung
+    
+    Jede Datei wird direkt geschrieben und (optional) anschließend streamend
+    gegen das mitgelieferte Teilschema geprüft; im Speicher liegt dabei
+    immer nur eine Rechnung.
+    
+    Args:
+        config: Konfiguration mit Unternehmensdaten
+        stapel: Aufträge aus pdf_stapel.erstelle_stapelauftraege()
+        ordner: Zielordner (None: neben dem Rechnungs-PDF im Auftragsordner)
+        syntax: "cii" oder "ubl"
+        profil: "xrechnung" oder "en16931"
+        pruefen: Erzeugte Dateien gegen das Teilschema prüfen
+        bei_fortschritt: Wird nach jeder Rechnung mit (fertig, gesamt, ergebnis) aufgerufen
+        abgebrochen: Liefert True, wenn der Export beendet werden soll
+    
+    Returns:
+        Ein Ergebnis je Rechnung (rechnung_id, rechnungsnummer, pfad, fehler, hinweise)
+    """
+    from adapter.erechnung_schema import pruefe
+    
+    ergebnisse = []
+    for eintrag in stapel:
+        if abgebrochen and abgebrochen():
+            break
+        ergebnis = {"rechnung_id": eintrag["rechnung_id"], "rechnungsnummer": eintrag["rechnungsnummer"],
+                    "pfad": None, "fehler": eintrag.get("fehler"), "hinweise": []}
+        if not ergebnis["fehler"]:
+            if ordner:
+                basis = os.path.basename(erechnung_pfad(eintrag["ausgabepfad"], syntax))
+                pfad = os.path.join(ordner, basis)
+            else:
+                pfad = erechnung_pfad(eintrag["ausgabepfad"], syntax)
+            try:
+                os.makedirs(os.path.dirname(pfad), exist_ok=True)
+                ergebnis["hinweise"] = pruefe_pflichtangaben(eintrag["rechnung"], eintrag["kunde"], config, profil)
+                schreibe_erechnung(pfad, eintrag["rechnung"], eintrag["kunde"], config, syntax, profil)
+                ergebnis["pfad"] = pfad
+                if pruefen:
+                    schemafehler = pruefe(pfad, syntax)
+                    if schemafehler:
+                        ergebnis["fehler"] = "Schemaprüfung: " + "; ".join(schemafehler[:3])
+            except Exception as e:
+                ergebnis["fehler"] = str(e) or e.__class__.__name__
+        ergebnisse.append(ergebnis)
+        if bei_fortschritt:
+            bei_fortschritt(len(ergebnisse), len(stapel), ergebnis)
+    return ergebnisse
@@ -0,0 +1,380 @@
+"""
+Mitgeliefertes Teilschema für E-Rechnungen und streamende Prüfung
+
+Die vollständigen XSDs von CII (D16B) und UBL 2.1 umfassen mehrere hundert
+Typen und bräuchten lxml oder xmlschema. Hier ist nur der Teil abgebildet,
+den adapter/erechnung.py erzeugt: Reihenfolge, Häufigkeit, Pflichtattribute
+und Datenformat jedes Elements. Die Prüfung liest die Datei mit iterparse
+und gibt jedes Element nach der Prüfung wieder frei, sie kommt also auch mit
+sehr großen Stapeldateien in konstantem Speicher aus.
+
+Ein Typ ist entweder eine Folge von Elementen (komplexer Typ) oder einer der
+einfachen Typen in EINFACHE_TYPEN.
+"""
+import re
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from adapter.erechnung import NAMENSRAEUME
+
+
+class E(NamedTuple):
+    """Element in einer Folge: Name (mit Präfix), Typ, Häufigkeit und Pflichtattribute"""
+    name: str
+    typ: str
+    min: int = 1
+    max: Optional[int] = 1  # None = beliebig oft
+    attribute: Tuple[str, ...] = ()
+
+
+EINFACHE_TYPEN = {
+    "text": re.compile(r"\S.*", re.S),
+    "code": re.compile(r"\S+"),
+    "betrag": re.compile(r"-?\d+(\.\d{1,2})?"),
+    "dezimal": re.compile(r"-?\d+(\.\d+)?"),
+    "datum102": re.compile(r"\d{4}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])"),
+    "datum": re.compile(r"\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])"),
+}
+
+
+CII = {
+    "wurzel": E("rsm:CrossIndustryInvoice", "Rechnung"),
+    "typen": {
+        "Rechnung": [
+            E("rsm:ExchangedDocumentContext", "Kontext"),
+            E("rsm:ExchangedDocument", "Dokument"),
+            E("rsm:SupplyChainTradeTransaction", "Transaktion"),
+        ],
+        "Kontext": [
+            E("ram:BusinessProcessSpecifiedDocumentContextParameter", "Kennung", 0),
+            E("ram:GuidelineSpecifiedDocumentContextParameter", "Kennung"),
+        ],
+        "Kennung": [E("ram:ID", "code")],
+        "Dokument": [
+            E("ram:ID", "text"),
+            E("ram:TypeCode", "code"),
+            E("ram:IssueDateTime", "Zeitpunkt"),
+            E("ram:IncludedNote", "Notiz", 0, None),
+        ],
+        "Zeitpunkt": [E("udt:DateTimeString", "datum102", attribute=("format",))],
+        "Notiz": [E("ram:Content", "text")],
+        "Transaktion": [
+            E("ram:IncludedSupplyChainTradeLineItem", "Zeile", 1, None),
+            E("ram:ApplicableHeaderTradeAgreement", "Vereinbarung"),
+            E("ram:ApplicableHeaderTradeDelivery", "Lieferung"),
+            E("ram:ApplicableHeaderTradeSettlement", "Abrechnung"),
+        ],
+        "Zeile": [
+            E("ram:AssociatedDocumentLineDocument", "ZeilenDokument"),
+            E("ram:SpecifiedTradeProduct", "Produkt"),
+            E("ram:SpecifiedLineTradeAgreement", "ZeilenVereinbarung"),
+            E("ram:SpecifiedLineTradeDelivery", "ZeilenLieferung"),
+            E("ram:SpecifiedLineTradeSettlement", "ZeilenAbrechnung"),
+        ],
+        "ZeilenDokument": [E("ram:LineID", "text")],
+        "Produkt": [E("ram:Name", "text")],
+        "ZeilenVereinbarung": [E("ram:NetPriceProductTradePrice", "Preis")],
+        "Preis": [E("ram:ChargeAmount", "dezimal")],
+        "ZeilenLieferung": [E("ram:BilledQuantity", "dezimal", attribute=("unitCode",))],
+        "ZeilenAbrechnung": [
+            E("ram:ApplicableTradeTax", "ZeilenSteuer"),
+            E("ram:SpecifiedTradeSettlementLineMonetarySummation", "ZeilenSumme"),
+        ],
+        "ZeilenSteuer": [
+            E("ram:TypeCode", "code"),
+            E("ram:CategoryCode", "code"),
+            E("ram:RateApplicablePercent", "dezimal", 0),
+        ],
+        "ZeilenSumme": [E("ram:LineTotalAmount", "betrag")],
+        "Vereinbarung": [
+            E("ram:BuyerReference", "text", 0),
+            E("ram:SellerTradeParty", "Partei"),
+            E("ram:BuyerTradeParty", "Partei"),
+        ],
+        "Partei": [
+            E("ram:ID", "text", 0),
+            E("ram:Name", "text"),
+            E("ram:DefinedTradeContact", "Kontakt", 0),
+            E("ram:PostalTradeAddress", "Adresse"),
+            E("ram:URIUniversalCommunication", "ElektronischeAdresse", 0),
+            E("ram:SpecifiedTaxRegistration", "Steuerregistrierung", 0, 2),
+        ],
+        "Kontakt": [
+            E("ram:PersonName", "text", 0),
+            E("ram:TelephoneUniversalCommunication", "Telefon", 0),
+            E("ram:EmailURIUniversalCommunication", "Uri", 0),
+        ],
+        "Telefon": [E("ram:CompleteNumber", "text")],
+        "Uri": [E("ram:URIID", "text")],
+        "ElektronischeAdresse": [E("ram:URIID", "text", attribute=("schemeID",))],
+        "Adresse": [
+            E("ram:PostcodeCode", "text", 0),
+            E("ram:LineOne", "text", 0),
+            E("ram:CityName", "text", 0),
+            E("ram:CountryID", "code"),
+        ],
+        "Steuerregistrierung": [E("ram:ID", "text", attribute=("schemeID",))],
+        "Lieferung": [E("ram:ActualDeliverySupplyChainEvent", "Ereignis", 0)],
+        "Ereignis": [E("ram:OccurrenceDateTime", "Zeitpunkt")],
+        "Abrechnung": [
+            E("ram:PaymentReference", "text", 0),
+            E("ram:InvoiceCurrencyCode", "code"),
+            E("ram:SpecifiedTradeSettlementPaymentMeans", "Zahlungsmittel", 0, None),
+            E("ram:ApplicableTradeTax", "Steuer", 1, None),
+            E("ram:SpecifiedTradePaymentTerms", "Zahlungsbedingung", 0),
+            E("ram:SpecifiedTradeSettlementHeaderMonetarySummation", "Summen"),
+        ],
+        "Zahlungsmittel": [
+            E("ram:TypeCode", "code"),
+            E("ram:PayeePartyCreditorFinancialAccount", "Konto", 0),
+            E("ram:PayeeSpecifiedCreditorFinancialInstitution", "Institut", 0),
+        ],
+        "Konto": [E("ram:IBANID", "code"), E("ram:AccountName", "text", 0)],
+        "Institut": [E("ram:BICID", "code")],
+        "Steuer": [
+            E("ram:CalculatedAmount", "betrag"),
+            E("ram:TypeCode", "code"),
+            E("ram:ExemptionReason", "text", 0),
+            E("ram:BasisAmount", "betrag"),
+            E("ram:CategoryCode", "code"),
+            E("ram:RateApplicablePercent", "dezimal", 0),
+        ],
+        "Zahlungsbedingung": [
+            E("ram:Description", "text", 0),
+            E("ram:DueDateDateTime", "Zeitpunkt", 0),
+        ],
+        "Summen": [
+            E("ram:LineTotalAmount", "betrag"),
+            E("ram:TaxBasisTotalAmount", "betrag"),
+            E("ram:TaxTotalAmount", "betrag", attribute=("currencyID",)),
+            E("ram:GrandTotalAmount", "betrag"),
+            E("ram:DuePayableAmount", "betrag"),
+        ],
+    },
+}
+
+
+UBL = {
+    "wurzel": E("Invoice", "Rechnung"),
+    "typen": {
+        "Rechnung": [
+            E("cbc:CustomizationID", "code"),
+            E("cbc:ProfileID", "code", 0),
+            E("cbc:ID", "text"),
+            E("cbc:IssueDate", "datum"),
+            E("cbc:DueDate", "datum", 0),
+            E("cbc:InvoiceTypeCode", "code"),
+            E("cbc:Note", "text", 0, None),
+            E("cbc:DocumentCurrencyCode", "code"),
+            E("cbc:BuyerReference", "text", 0),
+            E("cac:AccountingSupplierParty", "Vertragspartei"),
+            E("cac:AccountingCustomerParty", "Vertragspartei"),
+            E("cac:Delivery", "Lieferung", 0),
+            E("cac:PaymentMeans", "Zahlungsmittel", 0, None),
+            E("cac:PaymentTerms", "Zahlungsbedingung", 0),
+            E("cac:TaxTotal", "SteuerGesamt"),
+            E("cac:LegalMonetaryTotal", "Summen"),
+            E("cac:InvoiceLine", "Zeile", 1, None),
+        ],
+        "Vertragspartei": [E("cac:Party", "Partei")],
+        "Partei": [
+            E("cbc:EndpointID", "text", 0, attribute=("schemeID",)),
+            E("cac:PartyIdentification", "Kennung", 0),
+            E("cac:PostalAddress", "Adresse"),
+            E("cac:PartyTaxScheme", "Steuerschema", 0, 2),
+            E("cac:PartyLegalEntity", "Rechtstraeger"),
+            E("cac:Contact", "Kontakt", 0),
+        ],
+        "Kennung": [E("cbc:ID", "text")],
+        "Adresse": [
+            E("cbc:StreetName", "text", 0),
+            E("cbc:CityName", "text", 0),
+            E("cbc:PostalZone", "text", 0),
+            E("cac:Country", "Land"),
+        ],
+        "Land": [E("cbc:IdentificationCode", "code")],
+        "Steuerschema": [E("cbc:CompanyID", "text"), E("cac:TaxScheme", "Steuerart")],
+        "Steuerart": [E("cbc:ID", "code")],
+        "Rechtstraeger": [E("cbc:RegistrationName", "text")],
+        "Kontakt": [
+            E("cbc:Name", "text", 0),
+            E("cbc:Telephone", "text", 0),
+            E("cbc:ElectronicMail", "text", 0),
+        ],
+        "Lieferung": [E("cbc:ActualDeliveryDate", "datum", 0)],
+        "Zahlungsmittel": [
+            E("cbc:PaymentMeansCode", "code"),
+            E("cbc:PaymentID", "text", 0),
+            E("cac:PayeeFinancialAccount", "Konto", 0),
+        ],
+        "Konto": [
+            E("cbc:ID", "code"),
+            E("cbc:Name", "text", 0),
+            E("cac:FinancialInstitutionBranch", "Kennung", 0),
+        ],
+        "Zahlungsbedingung": [E("cbc:Note", "text")],
+        "SteuerGesamt": [
+            E("cbc:TaxAmount", "betrag", attribute=("currencyID",)),
+            E("cac:TaxSubtotal", "Teilsumme", 1, None),
+        ],
+        "Teilsumme": [
+            E("cbc:TaxableAmount", "betrag", attribute=("currencyID",)),
+            E("cbc:TaxAmount", "betrag", attribute=("currencyID",)),
+            E("cac:TaxCategory", "Steuerkategorie"),
+        ],
+        "Steuerkategorie": [
+            E("cbc:ID", "code"),
+            E("cbc:Percent", "dezimal", 0),
+            E("cbc:TaxExemptionReason", "text", 0),
+            E("cac:TaxScheme", "Steuerart"),
+        ],
+        "Summen": [
+            E("cbc:LineExtensionAmount", "betrag", attribute=("currencyID",)),
+            E("cbc:TaxExclusiveAmount", "betrag", attribute=("currencyID",)),
+            E("cbc:TaxInclusiveAmount", "betrag", attribute=("currencyID",)),
+            E("cbc:PayableAmount", "betrag", attribute=("currencyID",)),
+        ],
+        "Zeile": [
+            E("cbc:ID", "text"),
+            E("cbc:InvoicedQuantity", "dezimal", attribute=("unitCode",)),
+            E("cbc:LineExtensionAmount", "betrag", attribute=("currencyID",)),
+            E("cac:Item", "Artikel"),
+            E("cac:Price", "Preis"),
+        ],
+        "Artikel": [E("cbc:Name", "text"), E("cac:ClassifiedTaxCategory", "Steuerkategorie")],
+        "Preis": [E("cbc:PriceAmount", "dezimal", attribute=("currencyID",))],
+    },
+}
+
+
+SCHEMATA = {"cii": CII, "ubl": UBL}
+
+# Abbruch nach so vielen Fehlern (eine kaputte Datei soll nicht Tausende Meldungen liefern)
+MAX_FEHLER = 50
+
+
+class _Offen:
+    """Zustand eines geöffneten Elements während der Prüfung"""
+    __slots__ = ("element", "deklaration", "name", "index", "anzahl")
+    
+    def __init__(self, element: ET.Element, deklaration: Optional[E], name: str):
+        self.element = element
+        self.deklaration = deklaration  # None: unbekanntes Element, Inhalt wird nicht geprüft
+        self.name = name
+        self.index = 0  # Position in der Folge des komplexen Typs
+        self.anzahl = 0  # Vorkommen des Elements an dieser Position
+
+
+def pruefe(quelle: Union[str, BinaryIO], syntax: str = "cii") -> List[str]:
+    """
+    Prüft eine E-Rechnung streamend gegen das Teilschema
+    
+    Args:
+        quelle: Dateipfad oder binärer Strom
+        syntax: "cii" oder "ubl"
+    
+    Returns:
+        Fehlermeldungen mit Elementpfad (leer, wenn die Datei gültig ist)
+    """
+    schema = SCHEMATA[syntax]
+    typen = schema["typen"]
+    praefixe = {uri: praefix for praefix, uri in NAMENSRAEUME[syntax].items()}
+    fehler: List[str] = []
+    offen: List[_Offen] = []
+    
+    namen: Dict[str, str] = {}
+    
+    def name_von(tag: str) -> str:
+        """'{uri}Lokal' -> 'präfix:Lokal' (je Tag nur einmal berechnet)"""
+        name = namen.get(tag)
+        if name is None:
+            name = tag
+            if tag.startswith("{"):
+                uri, lokal = tag[1:].split("}", 1)
+                praefix = praefixe.get(uri)
+                if praefix is not None:
+                    name = f"{praefix}:{lokal}" if praefix else lokal
+            namen[tag] = name
+        return name
+    
+    def pfad() -> str:
+        return "/" + "/".join(o.name for o in offen)
+    
+    def melde(text: str):
+        fehler.append(f"{pfad()}: {text}")
+    
+    def fehlende(zustand: _Offen, bis: int) -> List[str]:
+        """Pflichtelemente der Folge zwischen der aktuellen Position und `bis`"""
+        folge = typen[zustand.deklaration.typ]
+        namen = []
+        for i in range(zustand.index, bis):
+            vorhanden = zustand.anzahl if i == zustand.index else 0
+            if vorhanden < folge[i].min:
+                namen.append(folge[i].name)
+        return namen
+    
+    def ordne_zu(zustand: _Offen, name: str) -> Optional[E]:
+        """Sucht das Kindelement in der Folge ab der aktuellen Position und rückt vor"""
+        folge = typen[zustand.deklaration.typ]
+        for i in range(zustand.index, len(folge)):
+            deklaration = folge[i]
+            if deklaration.name != name:
+                continue
+            bisher = zustand.anzahl if i == zustand.index else 0
+            if deklaration.max is not None and bisher >= deklaration.max:
+                continue
+            for vermisst in fehlende(zustand, i):
+                melde(f"Pflichtelement {vermisst} fehlt vor {name}")
+            zustand.index, zustand.anzahl = i, bisher + 1
+            return deklaration
+        return None
+    
+    try:
+        for ereignis, element in ET.iterparse(quelle, events=("start", "end")):
+            if len(fehler) >= MAX_FEHLER:
+                fehler.append("Prüfung abgebrochen (zu viele Fehler)")
+                break
+            if ereignis == "start":
+                name = name_von(element.tag)
+                if not offen:
+                    deklaration = schema["wurzel"] if name == schema["wurzel"].name else None
+                    if deklaration is None:
+                        fehler.append(f"Unerwartetes Wurzelelement {name} (erwartet {schema['wurzel'].name})")
+                else:
+                    eltern = offen[-1]
+                    if eltern.deklaration is None:
+                        deklaration = None
+                    elif eltern.deklaration.typ in EINFACHE_TYPEN:
+                        melde(f"Element {name} in einfachem Wert nicht erlaubt")
+                        deklaration = None
+                    else:
+                        deklaration = ordne_zu(eltern, name)
+                        if deklaration is None:
+                            melde(f"Unerwartetes Element {name}")
+                offen.append(_Offen(element, deklaration, name))
+                if deklaration is not None:
+                    for attribut in deklaration.attribute:
+                        if not element.get(attribut):
+                            melde(f"Pflichtattribut {attribut} fehlt")
+                continue
+            
+            zustand = offen[-1]
+            deklaration = zustand.deklaration
+            if deklaration is not None:
+                muster = EINFACHE_TYPEN.get(deklaration.typ)
+                if muster is not None:
+                    text = (element.text or "").strip()
+                    if not muster.fullmatch(text):
+                        melde(f"Ungültiger Wert {text!r} (erwartet {deklaration.typ})")
+                else:
+                    for vermisst in fehlende(zustand, len(typen[deklaration.typ])):
+                        melde(f"Pflichtelement {vermisst} fehlt")
+            offen.pop()
+            # Geprüfte Elemente freigeben, damit der Baum nicht mit der Datei wächst
+            element.clear()
+            if offen:
+                offen[-1].element.remove(element)
+    except ET.ParseError as e:
+        fehler.append(f"Kein wohlgeformtes XML: {e}")
+    return fehler
+
@@ -0,0 +1,445 @@
+"""
+GAEB DA XML: Import von Leistungsverzeichnissen (X83/X84) und Angebotsabgabe (X84)
+
+Der Import liest das LV mit iterparse und verwirft jede Position direkt nach
+dem Auslesen, der Speicherbedarf hängt also nicht von der Länge der Langtexte
+ab. Jede Position (Item) wird mit Ordnungszahl (OZ), Kurztext, Menge, Einheit
+und Einheitspreis (EP, nur in X84/X86 vorhanden) zu einer Position des
+Auftrags. Die Überschriften der LV-Bereiche werden in LV_DATEI im
+Auftragsordner abgelegt, damit der Export die Gliederung wiederherstellen kann.
+
+Der Export schreibt das bepreiste LV als Angebotsabgabe (DP 84) mit dem
+XmlSchreiber aus adapter/erechnung.py in die Datei.
+"""
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from xml.etree.ElementTree import iterparse
+
+from adapter.erechnung import XmlSchreiber
+from model.auftrag import Auftrag, Position
+
+LV_ORDNER = "LV"
+LV_DATEI = "lv.json"
+NAMENSRAUM_X84 = "http://www.gaeb.de/GAEB_DA_XML/DA84/3.3"
+NACHTRAG_BEREICH = "Nachträge"  # Bereich für Positionen ohne OZ beim Export
+
+# GAEB-Mengeneinheiten -> Einheiten der Positionen
+_EINHEITEN = {"st": "Stk", "stck": "Stk", "stk": "Stk", "stück": "Stk", "psch": "psch", "pauschal": "psch",
+              "m": "m", "lfm": "m", "m2": "m²", "qm": "m²", "m3": "m³", "cbm": "m³", "h": "Std", "std": "Std"}
+_EINHEITEN_GAEB = {"Stk": "St", "m²": "m2", "m³": "m3", "Std": "h"}
+CENT = Decimal("0.01")
+
+
+class GaebFehler(Exception):
+    """Die Datei ist kein lesbares GAEB DA XML"""
+    pass
+
+
+def _lokal(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(element) -> str:
+    """Gesamter Text eines Elements mit normalisierten Leerzeichen"""
+    return " ".join("".join(element.itertext()).split())
+
+
+def _kind(element, name: str):
+    for kind in element:
+        if _lokal(kind.tag) == name:
+            return kind
+    return None
+
+
+def _dezimal(text: Optional[str]) -> Optional[Decimal]:
+    if not text or not text.strip():
+        return None
+    try:
+        return Decimal(text.strip().replace(",", "."))
+    except ArithmeticError:
+        return None
+
+
+def einheit(gaeb_einheit: str) -> str:
+    """Einheit einer GAEB-Position als Einheit der Auftragsposition"""
+    gaeb_einheit = (gaeb_einheit or "").strip()
+    return _EINHEITEN.get(gaeb_einheit.casefold().rstrip("."), gaeb_einheit) or "Stk"
+
+
+def _kurztext(item) -> str:
+    beschreibung = _kind(item, "Description")
+    if beschreibung is None:
+        return ""
+    for element in beschreibung.iter():
+        if _lokal(element.tag) == "TextOutlTxt":
+            return _text(element)
+    # Ohne Kurztext: Anfang des Langtexts
+    langtext = _text(beschreibung)
+    return langtext[:70] + ("…" if len(langtext) > 70 else "")
+
+
+def lese_lv(pfad: str, bei_fortschritt: Optional[Callable[[float], None]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Liest ein GAEB-LV elementweise
+    
+    Yields:
+        ('info', {'projekt', 'bezeichnung', 'waehrung', 'datenart', 'gliederung'}) vor dem LV,
+        ('bereich', {'oz', 'titel'}) für jeden LV-Bereich,
+        ('position', {'oz', 'kurztext', 'menge', 'einheit', 'ep', 'bedarf'}) für jede Position
+    """
+    groesse = os.path.getsize(pfad) or 1
+    info: Dict[str, Any] = {"projekt": "", "bezeichnung": "", "waehrung": "EUR", "datenart": "", "gliederung": []}
+    info_gemeldet = False
+    pfad_namen: List[str] = []
+    bereiche: List[str] = []  # RNoPart der offenen Bereiche
+    anzahl = 0
+    try:
+        with open(pfad, "rb") as f:
+            for ereignis, element in iterparse(f, events=("start", "end")):
+                name = _lokal(element.tag)
+                if ereignis == "start":
+                    pfad_namen.append(name)
+                    if name == "BoQCtgy":
+                        bereiche.append(element.get("RNoPart", ""))
+                    elif name == "BoQBody" and not info_gemeldet:
+                        info_gemeldet = True
+                        yield "info", info
+                    continue
+                
+                pfad_namen.pop()
+                eltern = pfad_namen[-1] if pfad_namen else ""
+                if name == "Item":
+                    anzahl += 1
+                    menge = _dezimal(getattr(_kind(element, "Qty"), "text", None))
+                    ep = _dezimal(getattr(_kind(element, "UP"), "text", None))
+                    yield "position", {
+                        "oz": ".".join(bereiche + [element.get("RNoPart", "")]),
+                        "kurztext": _kurztext(element),
+                        "menge": menge if menge is not None else Decimal(1),
+                        "einheit": einheit(getattr(_kind(element, "QU"), "text", "")),
+                        "ep": ep or Decimal(0),
+                        "bedarf": _kind(element, "Provis") is not None,
+                    }
+                    element.clear()
+                    if bei_fortschritt and anzahl % 500 == 0:
+                        bei_fortschritt(f.tell() / groesse)
+                elif name == "LblTx" and eltern == "BoQCtgy":
+                    yield "bereich", {"oz": ".".join(bereiche), "titel": _text(element)}
+                    element.clear()
+                elif name == "BoQCtgy":
+                    bereiche.pop()
+                    element.clear()
+                elif name in ("NamePrj", "LblPrj", "Cur", "DP") and element.text:
+                    schluessel = {"NamePrj": "projekt", "LblPrj": "bezeichnung", "Cur": "waehrung", "DP": "datenart"}
+                    info.setdefault(schluessel[name], "")
+                    if not info[schluessel[name]] or name == "DP":
+                        info[schluessel[name]] = element.text.strip()
+                elif name == "BoQBkdn":
+                    typ = getattr(_kind(element, "Type"), "text", None) or ""
+                    laenge = (getattr(_kind(element, "Length"), "text", None) or "").strip()
+                    info["gliederung"].append({"typ": typ, "laenge": int(laenge) if laenge.isdigit() else 0})
+                elif name in ("Remark", "Description") and eltern not in ("Item",):
+                    element.clear()
+    except Exception as e:
+        if type(e).__name__ == "ParseError":
+            raise GaebFehler(f"Kein gültiges GAEB DA XML: {e}") from e
+        raise
+    if not info_gemeldet:
+        yield "info", info
+
+
+def lese_kopf(pfad: str) -> Dict[str, Any]:
+    """Liest nur die Projektangaben am Anfang des LVs (für Dialoge)"""
+    lv = lese_lv(pfad)
+    try:
+        for art, daten in lv:
+            if art == "info":
+                return daten
+    finally:
+        lv.close()
+    return {}
+
+
+def importiere_lv(pfad: str, kunde_id: str, bezeichnung: Optional[str] = None,
+                  mwst_satz: float = 19.0,
+                  bei_fortschritt: Optional[Callable[[float, str], None]] = None,
+                  abgebrochen: Optional[Callable[[], bool]] = None) -> Tuple[Auftrag, Dict[str, Any]]:
+    """
+    Liest ein LV und erstellt daraus einen (noch nicht gespeicherten) Auftrag
+    
+    Liest nur die Datei (kein DatenManager). Gespeichert wird mit
+    uebernehme_lv() - getrennt, damit das Lesen im Hintergrund laufen kann
+    und nur das Übernehmen im Tk-Thread.
+    
+    Returns:
+        (Auftrag, LV-Daten für uebernehme_lv())
+    """
+    info: Dict[str, Any] = {}
+    bereiche: Dict[str, str] = {}
+    positionen: List[Position] = []
+    # IDs wie Position._generate_id, je Position eine Mikrosekunde weiter
+    basis = datetime.now()
+    for art, daten in lese_lv(pfad, bei_fortschritt and (lambda a: bei_fortschritt(a, f"{len(positionen)} Positionen"))):
+        if art == "info":
+            info = daten
+        elif art == "bereich":
+            bereiche[daten["oz"]] = daten["titel"]
+        else:
+            kurztext = daten["kurztext"] or f"Position {daten['oz']}"
+            if daten["bedarf"]:
+                kurztext += " (Bedarfsposition)"
+            position_id = f"POS{basis.strftime('%Y%m%d%H%M%S')}{basis.microsecond + len(positionen):06d}"
+            positionen.append(Position(bezeichnung=kurztext, menge=float(daten["menge"]), einheit=daten["einheit"],
+                                       einzelpreis=float(daten["ep"]), position_id=position_id, oz=daten["oz"]))
+            if abgebrochen and len(positionen) % 500 == 0 and abgebrochen():
+                raise GaebFehler("Import abgebrochen")
+    if not positionen:
+        raise GaebFehler("Das Leistungsverzeichnis enthält keine Positionen")
+    
+    auftrag = Auftrag(kunde_id=kunde_id,
+                      bezeichnung=bezeichnung or info.get("bezeichnung") or info.get("projekt") or os.path.basename(pfad),
+                      beschreibung=f"Aus GAEB-LV {os.path.basename(pfad)}",
+                      mwst_satz=mwst_satz)
+    auftrag.positionen = positionen
+    auftrag._berechnen()
+    lv = {"datei": os.path.basename(pfad), "projekt": info.get("projekt", ""),
+          "bezeichnung": info.get("bezeichnung", ""), "waehrung": info.get("waehrung", "EUR"),
+          "gliederung": info.get("gliederung", []), "bereiche": bereiche}
+    return auftrag, lv
+
+
+def uebernehme_lv(manager, auftrag: Auftrag, lv: Dict[str, Any], quelle: Optional[str] = None):
+    """
+    Speichert einen importierten Auftrag in einem Schritt
+    
+    Ein Speichervorgang und ein Durchgang für alle Teilauftragsordner
+    (DatenManager.add_auftrag), danach LV-Daten und Originaldatei im Ordner LV.
+    """
+    manager.add_auftrag(auftrag)
+    manager.speichere_lv_daten(auftrag.auftragsnummer, lv, quelle)
+
+
+def schreibe_lv_daten(adapter, auftragsnummer: str, lv: Dict[str, Any], quelle: Optional[str] = None):
+    """Schreibt LV_DATEI und die Originaldatei in den Ordner LV (über DatenManager.speichere_lv_daten aufrufen)"""
+    ordner = _lv_ordner(adapter, auftragsnummer)
+    if ordner is None:
+        raise GaebFehler(f"Auftragsordner {auftragsnummer} nicht gefunden")
+    os.makedirs(ordner, exist_ok=True)
+    with open(os.path.join(ordner, LV_DATEI), "w", encoding="utf-8") as f:
+        json.dump(lv, f, ensure_ascii=False, indent=2)
+    if quelle and os.path.exists(quelle):
+        shutil.copy2(quelle, os.path.join(ordner, os.path.basename(quelle)))
+
+
+def _lv_ordner(adapter, auftragsnummer: str) -> Optional[str]:
+    """Ordner LV im Auftragsordner (None, wenn der Auftragsordner nicht existiert)"""
+    auftragsordner = adapter.get_auftragsordner_pfad(auftragsnummer)
+    return os.path.join(auftragsordner, LV_ORDNER) if auftragsordner else None
+
+
+def lade_lv_daten(adapter, auftragsnummer: str) -> Dict[str, Any]:
+    """LV-Daten eines importierten Auftrags (leer bei manuell angelegten Aufträgen)"""
+    ordner = _lv_ordner(adapter, auftragsnummer)
+    if ordner is None:
+        return {}
+    try:
+        with open(os.path.join(ordner, LV_DATEI), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Export ----------------------------------------------------------------
+
+def _betrag(wert: Decimal) -> str:
+    return str(wert.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _menge(wert: float) -> str:
+    return str(Decimal(str(wert)).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP))
+
+
+def _oz_teile(positionen: List[Position], lv: Dict[str, Any]) -> Iterator[Tuple[List[str], Position]]:
+    """OZ jeder Position in Teilen; Positionen ohne OZ kommen in einen eigenen Bereich am Ende"""
+    tiefe = max((len(p.oz.split(".")) for p in positionen if p.oz), default=2)
+    laengen = [g["laenge"] for g in lv.get("gliederung", []) if g.get("laenge")]
+    item_laenge = laengen[-1] if laengen else 4
+    ohne_oz = [p for p in positionen if not p.oz]
+    for position in positionen:
+        if position.oz:
+            yield position.oz.split("."), position
+    if ohne_oz:
+        bereich = ["9" * (laengen[0] if laengen else 2)] + ["1".zfill(l) for l in laengen[1:tiefe - 1]]
+        for nummer, position in enumerate(ohne_oz, start=1):
+            yield bereich + [str(nummer * 10).zfill(item_laenge)], position
+
+
+def schreibe_x84(ziel: Union[str, BinaryIO], auftrag: Auftrag, lv: Dict[str, Any], config: Dict[str, Any]):
+    """
+    Schreibt ein Auftrags-LV als bepreiste Angebotsabgabe (GAEB DA XML 3.3, DP 84)
+    
+    Args:
+        ziel: Dateipfad oder binärer Ausgabestrom
+        auftrag: Auftrag mit Positionen (OZ aus dem Import)
+        lv: LV-Daten aus lade_lv_daten() (Bereichsüberschriften, Gliederung)
+        config: Konfiguration (Bieterangaben aus 'unternehmen')
+    
+    Returns:
+        Angebotssumme (netto)
+    """
+    if isinstance(ziel, str):
+        temp_pfad = f"{ziel}.{os.getpid()}.tmp"
+        try:
+            with open(temp_pfad, "wb") as f:
+                gesamt = schreibe_x84(f, auftrag, lv, config)
+            os.replace(temp_pfad, ziel)
+        finally:
+            if os.path.exists(temp_pfad):
+                os.remove(temp_pfad)
+        return gesamt
+    
+    unternehmen = config.get("unternehmen", {})
+    bereiche = dict(lv.get("bereiche", {}))
+    jetzt = datetime.now()
+    s = XmlSchreiber(ziel)
+    s.beginne_dokument()
+    s.oeffne("GAEB", {"xmlns": NAMENSRAUM_X84})
+    with s.element("GAEBInfo"):
+        s.feld("Version", "3.3")
+        s.feld("VersDate", "2021-05")
+        s.feld("Date", jetzt.strftime("%Y-%m-%d"))
+        s.feld("Time", jetzt.strftime("%H:%M:%S"))
+        s.feld("ProgSystem", "Auftragsverwaltung")
+    with s.element("PrjInfo"):
+        s.feld("NamePrj", lv.get("projekt") or auftrag.auftragsnummer)
+        s.feld("LblPrj", lv.get("bezeichnung") or auftrag.bezeichnung)
+        s.feld("Cur", lv.get("waehrung", "EUR"))
+    s.oeffne("Award")
+    s.feld("DP", "84")
+    with s.element("AwardInfo"):
+        s.feld("Cur", lv.get("waehrung", "EUR"))
+    with s.element("CTR"):
+        with s.element("Address"):
+            s.feld("Name1", unternehmen.get("name"))
+            s.feld("Street", unternehmen.get("strasse"))
+            s.feld("PCode", unternehmen.get("plz"))
+            s.feld("City", unternehmen.get("ort"))
+            s.feld("Phone", unternehmen.get("telefon"))
+            s.feld("Email", unternehmen.get("email"))
+    s.oeffne("BoQ", {"ID": f"BoQ_{auftrag.id}"})
+    with s.element("BoQInfo"):
+        s.feld("Name", lv.get("projekt") or auftrag.auftragsnummer)
+        s.feld("LblTx", auftrag.bezeichnung)
+        for stufe in lv.get("gliederung", []):
+            with s.element("BoQBkdn"):
+                s.feld("Type", stufe.get("typ"))
+                s.feld("Length", stufe.get("laenge"))
+    s.oeffne("BoQBody")
+    
+    # Bereiche werden beim Wechsel des OZ-Präfixes geöffnet und geschlossen;
+    # die Summen der offenen Bereiche laufen dabei mit
+    offen: List[str] = []
+    summen: List[Decimal] = []
+    liste_offen = False
+    gesamt = Decimal(0)
+    
+    def schliesse_bereich():
+        nonlocal liste_offen
+        if liste_offen:
+            s.schliesse()  # Itemlist
+            liste_offen = False
+        s.schliesse()  # BoQBody
+        summe = summen.pop()
+        with s.element("Totals"):
+            s.feld("Total", _betrag(summe))
+        s.schliesse()  # BoQCtgy
+        offen.pop()
+        if summen:
+            summen[-1] += summe
+    
+    for teile, position in _oz_teile(auftrag.positionen, lv):
+        bereich, nummer = teile[:-1], teile[-1]
+        gemeinsam = 0
+        while gemeinsam < min(len(offen), len(bereich)) and offen[gemeinsam] == bereich[gemeinsam]:
+            gemeinsam += 1
+        while len(offen) > gemeinsam:
+            schliesse_bereich()
+        for tiefe in range(len(offen), len(bereich)):
+            if liste_offen:
+                s.schliesse()
+                liste_offen = False
+            oz = ".".join(bereich[:tiefe + 1])
+            s.oeffne("BoQCtgy", {"ID": f"C_{oz}", "RNoPart": bereich[tiefe]})
+            titel = bereiche.get(oz) or (NACHTRAG_BEREICH if position.oz == "" else f"Bereich {oz}")
+            with s.element("LblTx"):
+                with s.element("p"):
+                    s.feld("span", titel)
+            s.oeffne("BoQBody")
+            offen.append(bereich[tiefe])
+            summen.append(Decimal(0))
+        if not liste_offen:
+            s.oeffne("Itemlist")
+            liste_offen = True
+        
+        ep = Decimal(str(position.einzelpreis)).quantize(CENT, rounding=ROUND_HALF_UP)
+        menge = Decimal(_menge(position.menge))
+        gp = (ep * menge).quantize(CENT, rounding=ROUND_HALF_UP)
+        with s.element("Item", {"ID": f"I_{position.id}", "RNoPart": nummer}):
+            s.feld("Qty", _menge(position.menge))
+            s.feld("QU", _EINHEITEN_GAEB.get(position.einheit, position.einheit))
+            s.feld("UP", _betrag(ep))
+            s.feld("IT", _betrag(gp))
+            with s.element("Description"):
+                with s.element("CompleteText"):
+                    with s.element("OutlineText"):
+                        with s.element("OutlTxt"):
+                            with s.element("TextOutlTxt"):
+                                with s.element("p"):
+                                    s.feld("span", position.bezeichnung)
+        if summen:
+            summen[-1] += gp
+        gesamt += gp
+    
+    while offen:
+        schliesse_bereich()
+    if liste_offen:
+        s.schliesse()
+    s.schliesse()  # BoQBody
+    s.schliesse()  # BoQ
+    s.schliesse()  # Award
+    s.schliesse()  # GAEB
+    s.beende_dokument()
+    return gesamt
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="GAEB-Leistungsverzeichnis lesen (Übersicht ohne Import)")
+    parser.add_argument("datei", help="GAEB DA XML (X83, X84, ...)")
+    args = parser.parse_args(argumente)
+    bereiche = positionen = 0
+    summe = Decimal(0)
+    try:
+        for art, daten in lese_lv(args.datei):
+            if art == "info":
+                print(f"Projekt: {daten['projekt']}  {daten['bezeichnung']}  (DP {daten['datenart'] or '?'})")
+            elif art == "bereich":
+                bereiche += 1
+            else:
+                positionen += 1
+                summe += daten["menge"] * daten["ep"]
+    except (GaebFehler, OSError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    print(f"{bereiche} Bereiche, {positionen} Positionen, Summe {_betrag(summe)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
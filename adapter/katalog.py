@@ -0,0 +1,567 @@
+"""
+Lieferantenkataloge (Datanorm, BMEcat) mit indizierter Artikelsuche
+
+Die Kataloge der Großhändler werden zeilen- bzw. elementweise gelesen und in
+eine SQLite-Datenbank im Datenverzeichnis übernommen (KATALOG_DATEI). Die
+Artikelnummer ist per B-Baum indiziert (Präfixsuche), Kurz- und Langtext über
+einen FTS5-Volltextindex (Wortanfänge, ohne Groß-/Kleinschreibung und Umlaute).
+So bleibt die Suche auch bei mehreren hunderttausend Artikeln im
+Millisekundenbereich und kann direkt beim Tippen im Tk-Thread laufen.
+
+Unterstützte Formate:
+- Datanorm 4/5 (Semikolon-getrennt): A-Sätze (Artikel), B-Sätze (EAN),
+  P-Sätze (Preisänderungen), Verarbeitungskennzeichen N/A/L
+- BMEcat 1.2 (ARTICLE) und 2005 (PRODUCT), inkl. T_UPDATE_PRICES
+
+Preisänderungsdateien (Datanorm P-Sätze, BMEcat T_UPDATE_PRICES) ändern nur
+die Preise vorhandener Artikel. Der Volltextindex wird per Trigger nur für
+Artikel mit geändertem Text nachgeführt, Preisupdates berühren ihn nicht.
+
+Ohne Oberfläche aus dem Projektverzeichnis:
+    python -m adapter.katalog import DATANORM.001 [--lieferant NAME]
+    python -m adapter.katalog suche "kupferrohr 15"
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+KATALOG_DATEI = "katalog.sqlite"
+BLOCK_GROESSE = 5000  # Artikel je Transaktion beim Import
+MASSENIMPORT_BYTES = 5 * 2**20  # Ab dieser Dateigröße wird der Suchindex am Ende neu aufgebaut
+STANDARD_TREFFER = 20
+
+# Datanorm: Preiseinheit-Kennzeichen -> Preis gilt für so viele Mengeneinheiten
+_DATANORM_PREISEINHEIT = {"0": 1, "1": 10, "2": 100, "3": 1000}
+# BMEcat/UN-ECE-Einheitencodes -> Einheiten der Stückliste
+_EINHEITEN = {"C62": "Stk", "PCE": "Stk", "PCS": "Stk", "STK": "Stk", "H87": "Stk",
+              "MTR": "m", "MTK": "m²", "MTQ": "m³", "KGM": "kg", "TNE": "t", "LTR": "l",
+              "PK": "Pak", "PA": "Pak", "RO": "Rolle", "SET": "Set", "PR": "Paar", "HUR": "Std"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artikel (
+    id INTEGER PRIMARY KEY,
+    lieferant TEXT NOT NULL,
+    artikelnummer TEXT NOT NULL,
+    kurztext TEXT NOT NULL DEFAULT '',
+    langtext TEXT NOT NULL DEFAULT '',
+    einheit TEXT NOT NULL DEFAULT 'Stk',
+    preis REAL NOT NULL DEFAULT 0,
+    ean TEXT NOT NULL DEFAULT '',
+    warengruppe TEXT NOT NULL DEFAULT '',
+    geaendert_am TEXT NOT NULL DEFAULT '',
+    UNIQUE (lieferant, artikelnummer)
+);
+CREATE INDEX IF NOT EXISTS artikel_nummer ON artikel (artikelnummer COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS importe (
+    datei TEXT NOT NULL,
+    lieferant TEXT NOT NULL,
+    format TEXT NOT NULL,
+    artikel INTEGER NOT NULL,
+    preise INTEGER NOT NULL,
+    zeitpunkt TEXT NOT NULL
+);
+"""
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS artikel_text USING fts5(
+    artikelnummer, kurztext, langtext,
+    content='artikel', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS artikel_text_neu AFTER INSERT ON artikel BEGIN
+    INSERT INTO artikel_text (rowid, artikelnummer, kurztext, langtext)
+    VALUES (new.id, new.artikelnummer, new.kurztext, new.langtext);
+END;
+CREATE TRIGGER IF NOT EXISTS artikel_text_geloescht AFTER DELETE ON artikel BEGIN
+    INSERT INTO artikel_text (artikel_text, rowid, artikelnummer, kurztext, langtext)
+    VALUES ('delete', old.id, old.artikelnummer, old.kurztext, old.langtext);
+END;
+CREATE TRIGGER IF NOT EXISTS artikel_text_geaendert AFTER UPDATE OF kurztext, langtext ON artikel
+WHEN old.kurztext != new.kurztext OR old.langtext != new.langtext BEGIN
+    INSERT INTO artikel_text (artikel_text, rowid, artikelnummer, kurztext, langtext)
+    VALUES ('delete', old.id, old.artikelnummer, old.kurztext, old.langtext);
+    INSERT INTO artikel_text (rowid, artikelnummer, kurztext, langtext)
+    VALUES (new.id, new.artikelnummer, new.kurztext, new.langtext);
+END;
+"""
+
+
+class KatalogFehler(Exception):
+    """Die Katalogdatei kann nicht gelesen werden"""
+    pass
+
+
+def katalog_pfad(daten_pfad: str) -> str:
+    """Gibt den Pfad der Katalogdatenbank im Datenverzeichnis zurück"""
+    return os.path.join(daten_pfad, KATALOG_DATEI)
+
+
+# --- Lesen der Formate -----------------------------------------------------
+# Jeder Leser liefert Dicts mit 'aktion' ('neu', 'preis', 'loeschen'),
+# 'artikelnummer' und je nach Aktion weiteren Feldern.
+
+def _zahl(text: str, nachkommastellen: int = 0) -> float:
+    text = (text or "").strip()
+    if not text:
+        return 0.0
+    if "," in text or "." in text:
+        return float(text.replace(".", "").replace(",", ".") if "," in text else text)
+    return int(text) / 10 ** nachkommastellen
+
+
+def lese_datanorm(pfad: str, kodierung: str = "cp850",
+                  bei_fortschritt: Optional[Callable[[float], None]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Liest eine Datanorm-Datei (Version 4 oder 5, Semikolon-getrennt)
+    
+    Preise stehen in Datanorm ohne Komma in Cent und gelten für die
+    Preiseinheit (1, 10, 100 oder 1000 Stück); zurückgegeben wird der Preis je
+    Mengeneinheit. P-Sätze enthalten bis zu drei Artikel je Zeile.
+    """
+    groesse = os.path.getsize(pfad) or 1
+    with open(pfad, "r", encoding=kodierung, errors="replace", newline="") as f:
+        for nummer, zeile in enumerate(f):
+            if bei_fortschritt and nummer % 5000 == 0:
+                bei_fortschritt(f.buffer.tell() / groesse)
+            felder = [feld.strip() for feld in zeile.rstrip("\r\n").split(";")]
+            satzart = felder[0].upper() if felder else ""
+            felder += [""] * (13 - len(felder))
+            if satzart == "A":
+                kennzeichen = felder[1].upper()
+                if kennzeichen == "L":
+                    yield {"aktion": "loeschen", "artikelnummer": felder[2]}
+                    continue
+                teiler = _DATANORM_PREISEINHEIT.get(felder[7], 1)
+                yield {
+                    "aktion": "neu",
+                    "artikelnummer": felder[2],
+                    "kurztext": " ".join(t for t in (felder[4], felder[5]) if t),
+                    "einheit": felder[8] or "Stk",
+                    "preis": _zahl(felder[9], 2) / teiler,
+                    "warengruppe": felder[11],
+                }
+            elif satzart == "B" and felder[8]:
+                yield {"aktion": "ean", "artikelnummer": felder[2], "ean": felder[8]}
+            elif satzart == "P":
+                # P;A;Artikelnr;Preiskz;Preis;Rabattkz;Rabatt1;Rabatt2;Rabatt3 (bis zu dreimal)
+                for start in range(2, len(felder), 7):
+                    block = felder[start:start + 7]
+                    if len(block) >= 3 and block[0]:
+                        yield {"aktion": "preis", "artikelnummer": block[0], "preis": _zahl(block[2], 2)}
+
+
+def _lokal(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _kind(element, *namen) -> str:
+    """Text des ersten passenden Unterelements (Namensräume werden ignoriert)"""
+    for kind in element.iter():
+        if _lokal(kind.tag) in namen and kind.text:
+            return kind.text.strip()
+    return ""
+
+
+def lese_bmecat(pfad: str, bei_fortschritt: Optional[Callable[[float], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Liest eine BMEcat-Datei (Version 1.2 oder 2005) elementweise"""
+    groesse = os.path.getsize(pfad) or 1
+    nur_preise = False
+    with open(pfad, "rb") as f:
+        nummer = 0
+        for ereignis, element in iterparse(f, events=("start", "end")):
+            name = _lokal(element.tag)
+            if ereignis == "start":
+                if name == "T_UPDATE_PRICES":
+                    nur_preise = True
+                continue
+            if name == "SUPPLIER_NAME" and element.text:
+                yield {"aktion": "lieferant", "name": element.text.strip()}
+            if name not in ("ARTICLE", "PRODUCT"):
+                continue
+            nummer += 1
+            if bei_fortschritt and nummer % 2000 == 0:
+                bei_fortschritt(f.tell() / groesse)
+            
+            artikelnummer = _kind(element, "SUPPLIER_AID", "SUPPLIER_PID")
+            modus = element.get("mode", "")
+            preis = _bmecat_preis(element)
+            if not artikelnummer:
+                pass
+            elif modus == "delete":
+                yield {"aktion": "loeschen", "artikelnummer": artikelnummer}
+            elif nur_preise:
+                if preis is not None:
+                    yield {"aktion": "preis", "artikelnummer": artikelnummer, "preis": preis}
+            else:
+                einheit = _kind(element, "ORDER_UNIT")
+                yield {
+                    "aktion": "neu",
+                    "artikelnummer": artikelnummer,
+                    "kurztext": _kind(element, "DESCRIPTION_SHORT"),
+                    "langtext": re.sub(r"<[^>]+>", " ", _kind(element, "DESCRIPTION_LONG")).strip(),
+                    "einheit": _EINHEITEN.get(einheit.upper(), einheit) or "Stk",
+                    "preis": preis or 0.0,
+                    "ean": _kind(element, "EAN", "INTERNATIONAL_PID"),
+                    "warengruppe": _kind(element, "MANUFACTURER_TYPE_DESCR"),
+                }
+            element.clear()
+
+
+def _bmecat_preis(artikel) -> Optional[float]:
+    """Nettopreis je Bestelleinheit (net_customer vor net_list vor dem ersten Preis)"""
+    preise = {}
+    for element in artikel.iter():
+        if _lokal(element.tag) not in ("ARTICLE_PRICE", "PRODUCT_PRICE"):
+            continue
+        try:
+            betrag = float(_kind(element, "PRICE_AMOUNT").replace(",", "."))
+        except ValueError:
+            continue
+        menge = _kind(element, "PRICE_QUANTITY")
+        try:
+            betrag /= float(menge) if menge else 1.0
+        except (ValueError, ZeroDivisionError):
+            pass
+        preise.setdefault(element.get("price_type", ""), betrag)
+    for art in ("net_customer", "net_list"):
+        if art in preise:
+            return preise[art]
+    return next(iter(preise.values()), None)
+
+
+def erkenne_format(pfad: str) -> str:
+    """'bmecat' oder 'datanorm' anhand des Dateianfangs"""
+    with open(pfad, "rb") as f:
+        anfang = f.read(2048).lstrip()
+    if anfang.startswith(b"<") or b"<BMECAT" in anfang.upper():
+        return "bmecat"
+    if re.match(rb"^[VABPTRWDGSKZ];", anfang, re.IGNORECASE):
+        return "datanorm"
+    raise KatalogFehler("Unbekanntes Katalogformat (erwartet Datanorm 4/5 oder BMEcat)")
+
+
+def standard_lieferant(pfad: str, format: str) -> str:
+    """
+    Lieferantenname, falls keiner angegeben ist
+    
+    Datanorm-Dateien heißen bei allen Lieferanten gleich (DATANORM.001,
+    DATPREIS.001), daher gilt dort der Name des Ordners. BMEcat-Dateien
+    enthalten den Lieferanten selbst, bis dahin gilt der Dateiname.
+    """
+    pfad = os.path.abspath(pfad)
+    if format == "datanorm":
+        return os.path.basename(os.path.dirname(pfad)) or "Datanorm"
+    return os.path.splitext(os.path.basename(pfad))[0]
+
+
+# --- Datenbank -------------------------------------------------------------
+
+class Katalog:
+    """Artikelkatalog in SQLite (eine Verbindung je Thread)"""
+    
+    def __init__(self, pfad: str):
+        self.pfad = pfad
+        self._lokal = threading.local()
+        self.volltext = True
+        verbindung = self._verbindung()
+        verbindung.executescript(_SCHEMA)
+        try:
+            verbindung.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite ohne FTS5: Suche im Kurztext per LIKE (langsamer)
+            self.volltext = False
+        verbindung.commit()
+    
+    @classmethod
+    def fuer_manager(cls, manager) -> Optional['Katalog']:
+        """Gibt den Katalog im Datenverzeichnis des Managers zurück, None wenn noch keiner importiert wurde"""
+        pfad = katalog_pfad(manager.adapter.get_daten_pfad())
+        katalog = getattr(manager, "_katalog", None)
+        if katalog is not None and katalog.pfad == pfad:
+            return katalog
+        if not os.path.exists(pfad):
+            return None
+        katalog = cls(pfad)
+        manager._katalog = katalog
+        return katalog
+    
+    def _verbindung(self) -> sqlite3.Connection:
+        verbindung = getattr(self._lokal, "verbindung", None)
+        if verbindung is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.pfad)), exist_ok=True)
+            verbindung = sqlite3.connect(self.pfad, timeout=30)
+            verbindung.row_factory = sqlite3.Row
+            # WAL: Suchen bleiben möglich, während ein Import schreibt
+            verbindung.execute("PRAGMA journal_mode=WAL")
+            verbindung.execute("PRAGMA synchronous=NORMAL")
+            self._lokal.verbindung = verbindung
+        return verbindung
+    
+    def schliessen(self):
+        """Schließt die Verbindung des aufrufenden Threads"""
+        verbindung = getattr(self._lokal, "verbindung", None)
+        if verbindung is not None:
+            verbindung.close()
+            self._lokal.verbindung = None
+    
+    def kompaktiere(self) -> int:
+        """
+        Fasst die Segmente des Volltextindex zusammen und gibt freien Speicher frei
+        
+        Returns:
+            Eingesparte Bytes
+        """
+        vorher = os.path.getsize(self.pfad)
+        verbindung = self._verbindung()
+        if self.volltext:
+            verbindung.execute("INSERT INTO artikel_text (artikel_text) VALUES ('optimize')")
+            verbindung.commit()
+        verbindung.execute("VACUUM")
+        verbindung.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return vorher - os.path.getsize(self.pfad)
+    
+    def anzahl(self) -> int:
+        """Anzahl der Artikel im Katalog"""
+        return self._verbindung().execute("SELECT COUNT(*) FROM artikel").fetchone()[0]
+    
+    def lieferanten(self) -> List[Tuple[str, int]]:
+        """Lieferanten mit Artikelanzahl"""
+        return [tuple(z) for z in self._verbindung().execute(
+            "SELECT lieferant, COUNT(*) FROM artikel GROUP BY lieferant ORDER BY lieferant")]
+    
+    def artikel(self, lieferant: str, artikelnummer: str) -> Optional[Dict[str, Any]]:
+        """Gibt einen Artikel zurück"""
+        zeile = self._verbindung().execute(
+            "SELECT * FROM artikel WHERE lieferant = ? AND artikelnummer = ?",
+            (lieferant, artikelnummer)).fetchone()
+        return dict(zeile) if zeile else None
+    
+    def suche(self, text: str, limit: int = STANDARD_TREFFER) -> List[Dict[str, Any]]:
+        """
+        Sucht Artikel nach Artikelnummer (Präfix) und Text (Wortanfänge)
+        
+        Treffer über die Artikelnummer stehen vorn. Mehrere Wörter müssen alle
+        vorkommen, z.B. "kupfer rohr 15". Die Texttreffer werden bewusst nicht
+        nach Relevanz sortiert: Das Ranking müsste bei kurzen Eingaben wie "m"
+        alle Treffer bewerten und bräuchte dann ein Vielfaches der Zeit.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        verbindung = self._verbindung()
+        treffer: Dict[int, Dict[str, Any]] = {}
+        
+        # Präfix der Artikelnummer als Bereichsabfrage über den Index
+        for zeile in verbindung.execute(
+                "SELECT * FROM artikel WHERE artikelnummer >= ? COLLATE NOCASE "
+                "AND artikelnummer < ? COLLATE NOCASE ORDER BY artikelnummer COLLATE NOCASE LIMIT ?",
+                (text, text + "￿", limit)):
+            treffer[zeile["id"]] = dict(zeile)
+        
+        woerter = re.findall(r"\w+", text)
+        if len(treffer) < limit and woerter:
+            if self.volltext:
+                abfrage = " ".join(f'"{w}"*' for w in woerter)
+                zeilen = verbindung.execute(
+                    "SELECT a.* FROM artikel_text JOIN artikel a ON a.id = artikel_text.rowid "
+                    "WHERE artikel_text MATCH ? LIMIT ?", (abfrage, limit))
+            else:
+                bedingung = " AND ".join("kurztext LIKE ?" for _ in woerter)
+                zeilen = verbindung.execute(f"SELECT * FROM artikel WHERE {bedingung} LIMIT ?",
+                                            [f"%{w}%" for w in woerter] + [limit])
+            for zeile in zeilen:
+                if len(treffer) >= limit:
+                    break
+                treffer.setdefault(zeile["id"], dict(zeile))
+        return list(treffer.values())
+    
+    def importiere(self, pfad: str, lieferant: Optional[str] = None, format: Optional[str] = None,
+                   bei_fortschritt: Optional[Callable[[float, str], None]] = None,
+                   abgebrochen: Optional[Callable[[], bool]] = None, **optionen) -> Dict[str, Any]:
+        """
+        Importiert oder aktualisiert einen Lieferantenkatalog
+        
+        Vorhandene Artikel desselben Lieferanten werden überschrieben, nicht
+        enthaltene bleiben erhalten (Datanorm/BMEcat liefern oft nur Änderungen).
+        
+        Args:
+            pfad: Katalogdatei
+            lieferant: Name des Lieferanten (Standard: aus der Datei bzw. Dateiname)
+            format: 'datanorm' oder 'bmecat' (Standard: automatisch)
+            bei_fortschritt: Callback(anteil 0..1, text)
+            abgebrochen: Liefert True, wenn der Import abgebrochen werden soll; bereits
+                übernommene Blöcke bleiben erhalten
+            **optionen: kodierung (nur Datanorm)
+        
+        Returns:
+            Zusammenfassung mit 'lieferant', 'artikel', 'preise', 'geloescht',
+            'unbekannt' (Preisänderungen ohne Artikel), 'sekunden' und 'abgebrochen'
+        """
+        format = format or erkenne_format(pfad)
+        anteil = [0.0]
+        
+        def fortschritt(a: float):
+            anteil[0] = a
+        
+        if format == "bmecat":
+            saetze = lese_bmecat(pfad, fortschritt)
+        else:
+            saetze = lese_datanorm(pfad, bei_fortschritt=fortschritt, **optionen)
+        lieferant_aus_datei = lieferant is None
+        lieferant = lieferant or standard_lieferant(pfad, format)
+        
+        ergebnis = {"lieferant": lieferant, "artikel": 0, "preise": 0, "geloescht": 0,
+                    "unbekannt": 0, "sekunden": 0.0, "abgebrochen": False}
+        start = time.perf_counter()
+        jetzt = time.strftime("%Y-%m-%dT%H:%M:%S")
+        verbindung = self._verbindung()
+        neu, preise, eans, loeschen = [], [], [], []
+        
+        # Bei großen Dateien ist ein Neuaufbau des Suchindex am Ende deutlich
+        # schneller als das Nachführen per Trigger für jeden einzelnen Artikel
+        massenimport = self.volltext and os.path.getsize(pfad) > MASSENIMPORT_BYTES
+        if massenimport:
+            verbindung.executescript("DROP TRIGGER IF EXISTS artikel_text_neu; "
+                                     "DROP TRIGGER IF EXISTS artikel_text_geloescht; "
+                                     "DROP TRIGGER IF EXISTS artikel_text_geaendert;")
+        
+        def schreibe():
+            if neu:
+                verbindung.executemany(
+                    "INSERT INTO artikel (lieferant, artikelnummer, kurztext, langtext, einheit, preis, "
+                    "ean, warengruppe, geaendert_am) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (lieferant, artikelnummer) DO UPDATE SET kurztext = excluded.kurztext, "
+                    "langtext = CASE WHEN excluded.langtext != '' THEN excluded.langtext ELSE langtext END, "
+                    "einheit = excluded.einheit, preis = excluded.preis, "
+                    "ean = CASE WHEN excluded.ean != '' THEN excluded.ean ELSE ean END, "
+                    "warengruppe = excluded.warengruppe, geaendert_am = excluded.geaendert_am", neu)
+            if eans:
+                verbindung.executemany("UPDATE artikel SET ean = ? WHERE lieferant = ? AND artikelnummer = ?", eans)
+            if preise:
+                vorher = verbindung.total_changes
+                verbindung.executemany(
+                    "UPDATE artikel SET preis = ?, geaendert_am = ? WHERE lieferant = ? AND artikelnummer = ?",
+                    preise)
+                ergebnis["unbekannt"] += len(preise) - (verbindung.total_changes - vorher)
+            if loeschen:
+                verbindung.executemany("DELETE FROM artikel WHERE lieferant = ? AND artikelnummer = ?", loeschen)
+            verbindung.commit()
+            for liste in (neu, preise, eans, loeschen):
+                liste.clear()
+        
+        try:
+            for satz in saetze:
+                aktion = satz["aktion"]
+                if aktion == "lieferant":
+                    if lieferant_aus_datei:
+                        ergebnis["lieferant"] = lieferant = satz["name"]
+                    continue
+                nummer = satz["artikelnummer"]
+                if aktion == "neu":
+                    neu.append((lieferant, nummer, satz["kurztext"], satz.get("langtext", ""), satz["einheit"],
+                                round(satz["preis"], 4), satz.get("ean", ""), satz.get("warengruppe", ""), jetzt))
+                    ergebnis["artikel"] += 1
+                elif aktion == "preis":
+                    preise.append((round(satz["preis"], 4), jetzt, lieferant, nummer))
+                    ergebnis["preise"] += 1
+                elif aktion == "ean":
+                    eans.append((satz["ean"], lieferant, nummer))
+                elif aktion == "loeschen":
+                    loeschen.append((lieferant, nummer))
+                    ergebnis["geloescht"] += 1
+                
+                if len(neu) + len(preise) + len(eans) + len(loeschen) >= BLOCK_GROESSE:
+                    schreibe()
+                    if bei_fortschritt:
+                        bei_fortschritt(anteil[0], f"{ergebnis['artikel'] + ergebnis['preise']} Artikel gelesen")
+                    if abgebrochen and abgebrochen():
+                        ergebnis["abgebrochen"] = True
+                        break
+            schreibe()
+        except Exception:
+            verbindung.rollback()
+            raise
+        finally:
+            saetze.close()
+            if massenimport:
+                if ergebnis["artikel"] or ergebnis["geloescht"]:
+                    if bei_fortschritt:
+                        bei_fortschritt(anteil[0], "Suchindex wird aufgebaut")
+                    verbindung.execute("INSERT INTO artikel_text (artikel_text) VALUES ('rebuild')")
+                verbindung.executescript(_FTS_SCHEMA)
+        
+        verbindung.execute(
+            "INSERT INTO importe (datei, lieferant, format, artikel, preise, zeitpunkt) VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.basename(pfad), lieferant, format, ergebnis["artikel"], ergebnis["preise"], jetzt))
+        verbindung.commit()
+        
+        ergebnis["sekunden"] = round(time.perf_counter() - start, 2)
+        if bei_fortschritt:
+            bei_fortschritt(1.0, f"{ergebnis['artikel']} Artikel, {ergebnis['preise']} Preise übernommen")
+        return ergebnis
+
+
+def zusammenfassung(ergebnis: Dict[str, Any]) -> str:
+    """Text für Meldungen und Konsole"""
+    zeilen = [
+        f"Lieferant: {ergebnis['lieferant']}",
+        f"Artikel übernommen: {ergebnis['artikel']}",
+        f"Preise aktualisiert: {ergebnis['preise'] - ergebnis['unbekannt']}",
+    ]
+    if ergebnis["unbekannt"]:
+        zeilen.append(f"Preisänderungen ohne Artikel: {ergebnis['unbekannt']}")
+    if ergebnis["geloescht"]:
+        zeilen.append(f"Gelöscht: {ergebnis['geloescht']}")
+    zeilen.append(f"Dauer: {ergebnis['sekunden']:.1f} s")
+    if ergebnis["abgebrochen"]:
+        zeilen.append("Der Import wurde abgebrochen.")
+    return "\n".join(zeilen)
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lieferantenkataloge (Datanorm, BMEcat) importieren und durchsuchen")
+    parser.add_argument("--katalog", help="Pfad der Katalogdatenbank (Standard: im Datenverzeichnis)")
+    parser.add_argument("--config", default="config/config.json", help="Pfad der Konfiguration")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+    imp = befehle.add_parser("import", help="Katalog- oder Preisdatei importieren")
+    imp.add_argument("dateien", nargs="+")
+    imp.add_argument("--lieferant", help="Name des Lieferanten (Standard: Ordnername bei Datanorm, "
+                     "Angabe in der Datei bei BMEcat)")
+    imp.add_argument("--kodierung", default="cp850", help="Kodierung der Datanorm-Dateien")
+    suche = befehle.add_parser("suche", help="Artikel suchen")
+    suche.add_argument("text")
+    suche.add_argument("--anzahl", type=int, default=STANDARD_TREFFER)
+    args = parser.parse_args(argumente)
+    
+    pfad = args.katalog
+    if not pfad:
+        from adapter.datenadapter import DatenAdapter
+        pfad = katalog_pfad(DatenAdapter(args.config).get_daten_pfad())
+    katalog = Katalog(pfad)
+    
+    if args.befehl == "suche":
+        start = time.perf_counter()
+        treffer = katalog.suche(args.text, args.anzahl)
+        for artikel in treffer:
+            print(f"{artikel['artikelnummer']:<20} {artikel['kurztext'][:50]:<50} "
+                  f"{artikel['preis']:>10.2f} €/{artikel['einheit']}  ({artikel['lieferant']})")
+        print(f"{len(treffer)} Treffer in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+        return 0
+    
+    for datei in args.dateien:
+        try:
+            optionen = {"kodierung": args.kodierung} if erkenne_format(datei) == "datanorm" else {}
+            ergebnis = katalog.importiere(datei, args.lieferant, **optionen)
+        except (KatalogFehler, OSError, sqlite3.Error) as e:
+            print(f"Fehler bei {datei}: {e}", file=sys.stderr)
+            return 1
+        print(f"{datei}:\n{zusammenfassung(ergebnis)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
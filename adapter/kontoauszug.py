@@ -0,0 +1,545 @@
+"""
+Kontoauszug-Import (CAMT.053, MT940) mit automatischer Zuordnung der Zahlungseingänge
+
+Die Auszüge werden als Datenstrom gelesen (CAMT mit iterparse, MT940
+zeilenweise, auch mehrere Auszüge in einer ZIP-Datei). Jede Gutschrift wird
+über zwei Hash-Indizes der offenen Rechnungen zugeordnet:
+
+1. Rechnungsnummern im Verwendungszweck (auch ohne Präfix, z.B. "1042" für
+   "RE1042", oder über einen Zeilenumbruch getrennt)
+2. exakter offener Betrag, eingegrenzt über den Namen des Auftraggebers
+
+Als Rückfall zählt auch der offene Betrag abzüglich Kundenskonto. Eindeutige
+Treffer mit passendem Betrag werden gebucht (Manager.update_rechnungen, jede
+Auftragsdatei einmal), alles andere landet in der Klärungsliste
+(KLAERUNG_DATEI im Datenverzeichnis). Umsätze, deren Referenz schon an einer
+Rechnung vermerkt ist, werden übersprungen; ein Auszug kann also mehrfach
+importiert werden.
+"""
+import argparse
+import difflib
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import sys
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+
+KLAERUNG_DATEI = "zahlungsklaerung.json"
+MIN_ZIFFERN = 4  # Nummern ohne Präfix erst ab dieser Länge (sonst zu viele Zufallstreffer)
+NAMEN_AEHNLICHKEIT = 0.8
+
+_TOKEN = re.compile(r"[A-Z0-9]+(?:[-/.][A-Z0-9]+)*")
+_NICHT_ALNUM = re.compile(r"[^A-Z0-9]")
+_NAMENSZUSATZ = {"GMBH", "AG", "KG", "OHG", "UG", "GBR", "EK", "CO", "UND", "HERR", "FRAU", "DR"}
+
+
+class KontoauszugFehler(Exception):
+    """Die Datei ist kein lesbarer Kontoauszug"""
+    pass
+
+
+def _umsatz(datum: date, betrag: Decimal, gutschrift: bool, name: str, text: str, referenz: str) -> Dict[str, Any]:
+    text = " ".join(text.split())
+    if not referenz:
+        # Ohne Bankreferenz: Schlüssel aus den Inhalten (für den Schutz vor Doppelbuchungen)
+        referenz = "H" + hashlib.sha1(f"{datum}|{betrag}|{name}|{text}".encode("utf-8")).hexdigest()[:16]
+    return {"datum": datum, "betrag": betrag, "gutschrift": gutschrift, "name": " ".join(name.split()),
+            "text": text, "referenz": referenz}
+
+
+# --- CAMT.053 ----------------------------------------------------------------
+
+def _lokal(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _finde(element, *pfad: str):
+    """Erstes Element entlang eines Pfads lokaler Namen (namensraumunabhängig)"""
+    for name in pfad:
+        if element is None:
+            return None
+        element = next((kind for kind in element if _lokal(kind.tag) == name), None)
+    return element
+
+
+def _finde_text(element, *pfad: str) -> str:
+    gefunden = _finde(element, *pfad)
+    return (gefunden.text or "").strip() if gefunden is not None else ""
+
+
+def _camt_datum(ntry) -> date:
+    for feld in ("BookgDt", "ValDt"):
+        text = _finde_text(ntry, feld, "Dt") or _finde_text(ntry, feld, "DtTm")[:10]
+        if text:
+            return date.fromisoformat(text[:10])
+    raise KontoauszugFehler("Buchung ohne Datum im CAMT-Auszug")
+
+
+def _camt_verwendungszweck(element) -> str:
+    rmt = _finde(element, "RmtInf")
+    if rmt is None:
+        return ""
+    teile = [(kind.text or "") for kind in rmt if _lokal(kind.tag) == "Ustrd"]
+    for strd in (kind for kind in rmt if _lokal(kind.tag) == "Strd"):
+        teile.append(_finde_text(strd, "CdtrRefInf", "Ref"))
+        teile.extend((kind.text or "") for kind in strd if _lokal(kind.tag) == "AddtlRmtInf")
+    return " ".join(teile)
+
+
+def lese_camt(datei: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Umsätze eines CAMT.053-Auszugs (Sammelbuchungen mit Einzelumsätzen werden aufgelöst)"""
+    for ereignis, element in iterparse(datei, events=("end",)):
+        if _lokal(element.tag) != "Ntry":
+            continue
+        gutschrift = _finde_text(element, "CdtDbtInd") == "CRDT"
+        if _finde_text(element, "RvslInd").lower() == "true":
+            gutschrift = not gutschrift
+        datum = _camt_datum(element)
+        eintrag_referenz = _finde_text(element, "AcctSvcrRef") or _finde_text(element, "NtryRef")
+        details = [tx for dtls in element if _lokal(dtls.tag) == "NtryDtls"
+                   for tx in dtls if _lokal(tx.tag) == "TxDtls"]
+        # Einzelumsätze nur auflösen, wenn jeder einen eigenen Betrag hat
+        if len(details) > 1 and all(_finde(tx, "Amt") is not None or _finde(tx, "AmtDtls") is not None
+                                    for tx in details):
+            for nummer, tx in enumerate(details, start=1):
+                betrag = _finde_text(tx, "Amt") or _finde_text(tx, "AmtDtls", "TxAmt", "Amt")
+                partei = "Dbtr" if gutschrift else "Cdtr"
+                yield _umsatz(datum, Decimal(betrag), gutschrift,
+                              _finde_text(tx, "RltdPties", partei, "Nm") or _finde_text(tx, "RltdPties", partei, "Pty", "Nm"),
+                              _camt_verwendungszweck(tx),
+                              _finde_text(tx, "Refs", "AcctSvcrRef") or
+                              (f"{eintrag_referenz}/{nummer}" if eintrag_referenz else ""))
+        else:
+            tx = details[0] if details else element
+            partei = "Dbtr" if gutschrift else "Cdtr"
+            yield _umsatz(datum, Decimal(_finde_text(element, "Amt")), gutschrift,
+                          _finde_text(tx, "RltdPties", partei, "Nm") or _finde_text(tx, "RltdPties", partei, "Pty", "Nm"),
+                          _camt_verwendungszweck(tx) or _finde_text(element, "AddtlNtryInf"),
+                          eintrag_referenz or _finde_text(tx, "Refs", "EndToEndId"))
+        element.clear()
+
+
+# --- MT940 -------------------------------------------------------------------
+
+_MT940_61 = re.compile(r"^(\d{6})(\d{4})?(R?[CD])[A-Z]?(\d+,\d*)N?(.{3})?([^/]*)(?://(.*))?")
+
+
+def _mt940_86(text: str) -> Tuple[str, str]:
+    """Verwendungszweck und Name aus Feld 86 (strukturiert mit ?-Unterfeldern oder frei)"""
+    if len(text) > 3 and text[3] == "?":
+        felder: Dict[str, List[str]] = {}
+        for teil in text[4:].split("?"):
+            if len(teil) >= 2:
+                felder.setdefault(teil[:2], []).append(teil[2:])
+        zweck = "".join(f for code in [str(n) for n in range(20, 30)] + [str(n) for n in range(60, 64)]
+                        for f in felder.get(code, []))
+        name = "".join(felder.get("32", []) + felder.get("33", []))
+        return zweck, name
+    return text, ""
+
+
+def _mt940_felder(datei: IO[str]) -> Iterator[Tuple[str, str]]:
+    """(Feldkennung, Inhalt) je Feld; Folgezeilen werden angehängt, "-" beendet einen Auszug"""
+    feld, inhalt = None, []
+    for zeile in datei:
+        zeile = zeile.rstrip("\r\n")
+        treffer = re.match(r"^:(\d{2}[A-Z]?):(.*)", zeile)
+        if treffer is None and zeile.strip() != "-":
+            inhalt.append(zeile)
+            continue
+        if feld is not None:
+            yield feld, "".join(inhalt)
+        feld, inhalt = (treffer.group(1), [treffer.group(2)]) if treffer else (None, [])
+        if feld is None:
+            yield "-", ""
+    if feld is not None:
+        yield feld, "".join(inhalt)
+
+
+def _mt940_umsatz(f61: str, f86: str) -> Optional[Dict[str, Any]]:
+    treffer = _MT940_61.match(f61)
+    if not treffer:
+        return None
+    valuta, _, kennung, betrag, _, referenz, bankreferenz = treffer.groups()
+    zweck, name = _mt940_86(f86)
+    referenz = (referenz or "").strip()
+    referenz = (bankreferenz or "").strip() or ("" if referenz == "NONREF" else referenz)
+    return _umsatz(datetime.strptime(valuta, "%y%m%d").date(), Decimal(betrag.replace(",", ".")),
+                   kennung in ("C", "RD"), name, zweck, f"{valuta}/{referenz}" if referenz else "")
+
+
+def lese_mt940(datei: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Umsätze eines MT940-Auszugs (Feld 61 mit dem folgenden Feld 86)"""
+    offen_61 = None
+    for feld, inhalt in _mt940_felder(datei):
+        if offen_61 is not None and feld != "86":
+            umsatz = _mt940_umsatz(offen_61, "")
+            if umsatz:
+                yield umsatz
+            offen_61 = None
+        if feld == "61":
+            offen_61 = inhalt
+        elif feld == "86" and offen_61 is not None:
+            umsatz = _mt940_umsatz(offen_61, inhalt)
+            offen_61 = None
+            if umsatz:
+                yield umsatz
+    if offen_61 is not None:
+        umsatz = _mt940_umsatz(offen_61, "")
+        if umsatz:
+            yield umsatz
+
+
+def _lese_strom(name: str, datei: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    anfang = datei.peek(64)[:64] if hasattr(datei, "peek") else b""
+    if anfang.lstrip(b"\xef\xbb\xbf \r\n\t").startswith(b"<"):
+        yield from lese_camt(datei)
+    elif anfang.lstrip().startswith(b":") or anfang.lstrip().startswith(b"{") or name.lower().endswith((".sta", ".mt940", ".940", ".txt")):
+        yield from lese_mt940(io.TextIOWrapper(datei, encoding="cp1252", errors="replace"))
+    else:
+        raise KontoauszugFehler(f"{name}: weder CAMT.053 noch MT940")
+
+
+def lese_umsaetze(pfad: str) -> Iterator[Dict[str, Any]]:
+    """Umsätze einer Auszugsdatei (CAMT.053, MT940 oder ZIP mit mehreren Auszügen)"""
+    try:
+        if zipfile.is_zipfile(pfad):
+            with zipfile.ZipFile(pfad) as archiv:
+                for eintrag in sorted(archiv.namelist()):
+                    if not eintrag.endswith("/"):
+                        with archiv.open(eintrag) as roh:
+                            yield from _lese_strom(eintrag, io.BufferedReader(roh))
+        else:
+            with open(pfad, "rb") as datei:
+                yield from _lese_strom(os.path.basename(pfad), datei)
+    except (ValueError, ArithmeticError) as e:
+        # ParseError ist eine Unterklasse von SyntaxError, Datums-/Betragsfehler ValueError
+        raise KontoauszugFehler(f"{os.path.basename(pfad)}: {e}") from e
+    except SyntaxError as e:
+        raise KontoauszugFehler(f"{os.path.basename(pfad)}: kein gültiges XML ({e})") from e
+
+
+# --- Zuordnung ---------------------------------------------------------------
+
+def _normalisiere(text: str) -> str:
+    return _NICHT_ALNUM.sub("", text.upper())
+
+
+def _namens_tokens(name: str) -> Set[str]:
+    return {t for t in re.findall(r"[A-ZÄÖÜ]{2,}", name.upper()) if t not in _NAMENSZUSATZ}
+
+
+def _cent(betrag) -> int:
+    return int((Decimal(str(betrag)) * 100).quantize(Decimal(1)))
+
+
+class Zuordnung:
+    """
+    Hash-Indizes der offenen Rechnungen für die Zuordnung von Zahlungseingängen
+    
+    Arbeitet auf einer Momentaufnahme (rechnungen_fuer_zuordnung()), damit die
+    Zuordnung außerhalb des Tk-Threads laufen kann.
+    """
+    
+    def __init__(self, offene: List[Dict[str, Any]], gebuchte_referenzen: Iterable[str] = ()):
+        self.offene = {r["id"]: r for r in offene}
+        self.gebucht: Set[str] = set(gebuchte_referenzen)
+        self.nach_nummer: Dict[str, List[str]] = {}
+        self.nach_betrag: Dict[int, List[str]] = {}
+        for r in offene:
+            nummer = _normalisiere(r["rechnungsnummer"])
+            schluessel = {nummer}
+            ziffern = re.sub(r"^[A-Z]+", "", nummer)
+            if len(ziffern) >= MIN_ZIFFERN and ziffern != nummer:
+                schluessel.add(ziffern)  # "RE1042" auch als "1042"
+            for s in schluessel:
+                self.nach_nummer.setdefault(s, []).append(r["id"])
+            for schluessel in self._betrag_schluessel(r):
+                self.nach_betrag.setdefault(schluessel, []).append(r["id"])
+    
+    def _nummern_im_text(self, text: str) -> List[str]:
+        """Rechnungen, deren Nummer im Verwendungszweck steht (auch über Leer-/Zeilenumbrüche hinweg)"""
+        tokens = [_normalisiere(t) for t in _TOKEN.findall(text.upper())]
+        gefunden: Dict[str, None] = {}
+        for i, token in enumerate(tokens):
+            for kandidat in (token, token + tokens[i + 1] if i + 1 < len(tokens) else None):
+                for rechnung_id in self.nach_nummer.get(kandidat or "", ()):
+                    gefunden[rechnung_id] = None
+        return list(gefunden)
+    
+    def _name_passt(self, rechnung_id: str, name: str) -> bool:
+        kunde = self.offene[rechnung_id].get("kunde", "")
+        if not name or not kunde:
+            return False
+        a, b = _namens_tokens(name), _namens_tokens(kunde)
+        if a and b and (a <= b or b <= a):
+            return True
+        return difflib.SequenceMatcher(None, _normalisiere(name), _normalisiere(kunde)).ratio() >= NAMEN_AEHNLICHKEIT
+    
+    def ordne_zu(self, umsatz: Dict[str, Any]) -> Tuple[str, List[str], str]:
+        """
+        Ordnet einen Umsatz zu
+        
+        Returns:
+            (ergebnis, Rechnungs-IDs, Grund) mit ergebnis 'gebucht' (sicher), 'klaeren',
+            'doppelt' (schon gebucht) oder 'ignoriert' (Lastschrift)
+        """
+        if not umsatz["gutschrift"]:
+            return "ignoriert", [], "Belastung"
+        if umsatz["referenz"] in self.gebucht:
+            return "doppelt", [], "bereits gebucht"
+        cent = _cent(umsatz["betrag"])
+        
+        nummern = self._nummern_im_text(umsatz["text"])
+        if nummern:
+            if sum(_cent(self.offene[i]["offen"]) for i in nummern) == cent:
+                return "gebucht", nummern, "Rechnungsnummer und Betrag"
+            # Skonto auf eine einzelne Rechnung
+            if len(nummern) == 1 and nummern[0] in self.nach_betrag.get(cent, ()):
+                return "gebucht", nummern, "Rechnungsnummer und Betrag abzüglich Skonto"
+            passend = [i for i in nummern if _cent(self.offene[i]["offen"]) == cent]
+            if len(passend) == 1:
+                return "gebucht", passend, "Rechnungsnummer und Betrag"
+            return "klaeren", nummern, "Betrag weicht vom offenen Betrag ab"
+        
+        kandidaten = list(self.nach_betrag.get(cent, []))
+        if not kandidaten:
+            return "klaeren", [], "keine passende Rechnung"
+        mit_name = [i for i in kandidaten if self._name_passt(i, umsatz["name"])]
+        if len(mit_name) == 1:
+            return "gebucht", mit_name, "Betrag und Auftraggeber"
+        if len(kandidaten) == 1:
+            return "klaeren", kandidaten, "nur Betrag stimmt überein"
+        return "klaeren", mit_name or kandidaten, "mehrere Rechnungen mit diesem Betrag"
+    
+    def vermerke(self, umsatz: Dict[str, Any], rechnung_ids: List[str]):
+        """Nimmt zugeordnete Rechnungen aus den Indizes (eine Rechnung wird nur einmal automatisch bezahlt)"""
+        self.gebucht.add(umsatz["referenz"])
+        for rechnung_id in rechnung_ids:
+            rechnung = self.offene.get(rechnung_id)
+            if rechnung is None:
+                continue
+            for schluessel in self._betrag_schluessel(rechnung):
+                ids = self.nach_betrag.get(schluessel)
+                if ids and rechnung_id in ids:
+                    ids.remove(rechnung_id)
+            rechnung["offen"] = 0.0
+    
+    @staticmethod
+    def _betrag_schluessel(rechnung: Dict[str, Any]) -> List[int]:
+        """Offener Betrag in Cent, bei Kundenskonto auch der Betrag nach Abzug (ab- und aufgerundet)"""
+        schluessel = [_cent(rechnung["offen"])]
+        if rechnung.get("skonto"):
+            nach_abzug = Decimal(str(rechnung["offen"])) * (100 - Decimal(str(rechnung["skonto"])))
+            schluessel.extend(sorted({math.floor(nach_abzug), math.ceil(nach_abzug)} - set(schluessel)))
+        return schluessel
+
+
+def rechnungen_fuer_zuordnung(manager) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """
+    Momentaufnahme der offenen Rechnungen und der bereits gebuchten Umsatzreferenzen
+    
+    Returns:
+        (offene Rechnungen als {'id', 'rechnungsnummer', 'offen', 'kunde', 'skonto'}, Referenzen)
+    """
+    kunden = {k.id: k for k in manager.get_kunden()}
+    offene, referenzen = [], set()
+    for rechnung in manager.get_rechnungen():
+        referenzen.update(z.get("referenz") for z in rechnung.zahlungen if z.get("referenz"))
+        if rechnung.status in ("Bezahlt", "Storniert"):
+            continue
+        offen = rechnung.offener_betrag
+        if offen <= 0:
+            continue
+        kunde = kunden.get(rechnung.kunde_id)
+        offene.append({"id": rechnung.id, "rechnungsnummer": rechnung.rechnungsnummer, "offen": offen,
+                       "kunde": kunde.get_vollstaendiger_name() if kunde else "",
+                       "skonto": getattr(kunde, "skonto", 0) or 0})
+    return offene, referenzen
+
+
+def gleiche_ab(pfade: List[str], offene: List[Dict[str, Any]], referenzen: Set[str],
+               bei_fortschritt: Optional[Callable[[float, str], None]] = None,
+               abgebrochen: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """
+    Liest die Auszüge und ordnet alle Gutschriften zu (ohne etwas zu ändern)
+    
+    Returns:
+        {'umsaetze', 'gutschriften', 'doppelt', 'buchungen': [(umsatz, [ids], grund)],
+         'klaerung': [(umsatz, [ids], grund)]}
+    """
+    zuordnung = Zuordnung(offene, referenzen)
+    ergebnis = {"umsaetze": 0, "gutschriften": 0, "doppelt": 0, "buchungen": [], "klaerung": []}
+    for nummer, pfad in enumerate(pfade):
+        for umsatz in lese_umsaetze(pfad):
+            ergebnis["umsaetze"] += 1
+            art, ids, grund = zuordnung.ordne_zu(umsatz)
+            if art == "ignoriert":
+                continue
+            ergebnis["gutschriften"] += 1
+            if art == "doppelt":
+                ergebnis["doppelt"] += 1
+            elif art == "gebucht":
+                zuordnung.vermerke(umsatz, ids)
+                ergebnis["buchungen"].append((umsatz, ids, grund))
+            else:
+                zuordnung.gebucht.add(umsatz["referenz"])
+                ergebnis["klaerung"].append((umsatz, ids, grund))
+            if abgebrochen and ergebnis["umsaetze"] % 1000 == 0 and abgebrochen():
+                raise KontoauszugFehler("Import abgebrochen")
+        if bei_fortschritt:
+            bei_fortschritt((nummer + 1) / len(pfade), f"{ergebnis['umsaetze']} Umsätze gelesen")
+    return ergebnis
+
+
+def _zahlungsdatum(umsatz: Dict[str, Any]) -> datetime:
+    datum = umsatz["datum"]
+    return datum if isinstance(datum, datetime) else datetime.combine(datum, datetime.min.time())
+
+
+def buche(manager, buchungen: List[Tuple[Dict[str, Any], List[str], str]]
+          ) -> Tuple[int, List[Tuple[Dict[str, Any], List[str], str]]]:
+    """
+    Vermerkt die Zahlungen an den Rechnungen und speichert sie in einem Durchgang
+    
+    Bei Sammelüberweisungen erhält jede Rechnung ihren offenen Betrag; bei
+    Skonto wird der gezahlte Betrag vermerkt und die Rechnung als bezahlt markiert.
+    Wurde eine Rechnung seit der Zuordnung anderweitig erledigt, bleibt der
+    Umsatz ungebucht.
+    
+    Returns:
+        (Anzahl der geänderten Rechnungen, nicht gebuchte Einträge für die Klärungsliste)
+    """
+    geaendert = {}
+    nicht_gebucht = []
+    for umsatz, ids, grund in buchungen:
+        rechnungen = [manager.get_rechnung(i) for i in ids]
+        if any(r is None or r.status in ("Bezahlt", "Storniert") for r in rechnungen):
+            nicht_gebucht.append((umsatz, ids, "Rechnung inzwischen erledigt oder gelöscht"))
+            continue
+        rest = Decimal(str(umsatz["betrag"]))
+        for nummer, rechnung in enumerate(rechnungen, start=1):
+            offen = Decimal(str(rechnung.offener_betrag))
+            betrag = rest if nummer == len(rechnungen) else min(offen, rest)
+            rest -= betrag
+            rechnung.add_zahlung(_zahlungsdatum(umsatz), float(betrag), umsatz["referenz"],
+                                 f"{umsatz['name']}: {umsatz['text']}"[:200])
+            if len(rechnungen) == 1 and betrag < offen and grund != "manuell":
+                rechnung.status = "Bezahlt"  # Skonto
+            geaendert[rechnung.id] = rechnung
+    manager.update_rechnungen(list(geaendert.values()))
+    return len(geaendert), nicht_gebucht
+
+
+# --- Klärungsliste -----------------------------------------------------------
+
+def _klaerung_pfad(adapter) -> str:
+    return os.path.join(adapter.get_daten_pfad(), KLAERUNG_DATEI)
+
+
+def lade_klaerung(adapter) -> List[Dict[str, Any]]:
+    """
+    Klärungsliste ({'datum', 'betrag', 'name', 'text', 'referenz', 'kandidaten', 'grund'})
+    
+    Ignorierte Umsätze bleiben mit 'ignoriert' in der Liste, damit sie beim
+    erneuten Import desselben Auszugs nicht wieder auftauchen.
+    """
+    try:
+        with open(_klaerung_pfad(adapter), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def speichere_klaerung(adapter, eintraege: List[Dict[str, Any]]):
+    """Speichert die Klärungsliste (atomar)"""
+    pfad = _klaerung_pfad(adapter)
+    temp_pfad = f"{pfad}.{os.getpid()}.tmp"
+    with open(temp_pfad, "w", encoding="utf-8") as f:
+        json.dump(eintraege, f, ensure_ascii=False, indent=2)
+    os.replace(temp_pfad, pfad)
+
+
+def ergaenze_klaerung(adapter, klaerung: List[Tuple[Dict[str, Any], List[str], str]]) -> int:
+    """Hängt neue ungeklärte Umsätze an die Klärungsliste an (ohne Duplikate) und gibt die Anzahl offener Einträge zurück"""
+    eintraege = lade_klaerung(adapter)
+    vorhanden = {e["referenz"] for e in eintraege}
+    for umsatz, ids, grund in klaerung:
+        if umsatz["referenz"] in vorhanden:
+            continue
+        eintraege.append({"datum": umsatz["datum"].isoformat(), "betrag": str(umsatz["betrag"]),
+                          "name": umsatz["name"], "text": umsatz["text"], "referenz": umsatz["referenz"],
+                          "kandidaten": ids, "grund": grund})
+    speichere_klaerung(adapter, eintraege)
+    return sum(1 for e in eintraege if not e.get("ignoriert"))
+
+
+def klaerung_als_umsatz(eintrag: Dict[str, Any]) -> Dict[str, Any]:
+    """Eintrag der Klärungsliste als Umsatz (für buche())"""
+    return {**eintrag, "datum": date.fromisoformat(eintrag["datum"]), "betrag": Decimal(eintrag["betrag"]),
+            "gutschrift": True}
+
+
+def uebernehme(manager, ergebnis: Dict[str, Any]) -> int:
+    """
+    Bucht die Zuordnungen aus gleiche_ab() und ergänzt die Klärungsliste
+    
+    Returns:
+        Anzahl der offenen Einträge der Klärungsliste
+    """
+    ergebnis["rechnungen"], nicht_gebucht = buche(manager, ergebnis["buchungen"])
+    uebrig = {id(umsatz) for umsatz, _, _ in nicht_gebucht}
+    ergebnis["buchungen"] = [b for b in ergebnis["buchungen"] if id(b[0]) not in uebrig]
+    ergebnis["klaerung"].extend(nicht_gebucht)
+    ergebnis["offen_zu_klaeren"] = ergaenze_klaerung(manager.adapter, ergebnis["klaerung"])
+    return ergebnis["offen_zu_klaeren"]
+
+
+def importiere(manager, pfade: List[str], probelauf: bool = False) -> Dict[str, Any]:
+    """Liest, ordnet zu, bucht eindeutige Zahlungen und ergänzt die Klärungsliste (für den Aufruf ohne Oberfläche)"""
+    offene, referenzen = rechnungen_fuer_zuordnung(manager)
+    ergebnis = gleiche_ab(pfade, offene, referenzen)
+    if not probelauf:
+        uebernehme(manager, ergebnis)
+        manager.warte_auf_speicherung()
+    return ergebnis
+
+
+def zusammenfassung(ergebnis: Dict[str, Any], probelauf: bool = False) -> str:
+    """Text für Meldungen und Konsolenausgabe"""
+    summe = sum((u["betrag"] for u, _, _ in ergebnis["buchungen"]), Decimal(0))
+    zeilen = [f"{ergebnis['umsaetze']} Umsätze gelesen, davon {ergebnis['gutschriften']} Gutschriften",
+              f"{len(ergebnis['buchungen'])} Zahlungen {'zuordenbar' if probelauf else 'gebucht'} ({summe:.2f} €)",
+              f"{len(ergebnis['klaerung'])} Zahlungen zu klären"]
+    if ergebnis["doppelt"]:
+        zeilen.append(f"{ergebnis['doppelt']} bereits früher importiert")
+    return "\n".join(zeilen)
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kontoauszüge (CAMT.053, MT940) importieren und Zahlungen zuordnen")
+    parser.add_argument("dateien", nargs="+", help="Auszugsdateien (XML, STA/MT940 oder ZIP)")
+    parser.add_argument("--config", default="config/config.json", help="Pfad der Konfiguration")
+    parser.add_argument("--probelauf", action="store_true", help="Nur zuordnen, nichts buchen")
+    args = parser.parse_args(argumente)
+    
+    from adapter.manager import DatenManager
+    manager = DatenManager(args.config)
+    try:
+        ergebnis = importiere(manager, args.dateien, args.probelauf)
+    except (KontoauszugFehler, OSError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    print(zusammenfassung(ergebnis, args.probelauf))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
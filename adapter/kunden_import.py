@@ -0,0 +1,506 @@
+"""
+Massenimport von Kunden aus CSV- und Excel-Dateien (XLSX)
+
+Die Datei wird zeilenweise gelesen, nicht vollständig in den Speicher geladen.
+Jede Zeile wird über die Spaltenzuordnung in die Felder eines Kunden
+übertragen, geprüft und gegen einen Index der vorhandenen Kunden (und der
+bereits importierten Zeilen) auf Dubletten abgeglichen. Das Lesen und Prüfen
+(pruefe_datei) fasst den DatenManager nicht an und kann im Hintergrund laufen;
+übernommen wird danach im Tk-Thread (uebernehme) in Blöcken zu BLOCK_GROESSE
+Kunden über DatenManager.add_kunden(), die Kundendatei wird also je Block
+einmal geschrieben statt je Kunde.
+
+XLSX-Dateien werden direkt aus dem ZIP-Archiv gelesen (erstes Tabellenblatt),
+openpyxl wird dafür nicht benötigt.
+
+Ohne Oberfläche aus dem Projektverzeichnis:
+    python -m adapter.kunden_import kunden.csv [--zuordnung name=Nachname ...] [--probelauf]
+"""
+import argparse
+import codecs
+import csv
+import io
+import os
+import re
+import sys
+import unicodedata
+import zipfile
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+
+from model.kunde import Kunde
+
+BLOCK_GROESSE = 2000
+MAX_MELDUNGEN = 200  # Gespeicherte Fehlermeldungen, danach wird nur noch gezählt
+
+# Kundenfeld -> übliche Spaltenüberschriften (normalisiert, siehe _normalisiere)
+SPALTEN = {
+    "name": ["name", "nachname", "familienname", "kundenname", "ansprechpartner"],
+    "vorname": ["vorname"],
+    "firma": ["firma", "firmenname", "unternehmen", "firmierung", "name1", "company"],
+    "strasse": ["strasse", "str", "strasse und hausnummer", "anschrift", "adresse", "street"],
+    "plz": ["plz", "postleitzahl", "zip"],
+    "ort": ["ort", "stadt", "wohnort", "city"],
+    "telefon": ["telefon", "tel", "telefonnummer", "phone", "mobil"],
+    "email": ["email", "e mail", "mail", "e mail adresse", "emailadresse"],
+    "ust_id": ["ust id", "ustid", "ust idnr", "ust id nr", "umsatzsteuer id", "vat id"],
+    "notizen": ["notizen", "notiz", "bemerkung", "bemerkungen", "kommentar"],
+    "skonto": ["skonto"],
+    "abschlag": ["abschlag"],
+    "rabatt": ["rabatt"],
+    "kunde_id": ["id", "kunden id", "kundennummer", "kundennr", "kd nr"],
+}
+ZAHLENFELDER = ("skonto", "abschlag", "rabatt")
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+class ImportFehler(Exception):
+    """Die Importdatei kann nicht gelesen werden"""
+    pass
+
+
+def _normalisiere(text: Any) -> str:
+    """Kleinbuchstaben ohne Umlaute und Satzzeichen, für Spaltenköpfe und Dublettenschlüssel"""
+    if text is None:
+        return ""
+    text = str(text).replace("ß", "ss")
+    zerlegt = unicodedata.normalize("NFKD", text)
+    text = "".join(z for z in zerlegt if not unicodedata.combining(z)).casefold()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text).split())
+
+
+# --- Lesen -----------------------------------------------------------------
+
+class _Zaehler(io.RawIOBase):
+    """Liest aus einer Binärdatei und merkt sich die gelesenen Bytes (für den Fortschritt)"""
+    
+    def __init__(self, datei):
+        self.datei = datei
+        self.gelesen = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, puffer) -> int:
+        daten = self.datei.read(len(puffer))
+        puffer[:len(daten)] = daten
+        self.gelesen += len(daten)
+        return len(daten)
+
+
+def _erkenne_kodierung(anfang: bytes) -> str:
+    if anfang.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        anfang.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # Abgeschnittenes Mehrbyte-Zeichen am Ende der Probe ist kein Fehler
+        if e.start >= len(anfang) - 3:
+            return "utf-8"
+        return "cp1252"
+
+
+def lese_csv(pfad: str, trennzeichen: Optional[str] = None, kodierung: Optional[str] = None,
+             bei_fortschritt: Optional[Callable[[float], None]] = None) -> Iterator[List[str]]:
+    """
+    Liest eine CSV-Datei zeilenweise (erste Zeile = Spaltenköpfe)
+    
+    Kodierung (UTF-8 mit/ohne BOM oder Windows-1252, wie von Excel gespeichert)
+    und Trennzeichen werden erkannt, wenn sie nicht angegeben sind.
+    """
+    groesse = os.path.getsize(pfad) or 1
+    with open(pfad, "rb") as roh:
+        probe = roh.read(64 * 1024)
+        roh.seek(0)
+        kodierung = kodierung or _erkenne_kodierung(probe)
+        if trennzeichen is None:
+            text = probe.decode(kodierung, errors="ignore")
+            try:
+                trennzeichen = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=";,\t|").delimiter
+            except csv.Error:
+                trennzeichen = ";"
+        zaehler = _Zaehler(roh)
+        text_datei = io.TextIOWrapper(io.BufferedReader(zaehler), encoding=kodierung, newline="")
+        for nummer, zeile in enumerate(csv.reader(text_datei, delimiter=trennzeichen)):
+            if bei_fortschritt and nummer % 1000 == 0:
+                bei_fortschritt(zaehler.gelesen / groesse)
+            yield zeile
+
+
+def _spaltennummer(zelle: str) -> int:
+    """'C7' -> 2"""
+    nummer = 0
+    for zeichen in zelle:
+        if not zeichen.isalpha():
+            break
+        nummer = nummer * 26 + ord(zeichen.upper()) - ord("A") + 1
+    return nummer - 1
+
+
+def _erstes_blatt(archiv: zipfile.ZipFile) -> str:
+    """Pfad des ersten Tabellenblatts im Archiv"""
+    try:
+        with archiv.open("xl/workbook.xml") as f:
+            blatt = next(e for _, e in iterparse(f) if e.tag == _XLSX_NS + "sheet")
+        rel_id = blatt.get(_REL_NS + "id")
+        with archiv.open("xl/_rels/workbook.xml.rels") as f:
+            for _, e in iterparse(f):
+                if e.get("Id") == rel_id:
+                    ziel = e.get("Target").lstrip("/")
+                    return ziel if ziel.startswith("xl/") else "xl/" + ziel
+    except (KeyError, StopIteration):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def lese_xlsx(pfad: str, bei_fortschritt: Optional[Callable[[float], None]] = None) -> Iterator[List[str]]:
+    """Liest das erste Tabellenblatt einer XLSX-Datei zeilenweise"""
+    try:
+        archiv = zipfile.ZipFile(pfad)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ImportFehler(f"Keine gültige Excel-Datei (XLSX): {e}") from e
+    with archiv:
+        texte: List[str] = []
+        if "xl/sharedStrings.xml" in archiv.namelist():
+            with archiv.open("xl/sharedStrings.xml") as f:
+                for _, e in iterparse(f):
+                    if e.tag == _XLSX_NS + "si":
+                        texte.append("".join(t.text or "" for t in e.iter(_XLSX_NS + "t")))
+                        e.clear()
+        blatt = _erstes_blatt(archiv)
+        try:
+            groesse = archiv.getinfo(blatt).file_size or 1
+        except KeyError as e:
+            raise ImportFehler(f"Tabellenblatt nicht gefunden: {blatt}") from e
+        with archiv.open(blatt) as f:
+            nummer = 0
+            for _, e in iterparse(f):
+                if e.tag != _XLSX_NS + "row":
+                    continue
+                zeile: List[str] = []
+                for zelle in e.iter(_XLSX_NS + "c"):
+                    spalte = _spaltennummer(zelle.get("r", "")) if zelle.get("r") else len(zeile)
+                    typ = zelle.get("t")
+                    if typ == "inlineStr":
+                        wert = "".join(t.text or "" for t in zelle.iter(_XLSX_NS + "t"))
+                    else:
+                        v = zelle.find(_XLSX_NS + "v")
+                        wert = v.text if v is not None and v.text is not None else ""
+                        if typ == "s" and wert:
+                            wert = texte[int(wert)]
+                        elif typ is None and wert.endswith(".0"):
+                            wert = wert[:-2]  # Ganzzahlen speichert Excel als Gleitkommazahl
+                    zeile.extend([""] * (spalte - len(zeile)))
+                    zeile.append(wert)
+                e.clear()
+                if bei_fortschritt and nummer % 1000 == 0:
+                    bei_fortschritt(f.tell() / groesse)
+                nummer += 1
+                yield zeile
+
+
+def lese_zeilen(pfad: str, bei_fortschritt: Optional[Callable[[float], None]] = None,
+                **csv_optionen) -> Iterator[List[str]]:
+    """Liest CSV oder XLSX (nach Dateiendung) zeilenweise, die erste Zeile sind die Spaltenköpfe"""
+    if pfad.lower().endswith((".xlsx", ".xlsm")):
+        return lese_xlsx(pfad, bei_fortschritt)
+    if pfad.lower().endswith(".xls"):
+        raise ImportFehler("Das alte Excel-Format (.xls) wird nicht unterstützt. "
+                           "Bitte als .xlsx oder CSV speichern.")
+    return lese_csv(pfad, bei_fortschritt=bei_fortschritt, **csv_optionen)
+
+
+def lese_kopfzeile(pfad: str, **csv_optionen) -> List[str]:
+    """Gibt die Spaltenköpfe der Datei zurück"""
+    zeilen = lese_zeilen(pfad, **csv_optionen)
+    try:
+        return [k.strip() for k in next(zeilen)]
+    except StopIteration:
+        return []
+    finally:
+        zeilen.close()
+
+
+# --- Zuordnung und Prüfung -------------------------------------------------
+
+def erkenne_zuordnung(kopfzeile: List[str]) -> Dict[str, str]:
+    """
+    Ordnet den Kundenfeldern die passenden Spalten der Datei zu
+    
+    Returns:
+        Kundenfeld -> Spaltenkopf (nur erkannte Felder)
+    """
+    zuordnung = {}
+    normalisiert = {_normalisiere(k): k for k in kopfzeile if k}
+    for feld, namen in SPALTEN.items():
+        for name in [feld] + namen:
+            if _normalisiere(name) in normalisiert:
+                zuordnung[feld] = normalisiert[_normalisiere(name)]
+                break
+    return zuordnung
+
+
+def _zahl(text: str) -> float:
+    text = text.replace("%", "").strip()
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    return float(text) if text else 0.0
+
+
+def pruefe_zeile(werte: Dict[str, str]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Bereinigt die Werte einer Zeile und prüft sie
+    
+    Returns:
+        (bereinigte Werte, Fehlermeldungen) - die Zeile ist nur ohne Fehler importierbar
+    """
+    daten: Dict[str, Any] = {feld: (wert or "").strip() for feld, wert in werte.items()}
+    fehler = []
+    if not daten.get("name") and not daten.get("firma"):
+        fehler.append("Name oder Firma fehlt")
+    
+    plz = daten.get("plz", "")
+    if plz:
+        # Excel verliert führende Nullen (01067 -> 1067)
+        if plz.isdigit() and len(plz) == 4:
+            plz = "0" + plz
+        if not re.fullmatch(r"[0-9A-Za-z -]{3,10}", plz):
+            fehler.append(f"Ungültige PLZ '{plz}'")
+        daten["plz"] = plz
+    
+    email = daten.get("email", "")
+    if email and not _EMAIL.match(email):
+        fehler.append(f"Ungültige E-Mail-Adresse '{email}'")
+    
+    for feld in ZAHLENFELDER:
+        if daten.get(feld):
+            try:
+                daten[feld] = _zahl(daten[feld])
+            except ValueError:
+                fehler.append(f"{feld.capitalize()} ist keine Zahl: '{daten[feld]}'")
+                daten[feld] = 0.0
+            else:
+                if not 0 <= daten[feld] <= 100:
+                    fehler.append(f"{feld.capitalize()} muss zwischen 0 und 100 % liegen")
+        else:
+            daten[feld] = 0.0
+    return daten, fehler
+
+
+def dubletten_schluessel(kunde) -> Set[str]:
+    """Schlüssel, unter denen ein Kunde als Dublette erkannt wird (Name/Firma mit PLZ, E-Mail)"""
+    def wert(feld):
+        return kunde.get(feld, "") if isinstance(kunde, dict) else getattr(kunde, feld, "")
+    
+    schluessel = set()
+    bezeichnung = _normalisiere(wert("firma")) or _normalisiere(f"{wert('vorname')} {wert('name')}")
+    if bezeichnung:
+        schluessel.add(f"n:{bezeichnung}|{_normalisiere(wert('plz'))}")
+    email = (wert("email") or "").strip().casefold()
+    if email:
+        schluessel.add(f"e:{email}")
+    return schluessel
+
+
+# --- Import ----------------------------------------------------------------
+
+def bestand(manager) -> Tuple[Set[str], Set[str]]:
+    """
+    Dubletten-Schlüssel und IDs der vorhandenen Kunden
+    
+    In der Oberfläche im Tk-Thread aufrufen; pruefe_datei() arbeitet dann im
+    Hintergrund nur mit dieser Momentaufnahme.
+    """
+    bekannt: Set[str] = set()
+    vorhandene_ids: Set[str] = set()
+    for kunde in manager.get_kunden():
+        bekannt |= dubletten_schluessel(kunde)
+        vorhandene_ids.add(kunde.id)
+    return bekannt, vorhandene_ids
+
+
+def pruefe_datei(pfad: str, bestand: Tuple[Set[str], Set[str]], zuordnung: Optional[Dict[str, str]] = None,
+                 block_groesse: int = BLOCK_GROESSE,
+                 bei_fortschritt: Optional[Callable[[float, str], None]] = None,
+                 abgebrochen: Optional[Callable[[], bool]] = None,
+                 **csv_optionen) -> Dict[str, Any]:
+    """
+    Liest und prüft eine CSV- oder XLSX-Datei, ohne den DatenManager anzufassen
+    
+    Args:
+        pfad: Importdatei
+        bestand: Ergebnis von bestand() (wird nicht verändert)
+        zuordnung: Kundenfeld -> Spaltenkopf; fehlende Felder werden automatisch erkannt
+        block_groesse: Kunden je Block (je Block wird die Kundendatei einmal geschrieben)
+        bei_fortschritt: Callback(anteil 0..1, text)
+        abgebrochen: Liefert True, wenn das Lesen abgebrochen werden soll. Die bis
+            dahin geprüften Blöcke bleiben im Ergebnis.
+        **csv_optionen: trennzeichen, kodierung (nur CSV)
+    
+    Returns:
+        Zusammenfassung mit 'zeilen', 'importiert' (übernehmbare Kunden), 'dubletten',
+        'fehlerhaft', 'meldungen' (Liste von (Zeilennummer, Text)), 'abgebrochen'
+        und 'bloecke' (Listen neuer Kunden für uebernehme())
+    """
+    ergebnis = {"zeilen": 0, "importiert": 0, "dubletten": 0, "fehlerhaft": 0,
+                "meldungen": [], "abgebrochen": False, "bloecke": []}
+    
+    def melde(zeile: int, text: str):
+        if len(ergebnis["meldungen"]) < MAX_MELDUNGEN:
+            ergebnis["meldungen"].append((zeile, text))
+    
+    anteil = [0.0]
+    zeilen = lese_zeilen(pfad, bei_fortschritt=lambda a: anteil.__setitem__(0, a), **csv_optionen)
+    try:
+        kopfzeile = [k.strip() for k in next(zeilen, [])]
+        if not any(kopfzeile):
+            raise ImportFehler("Die Datei enthält keine Spaltenköpfe")
+        spalten = {**erkenne_zuordnung(kopfzeile), **(zuordnung or {})}
+        unbekannt = [s for s in spalten.values() if s and s not in kopfzeile]
+        if unbekannt:
+            raise ImportFehler(f"Spalte(n) nicht in der Datei: {', '.join(unbekannt)}")
+        if not spalten.get("name") and not spalten.get("firma"):
+            raise ImportFehler("Weder eine Spalte für den Namen noch für die Firma gefunden")
+        index = {feld: kopfzeile.index(spalte) for feld, spalte in spalten.items() if spalte}
+        
+        bekannt = set(bestand[0])
+        vorhandene_ids = set(bestand[1])
+        
+        # IDs im Format von Kunde._generate_id, je Kunde eine Mikrosekunde weiter
+        # (im Schleifentakt würde datetime.now() dieselbe ID mehrfach liefern)
+        id_basis = datetime.now()
+        block: List[Kunde] = []
+        
+        def schliesse_block():
+            if block:
+                ergebnis["bloecke"].append(list(block))
+            ergebnis["importiert"] += len(block)
+            block.clear()
+        
+        for nummer, zeile in enumerate(zeilen, start=2):
+            if not any(z.strip() for z in zeile):
+                continue
+            ergebnis["zeilen"] += 1
+            werte = {feld: zeile[i] if i < len(zeile) else "" for feld, i in index.items()}
+            daten, fehler = pruefe_zeile(werte)
+            if fehler:
+                ergebnis["fehlerhaft"] += 1
+                melde(nummer, "; ".join(fehler))
+                continue
+            
+            schluessel = dubletten_schluessel(daten)
+            kunde_id = daten.pop("kunde_id", "")
+            if (schluessel & bekannt) or kunde_id in vorhandene_ids:
+                ergebnis["dubletten"] += 1
+                melde(nummer, f"Dublette: {daten.get('firma') or daten.get('name')}")
+                continue
+            bekannt |= schluessel
+            
+            if not kunde_id:
+                kunde_id = f"K{(id_basis + timedelta(microseconds=nummer)).strftime('%Y%m%d%H%M%S%f')}"
+            vorhandene_ids.add(kunde_id)
+            block.append(Kunde(kunde_id=kunde_id, **{"name": "", **daten}))
+            
+            if len(block) >= block_groesse:
+                schliesse_block()
+                if bei_fortschritt:
+                    bei_fortschritt(anteil[0], f"{ergebnis['importiert']} Kunden geprüft")
+                if abgebrochen and abgebrochen():
+                    ergebnis["abgebrochen"] = True
+                    return ergebnis
+        schliesse_block()
+    finally:
+        zeilen.close()
+    
+    if bei_fortschritt:
+        bei_fortschritt(1.0, f"{ergebnis['importiert']} Kunden geprüft")
+    return ergebnis
+
+
+def uebernehme(manager, ergebnis: Dict[str, Any]) -> int:
+    """
+    Übernimmt die Blöcke aus pruefe_datei() über DatenManager.add_kunden()
+    
+    In der Oberfläche im Tk-Thread aufrufen. Entfernt 'bloecke' aus dem Ergebnis
+    und setzt 'importiert' auf die Anzahl der tatsächlich hinzugefügten Kunden.
+    """
+    anzahl = 0
+    for block in ergebnis.pop("bloecke", []):
+        anzahl += manager.add_kunden(block)
+    ergebnis["importiert"] = anzahl
+    return anzahl
+
+
+def importiere(manager, pfad: str, zuordnung: Optional[Dict[str, str]] = None,
+               probelauf: bool = False, block_groesse: int = BLOCK_GROESSE,
+               bei_fortschritt: Optional[Callable[[float, str], None]] = None,
+               **csv_optionen) -> Dict[str, Any]:
+    """Prüft und übernimmt in einem Zug (für den Aufruf ohne Oberfläche), siehe pruefe_datei()"""
+    ergebnis = pruefe_datei(pfad, bestand(manager), zuordnung, block_groesse=block_groesse,
+                            bei_fortschritt=bei_fortschritt, **csv_optionen)
+    if probelauf:
+        ergebnis.pop("bloecke")
+    else:
+        uebernehme(manager, ergebnis)
+    return ergebnis
+
+
+def zusammenfassung(ergebnis: Dict[str, Any], probelauf: bool = False) -> str:
+    """Text für Meldungen und Konsole"""
+    zeilen = [
+        f"Gelesene Zeilen: {ergebnis['zeilen']}",
+        f"{'Importierbar' if probelauf else 'Importiert'}: {ergebnis['importiert']}",
+        f"Dubletten übersprungen: {ergebnis['dubletten']}",
+        f"Fehlerhafte Zeilen: {ergebnis['fehlerhaft']}",
+    ]
+    if ergebnis["abgebrochen"]:
+        zeilen.append("Der Import wurde abgebrochen.")
+    return "\n".join(zeilen)
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kunden aus einer CSV- oder XLSX-Datei importieren")
+    parser.add_argument("datei", help="Importdatei (.csv oder .xlsx)")
+    parser.add_argument("--config", default="config/config.json", help="Pfad der Konfiguration")
+    parser.add_argument("--zuordnung", nargs="+", default=[], metavar="FELD=SPALTE",
+                        help="Spaltenzuordnung, z.B. name=Nachname plz=Postleitzahl")
+    parser.add_argument("--trennzeichen", help="CSV-Trennzeichen (Standard: automatisch)")
+    parser.add_argument("--kodierung", help="CSV-Kodierung (Standard: automatisch)")
+    parser.add_argument("--probelauf", action="store_true", help="Nur prüfen, nichts übernehmen")
+    args = parser.parse_args(argumente)
+    
+    zuordnung = {}
+    for angabe in args.zuordnung:
+        feld, _, spalte = angabe.partition("=")
+        if feld not in SPALTEN or not spalte:
+            parser.error(f"Ungültige Zuordnung '{angabe}' (Felder: {', '.join(SPALTEN)})")
+        zuordnung[feld] = spalte
+    
+    from adapter.manager import DatenManager
+    manager = DatenManager(args.config)
+    
+    def fortschritt(anteil: float, text: str):
+        print(f"\r{anteil * 100:5.1f} %  {text}", end="", file=sys.stderr, flush=True)
+    
+    try:
+        ergebnis = importiere(manager, args.datei, zuordnung, probelauf=args.probelauf,
+                              bei_fortschritt=fortschritt, trennzeichen=args.trennzeichen,
+                              kodierung=args.kodierung)
+    except (ImportFehler, OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"\nFehler: {e}", file=sys.stderr)
+        return 1
+    manager.warte_auf_speicherung()
+    print(file=sys.stderr)
+    print(zusammenfassung(ergebnis, args.probelauf))
+    for zeile, text in ergebnis["meldungen"]:
+        print(f"  Zeile {zeile}: {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
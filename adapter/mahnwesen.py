@@ -0,0 +1,261 @@
+"""
+Mahnwesen: Auswahl fälliger Mahnungen, Mahnlauf und Verbuchung der Mahnstufen
+
+Die Mahnstufen stehen im Abschnitt 'mahnwesen' der Konfiguration. Eine
+Rechnung erreicht Stufe 1, sobald sie ``nach_tagen`` Tage überfällig ist,
+jede weitere Stufe ``nach_tagen`` Tage nach der vorherigen Mahnung.
+Kandidaten liefert der Überfälligkeits-Index des Managers (siehe
+adapter/ueberfaellig.py); bezahlte und stornierte Rechnungen sind dort gar
+nicht erst enthalten, der Lauf muss also nicht alle Rechnungen durchsuchen.
+
+Die Schreiben eines Laufs werden in einem Durchgang in ein gemeinsames PDF
+gesetzt (PDFGenerator.mahnungen_erstellen), große Läufe in Teilen zu je
+TEIL_GROESSE Schreiben, die parallel im Prozess-Pool entstehen. Die
+Mahnstufen werden erst nach dem erfolgreichen Rendern an den Rechnungen
+vermerkt (buche_mahnlauf).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+# Voreinstellung, falls die Konfiguration keine Stufen enthält
+STANDARD_STUFEN = [
+    {"bezeichnung": "Zahlungserinnerung", "nach_tagen": 7, "gebuehr": 0.0, "frist_tage": 7},
+    {"bezeichnung": "1. Mahnung", "nach_tagen": 14, "gebuehr": 5.0, "frist_tage": 7},
+    {"bezeichnung": "2. Mahnung", "nach_tagen": 14, "gebuehr": 10.0, "frist_tage": 7},
+]
+
+# Brieftexte (überschreibbar mit "text" je Stufe); Platzhalter siehe _brieftext()
+ERINNERUNG_TEXT = (
+    "sicherlich ist Ihrer Aufmerksamkeit entgangen, dass unsere Rechnung {rechnungsnummer} "
+    "vom {rechnungsdatum} seit dem {faelligkeitsdatum} zur Zahlung fällig ist. "
+    "Wir bitten Sie, den offenen Betrag bis zum {frist} zu begleichen."
+)
+MAHNUNG_TEXT = (
+    "leider konnten wir zu unserer Rechnung {rechnungsnummer} vom {rechnungsdatum} trotz "
+    "unserer {vorherige} bis heute keinen Zahlungseingang feststellen. Wir bitten Sie, "
+    "den unten aufgeführten Betrag einschließlich Mahngebühren bis spätestens {frist} zu überweisen."
+)
+
+MAHNUNGEN_ORDNER = "Mahnungen"
+TEIL_GROESSE = 500  # Schreiben je PDF bei großen Läufen
+
+
+def lade_stufen(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Gibt die Mahnstufen der Konfiguration zurück (mit Standardwerten ergänzt)"""
+    stufen = config.get("mahnwesen", {}).get("stufen") or STANDARD_STUFEN
+    return [{"bezeichnung": f"{nummer}. Mahnung", "nach_tagen": 14, "gebuehr": 0.0, "frist_tage": 7, **stufe}
+            for nummer, stufe in enumerate(stufen, 1)]
+
+
+def _als_datum(wert) -> date:
+    return wert.date() if isinstance(wert, datetime) else wert
+
+
+def naechste_stufe(rechnung, stufen: List[Dict[str, Any]], heute: date) -> Optional[int]:
+    """
+    Ermittelt die heute fällige Mahnstufe einer überfälligen Rechnung
+    
+    Returns:
+        Stufe ab 1, None wenn (noch) keine Mahnung fällig ist oder die letzte Stufe erreicht ist
+    """
+    stufe = rechnung.mahnstufe + 1
+    if stufe > len(stufen):
+        return None
+    bezug = _als_datum(rechnung.letzte_mahnung or rechnung.faelligkeitsdatum)
+    if heute < bezug + timedelta(days=stufen[stufe - 1]["nach_tagen"]):
+        return None
+    return stufe
+
+
+def _brieftext(stufe: Dict[str, Any], nummer: int, stufen: List[Dict[str, Any]], werte: Dict[str, str]) -> str:
+    """Setzt den Brieftext einer Stufe zusammen"""
+    vorlage = stufe.get("text") or (ERINNERUNG_TEXT if nummer == 1 else MAHNUNG_TEXT)
+    vorherige = stufen[nummer - 2]["bezeichnung"] if nummer > 1 else ""
+    return vorlage.format(vorherige=vorherige, **werte)
+
+
+def plane_mahnlauf(manager, heute: Optional[date] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Wählt alle heute fälligen Mahnungen aus
+    
+    Die Einträge enthalten nur serialisierte Daten und können im Hintergrund
+    gerendert werden. Die Rechnungen werden dabei noch nicht verändert.
+    
+    Args:
+        manager: DatenManager
+        heute: Stichtag (Standard: heute)
+    
+    Returns:
+        {'mahnungen': Liste von Mahnungen (älteste Fälligkeit zuerst) mit
+        rechnung_id, rechnungsnummer, stufe, bezeichnung, gebuehr, betrag,
+        mahngebuehren, bezahlt (Teilzahlungen), offen, datum, frist, text und
+        kunde; 'uebersprungen': fällige Rechnungen ohne Mahnung mit
+        rechnung_id, rechnungsnummer und grund}
+    """
+    heute = heute or date.today()
+    stufen = lade_stufen(manager.adapter.get_config())
+    manager.ueberfaellig.pruefe(heute)
+    
+    kunden = {k.id: k for k in manager.get_kunden()}
+    mahnungen = []
+    uebersprungen = []
+    for rechnung in manager.get_ueberfaellige_rechnungen():
+        nummer = naechste_stufe(rechnung, stufen, heute)
+        if nummer is None:
+            continue
+        kunde = kunden.get(rechnung.kunde_id)
+        if kunde is None:
+            uebersprungen.append({"rechnung_id": rechnung.id, "rechnungsnummer": rechnung.rechnungsnummer,
+                                  "grund": "Kunde nicht gefunden"})
+            continue
+        
+        stufe = stufen[nummer - 1]
+        rechnung._berechnen()
+        gebuehr = float(stufe["gebuehr"])
+        mahngebuehren = rechnung.mahngebuehren + gebuehr
+        bezahlt = rechnung.bezahlter_betrag
+        # offener_betrag enthält Teilzahlungen und bisherige Gebühren, nicht die neue
+        offen = round(rechnung.offener_betrag + gebuehr, 2)
+        frist = heute + timedelta(days=stufe["frist_tage"])
+        werte = {
+            "rechnungsnummer": rechnung.rechnungsnummer,
+            "rechnungsdatum": rechnung.rechnungsdatum.strftime("%d.%m.%Y"),
+            "faelligkeitsdatum": rechnung.faelligkeitsdatum.strftime("%d.%m.%Y"),
+            "frist": frist.strftime("%d.%m.%Y"),
+            "betrag": f"{offen:.2f} €",
+        }
+        mahnungen.append({
+            "rechnung_id": rechnung.id,
+            "rechnungsnummer": rechnung.rechnungsnummer,
+            "stufe": nummer,
+            "bezeichnung": stufe["bezeichnung"],
+            "gebuehr": gebuehr,
+            "betrag": rechnung.bruttobetrag,
+            "mahngebuehren": mahngebuehren,
+            "bezahlt": bezahlt,
+            "offen": offen,
+            "rechnungsdatum": rechnung.rechnungsdatum.isoformat(),
+            "faelligkeitsdatum": rechnung.faelligkeitsdatum.isoformat(),
+            "datum": heute.isoformat(),
+            "frist": frist.isoformat(),
+            "text": _brieftext(stufe, nummer, stufen, werte),
+            "kunde": kunde.to_dict(),
+        })
+    return {"mahnungen": mahnungen, "uebersprungen": uebersprungen}
+
+
+def mahnlauf_pfad(manager, zeitpunkt: Optional[datetime] = None) -> str:
+    """Gibt den Pfad für das PDF eines Mahnlaufs zurück (Mahnungen/Mahnlauf_<YYYYMMDD_HHMMSS>.pdf)"""
+    zeitpunkt = zeitpunkt or datetime.now()
+    return os.path.join(manager.adapter.get_daten_pfad(), MAHNUNGEN_ORDNER,
+                        f"Mahnlauf_{zeitpunkt.strftime('%Y%m%d_%H%M%S')}.pdf")
+
+
+def _rendere_teil(config: Dict[str, Any], mahnungen: List[Dict[str, Any]], ausgabepfad: str,
+                  logo_pfad: Optional[str]) -> str:
+    """Rendert einen Teil des Mahnlaufs (auch im Worker-Prozess)"""
+    from adapter.pdf_generator import PDFGenerator
+    return PDFGenerator(config).mahnungen_erstellen(mahnungen, ausgabepfad, logo_pfad)
+
+
+def rendere_mahnlauf(config: Dict[str, Any],
+                     mahnungen: List[Dict[str, Any]],
+                     ausgabepfad: str,
+                     logo_pfad: Optional[str] = None,
+                     max_worker: Optional[int] = None,
+                     bei_fortschritt: Optional[Callable[[int, int], None]] = None,
+                     abgebrochen: Optional[Callable[[], bool]] = None) -> List[str]:
+    """
+    Rendert alle Mahnschreiben (für den Hintergrund-Worker)
+    
+    Bis TEIL_GROESSE Schreiben entsteht ein PDF unter ausgabepfad, größere
+    Läufe werden in Teile (<Name>_Teil01.pdf, ...) zerlegt und parallel gerendert.
+    
+    Args:
+        config: Konfiguration für den PDFGenerator
+        mahnungen: plane_mahnlauf()['mahnungen']
+        ausgabepfad: Pfad für die PDF-Datei (siehe mahnlauf_pfad())
+        logo_pfad: Optionaler Pfad zum Firmenlogo
+        max_worker: Anzahl Prozesse (Standard: Anzahl CPU-Kerne)
+        bei_fortschritt: Wird nach jedem Teil mit (fertig, gesamt) aufgerufen
+        abgebrochen: Liefert True, wenn der Lauf verworfen werden soll; bereits
+            erstellte Teile werden dann gelöscht (der Lauf wird nicht verbucht,
+            ein späterer Lauf erzeugt dieselben Schreiben erneut)
+    
+    Returns:
+        Pfade der erstellten PDFs (in Reihenfolge der Teile, leer nach einem Abbruch)
+    """
+    os.makedirs(os.path.dirname(ausgabepfad), exist_ok=True)
+    teile = [mahnungen[i:i + TEIL_GROESSE] for i in range(0, len(mahnungen), TEIL_GROESSE)]
+    if len(teile) == 1:
+        pfade = [ausgabepfad]
+    else:
+        basis, endung = os.path.splitext(ausgabepfad)
+        pfade = [f"{basis}_Teil{nummer:02d}{endung}" for nummer in range(1, len(teile) + 1)]
+    max_worker = max(1, min(max_worker or os.cpu_count() or 1, len(teile)))
+    
+    if max_worker == 1:
+        for fertig, (teil, pfad) in enumerate(zip(teile, pfade), 1):
+            if abgebrochen and abgebrochen():
+                return _verwirf_teile(pfade)
+            _rendere_teil(config, teil, pfad, logo_pfad)
+            if bei_fortschritt:
+                bei_fortschritt(fertig, len(teile))
+        return pfade
+    
+    with ProcessPoolExecutor(max_workers=max_worker) as pool:
+        futures = [pool.submit(_rendere_teil, config, teil, pfad, logo_pfad) for teil, pfad in zip(teile, pfade)]
+        erstellt = set()
+        for future in as_completed(futures):
+            if abgebrochen and abgebrochen():
+                for offen in futures:
+                    offen.cancel()
+                break
+            erstellt.add(future.result())
+            if bei_fortschritt:
+                bei_fortschritt(len(erstellt), len(teile))
+    # Laufende Teile sind beim Verlassen des Pools fertig geschrieben
+    if len(erstellt) < len(teile):
+        return _verwirf_teile(pfade)
+    return pfade
+
+
+def _verwirf_teile(pfade: List[str]) -> List[str]:
+    """Löscht die bereits erstellten Teile eines abgebrochenen Mahnlaufs"""
+    for pfad in pfade:
+        try:
+            os.remove(pfad)
+        except FileNotFoundError:
+            pass
+    return []
+
+
+def buche_mahnlauf(manager, mahnungen: List[Dict[str, Any]]) -> int:
+    """
+    Vermerkt die versandten Mahnungen an den Rechnungen und speichert sie
+    
+    Returns:
+        Anzahl der aktualisierten Rechnungen
+    """
+    nach_id = {m["rechnung_id"]: m for m in mahnungen}
+    geaendert = []
+    for rechnung in manager.get_rechnungen():
+        mahnung = nach_id.get(rechnung.id)
+        # Inzwischen bezahlte oder bereits gebuchte Rechnungen überspringen
+        if (mahnung is None or rechnung.mahnstufe >= mahnung["stufe"]
+                or rechnung.status in manager.ueberfaellig.ERLEDIGTE_STATUS):
+            continue
+        rechnung.add_mahnung(mahnung["stufe"], datetime.fromisoformat(mahnung["datum"]), mahnung["gebuehr"])
+        geaendert.append(rechnung)
+    manager.update_rechnungen(geaendert)
+    return len(geaendert)
+
+
+def zusammenfassung(mahnungen: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Zählt die Mahnungen je Stufenbezeichnung (in Stufenreihenfolge)"""
+    anzahl: Dict[str, int] = {}
+    for mahnung in sorted(mahnungen, key=lambda m: m["stufe"]):
+        anzahl[mahnung["bezeichnung"]] = anzahl.get(mahnung["bezeichnung"], 0) + 1
+    return anzahl
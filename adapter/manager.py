@@ -1,9 +1,13 @@
 """
 Manager-Klasse für zentrale Datenverwaltung
 """
-from typing import List, Optional
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional, Callable, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from adapter import startprofil
 from adapter.datenadapter import DatenAdapter
+from adapter.ueberfaellig import UeberfaelligkeitsTracker
 from model.kunde import Kunde
 from model.auftrag import Auftrag
 from model.rechnung import Rechnung
@@ -14,52 +18,146 @@ from model.stueckliste import Stueckliste
 class DatenManager:
     """Zentrale Verwaltung aller Daten"""
     
-    def __init__(self, config_path: str = "config/config.json"):
-        """Initialisiert den Datenmanager"""
-        self.adapter = DatenAdapter(config_path)
+    def __init__(self, config_path: str = "config/config.json", sofort_laden: bool = True):
+        """
+        Initialisiert den Datenmanager
+        
+        Args:
+            config_path: Pfad zur Konfigurationsdatei
+            sofort_laden: Wenn False, muss lade_alle_daten() später aufgerufen werden
+                (z.B. im Hintergrund, während das Hauptfenster bereits angezeigt wird)
+        """
+        with startprofil.phase("DatenAdapter (Konfiguration laden)"):
+            self.adapter = DatenAdapter(config_path)
         self.adapter.manager = self  # Setze Referenz für Zugriff auf Aufträge
         self._kunden: List[Kunde] = []
         self._auftraege: List[Auftrag] = []
         self._rechnungen: List[Rechnung] = []
         self._stundennachweise: List[Stundennachweis] = []
         self._stuecklisten: List[Stueckliste] = []
-        self.lade_alle_daten()
-    
-    def lade_alle_daten(self):
-        """Lädt alle Daten aus den Dateien"""
-        # Kunden laden
-        kunden_data = self.adapter.lade_kunden()
-        self._kunden = [Kunde.from_dict(k) for k in kunden_data]
         
-        # Aufträge laden
-        auftraege_data = self.adapter.lade_auftraege()
-        self._auftraege = [Auftrag.from_dict(a) for a in auftraege_data]
+        # Änderungszähler je Entität (z.B. zum Invalidieren zwischengespeicherter Sortierschlüssel)
+        self._revision = 0
+        self._lade_revision = 0
+        self._revisionen: Dict[str, int] = {}
         
-        # Rechnungen laden - aus allen Auftragsordnern
-        self._rechnungen = []
-        for auftrag in self._auftraege:
-            rechnungen_data = self.adapter.lade_rechnungen_fuer_auftrag(auftrag.auftragsnummer)
-            self._rechnungen.extend([Rechnung.from_dict(r) for r in rechnungen_data])
+        # Index der unbezahlten Rechnungen nach Fälligkeit (Badge, Hervorhebung)
+        self.ueberfaellig = UeberfaelligkeitsTracker()
+        
+        # Optionale Hintergrundspeicherung (ein Thread, Schreibreihenfolge bleibt erhalten)
+        self._speicher_executor: Optional[ThreadPoolExecutor] = None
+        self._offene_speicherungen = 0
+        self._speicher_lock = threading.Lock()
+        self.bei_speicherfehler: Optional[Callable[[BaseException], None]] = None
+        
+        if sofort_laden:
+            self.lade_alle_daten()
+    
+    def aktiviere_hintergrund_speicherung(self, bei_fehler: Optional[Callable[[BaseException], None]] = None):
+        """
+        Führt Schreibvorgänge ab sofort in einem eigenen Thread aus
+        
+        Die Daten werden weiterhin im aufrufenden Thread serialisiert, nur das
+        Schreiben der Dateien läuft im Hintergrund (in Aufrufreihenfolge).
         
-        # Stundennachweise laden
-        nachweise_data = self.adapter.lade_stundennachweise()
-        self._stundennachweise = [Stundennachweis.from_dict(n) for n in nachweise_data]
+        Args:
+            bei_fehler: Callback bei Schreibfehlern (wird im Speicher-Thread aufgerufen)
+        """
+        if self._speicher_executor is None:
+            self._speicher_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speichern")
+        self.bei_speicherfehler = bei_fehler
+    
+    def hat_offene_speicherungen(self) -> bool:
+        """Gibt zurück, ob noch Schreibvorgänge ausstehen"""
+        return self._offene_speicherungen > 0
+    
+    def warte_auf_speicherung(self):
+        """Blockiert, bis alle ausstehenden Schreibvorgänge abgeschlossen sind"""
+        if self._speicher_executor is not None:
+            self._speicher_executor.submit(lambda: None).result()
+    
+    def _schreibe(self, funktion: Callable, *args):
+        """Führt einen Schreibvorgang aus - direkt oder im Speicher-Thread"""
+        if self._speicher_executor is None:
+            funktion(*args)
+            return
         
-        # Stücklisten laden
-        stuecklisten_data = self.adapter.lade_stuecklisten()
-        self._stuecklisten = [Stueckliste.from_dict(s) for s in stuecklisten_data]
+        with self._speicher_lock:
+            self._offene_speicherungen += 1
+        future = self._speicher_executor.submit(funktion, *args)
+        future.add_done_callback(self._schreibvorgang_beendet)
+    
+    def _schreibvorgang_beendet(self, future: Future):
+        """Wird nach jedem Schreibvorgang im Hintergrund aufgerufen"""
+        with self._speicher_lock:
+            self._offene_speicherungen -= 1
+        fehler = future.exception()
+        if fehler is not None:
+            if self.bei_speicherfehler:
+                self.bei_speicherfehler(fehler)
+            else:
+                print(f"Fehler beim Speichern: {fehler}")
+    
+    def lade_alle_daten(self):
+        """Lädt alle Daten aus den Dateien"""
+        with startprofil.phase("lade_alle_daten"):
+            # Ausstehende Schreibvorgänge abschließen, sonst würden veraltete Dateien gelesen
+            self.warte_auf_speicherung()
+            
+            # Nach dem Laden gelten alle Entitäten als geändert
+            self._revision += 1
+            self._lade_revision = self._revision
+            self._revisionen = {}
+            
+            # Lesen (Datei und JSON) und Erzeugen der Objekte werden getrennt gemessen
+            with startprofil.phase("Kunden lesen"):
+                kunden_data = self.adapter.lade_kunden()
+            with startprofil.phase("Kunden from_dict"):
+                self._kunden = [Kunde.from_dict(k) for k in kunden_data]
+            
+            with startprofil.phase("Aufträge lesen"):
+                auftraege_data = self.adapter.lade_auftraege()
+            with startprofil.phase("Aufträge from_dict"):
+                self._auftraege = [Auftrag.from_dict(a) for a in auftraege_data]
+            
+            # Rechnungen laden - aus allen Auftragsordnern
+            with startprofil.phase("Rechnungen lesen"):
+                rechnungen_data = []
+                for auftrag in self._auftraege:
+                    rechnungen_data.extend(self.adapter.lade_rechnungen_fuer_auftrag(auftrag.auftragsnummer))
+            with startprofil.phase("Rechnungen from_dict"):
+                self._rechnungen = [Rechnung.from_dict(r) for r in rechnungen_data]
+            with startprofil.phase("Überfälligkeits-Index"):
+                self.ueberfaellig.neu_aufbauen(self._rechnungen)
+            
+            with startprofil.phase("Stundennachweise lesen"):
+                nachweise_data = self.adapter.lade_stundennachweise()
+            with startprofil.phase("Stundennachweise from_dict"):
+                self._stundennachweise = [Stundennachweis.from_dict(n) for n in nachweise_data]
+            
+            with startprofil.phase("Stücklisten lesen"):
+                stuecklisten_data = self.adapter.lade_stuecklisten()
+            with startprofil.phase("Stücklisten from_dict"):
+                self._stuecklisten = [Stueckliste.from_dict(s) for s in stuecklisten_data]
+    
+    def get_revision(self, entitaet_id: str) -> int:
+        """Gibt den Änderungsstand einer Entität zurück (ändert sich bei jedem add/update/delete)"""
+        return self._revisionen.get(entitaet_id, self._lade_revision)
+    
+    def _markiere_geaendert(self, entitaet_id: str):
+        """Erhöht den Änderungsstand einer Entität"""
+        self._revision += 1
+        self._revisionen[entitaet_id] = self._revision
     
     def speichere_alle_daten(self):
         """Speichert alle Daten in die Dateien"""
-        # Kunden speichern
+        # Daten im aufrufenden Thread serialisieren, damit der Schreibvorgang
+        # einen konsistenten Stand sieht
         kunden_data = [k.to_dict() for k in self._kunden]
-        self.adapter.speichere_kunden(kunden_data)
-        
-        # Aufträge speichern
         auftraege_data = [a.to_dict() for a in self._auftraege]
-        self.adapter.speichere_auftraege(auftraege_data)
         
-        # Rechnungen speichern - nach Auftrag gruppiert
+        # Rechnungen, Stundennachweise und Stücklisten nach Auftrag gruppiert
+        # (auch die Zuordnung zum Auftrag geschieht hier, nicht im Speicher-Thread)
         rechnungen_nach_auftrag = {}
         for rechnung in self._rechnungen:
             auftrag = self.get_auftrag(rechnung.auftrag_id)
@@ -69,17 +167,65 @@ class DatenManager:
                     rechnungen_nach_auftrag[auftragsnummer] = []
                 rechnungen_nach_auftrag[auftragsnummer].append(rechnung.to_dict(auftragsnummer=auftragsnummer))
         
-        # Speichere pro Auftrag
-        for auftragsnummer, auftrag_rechnungen in rechnungen_nach_auftrag.items():
-            self.adapter.speichere_rechnungen_fuer_auftrag(auftragsnummer, auftrag_rechnungen)
+        nachweise_nach_auftrag = self._nach_auftrag_gruppiert(self._stundennachweise)
+        stuecklisten_nach_auftrag = self._nach_auftrag_gruppiert(self._stuecklisten)
         
-        # Stundennachweise speichern
-        nachweise_data = [n.to_dict() for n in self._stundennachweise]
-        self.adapter.speichere_stundennachweise(nachweise_data)
+        self._schreibe(self._schreibe_alle_daten, kunden_data, auftraege_data,
+                       rechnungen_nach_auftrag, nachweise_nach_auftrag, stuecklisten_nach_auftrag)
+    
+    def _nach_auftrag_gruppiert(self, eintraege) -> Dict[str, List[Dict[str, Any]]]:
+        """Serialisiert Stundennachweise bzw. Stücklisten nach Auftragsnummer gruppiert"""
+        nach_auftrag: Dict[str, List[Dict[str, Any]]] = {}
+        for eintrag in eintraege:
+            auftrag = self.get_auftrag(eintrag.auftrag_id) if eintrag.auftrag_id else None
+            if auftrag:
+                nach_auftrag.setdefault(auftrag.auftragsnummer, []).append(eintrag.to_dict())
+        return nach_auftrag
+    
+    def _schreibe_alle_daten(self, kunden_data, auftraege_data, rechnungen_nach_auftrag,
+                             nachweise_nach_auftrag, stuecklisten_nach_auftrag):
+        """Schreibt bereits serialisierte Daten in die Dateien"""
+        self.adapter.speichere_kunden(kunden_data)
+        self.adapter.speichere_auftraege(auftraege_data)
+        
+        # Speichere Rechnungen pro Auftrag
+        self.adapter.speichere_rechnungen_fuer_auftraege(rechnungen_nach_auftrag)
         
-        # Stücklisten speichern
-        stuecklisten_data = [s.to_dict() for s in self._stuecklisten]
-        self.adapter.speichere_stuecklisten(stuecklisten_data)
+        self.adapter.speichere_stundennachweise_fuer_auftraege(nachweise_nach_auftrag)
+        self.adapter.speichere_stuecklisten_fuer_auftraege(stuecklisten_nach_auftrag)
+    
+    def _aktualisiere_auftragsdatei(self, lade: Callable, speichere: Callable, auftragsnummer: str,
+                                    eintrag_id: str, eintrag: Optional[Dict[str, Any]] = None):
+        """
+        Aktualisiert einen Eintrag in einer auftragsspezifischen Datei
+        
+        Args:
+            lade: Adapter-Methode zum Laden (z.B. lade_rechnungen_fuer_auftrag)
+            speichere: Adapter-Methode zum Speichern
+            auftragsnummer: Die Auftragsnummer (YYYY-XXXX)
+            eintrag_id: ID des Eintrags
+            eintrag: Neuer Inhalt; None entfernt den Eintrag
+        """
+        daten = lade(auftragsnummer)
+        for j, eintrag_dict in enumerate(daten):
+            if eintrag_dict.get("id") == eintrag_id:
+                if eintrag is None:
+                    daten.pop(j)
+                else:
+                    daten[j] = eintrag
+                break
+        else:
+            if eintrag is not None:
+                daten.append(eintrag)
+        speichere(auftragsnummer, daten)
+    
+    def _erstelle_ordnerstruktur(self, auftragsnummer: str, bezeichnungen: List[str], mit_hauptordner: bool):
+        """Erstellt Auftrags- und Teilauftragsordner"""
+        if mit_hauptordner:
+            self.adapter.erstelle_auftragsordnerstruktur(auftragsnummer)
+        
+        # Teilauftragsordner aller Positionen in einem Durchgang (nur fehlende)
+        self.adapter.erstelle_teilauftrag_ordnerstrukturen(auftragsnummer, bezeichnungen)
     
     # Kunden-Methoden
     def get_kunden(self) -> List[Kunde]:
@@ -97,15 +243,39 @@ class DatenManager:
         """Fügt einen neuen Kunden hinzu"""
         if not any(k.id == kunde.id for k in self._kunden):
             self._kunden.append(kunde)
+            self._markiere_geaendert(kunde.id)
             self.speichere_alle_daten()
             return True
         return False
     
+    def add_kunden(self, kunden: List[Kunde]) -> int:
+        """
+        Fügt viele Kunden auf einmal hinzu (z.B. beim Import)
+        
+        Die Kundendatei wird nur einmal geschrieben, die übrigen Dateien gar nicht.
+        
+        Returns:
+            Anzahl der hinzugefügten Kunden (bereits vorhandene IDs werden übersprungen)
+        """
+        vorhandene_ids = {k.id for k in self._kunden}
+        anzahl = 0
+        for kunde in kunden:
+            if kunde.id in vorhandene_ids:
+                continue
+            self._kunden.append(kunde)
+            vorhandene_ids.add(kunde.id)
+            self._markiere_geaendert(kunde.id)
+            anzahl += 1
+        if anzahl:
+            self._schreibe(self.adapter.speichere_kunden, [k.to_dict() for k in self._kunden])
+        return anzahl
+    
     def update_kunde(self, kunde: Kunde) -> bool:
         """Aktualisiert einen Kunden"""
         for i, k in enumerate(self._kunden):
             if k.id == kunde.id:
                 self._kunden[i] = kunde
+                self._markiere_geaendert(kunde.id)
                 self.speichere_alle_daten()
                 return True
         return False
@@ -115,6 +285,7 @@ class DatenManager:
         for i, k in enumerate(self._kunden):
             if k.id == kunde_id:
                 self._kunden.pop(i)
+                self._markiere_geaendert(kunde_id)
                 self.speichere_alle_daten()
                 return True
         return False
@@ -169,36 +340,39 @@ class DatenManager:
                 auftrag.auftragsnummer = self.generiere_naechste_auftragsnummer()
             
             self._auftraege.append(auftrag)
+            self._markiere_geaendert(auftrag.id)
             self.speichere_alle_daten()
             
-            # Erstelle Ordnerstruktur
-            self.adapter.erstelle_auftragsordnerstruktur(auftrag.auftragsnummer)
-            
-            # Erstelle Teilauftragsordner für jede Position
-            for index, position in enumerate(auftrag.positionen, start=1):
-                self.adapter.erstelle_teilauftrag_ordnerstruktur(
-                    auftrag.auftragsnummer, 
-                    index, 
-                    position.bezeichnung
-                )
+            # Erstelle Ordnerstruktur inkl. Teilauftragsordner für jede Position
+            self._schreibe(self._erstelle_ordnerstruktur, auftrag.auftragsnummer,
+                           [p.bezeichnung for p in auftrag.positionen], True)
             
             return True
         return False
     
+    def speichere_lv_daten(self, auftragsnummer: str, lv: Dict[str, Any], quelle: Optional[str] = None):
+        """
+        Schreibt die Daten eines importierten Leistungsverzeichnisses in den Ordner LV des Auftrags
+        
+        Args:
+            auftragsnummer: Die Auftragsnummer (YYYY-XXXX)
+            lv: LV-Daten aus adapter.gaeb.importiere_lv()
+            quelle: Originaldatei, die mit abgelegt wird
+        """
+        from adapter.gaeb import schreibe_lv_daten
+        self._schreibe(schreibe_lv_daten, self.adapter, auftragsnummer, dict(lv), quelle)
+    
     def update_auftrag(self, auftrag: Auftrag) -> bool:
         """Aktualisiert einen Auftrag und erstellt ggf. fehlende Teilauftragsordner"""
         for i, a in enumerate(self._auftraege):
             if a.id == auftrag.id:
                 self._auftraege[i] = auftrag
+                self._markiere_geaendert(auftrag.id)
                 self.speichere_alle_daten()
                 
                 # Erstelle Teilauftragsordner für jede Position
-                for index, position in enumerate(auftrag.positionen, start=1):
-                    self.adapter.erstelle_teilauftrag_ordnerstruktur(
-                        auftrag.auftragsnummer, 
-                        index, 
-                        position.bezeichnung
-                    )
+                self._schreibe(self._erstelle_ordnerstruktur, auftrag.auftragsnummer,
+                               [p.bezeichnung for p in auftrag.positionen], False)
                 
                 return True
         return False
@@ -208,7 +382,9 @@ class DatenManager:
         for i, a in enumerate(self._auftraege):
             if a.id == auftrag_id:
                 self._auftraege.pop(i)
+                self._markiere_geaendert(auftrag_id)
                 self.speichere_alle_daten()
+                self._schreibe(self.adapter.entferne_aus_rechnungsindex, a.auftragsnummer)
                 return True
         return False
     
@@ -232,16 +408,25 @@ class DatenManager:
         """Gibt alle Rechnungen eines Auftrags zurück"""
         return [r for r in self._rechnungen if r.auftrag_id == auftrag_id]
     
+    def get_ueberfaellige_rechnungen(self) -> List[Rechnung]:
+        """Gibt alle überfälligen Rechnungen zurück (älteste Fälligkeit zuerst)"""
+        reihenfolge = {rechnung_id: i for i, rechnung_id in enumerate(self.ueberfaellig.get_ueberfaellige())}
+        ueberfaellige = [r for r in self._rechnungen if r.id in reihenfolge]
+        return sorted(ueberfaellige, key=lambda r: reihenfolge[r.id])
+    
     def add_rechnung(self, rechnung: Rechnung) -> bool:
         """Fügt eine neue Rechnung hinzu"""
         if not any(r.id == rechnung.id for r in self._rechnungen):
             self._rechnungen.append(rechnung)
+            self._markiere_geaendert(rechnung.id)
+            self.ueberfaellig.aktualisiere(rechnung)
             # Speichere direkt im Auftragsordner
             auftrag = self.get_auftrag(rechnung.auftrag_id)
             if auftrag:
-                rechnungen_data = self.adapter.lade_rechnungen_fuer_auftrag(auftrag.auftragsnummer)
-                rechnungen_data.append(rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer))
-                self.adapter.speichere_rechnungen_fuer_auftrag(auftrag.auftragsnummer, rechnungen_data)
+                self._schreibe(self._aktualisiere_auftragsdatei,
+                               self.adapter.lade_rechnungen_fuer_auftrag,
+                               self.adapter.speichere_rechnungen_fuer_auftrag,
+                               auftrag.auftragsnummer, rechnung.id, rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer))
             else:
                 self.speichere_alle_daten()
             return True
@@ -252,34 +437,68 @@ class DatenManager:
         for i, r in enumerate(self._rechnungen):
             if r.id == rechnung.id:
                 self._rechnungen[i] = rechnung
+                self._markiere_geaendert(rechnung.id)
+                self.ueberfaellig.aktualisiere(rechnung)
                 # Speichere direkt im Auftragsordner
                 auftrag = self.get_auftrag(rechnung.auftrag_id)
                 if auftrag:
-                    rechnungen_data = self.adapter.lade_rechnungen_fuer_auftrag(auftrag.auftragsnummer)
-                    # Aktualisiere die Rechnung in der Liste
-                    for j, rechnung_dict in enumerate(rechnungen_data):
-                        if rechnung_dict.get("id") == rechnung.id:
-                            rechnungen_data[j] = rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer)
-                            break
-                    else:
-                        rechnungen_data.append(rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer))
-                    self.adapter.speichere_rechnungen_fuer_auftrag(auftrag.auftragsnummer, rechnungen_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_rechnungen_fuer_auftrag,
+                                   self.adapter.speichere_rechnungen_fuer_auftrag,
+                                   auftrag.auftragsnummer, rechnung.id, rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer))
                 else:
                     self.speichere_alle_daten()
                 return True
         return False
     
+    def update_rechnungen(self, rechnungen: List[Rechnung]):
+        """
+        Aktualisiert viele Rechnungen auf einmal (z.B. nach einem Mahnlauf)
+        
+        Jede betroffene Auftragsdatei wird nur einmal geschrieben.
+        """
+        if not rechnungen:
+            return
+        index = {r.id: i for i, r in enumerate(self._rechnungen)}
+        auftrag_ids = set()
+        for rechnung in rechnungen:
+            if rechnung.id not in index:
+                continue
+            self._rechnungen[index[rechnung.id]] = rechnung
+            self._markiere_geaendert(rechnung.id)
+            self.ueberfaellig.aktualisiere(rechnung)
+            auftrag_ids.add(rechnung.auftrag_id)
+        
+        self._speichere_rechnungen_der_auftraege(auftrag_ids)
+    
+    def _speichere_rechnungen_der_auftraege(self, auftrag_ids):
+        """Schreibt die Rechnungsdateien der Aufträge (jede Datei einmal, der Index einmal)"""
+        # Rechnungen der betroffenen Aufträge in einem Durchgang gruppieren
+        nach_auftrag = {}
+        for rechnung in self._rechnungen:
+            if rechnung.auftrag_id in auftrag_ids:
+                nach_auftrag.setdefault(rechnung.auftrag_id, []).append(rechnung)
+        daten = {}
+        for auftrag in self._auftraege:
+            if auftrag.id in nach_auftrag:
+                daten[auftrag.auftragsnummer] = [r.to_dict(auftragsnummer=auftrag.auftragsnummer)
+                                                 for r in nach_auftrag[auftrag.id]]
+        self._schreibe(self.adapter.speichere_rechnungen_fuer_auftraege, daten)
+    
     def delete_rechnung(self, rechnung_id: str) -> bool:
         """Löscht eine Rechnung"""
         for i, r in enumerate(self._rechnungen):
             if r.id == rechnung_id:
                 auftrag = self.get_auftrag(r.auftrag_id)
                 self._rechnungen.pop(i)
+                self._markiere_geaendert(rechnung_id)
+                self.ueberfaellig.entferne(rechnung_id)
                 # Entferne aus auftragsspezifischer Datei
                 if auftrag:
-                    rechnungen_data = self.adapter.lade_rechnungen_fuer_auftrag(auftrag.auftragsnummer)
-                    rechnungen_data = [rd for rd in rechnungen_data if rd.get("id") != rechnung_id]
-                    self.adapter.speichere_rechnungen_fuer_auftrag(auftrag.auftragsnummer, rechnungen_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_rechnungen_fuer_auftrag,
+                                   self.adapter.speichere_rechnungen_fuer_auftrag,
+                                   auftrag.auftragsnummer, rechnung_id)
                 else:
                     self.speichere_alle_daten()
                 return True
@@ -301,6 +520,76 @@ class DatenManager:
         if not auftrag:
             return None
         
+        rechnung = self._baue_rechnung_aus_auftrag(auftrag, zahlungsziel_tage, stuecklisten_anhaengen, status_pruefung)
+        self._vergib_rechnungsnummer(rechnung, {r.rechnungsnummer for r in self._rechnungen})
+        
+        # Rechnung hinzufügen (wird automatisch im Auftragsordner gespeichert)
+        self.add_rechnung(rechnung)
+        return rechnung
+    
+    def get_abrechenbare_auftraege(self) -> List[Auftrag]:
+        """Aufträge, deren Positionen alle den Status "Rechnung" haben und die noch keine Rechnung haben"""
+        abgerechnet = {r.auftrag_id for r in self._rechnungen if r.status != "Storniert"}
+        return [a for a in self._auftraege
+                if a.positionen and a.id not in abgerechnet and a.status not in ("Abgeschlossen", "Storniert")
+                and all(pos.status == "Rechnung" for pos in a.positionen)]
+    
+    def erstelle_rechnungen_aus_auftraegen(self, auftrag_ids: List[str], zahlungsziel_tage: int = 14,
+                                           stuecklisten_anhaengen: bool = True) -> Tuple[List[Rechnung], Dict[str, str]]:
+        """
+        Erstellt Rechnungen für mehrere Aufträge (z.B. alle abrechnungsbereiten)
+        
+        Jede Auftragsdatei und der Rechnungsindex werden nur einmal geschrieben.
+        
+        Returns:
+            (erstellte Rechnungen, Auftrag-ID -> Fehlermeldung für übersprungene Aufträge)
+        """
+        auftraege = {a.id: a for a in self._auftraege}
+        nummern = {r.rechnungsnummer for r in self._rechnungen}
+        ids = {r.id for r in self._rechnungen}
+        erstellt, fehler = [], {}
+        for auftrag_id in auftrag_ids:
+            auftrag = auftraege.get(auftrag_id)
+            if not auftrag:
+                fehler[auftrag_id] = "Auftrag nicht gefunden"
+                continue
+            try:
+                rechnung = self._baue_rechnung_aus_auftrag(auftrag, zahlungsziel_tage, stuecklisten_anhaengen, True)
+            except ValueError as e:
+                fehler[auftrag_id] = str(e)
+                continue
+            self._vergib_rechnungsnummer(rechnung, nummern)
+            # IDs sind Zeitstempel; bei grober Uhrauflösung können sie sich wiederholen
+            basis, zaehler = rechnung.id, 1
+            while rechnung.id in ids:
+                zaehler += 1
+                rechnung.id = f"{basis}_{zaehler}"
+            ids.add(rechnung.id)
+            self._rechnungen.append(rechnung)
+            self._markiere_geaendert(rechnung.id)
+            self.ueberfaellig.aktualisiere(rechnung)
+            erstellt.append(rechnung)
+        if erstellt:
+            self._speichere_rechnungen_der_auftraege({r.auftrag_id for r in erstellt})
+        return erstellt, fehler
+    
+    @staticmethod
+    def _vergib_rechnungsnummer(rechnung: Rechnung, vergeben: set):
+        """Verschiebt eine schon vergebene Rechnungsnummer (Zeitstempel) um jeweils eine Sekunde"""
+        nummer = rechnung.rechnungsnummer
+        if nummer in vergeben:
+            zeitpunkt = datetime.strptime(nummer[2:], "%Y%m%d%H%M%S")
+            while nummer in vergeben:
+                zeitpunkt += timedelta(seconds=1)
+                nummer = f"RE{zeitpunkt.strftime('%Y%m%d%H%M%S')}"
+            rechnung.rechnungsnummer = nummer
+        vergeben.add(nummer)
+    
+    def _baue_rechnung_aus_auftrag(self, auftrag: Auftrag, zahlungsziel_tage: int, stuecklisten_anhaengen: bool,
+                                   status_pruefung: bool) -> Rechnung:
+        """Erstellt die Rechnung eines Auftrags, ohne sie hinzuzufügen (siehe erstelle_rechnung_aus_auftrag)"""
+        auftrag_id = auftrag.id
+        
         # Sicherheitsprüfung: Alle Positionen müssen Status "Rechnung" haben
         if status_pruefung and auftrag.positionen:
             positionen_nicht_bereit = []
@@ -366,8 +655,6 @@ class DatenManager:
                 )
                 rechnung.add_position(aufschlag_position)
         
-        # Rechnung hinzufügen (wird automatisch im Auftragsordner gespeichert)
-        self.add_rechnung(rechnung)
         return rechnung
     
     # Stundennachweis-Methoden
@@ -396,9 +683,10 @@ class DatenManager:
             # Speichere direkt im Auftragsordner
             auftrag = self.get_auftrag(nachweis.auftrag_id)
             if auftrag:
-                nachweise_data = self.adapter.lade_stundennachweise_fuer_auftrag(auftrag.auftragsnummer)
-                nachweise_data.append(nachweis.to_dict())
-                self.adapter.speichere_stundennachweise_fuer_auftrag(auftrag.auftragsnummer, nachweise_data)
+                self._schreibe(self._aktualisiere_auftragsdatei,
+                               self.adapter.lade_stundennachweise_fuer_auftrag,
+                               self.adapter.speichere_stundennachweise_fuer_auftrag,
+                               auftrag.auftragsnummer, nachweis.id, nachweis.to_dict())
             else:
                 self.speichere_alle_daten()
             return True
@@ -412,15 +700,10 @@ class DatenManager:
                 # Speichere direkt im Auftragsordner
                 auftrag = self.get_auftrag(nachweis.auftrag_id)
                 if auftrag:
-                    nachweise_data = self.adapter.lade_stundennachweise_fuer_auftrag(auftrag.auftragsnummer)
-                    # Aktualisiere den Nachweis in der Liste
-                    for j, nachweis_dict in enumerate(nachweise_data):
-                        if nachweis_dict.get("id") == nachweis.id:
-                            nachweise_data[j] = nachweis.to_dict()
-                            break
-                    else:
-                        nachweise_data.append(nachweis.to_dict())
-                    self.adapter.speichere_stundennachweise_fuer_auftrag(auftrag.auftragsnummer, nachweise_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_stundennachweise_fuer_auftrag,
+                                   self.adapter.speichere_stundennachweise_fuer_auftrag,
+                                   auftrag.auftragsnummer, nachweis.id, nachweis.to_dict())
                 else:
                     self.speichere_alle_daten()
                 return True
@@ -434,9 +717,10 @@ class DatenManager:
                 self._stundennachweise.pop(i)
                 # Entferne aus auftragsspezifischer Datei
                 if auftrag:
-                    nachweise_data = self.adapter.lade_stundennachweise_fuer_auftrag(auftrag.auftragsnummer)
-                    nachweise_data = [nd for nd in nachweise_data if nd.get("id") != nachweis_id]
-                    self.adapter.speichere_stundennachweise_fuer_auftrag(auftrag.auftragsnummer, nachweise_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_stundennachweise_fuer_auftrag,
+                                   self.adapter.speichere_stundennachweise_fuer_auftrag,
+                                   auftrag.auftragsnummer, nachweis_id)
                 else:
                     self.speichere_alle_daten()
                 return True
@@ -472,9 +756,10 @@ class DatenManager:
             # Speichere direkt im Auftragsordner
             auftrag = self.get_auftrag(stueckliste.auftrag_id)
             if auftrag:
-                stuecklisten_data = self.adapter.lade_stuecklisten_fuer_auftrag(auftrag.auftragsnummer)
-                stuecklisten_data.append(stueckliste.to_dict())
-                self.adapter.speichere_stuecklisten_fuer_auftrag(auftrag.auftragsnummer, stuecklisten_data)
+                self._schreibe(self._aktualisiere_auftragsdatei,
+                               self.adapter.lade_stuecklisten_fuer_auftrag,
+                               self.adapter.speichere_stuecklisten_fuer_auftrag,
+                               auftrag.auftragsnummer, stueckliste.id, stueckliste.to_dict())
             else:
                 self.speichere_alle_daten()
             return True
@@ -488,15 +773,10 @@ class DatenManager:
                 # Speichere direkt im Auftragsordner
                 auftrag = self.get_auftrag(stueckliste.auftrag_id)
                 if auftrag:
-                    stuecklisten_data = self.adapter.lade_stuecklisten_fuer_auftrag(auftrag.auftragsnummer)
-                    # Aktualisiere die Stückliste in der Liste
-                    for j, stueckliste_dict in enumerate(stuecklisten_data):
-                        if stueckliste_dict.get("id") == stueckliste.id:
-                            stuecklisten_data[j] = stueckliste.to_dict()
-                            break
-                    else:
-                        stuecklisten_data.append(stueckliste.to_dict())
-                    self.adapter.speichere_stuecklisten_fuer_auftrag(auftrag.auftragsnummer, stuecklisten_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_stuecklisten_fuer_auftrag,
+                                   self.adapter.speichere_stuecklisten_fuer_auftrag,
+                                   auftrag.auftragsnummer, stueckliste.id, stueckliste.to_dict())
                 else:
                     self.speichere_alle_daten()
                 return True
@@ -510,9 +790,10 @@ class DatenManager:
                 self._stuecklisten.pop(i)
                 # Entferne aus auftragsspezifischer Datei
                 if auftrag:
-                    stuecklisten_data = self.adapter.lade_stuecklisten_fuer_auftrag(auftrag.auftragsnummer)
-                    stuecklisten_data = [sd for sd in stuecklisten_data if sd.get("id") != stueckliste_id]
-                    self.adapter.speichere_stuecklisten_fuer_auftrag(auftrag.auftragsnummer, stuecklisten_data)
+                    self._schreibe(self._aktualisiere_auftragsdatei,
+                                   self.adapter.lade_stuecklisten_fuer_auftrag,
+                                   self.adapter.speichere_stuecklisten_fuer_auftrag,
+                                   auftrag.auftragsnummer, stueckliste_id)
                 else:
                     self.speichere_alle_daten()
                 return True
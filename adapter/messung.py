@@ -0,0 +1,274 @@
+"""
+Laufzeitmessung für DatenManager und DatenAdapter
+
+Misst je Aufruf Dauer, gelesene/geschriebene Bytes und Anzahl der Dateien aller
+öffentlichen Methoden des DatenManagers sowie der lade_*/speichere_*-Methoden
+des DatenAdapters. Die letzten Aufrufe liegen in einem Ringpuffer, dazu werden
+Summen je Methode geführt (Export als JSON oder im Prometheus-Textformat).
+
+Ausgeschaltet kostet die Messung nichts: Die Methoden werden erst mit
+aktiviere() umhüllt und mit deaktiviere() wieder im Original hergestellt.
+Methoden, die schon vorher gebunden wurden (z.B. als Callback), werden nicht
+erfasst - daher möglichst vor dem Laden der Daten aktivieren.
+
+Bytes und Dateien werden an den Dateizugriffen des Adapters (_lade_datei,
+_speichere_datei) gezählt und allen gerade laufenden gemessenen Aufrufen des
+Threads zugerechnet, z.B. DatenManager.update_kunde und
+DatenAdapter.speichere_kunden. Schreibvorgänge der Hintergrundspeicherung
+erscheinen daher unter den Methoden des Adapters (im Speicher-Thread).
+"""
+import functools
+import json
+import os
+import threading
+import time
+import types
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+STANDARD_PUFFER = 2000
+
+# Präfix der Metriknamen im Prometheus-Export
+PROMETHEUS_PRAEFIX = "auftragsverwaltung"
+
+_lock = threading.Lock()
+_lokal = threading.local()
+_aktiv = False
+_originale: Dict[tuple, Callable] = {}
+_puffer: Deque[Dict[str, Any]] = deque(maxlen=STANDARD_PUFFER)
+_summen: Dict[str, Dict[str, float]] = {}
+_seit = datetime.now()
+
+
+class _Aufruf:
+    """Zähler eines laufenden Aufrufs (liegt auf dem Aufrufstapel des Threads)"""
+    __slots__ = ("gelesen", "geschrieben", "dateien")
+    
+    def __init__(self):
+        self.gelesen = 0
+        self.geschrieben = 0
+        self.dateien = 0
+
+
+def _stapel() -> List[_Aufruf]:
+    stapel = getattr(_lokal, "stapel", None)
+    if stapel is None:
+        stapel = _lokal.stapel = []
+    return stapel
+
+
+def _ziele() -> List[tuple]:
+    """(Klasse, Methodenname, Dateizugriff) aller gemessenen Methoden"""
+    from adapter.datenadapter import DatenAdapter
+    from adapter.manager import DatenManager
+    ziele = [(DatenManager, name, None) for name, wert in vars(DatenManager).items()
+             if not name.startswith("_") and isinstance(wert, types.FunctionType)]
+    ziele += [(DatenAdapter, name, None) for name, wert in vars(DatenAdapter).items()
+              if name.startswith(("lade_", "speichere_")) and isinstance(wert, types.FunctionType)]
+    ziele += [(DatenAdapter, "_lade_datei", "gelesen"), (DatenAdapter, "_speichere_datei", "geschrieben")]
+    return ziele
+
+
+def _umhuelle(klasse: type, funktion: Callable) -> Callable:
+    """Misst jeden Aufruf der Methode"""
+    name = f"{klasse.__name__}.{funktion.__name__}"
+    
+    @functools.wraps(funktion)
+    def gemessen(*args, **kwargs):
+        if not _aktiv:
+            return funktion(*args, **kwargs)
+        stapel = _stapel()
+        aufruf = _Aufruf()
+        stapel.append(aufruf)
+        fehler = None
+        start = time.perf_counter()
+        try:
+            return funktion(*args, **kwargs)
+        except BaseException as e:
+            fehler = type(e).__name__
+            raise
+        finally:
+            dauer = time.perf_counter() - start
+            stapel.pop()
+            _erfasse(name, dauer, aufruf, len(stapel), fehler)
+    
+    return gemessen
+
+
+def _umhuelle_dateizugriff(funktion: Callable, richtung: str) -> Callable:
+    """Zählt Bytes und Dateien eines Dateizugriffs für alle laufenden Aufrufe"""
+    
+    @functools.wraps(funktion)
+    def gezaehlt(self, datei_pfad, *args, **kwargs):
+        ergebnis = funktion(self, datei_pfad, *args, **kwargs)
+        stapel = _stapel() if _aktiv else None
+        if stapel:
+            try:
+                groesse = os.path.getsize(datei_pfad)
+            except OSError:
+                # Fehlende Datei (_lade_datei gibt dann eine leere Liste zurück)
+                return ergebnis
+            for aufruf in stapel:
+                setattr(aufruf, richtung, getattr(aufruf, richtung) + groesse)
+                aufruf.dateien += 1
+        return ergebnis
+    
+    return gezaehlt
+
+
+def _erfasse(name: str, dauer: float, aufruf: _Aufruf, tiefe: int, fehler: Optional[str]):
+    eintrag = {
+        "zeit": time.time(),
+        "methode": name,
+        "dauer_s": dauer,
+        "bytes_gelesen": aufruf.gelesen,
+        "bytes_geschrieben": aufruf.geschrieben,
+        "dateien": aufruf.dateien,
+        "tiefe": tiefe,
+        "thread": threading.current_thread().name,
+    }
+    if fehler:
+        eintrag["fehler"] = fehler
+    with _lock:
+        _puffer.append(eintrag)
+        summe = _summen.get(name)
+        if summe is None:
+            summe = _summen[name] = {"aufrufe": 0, "dauer_s": 0.0, "max_s": 0.0, "bytes_gelesen": 0,
+                                     "bytes_geschrieben": 0, "dateien": 0, "fehler": 0}
+        summe["aufrufe"] += 1
+        summe["dauer_s"] += dauer
+        if dauer > summe["max_s"]:
+            summe["max_s"] = dauer
+        summe["bytes_gelesen"] += aufruf.gelesen
+        summe["bytes_geschrieben"] += aufruf.geschrieben
+        summe["dateien"] += aufruf.dateien
+        if fehler:
+            summe["fehler"] += 1
+
+
+# --- Steuerung -------------------------------------------------------------
+
+def ist_aktiv() -> bool:
+    """Gibt zurück, ob gerade gemessen wird"""
+    return _aktiv
+
+
+def aktiviere(puffer: Optional[int] = None):
+    """
+    Schaltet die Messung ein
+    
+    Args:
+        puffer: Anzahl der Aufrufe im Ringpuffer (Standard: bisherige Größe)
+    """
+    global _aktiv, _puffer
+    with _lock:
+        if puffer and puffer != _puffer.maxlen:
+            _puffer = deque(_puffer, maxlen=puffer)
+        if not _originale:
+            for klasse, name, richtung in _ziele():
+                funktion = vars(klasse)[name]
+                _originale[(klasse, name)] = funktion
+                setattr(klasse, name, _umhuelle_dateizugriff(funktion, richtung) if richtung
+                        else _umhuelle(klasse, funktion))
+        _aktiv = True
+
+
+def deaktiviere():
+    """Schaltet die Messung aus und stellt die ursprünglichen Methoden wieder her"""
+    global _aktiv
+    with _lock:
+        _aktiv = False
+        for (klasse, name), funktion in _originale.items():
+            setattr(klasse, name, funktion)
+        _originale.clear()
+
+
+def aktiviere_aus_config(config: Dict[str, Any]) -> bool:
+    """Schaltet die Messung ein, wenn diagnose.messung in der Konfiguration gesetzt ist"""
+    diagnose = config.get("diagnose", {})
+    if diagnose.get("messung"):
+        aktiviere(diagnose.get("messpuffer") or STANDARD_PUFFER)
+    return _aktiv
+
+
+def zuruecksetzen():
+    """Leert Ringpuffer und Summen"""
+    global _seit
+    with _lock:
+        _puffer.clear()
+        _summen.clear()
+        _seit = datetime.now()
+
+
+# --- Auswertung ------------------------------------------------------------
+
+def letzte_aufrufe(anzahl: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Gibt die letzten Aufrufe aus dem Ringpuffer zurück (neueste zuletzt)"""
+    with _lock:
+        eintraege = list(_puffer)
+    return eintraege[-anzahl:] if anzahl else eintraege
+
+
+def summen() -> Dict[str, Dict[str, float]]:
+    """Gibt die Summen je Methode zurück, nach Gesamtdauer absteigend sortiert"""
+    with _lock:
+        kopie = {name: dict(werte) for name, werte in _summen.items()}
+    return dict(sorted(kopie.items(), key=lambda e: e[1]["dauer_s"], reverse=True))
+
+
+def als_json(mit_aufrufen: bool = True) -> Dict[str, Any]:
+    """Gibt Summen und (optional) den Ringpuffer als JSON-fähiges Dict zurück"""
+    daten = {
+        "aktiv": _aktiv,
+        "seit": _seit.isoformat(timespec="seconds"),
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "summen": summen(),
+    }
+    if mit_aufrufen:
+        daten["aufrufe"] = letzte_aufrufe()
+    return daten
+
+
+def speichere_json(pfad: str, mit_aufrufen: bool = True):
+    """Schreibt als_json() in eine Datei"""
+    temp_pfad = f"{pfad}.tmp"
+    with open(temp_pfad, "w", encoding="utf-8") as f:
+        json.dump(als_json(mit_aufrufen), f, ensure_ascii=False, indent=2)
+    os.replace(temp_pfad, pfad)
+
+
+def _label(wert: str) -> str:
+    return wert.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def als_prometheus() -> str:
+    """Gibt die Summen im Textformat von Prometheus zurück (z.B. für den node_exporter textfile collector)"""
+    metriken = (
+        ("aufrufe_total", "counter", "Anzahl der Aufrufe", "aufrufe"),
+        ("dauer_sekunden_total", "counter", "Summe der Laufzeit in Sekunden", "dauer_s"),
+        ("dauer_sekunden_max", "gauge", "Längste Laufzeit eines Aufrufs in Sekunden", "max_s"),
+        ("gelesen_bytes_total", "counter", "Gelesene Bytes", "bytes_gelesen"),
+        ("geschrieben_bytes_total", "counter", "Geschriebene Bytes", "bytes_geschrieben"),
+        ("dateien_total", "counter", "Gelesene und geschriebene Dateien", "dateien"),
+        ("fehler_total", "counter", "Aufrufe mit Ausnahme", "fehler"),
+    )
+    werte = summen()
+    zeilen = []
+    for metrik, typ, hilfe, feld in metriken:
+        name = f"{PROMETHEUS_PRAEFIX}_{metrik}"
+        zeilen.append(f"# HELP {name} {hilfe}")
+        zeilen.append(f"# TYPE {name} {typ}")
+        for methode, summe in sorted(werte.items()):
+            wert = summe[feld]
+            zeilen.append(f'{name}{{methode="{_label(methode)}"}} {round(wert, 6) if isinstance(wert, float) else wert}')
+    return "\n".join(zeilen) + "\n"
+
+
+def speichere_prometheus(pfad: str):
+    """Schreibt als_prometheus() in eine Datei (atomar, damit ein Collector nie halbe Dateien liest)"""
+    temp_pfad = f"{pfad}.tmp"
+    with open(temp_pfad, "w", encoding="utf-8") as f:
+        f.write(als_prometheus())
+    os.replace(temp_pfad, pfad)
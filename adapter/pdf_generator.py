@@ -1,17 +1,295 @@
 """
-PDF-Generator für Rechnungen, Angebote und Lieferscheine
+PDF-Generator für Rechnungen, Stundennachweise und Stücklisten
 GoBD-konform, §14 UStG-konform und DIN 5008 Layout
 """
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, Frame, PageTemplate
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (BaseDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, Frame, PageTemplate,
+                                KeepTogether, PageBreak, Flowable, ActionFlowable, NextPageTemplate)
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
 from reportlab.pdfgen import canvas
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple, List
+from xml.sax.saxutils import escape
 import os
 
+from adapter import pdf_manifest
+from adapter.pdf_tabelle import UebertragsTabelle
+
+
+# Bei Änderungen am Layout erhöhen, damit vorhandene PDFs neu erzeugt werden (siehe pdf_manifest)
+VORLAGEN_VERSION = 2
+
+# Inhaltsströme nur komprimieren, nicht zusätzlich ASCII85-kodieren (ohne C-Beschleunigung
+# ist die Kodierung bei großen Dokumenten der teuerste Einzelschritt, die Dateien werden kleiner)
+rl_config.useA85 = 0
+
+# Rechnungsfelder ohne Einfluss auf das Rechnungs-PDF (nicht im Eingabe-Hash)
+NICHT_IM_PDF = ('status', 'mahnstufe', 'mahnungen', 'zahlungen')
+
+# TrueType-Schriften mit Umlauten und €-Zeichen (normal, fett), gesucht bei "schrift": "auto"
+SCHRIFT_KANDIDATEN = [
+    ("C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialbd.ttf"),
+    ("/Library/Fonts/Arial.ttf", "/Library/Fonts/Arial Bold.ttf"),
+    ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+     "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+
+# Prozessweite Caches: registrierte Schriften und dekodierte Logos (Pfad -> (mtime, ImageReader))
+_schriften: Dict[Tuple[Optional[str], Optional[str]], Tuple[str, str]] = {}
+_logos: Dict[str, Tuple[float, ImageReader]] = {}
+
+
+def registriere_schriften(normal_pfad: Optional[str] = None, fett_pfad: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Registriert eine TrueType-Schrift (einmal pro Prozess) und gibt die Fontnamen zurück
+    
+    Ohne Angabe wird Helvetica verwendet (Standardschrift, WinAnsi mit Umlauten
+    und €, wird nicht eingebettet und ist am schnellsten).
+    
+    Args:
+        normal_pfad: Pfad zur Schrift oder "auto" (sucht SCHRIFT_KANDIDATEN)
+        fett_pfad: Optionaler Pfad zum fetten Schnitt
+    
+    Returns:
+        (normal, fett) - Helvetica, falls keine TrueType-Schrift gefunden wurde
+    """
+    schluessel = (normal_pfad, fett_pfad)
+    if schluessel in _schriften:
+        return _schriften[schluessel]
+    
+    if normal_pfad == "auto":
+        kandidaten = SCHRIFT_KANDIDATEN
+    elif normal_pfad:
+        kandidaten = [(normal_pfad, fett_pfad)]
+    else:
+        kandidaten = []
+    ergebnis = ("Helvetica", "Helvetica-Bold")
+    for normal, fett in kandidaten:
+        if not os.path.exists(normal):
+            continue
+        if not fett or not os.path.exists(fett):
+            fett = normal
+        name = f"Dok-{os.path.splitext(os.path.basename(normal))[0]}"
+        name_fett = f"Dok-{os.path.splitext(os.path.basename(fett))[0]}"
+        try:
+            if name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(name, normal))
+            if name_fett not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(name_fett, fett))
+        except TTFError as e:
+            print(f"Warnung: Schrift {normal} konnte nicht geladen werden: {e}")
+            continue
+        # Familie registrieren, damit <b> in Paragraphen den fetten Schnitt verwendet
+        pdfmetrics.registerFontFamily(name, normal=name, bold=name_fett, italic=name, boldItalic=name_fett)
+        ergebnis = (name, name_fett)
+        break
+    
+    _schriften[schluessel] = ergebnis
+    return ergebnis
+
+
+def lade_logo(logo_pfad: Optional[str]) -> Optional[ImageReader]:
+    """Dekodiert ein Logo einmal und gibt den zwischengespeicherten ImageReader zurück"""
+    if not logo_pfad:
+        return None
+    try:
+        mtime = os.path.getmtime(logo_pfad)
+    except OSError:
+        return None
+    eintrag = _logos.get(logo_pfad)
+    if eintrag is None or eintrag[0] != mtime:
+        eintrag = (mtime, ImageReader(logo_pfad))
+        _logos[logo_pfad] = eintrag
+    return eintrag[1]
+
+
+@lru_cache(maxsize=None)
+def _vorlagen(schrift: str, schrift_fett: str) -> Dict[str, Any]:
+    """Erstellt Absatz- und Tabellenstile einmal je Schrift"""
+    styles = getSampleStyleSheet()
+    normal = ParagraphStyle('DokNormal', parent=styles['Normal'], fontName=schrift)
+    return {
+        'normal': normal,
+        'titel': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontName=schrift_fett,
+            fontSize=18,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=15,
+            spaceBefore=10
+        ),
+        # Paragraph-Style für Beschreibung mit Word-Wrap
+        'beschreibung': ParagraphStyle(
+            'BeschreibungStyle',
+            parent=normal,
+            fontSize=9,
+            wordWrap='CJK',  # Ermöglicht Word-Wrap
+            leading=10.8  # Zeilenhöhe
+        ),
+        'details_tabelle': TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTNAME', (0, 0), (0, -1), schrift_fett),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ]),
+        'details_tabelle_kompakt': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTNAME', (0, 0), (0, -1), schrift_fett),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 1),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ]),
+        'positionen_tabelle': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTNAME', (0, 0), (-1, 0), schrift_fett),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # TOP statt MIDDLE für mehrzeilige Beschreibungen
+        ]),
+        'summen_tabelle': TableStyle([
+            ('ALIGN', (4, 0), (4, -1), 'RIGHT'),
+            ('ALIGN', (5, 0), (5, -1), 'RIGHT'),
+            ('FONTNAME', (4, 0), (-1, -1), schrift_fett),
+            ('FONTSIZE', (4, 0), (-1, -1), 10),
+            ('LINEABOVE', (4, 0), (5, 0), 0.5, colors.grey),
+            ('LINEABOVE', (4, -1), (5, -1), 2, colors.black),
+            ('FONTSIZE', (4, -1), (5, -1), 12),
+        ]),
+        # Stundennachweis / Stückliste: Kopfzeile grau, Summenzeile fett
+        'liste_tabelle': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTNAME', (0, 0), (-1, 0), schrift_fett),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'liste_zelle': ParagraphStyle(
+            'ListeZelle',
+            parent=normal,
+            fontSize=8,
+            wordWrap='CJK',
+            leading=9.6
+        ),
+        'unterschrift_tabelle': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('LINEABOVE', (0, 1), (0, 1), 0.5, colors.black),
+            ('LINEABOVE', (2, 1), (2, 1), 0.5, colors.black),
+            ('TOPPADDING', (0, 0), (-1, 0), 12*mm),
+        ]),
+        'bank_tabelle': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), schrift),
+            ('FONTNAME', (0, 0), (0, -1), schrift_fett),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.Color(0.95, 0.95, 0.95)),
+            ('LEFTPADDING', (0, 0), (-1, -1), 3*mm),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3*mm),
+            ('TOPPADDING', (0, 0), (-1, -1), 2*mm),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2*mm),
+        ]),
+    }
+
+
+class _Kopfzeile(ActionFlowable):
+    """Setzt die Kopfzeile der folgenden Seiten (Abschnittswechsel im Dossier)"""
+    
+    def __init__(self, text: str):
+        ActionFlowable.__init__(self)
+        self.text = text
+    
+    def apply(self, doc):
+        doc.kopfzeile = self.text
+
+
+class _NeuerBrief(ActionFlowable):
+    """Beginnt im Sammel-PDF einen neuen Brief (Adressfeld, Kopfzeile und Seitenzählung)"""
+    
+    def __init__(self, empfaenger: Optional[Dict[str, Any]], kopfzeile: str):
+        ActionFlowable.__init__(self)
+        self.empfaenger = empfaenger
+        self.kopfzeile = kopfzeile
+    
+    def apply(self, doc):
+        # Die nächste Seite ist die erste des neuen Briefs
+        doc.empfaenger = self.empfaenger
+        doc.kopfzeile = self.kopfzeile
+        doc.seitenversatz = doc.page
+
+
+class _Baustein(Flowable):
+    """Gleichbleibender Inhalt mehrerer Briefe, der je Dokument nur einmal als PDF-Formular gezeichnet wird"""
+    
+    def __init__(self, name: str, flowables: list, zeichne_formular, _masse: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.name = name
+        self.flowables = flowables
+        self._zeichne_formular = zeichne_formular
+        self._masse = {} if _masse is None else _masse
+    
+    def kopie(self) -> '_Baustein':
+        """Weitere Verwendung im selben Dokument (Platypus vermerkt den Umbruchzustand am Objekt)"""
+        return _Baustein(self.name, self.flowables, self._zeichne_formular, self._masse)
+    
+    def wrap(self, verfuegbar_breite, verfuegbar_hoehe):
+        # Einmal umbrechen, alle Kopien verwenden Maße und Formular wieder
+        masse = self._masse
+        if not masse:
+            masse['breite'] = verfuegbar_breite
+            masse['hoehen'] = [f.wrap(verfuegbar_breite, verfuegbar_hoehe)[1] for f in self.flowables]
+            masse['hoehe'] = sum(f.getSpaceBefore() + h + f.getSpaceAfter()
+                                 for f, h in zip(self.flowables, masse['hoehen']))
+        return masse['breite'], masse['hoehe']
+    
+    def draw(self):
+        self._zeichne_formular(self.canv, self.name, self._zeichne_inhalt)
+    
+    def _zeichne_inhalt(self, canvas_obj):
+        y = self._masse['hoehe']
+        for f, h in zip(self.flowables, self._masse['hoehen']):
+            y -= f.getSpaceBefore() + h
+            f.drawOn(canvas_obj, 0, y)
+            y -= f.getSpaceAfter()
+
+
+class _Lesezeichen(Flowable):
+    """Setzt ein PDF-Lesezeichen auf die aktuelle Seite (ohne Platzbedarf)"""
+    
+    _zaehler = 0
+    
+    def __init__(self, titel: str, ebene: int = 0):
+        super().__init__()
+        self.titel = titel
+        self.ebene = ebene
+        _Lesezeichen._zaehler += 1
+        self.schluessel = f"lz{_Lesezeichen._zaehler}"
+    
+    def wrap(self, verfuegbar_breite, verfuegbar_hoehe):
+        return 0, 0
+    
+    def draw(self):
+        self.canv.bookmarkPage(self.schluessel)
+        self.canv.addOutlineEntry(self.titel, self.schluessel, level=self.ebene, closed=False)
+        self.canv.showOutline()  # Lesezeichenleiste beim Öffnen anzeigen
+
 
 class PDFGenerator:
     """Generiert professionelle PDFs für Rechnungen, Angebote etc."""
@@ -22,55 +300,94 @@ class PDFGenerator:
     ADRESSFELD_BREITE = 85*mm
     ADRESSFELD_HOEHE = 40*mm
     
-    def __init__(self, config: Dict[str, Any]):
+    # Seitenränder und Satzspiegel (erste Seite unterhalb von Briefkopf und Adressfeld)
+    RAND_LINKS = 20*mm
+    RAND_RECHTS = 20*mm
+    INHALT_OBEN_ERSTE_SEITE = 105*mm
+    INHALT_OBEN_FOLGESEITE = 25*mm
+    INHALT_UNTEN = 28*mm  # Oberhalb der Fußzeile
+    
+    def __init__(self, config):
         """
         Args:
-            config: Konfigurationsdictionary mit Unternehmensdaten
+            config: Konfigurationsdictionary mit Unternehmensdaten oder ein DatenManager
+                (für erstelle_*_pdf, die Kunden, Aufträge und Ablageorte nachschlagen)
         """
+        if hasattr(config, 'adapter'):
+            self.manager = config
+            config = self.manager.adapter.get_config()
+        else:
+            self.manager = None
         self.config = config
+        self.uebersprungen = False  # True, wenn der letzte Aufruf ein unverändertes PDF beibehalten hat
+        self.letzter_hash: Optional[str] = None  # Eingabe-Hash des zuletzt erstellten Dokuments
+        self.manifest_schreiben = True  # False: Aufrufer vermerkt letzter_hash selbst (Worker-Prozesse)
         self.unternehmen = config.get('unternehmen', {})
         self.rechnung_config = config.get('rechnung', {})
         
+        # Schriften, Stile und statische Texte einmal je Konfiguration vorbereiten
+        pdf_config = config.get('pdf', {})
+        self.zugferd = bool(self.rechnung_config.get('zugferd'))
+        # PDF/A-3 (ZUGFeRD) verlangt eingebettete Schriften, Helvetica wird nie eingebettet
+        schrift = pdf_config.get('schrift') or ('auto' if self.zugferd else None)
+        self.schrift, self.schrift_fett = registriere_schriften(schrift, pdf_config.get('schrift_fett'))
+        if self.zugferd and self.schrift == 'Helvetica':
+            print("Warnung: Keine TrueType-Schrift gefunden, ZUGFeRD-PDFs sind nicht PDF/A-3-konform "
+                  "(pdf.schrift in der Konfiguration setzen)")
+        self.vorlagen = _vorlagen(self.schrift, self.schrift_fett)
+        
+        u = self.unternehmen
+        self._absender_zeile = f"{u.get('name', '')} • {u.get('strasse', '')} • {u.get('plz', '')} {u.get('ort', '')}"
+        self._briefkopf_zeilen = [u.get('name', ''), f"{u.get('strasse', '')}", f"{u.get('plz', '')} {u.get('ort', '')}"]
+        self._fusszeilen = [
+            self._absender_zeile,
+            f"Tel: {u.get('telefon', '')} • E-Mail: {u.get('email', '')}",
+            f"USt-IdNr: {u.get('ust_id', '')} • Bank: {u.get('bank', '')} • IBAN: {u.get('iban', '')}"
+        ]
+        
     def rechnung_erstellen(self, 
                            rechnung: Dict[str, Any], 
                            kunde: Dict[str, Any],
                            ausgabepfad: str,
-                           logo_pfad: Optional[str] = None) -> str:
+                           logo_pfad: Optional[str] = None,
+                           erzwingen: bool = False) -> str:
         """
         Erstellt eine Rechnung als PDF (DIN 5008 konform)
         
+        Mit "zugferd": true im Abschnitt 'rechnung' der Konfiguration wird die
+        Rechnung zusätzlich als E-Rechnung (CII, Profil EN 16931) eingebettet
+        (ZUGFeRD/Factur-X, PDF/A-3).
+        
         Args:
             rechnung: Rechnungsdaten (Dict aus Rechnung.to_dict())
             kunde: Kundendaten (Dict aus Kunde.to_dict())
             ausgabepfad: Pfad für die PDF-Datei
             logo_pfad: Optionaler Pfad zum Firmenlogo
+            erzwingen: PDF auch dann neu erzeugen, wenn sich keine Eingabe geändert hat
             
         Returns:
             Pfad zur erstellten PDF-Datei
         """
-        # PDF erstellen mit custom Canvas für Header/Footer
-        doc = SimpleDocTemplate(
-            ausgabepfad,
-            pagesize=A4,
-            rightMargin=20*mm,
-            leftMargin=20*mm,
-            topMargin=105*mm,  # Platz für Briefkopf + Adressfeld
-            bottomMargin=20*mm
-        )
+        # Status und Mahnungen erscheinen nicht im PDF; Bezahlen/Mahnen erfordert kein neues Dokument
+        daten = {'rechnung': {k: v for k, v in rechnung.items() if k not in NICHT_IM_PDF}, 'kunde': kunde}
+        eingabe_hash = self._eingabe_hash('rechnung', daten, logo_pfad)
+        if self._ist_aktuell(ausgabepfad, eingabe_hash, erzwingen):
+            return ausgabepfad
         
-        # Story (Inhalt) aufbauen
+        story = self._rechnung_story(rechnung, kunde)
+        e_rechnung = None
+        if self.zugferd:
+            from adapter.erechnung import erechnung_bytes
+            e_rechnung = erechnung_bytes(rechnung, kunde, self.config, syntax="cii", profil="en16931")
+        return self._baue_dokument(ausgabepfad, story, kunde, f"Rechnung {rechnung['rechnungsnummer']}", logo_pfad,
+                                   eingabe_hash, e_rechnung=e_rechnung)
+    
+    def _rechnung_story(self, rechnung: Dict[str, Any], kunde: Dict[str, Any]) -> list:
+        """Baut den Inhalt (Flowables) einer Rechnung"""
         story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom Styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=15,
-            spaceBefore=10
-        )
+        vorlagen = self.vorlagen
+        normal_style = vorlagen['normal']
+        title_style = vorlagen['titel']
         
         # Rechnungskopf
         story.append(Paragraph("RECHNUNG", title_style))
@@ -89,28 +406,11 @@ class PDFGenerator:
         ]
         
         details_table = Table(details_data, colWidths=[50*mm, 60*mm])
-        details_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
+        details_table.setStyle(vorlagen['details_tabelle'])
         story.append(details_table)
         story.append(Spacer(1, 10*mm))
         
-        # Anrede
-        # Verbesserte Anrede: Firma hat Vorrang, sonst Name
-        if kunde.get('firma'):
-            anrede = f"Sehr geehrte Damen und Herren,"
-        elif kunde.get('name'):
-            # Wenn Vorname vorhanden, verwende "Herr/Frau Vorname Name", sonst nur Name
-            if kunde.get('vorname'):
-                anrede = f"Sehr geehrte/r {kunde.get('vorname', '')} {kunde.get('name', '')},"
-            else:
-                anrede = f"Sehr geehrte/r {kunde.get('name', '')},"
-        else:
-            anrede = "Sehr geehrte Damen und Herren,"
-        story.append(Paragraph(anrede, styles['Normal']))
+        story.append(Paragraph(self._anrede(kunde), normal_style))
         story.append(Spacer(1, 5*mm))
         
         # Einleitung mit Auftragsnummer
@@ -119,45 +419,34 @@ class PDFGenerator:
             intro_text = f"hiermit erlauben wir uns, Ihnen die Leistungen zu Auftrag {auftragsnummer} in Rechnung zu stellen:"
         else:
             intro_text = "hiermit erlauben wir uns, Ihnen folgende Leistungen in Rechnung zu stellen:"
-        story.append(Paragraph(intro_text, styles['Normal']))
+        story.append(Paragraph(intro_text, normal_style))
         story.append(Spacer(1, 8*mm))
         
         # Positionstabelle
-        # Paragraph-Style für Beschreibung mit Word-Wrap
-        beschreibung_style = ParagraphStyle(
-            'BeschreibungStyle',
-            parent=styles['Normal'],
-            fontSize=9,
-            wordWrap='CJK',  # Ermöglicht Word-Wrap
-            leading=10.8  # Zeilenhöhe
-        )
+        beschreibung_style = vorlagen['beschreibung']
         
-        pos_data = [['Pos.', 'Beschreibung', 'Menge', 'Einheit', 'Einzelpreis', 'Gesamt']]
+        pos_kopf = ['Pos.', 'Beschreibung', 'Menge', 'Einheit', 'Einzelpreis', 'Gesamt']
         
-        for idx, pos in enumerate(rechnung['positionen'], 1):
+        def pos_zeile(idx, pos):
             beschreibung_text = pos.get('beschreibung', pos.get('bezeichnung', ''))
-            pos_data.append([
+            return ([
                 str(idx),
-                Paragraph(beschreibung_text, beschreibung_style),
+                self._zelltext(beschreibung_text, beschreibung_style, 70*mm),
                 f"{pos.get('menge', 0):.2f}",
                 pos.get('einheit', 'Stk'),
                 f"{pos.get('einzelpreis', 0):.2f} €",
                 f"{pos.get('gesamtpreis', 0):.2f} €"
-            ])
+            ], pos.get('gesamtpreis', 0))
         
-        pos_table = Table(pos_data, colWidths=[10*mm, 70*mm, 20*mm, 20*mm, 25*mm, 25*mm])
-        pos_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # TOP statt MIDDLE für mehrzeilige Beschreibungen
-        ]))
-        story.append(pos_table)
+        # Zeilen (und Paragraphs) entstehen erst beim Seitenumbruch, Seite für Seite
+        story.append(UebertragsTabelle(
+            pos_kopf,
+            (pos_zeile(idx, pos) for idx, pos in enumerate(rechnung['positionen'], 1)),
+            [10*mm, 70*mm, 20*mm, 20*mm, 25*mm, 25*mm],
+            vorlagen['positionen_tabelle'],
+            self._euro,
+            self.schrift_fett
+        ))
         story.append(Spacer(1, 5*mm))
         
         # Summen
@@ -168,15 +457,7 @@ class PDFGenerator:
         ]
         
         summen_table = Table(summen_data, colWidths=[10*mm, 70*mm, 20*mm, 20*mm, 25*mm, 25*mm])
-        summen_table.setStyle(TableStyle([
-            ('ALIGN', (4, 0), (4, -1), 'RIGHT'),
-            ('ALIGN', (5, 0), (5, -1), 'RIGHT'),
-            ('FONTNAME', (4, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (4, 0), (-1, -1), 10),
-            ('LINEABOVE', (4, 0), (5, 0), 0.5, colors.grey),
-            ('LINEABOVE', (4, -1), (5, -1), 2, colors.black),
-            ('FONTSIZE', (4, -1), (5, -1), 12),
-        ]))
+        summen_table.setStyle(vorlagen['summen_tabelle'])
         story.append(summen_table)
         story.append(Spacer(1, 10*mm))
         
@@ -185,59 +466,615 @@ class PDFGenerator:
         bis zum <b>{faelligkeitsdatum.strftime('%d.%m.%Y')}</b> unter Angabe der Rechnungsnummer 
         <b>{rechnung['rechnungsnummer']}</b> auf unser Konto zu überweisen:"""
         
-        story.append(Paragraph(zahlungstext, styles['Normal']))
+        story.append(Paragraph(zahlungstext, normal_style))
         story.append(Spacer(1, 5*mm))
         
-        # Bankverbindung
+        story.append(self._bankverbindung())
+        story.append(Spacer(1, 10*mm))
+        
+        # Hinweise
+        if rechnung.get('notizen'):
+            story.append(Paragraph(f"<b>Hinweise:</b> {rechnung['notizen']}", normal_style))
+            story.append(Spacer(1, 5*mm))
+        
+        story.append(Paragraph("Vielen Dank für Ihren Auftrag und Ihr Vertrauen!", normal_style))
+        story.append(Spacer(1, 8*mm))
+        story.append(Paragraph("Mit freundlichen Grüßen", normal_style))
+        story.append(Spacer(1, 15*mm))
+        story.append(Paragraph(self.unternehmen.get('name', ''), normal_style))
+        return story
+    
+    @staticmethod
+    def _anrede(kunde: Dict[str, Any]) -> str:
+        """Briefanrede: Firma hat Vorrang, sonst Name"""
+        if kunde.get('firma'):
+            return "Sehr geehrte Damen und Herren,"
+        if kunde.get('name'):
+            # Wenn Vorname vorhanden, verwende "Vorname Name", sonst nur Name
+            if kunde.get('vorname'):
+                return f"Sehr geehrte/r {kunde.get('vorname', '')} {kunde.get('name', '')},"
+            return f"Sehr geehrte/r {kunde.get('name', '')},"
+        return "Sehr geehrte Damen und Herren,"
+    
+    def _bankverbindung(self) -> Table:
+        """Tabelle mit der Bankverbindung des Unternehmens"""
         bank_data = [
             ['Kontoinhaber:', self.unternehmen.get('name', '')],
             ['Bank:', self.unternehmen.get('bank', '')],
             ['IBAN:', self.unternehmen.get('iban', '')],
             ['BIC:', self.unternehmen.get('bic', '')],
         ]
-        
         bank_table = Table(bank_data, colWidths=[35*mm, 95*mm])
-        bank_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.Color(0.95, 0.95, 0.95)),
-            ('LEFTPADDING', (0, 0), (-1, -1), 3*mm),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3*mm),
-            ('TOPPADDING', (0, 0), (-1, -1), 2*mm),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2*mm),
+        bank_table.setStyle(self.vorlagen['bank_tabelle'])
+        return bank_table
+    
+    def mahnungen_erstellen(self, mahnungen: List[Dict[str, Any]], ausgabepfad: str,
+                            logo_pfad: Optional[str] = None) -> str:
+        """
+        Setzt alle Mahnschreiben eines Mahnlaufs in ein gemeinsames PDF
+        
+        Jedes Schreiben beginnt mit Briefkopf und Adressfeld auf einer neuen Seite
+        und zählt seine Seiten ab 1. Briefkopf, Fußzeile, Logo und Schriften sind
+        nur einmal im PDF enthalten, ein Lauf über tausende Rechnungen ist daher
+        ein einziger Renderdurchgang.
+        
+        Args:
+            mahnungen: adapter.mahnwesen.plane_mahnlauf()['mahnungen']
+            ausgabepfad: Pfad für die PDF-Datei
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei
+        """
+        if not mahnungen:
+            raise ValueError("Keine Mahnungen im Mahnlauf.")
+        # Bankverbindung und Grußformel sind in allen Schreiben gleich
+        normal_style = self.vorlagen['normal']
+        schluss = _Baustein('mahnung_schluss', [
+            self._bankverbindung(),
+            Spacer(1, 6*mm),
+            Paragraph("Mit freundlichen Grüßen", normal_style),
+            Spacer(1, 10*mm),
+            Paragraph(self.unternehmen.get('name', ''), normal_style),
+        ], self._zeichne_formular)
+        
+        story = []
+        for nummer, mahnung in enumerate(mahnungen):
+            titel = f"{mahnung['bezeichnung']} {mahnung['rechnungsnummer']}"
+            if nummer:
+                story.extend([_NeuerBrief(mahnung['kunde'], titel), NextPageTemplate('erste'), PageBreak()])
+            story.append(_Lesezeichen(titel))
+            story.extend(self._mahnung_story(mahnung))
+            story.append(schluss.kopie())
+        
+        erste = mahnungen[0]
+        datum = datetime.fromisoformat(erste['datum']).strftime('%d.%m.%Y')
+        return self._baue_dokument(ausgabepfad, story, erste['kunde'], f"Mahnlauf vom {datum}", logo_pfad,
+                                   kopfzeile=f"{erste['bezeichnung']} {erste['rechnungsnummer']}")
+    
+    def _mahnung_story(self, mahnung: Dict[str, Any]) -> list:
+        """Baut den veränderlichen Inhalt (Flowables) eines Mahnschreibens bis zur Bankverbindung"""
+        vorlagen = self.vorlagen
+        normal_style = vorlagen['normal']
+        kunde = mahnung['kunde']
+        datum = datetime.fromisoformat(mahnung['datum'])
+        
+        story = [Paragraph(self._markup(mahnung['bezeichnung'].upper()), vorlagen['titel'])]
+        # Kompakter als die Rechnung: jedes Schreiben soll auf eine Seite passen
+        rechnungsdatum = datetime.fromisoformat(mahnung['rechnungsdatum']).strftime('%d.%m.%Y')
+        details_table = Table([
+            ['Datum:', datum.strftime('%d.%m.%Y')],
+            ['Rechnung:', f"{mahnung['rechnungsnummer']} vom {rechnungsdatum}"],
+            ['Fällig seit:', datetime.fromisoformat(mahnung['faelligkeitsdatum']).strftime('%d.%m.%Y')],
+            ['Kundennummer:', kunde.get('id', 'N/A')],
+        ], colWidths=[50*mm, 60*mm])
+        details_table.setStyle(vorlagen['details_tabelle_kompakt'])
+        story.append(details_table)
+        story.append(Spacer(1, 6*mm))
+        
+        story.append(Paragraph(self._anrede(kunde), normal_style))
+        story.append(Spacer(1, 3*mm))
+        story.append(Paragraph(self._markup(mahnung['text']), normal_style))
+        story.append(Spacer(1, 5*mm))
+        
+        summen_data = [['', '', '', '', 'Rechnungsbetrag:', self._euro(mahnung['betrag'])]]
+        if mahnung['mahngebuehren']:
+            summen_data.append(['', '', '', '', 'Mahngebühren:', self._euro(mahnung['mahngebuehren'])])
+        if mahnung.get('bezahlt'):
+            summen_data.append(['', '', '', '', 'Bereits bezahlt:', self._euro(-mahnung['bezahlt'])])
+        summen_data.append(['', '', '', '', 'Offener Betrag:', self._euro(mahnung['offen'])])
+        summen_table = Table(summen_data, colWidths=[10*mm, 70*mm, 20*mm, 20*mm, 25*mm, 25*mm])
+        summen_table.setStyle(vorlagen['summen_tabelle'])
+        story.append(summen_table)
+        story.append(Spacer(1, 6*mm))
+        
+        frist = datetime.fromisoformat(mahnung['frist']).strftime('%d.%m.%Y')
+        story.append(Paragraph(
+            f"Bitte überweisen Sie den <b>offenen Betrag von {self._euro(mahnung['offen'])}</b> bis zum "
+            f"<b>{frist}</b> unter Angabe der Rechnungsnummer <b>{mahnung['rechnungsnummer']}</b> auf das unten angegebene Konto. "
+            f"Sollten Sie die Zahlung inzwischen veranlasst haben, betrachten Sie dieses Schreiben bitte "
+            f"als gegenstandslos.",
+            normal_style))
+        story.append(Spacer(1, 4*mm))
+        return story
+    
+    def erstelle_rechnung_pdf(self, rechnung, logo_pfad: Optional[str] = None, erzwingen: bool = False) -> str:
+        """
+        Erstellt das PDF einer Rechnung im Ordner 'Rechnungen' des Auftrags
+        
+        Args:
+            rechnung: Rechnung-Objekt
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+            erzwingen: PDF auch dann neu erzeugen, wenn sich keine Eingabe geändert hat
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei (Rechnungen/Rechnung_<Nr>_<YYYYMMDD>.pdf)
+        """
+        daten = self.rechnung_daten(rechnung)
+        return self.rechnung_erstellen(daten['rechnung'], daten['kunde'], daten['ausgabepfad'],
+                                       logo_pfad, erzwingen)
+    
+    def rechnung_daten(self, rechnung) -> Dict[str, Any]:
+        """
+        Serialisiert, was das PDF einer Rechnung braucht (legt den Ordner an)
+        
+        Liest die Objekte des DatenManagers; in der Oberfläche daher im Tk-Thread
+        aufrufen und nur das Ergebnis an rechnung_erstellen() im Hintergrund übergeben.
+        
+        Returns:
+            {'rechnung', 'kunde', 'ausgabepfad'}
+        """
+        kunde, auftrag, ausgabepfad = self._get_rechnung_kontext(rechnung)
+        return {
+            'rechnung': rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer),
+            'kunde': kunde.to_dict(),
+            'ausgabepfad': ausgabepfad,
+        }
+    
+    def erstelle_stundennachweis_pdf(self, nachweis, logo_pfad: Optional[str] = None, erzwingen: bool = False) -> str:
+        """
+        Erstellt das PDF eines Stundennachweises im Ordner der Position
+        
+        Args:
+            nachweis: Stundennachweis-Objekt
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+            erzwingen: PDF auch dann neu erzeugen, wenn sich keine Eingabe geändert hat
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei (<NN>_<Position>/Stundennachweis_<Auftrag>_<NN>_<YYYYMMDD>.pdf)
+        """
+        auftragsnummer, positionsnummer, position_ordner = self._get_position_ordner(nachweis.auftrag_id, nachweis.position_id)
+        ausgabepfad = os.path.join(
+            position_ordner,
+            f"Stundennachweis_{auftragsnummer}_{positionsnummer:02d}_{nachweis.datum.strftime('%Y%m%d')}.pdf")
+        kunde = self._get_kunde_dict(nachweis.kunde_id)
+        eingabe_hash = self._eingabe_hash('stundennachweis', {'nachweis': nachweis.to_dict(), 'kunde': kunde,
+                                                              'auftragsnummer': auftragsnummer}, logo_pfad)
+        if self._ist_aktuell(ausgabepfad, eingabe_hash, erzwingen):
+            return ausgabepfad
+        
+        story = self._stundennachweis_story(nachweis, auftragsnummer)
+        return self._baue_dokument(ausgabepfad, story, kunde, f"Stundennachweis {auftragsnummer}/{positionsnummer:02d}",
+                                   logo_pfad, eingabe_hash)
+    
+    def _stundennachweis_story(self, nachweis, auftragsnummer: str) -> list:
+        """Baut den Inhalt (Flowables) eines Stundennachweises"""
+        vorlagen = self.vorlagen
+        normal_style = vorlagen['normal']
+        zelle_style = vorlagen['liste_zelle']
+        
+        story = [Paragraph("STUNDENNACHWEIS", vorlagen['titel'])]
+        story.append(self._details_tabelle([
+            ['Auftragsnummer:', auftragsnummer],
+            ['Projekt:', nachweis.projekt],
+            ['Bearbeiter:', nachweis.bearbeiter],
+            ['Einsatzort:', nachweis.ort],
+            ['Datum:', nachweis.datum.strftime('%d.%m.%Y')],
         ]))
-        story.append(bank_table)
+        story.append(Spacer(1, 8*mm))
+        
+        # Zeiteinträge (chronologisch), seitenweise mit Übertrag der Stunden
+        kopf = ['Datum', 'Tag', 'Bearbeiter', 'Zeit 1', 'Zeit 2', 'Tätigkeit', 'Std.']
+        spalten = [20*mm, 22*mm, 28*mm, 22*mm, 22*mm, 41*mm, 15*mm]
+        
+        def zeitspanne(start, ende) -> str:
+            return f"{start.strftime('%H:%M')}-{ende.strftime('%H:%M')}" if start and ende else ""
+        
+        def zeile(ze):
+            stunden = ze.berechne_gesamtzeit()
+            return ([ze.datum.strftime('%d.%m.%Y'), ze.get_wochentag(), ze.bearbeiter,
+                     zeitspanne(ze.startzeit_1, ze.endzeit_1), zeitspanne(ze.startzeit_2, ze.endzeit_2),
+                     self._zelltext(self._markup(ze.taetigkeitsbeschreibung), zelle_style, spalten[5]),
+                     f"{stunden:.2f}"], stunden)
+        
+        zeilen = (zeile(ze) for ze in sorted(nachweis.zeiteintraege, key=lambda z: z.datum))
+        story.append(self._listen_tabelle(kopf, zeilen, spalten, lambda std: f"{std:.2f}", rechtsbuendig=[6]))
+        story.append(Spacer(1, 5*mm))
+        
+        summen = [['Gesamtstunden:', f"{nachweis.get_gesamtstunden():.2f} Std."]]
+        if nachweis.anzahl_fahrten:
+            summen.append(['Fahrten:', f"{nachweis.anzahl_fahrten} × {nachweis.reisestrecke_km:.1f} km "
+                                       f"= {nachweis.get_gesamtstrecke():.1f} km"])
+        story.append(self._details_tabelle(summen))
         story.append(Spacer(1, 10*mm))
         
-        # Hinweise
-        if rechnung.get('notizen'):
-            story.append(Paragraph(f"<b>Hinweise:</b> {rechnung['notizen']}", styles['Normal']))
-            story.append(Spacer(1, 5*mm))
+        story.append(Paragraph("Die oben aufgeführten Arbeitszeiten werden bestätigt.", normal_style))
+        story.append(self._unterschriften(nachweis.unterschrift_bearbeiter or nachweis.bearbeiter, "Bearbeiter",
+                                          nachweis.unterschrift_kunde, "Kunde"))
+        return story
+    
+    def erstelle_stueckliste_pdf(self, stueckliste, logo_pfad: Optional[str] = None, erzwingen: bool = False) -> str:
+        """
+        Erstellt das PDF einer Stückliste im Ordner der Position
         
-        story.append(Paragraph("Vielen Dank für Ihren Auftrag und Ihr Vertrauen!", styles['Normal']))
+        Args:
+            stueckliste: Stueckliste-Objekt
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+            erzwingen: PDF auch dann neu erzeugen, wenn sich keine Eingabe geändert hat
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei (<NN>_<Position>/Stueckliste_<Auftrag>_<NN>_<YYYYMMDD>.pdf)
+        """
+        auftragsnummer, positionsnummer, position_ordner = self._get_position_ordner(stueckliste.auftrag_id, stueckliste.position_id)
+        ausgabepfad = os.path.join(
+            position_ordner,
+            f"Stueckliste_{auftragsnummer}_{positionsnummer:02d}_{stueckliste.erstellt_am.strftime('%Y%m%d')}.pdf")
+        kunde = self._get_kunde_dict(stueckliste.kunde_id)
+        eingabe_hash = self._eingabe_hash('stueckliste', {'stueckliste': stueckliste.to_dict(), 'kunde': kunde,
+                                                          'auftragsnummer': auftragsnummer}, logo_pfad)
+        if self._ist_aktuell(ausgabepfad, eingabe_hash, erzwingen):
+            return ausgabepfad
+        
+        story = self._stueckliste_story(stueckliste, auftragsnummer)
+        return self._baue_dokument(ausgabepfad, story, kunde, f"Stückliste {stueckliste.stuecklisten_nummer}",
+                                   logo_pfad, eingabe_hash)
+    
+    def _stueckliste_story(self, stueckliste, auftragsnummer: str) -> list:
+        """Baut den Inhalt (Flowables) einer Stückliste"""
+        vorlagen = self.vorlagen
+        zelle_style = vorlagen['liste_zelle']
+        
+        story = [Paragraph("STÜCKLISTE", vorlagen['titel'])]
+        story.append(self._details_tabelle([
+            ['Stücklisten-Nr.:', stueckliste.stuecklisten_nummer],
+            ['Auftragsnummer:', auftragsnummer],
+            ['Projekt:', stueckliste.projekt],
+            ['Datum:', stueckliste.erstellt_am.strftime('%d.%m.%Y')],
+        ]))
         story.append(Spacer(1, 8*mm))
-        story.append(Paragraph("Mit freundlichen Grüßen", styles['Normal']))
-        story.append(Spacer(1, 15*mm))
-        story.append(Paragraph(self.unternehmen.get('name', ''), styles['Normal']))
         
-        # PDF erstellen mit custom Header/Footer
-        doc.build(
-            story, 
-            onFirstPage=lambda c, d: self._add_header_footer(c, d, kunde, logo_pfad, True),
-            onLaterPages=lambda c, d: self._add_header_footer(c, d, kunde, logo_pfad, False)
+        kopf = ['Pos.', 'Material', 'Menge', 'Einheit', 'Einzelpreis', 'Gesamt']
+        spalten = [10*mm, 80*mm, 18*mm, 16*mm, 23*mm, 23*mm]
+        
+        def material(eintrag) -> str:
+            if eintrag.beschreibung:
+                return f"{self._markup(eintrag.material)}<br/><font size=7>{self._markup(eintrag.beschreibung)}</font>"
+            return self._markup(eintrag.material)
+        
+        zeilen = (
+            ([str(idx), self._zelltext(material(e), zelle_style, spalten[1]),
+              f"{e.menge:.2f}", e.einheit, f"{e.einzelpreis:.2f} €", f"{e.gesamtpreis:.2f} €"], e.gesamtpreis)
+            for idx, e in enumerate(stueckliste.eintraege, 1)
         )
+        story.append(self._listen_tabelle(kopf, zeilen, spalten, self._euro, rechtsbuendig=[2, 4, 5]))
+        story.append(Spacer(1, 5*mm))
+        
+        story.append(self._details_tabelle([['Gesamtbetrag (netto):', f"{stueckliste.get_gesamtbetrag():.2f} €"]]))
+        if stueckliste.notizen:
+            story.append(Spacer(1, 5*mm))
+            story.append(Paragraph(f"<b>Hinweise:</b> {self._markup(stueckliste.notizen)}", vorlagen['normal']))
+        return story
+    
+    def erstelle_dossier_pdf(self, rechnung, logo_pfad: Optional[str] = None, erzwingen: bool = False) -> str:
+        """
+        Erstellt ein Dossier aus Rechnung, Stundennachweisen und Stücklisten des Auftrags
         
+        Args:
+            rechnung: Rechnung-Objekt
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+            erzwingen: PDF auch dann neu erzeugen, wenn sich keine Eingabe geändert hat
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei (Rechnungen/Dossier_<Nr>_<YYYYMMDD>.pdf)
+        """
+        return self.dossier_erstellen(self.dossier_daten(rechnung), logo_pfad, erzwingen)
+    
+    def dossier_daten(self, rechnung) -> Dict[str, Any]:
+        """
+        Serialisiert alles, was das Dossier einer Rechnung braucht (legt den Ordner an)
+        
+        Liest die Objekte des DatenManagers; in der Oberfläche daher im Tk-Thread
+        aufrufen und nur das Ergebnis an dossier_erstellen() im Hintergrund übergeben.
+        
+        Returns:
+            {'rechnung', 'kunde', 'auftragsnummer', 'ausgabepfad', 'anhaenge'} mit
+            je Anhang 'position' (Nummer ab 1), 'bezeichnung', 'nachweis' und
+            'stueckliste' (Dicts oder None)
+        """
+        manager = self._get_manager()
+        kunde, auftrag, rechnungspfad = self._get_rechnung_kontext(rechnung)
+        ordner, dateiname = os.path.split(rechnungspfad)
+        
+        anhaenge = []
+        for positionsnummer, position in enumerate(auftrag.positionen, 1):
+            nachweis = manager.get_stundennachweis_fuer_position(auftrag.id, position.id)
+            stueckliste = manager.get_stueckliste_fuer_position(auftrag.id, position.id)
+            if nachweis or stueckliste:
+                anhaenge.append({'position': positionsnummer, 'bezeichnung': position.bezeichnung,
+                                 'nachweis': nachweis.to_dict() if nachweis else None,
+                                 'stueckliste': stueckliste.to_dict() if stueckliste else None})
+        return {
+            'rechnung': rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer),
+            'kunde': kunde.to_dict(),
+            'auftragsnummer': auftrag.auftragsnummer,
+            'ausgabepfad': os.path.join(ordner, dateiname.replace("Rechnung_", "Dossier_", 1)),
+            'anhaenge': anhaenge,
+        }
+    
+    def dossier_erstellen(self, dossier: Dict[str, Any], logo_pfad: Optional[str] = None,
+                          erzwingen: bool = False) -> str:
+        """
+        Setzt das Dossier aus dossier_daten() (braucht keinen DatenManager)
+        
+        Alle Dokumente werden in einem einzigen Durchlauf in dieselbe PDF-Datei
+        gesetzt (kein Zusammenfügen einzelner PDFs): Briefkopf, Fußzeile, Logo
+        und Schriften sind nur einmal enthalten. Jedes Dokument beginnt auf
+        einer neuen Seite und erhält ein Lesezeichen (Positionen als Gruppe).
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei
+        """
+        from model.stundennachweis import Stundennachweis
+        from model.stueckliste import Stueckliste
+        
+        rechnung_dict = dossier['rechnung']
+        kunde_dict = dossier['kunde']
+        auftragsnummer = dossier['auftragsnummer']
+        ausgabepfad = dossier['ausgabepfad']
+        
+        daten = {
+            'rechnung': {k: v for k, v in rechnung_dict.items() if k not in NICHT_IM_PDF},
+            'kunde': kunde_dict,
+            'anhaenge': dossier['anhaenge'],
+        }
+        eingabe_hash = self._eingabe_hash('dossier', daten, logo_pfad)
+        if self._ist_aktuell(ausgabepfad, eingabe_hash, erzwingen):
+            return ausgabepfad
+        
+        rechnung_titel = f"Rechnung {rechnung_dict['rechnungsnummer']}"
+        story = [_Lesezeichen(rechnung_titel, 0)]
+        story.extend(self._rechnung_story(rechnung_dict, kunde_dict))
+        for anhang in dossier['anhaenge']:
+            positionsnummer = anhang['position']
+            gruppe = f"Pos. {positionsnummer:02d} {anhang['bezeichnung']}"
+            if anhang['nachweis']:
+                nachweis = Stundennachweis.from_dict(anhang['nachweis'])
+                story.extend(self._neuer_abschnitt(f"Stundennachweis {auftragsnummer}/{positionsnummer:02d}",
+                                                   [(gruppe, 0), ("Stundennachweis", 1)]))
+                story.extend(self._stundennachweis_story(nachweis, auftragsnummer))
+                gruppe = None
+            if anhang['stueckliste']:
+                stueckliste = Stueckliste.from_dict(anhang['stueckliste'])
+                lesezeichen = [(gruppe, 0)] if gruppe else []
+                story.extend(self._neuer_abschnitt(f"Stückliste {stueckliste.stuecklisten_nummer}",
+                                                   lesezeichen + [("Stückliste", 1)]))
+                story.extend(self._stueckliste_story(stueckliste, auftragsnummer))
+        
+        return self._baue_dokument(ausgabepfad, story, kunde_dict, f"Dossier {rechnung_dict['rechnungsnummer']}",
+                                   logo_pfad, eingabe_hash, kopfzeile=rechnung_titel)
+    
+    @staticmethod
+    def _neuer_abschnitt(kopfzeile: str, lesezeichen: List[Tuple[str, int]]) -> list:
+        """Flowables für den Beginn eines Dokuments im Dossier (neue Seite, Kopfzeile, Lesezeichen)"""
+        return [_Kopfzeile(kopfzeile), PageBreak()] + [_Lesezeichen(titel, ebene) for titel, ebene in lesezeichen]
+    
+    def _eingabe_hash(self, art: str, daten: Dict[str, Any], logo_pfad: Optional[str]) -> str:
+        """Hash aller Eingaben, die den Inhalt eines Dokuments bestimmen"""
+        return pdf_manifest.berechne_hash({
+            'art': art,
+            'vorlagen_version': VORLAGEN_VERSION,
+            'daten': daten,
+            'unternehmen': self.unternehmen,
+            'rechnung': self.rechnung_config,
+            'schriften': [self.schrift, self.schrift_fett],
+            'logo': pdf_manifest.datei_hash(logo_pfad),
+        })
+    
+    def _ist_aktuell(self, ausgabepfad: str, eingabe_hash: str, erzwingen: bool) -> bool:
+        """Prüft, ob das vorhandene PDF übernommen werden kann (setzt self.uebersprungen)"""
+        self.letzter_hash = eingabe_hash
+        self.uebersprungen = not erzwingen and pdf_manifest.ist_aktuell(ausgabepfad, eingabe_hash)
+        return self.uebersprungen
+    
+    @staticmethod
+    def _markup(text: str) -> str:
+        """Maskiert Benutzertext für Paragraph (Sonderzeichen, Zeilenumbrüche)"""
+        return escape(text or "").replace('\n', '<br/>')
+    
+    def _get_manager(self):
+        """Gibt den DatenManager zurück (nur verfügbar, wenn mit Manager erzeugt)"""
+        if self.manager is None:
+            raise ValueError("PDFGenerator wurde ohne DatenManager erzeugt.")
+        return self.manager
+    
+    def _get_rechnung_kontext(self, rechnung):
+        """
+        Ermittelt Kunde, Auftrag und Standard-PDF-Pfad einer Rechnung (legt den Ordner an)
+        
+        Returns:
+            (Kunde, Auftrag, Pfad des Rechnungs-PDFs)
+        """
+        manager = self._get_manager()
+        kunde = manager.get_kunde(rechnung.kunde_id)
+        if not kunde:
+            raise ValueError("Kunde der Rechnung nicht gefunden.")
+        auftrag = manager.get_auftrag(rechnung.auftrag_id)
+        if not auftrag:
+            raise ValueError("Auftrag der Rechnung nicht gefunden.")
+        
+        ausgabepfad = manager.adapter.get_rechnung_pdf_pfad(
+            auftrag.auftragsnummer, rechnung.rechnungsnummer, rechnung.rechnungsdatum)
+        os.makedirs(os.path.dirname(ausgabepfad), exist_ok=True)
+        return kunde, auftrag, ausgabepfad
+    
+    def _get_kunde_dict(self, kunde_id: str) -> Optional[Dict[str, Any]]:
+        """Gibt die Kundendaten für das Adressfeld zurück (None, falls unbekannt)"""
+        kunde = self._get_manager().get_kunde(kunde_id) if kunde_id else None
+        return kunde.to_dict() if kunde else None
+    
+    def _get_position_ordner(self, auftrag_id: str, position_id: str) -> Tuple[str, int, str]:
+        """
+        Ermittelt (und erstellt ggf.) den Ordner einer Position
+        
+        Returns:
+            (Auftragsnummer, Positionsnummer ab 1, Ordnerpfad wie 02_Trockenbau)
+        """
+        auftrag = self._get_manager().get_auftrag(auftrag_id)
+        if not auftrag:
+            raise ValueError("Auftrag nicht gefunden.")
+        for positionsnummer, position in enumerate(auftrag.positionen, 1):
+            if position.id == position_id:
+                ordner = self.manager.adapter.erstelle_teilauftrag_ordnerstruktur(
+                    auftrag.auftragsnummer, positionsnummer, position.bezeichnung)
+                return auftrag.auftragsnummer, positionsnummer, ordner
+        raise ValueError("Position nicht im Auftrag gefunden.")
+    
+    def _details_tabelle(self, daten: List[List[str]]) -> Table:
+        """Zweispaltige Tabelle 'Bezeichnung: Wert' (fette Bezeichnungen)"""
+        tabelle = Table(daten, colWidths=[50*mm, 110*mm], hAlign='LEFT')
+        tabelle.setStyle(self.vorlagen['details_tabelle'])
+        return tabelle
+    
+    @staticmethod
+    def _euro(betrag: float) -> str:
+        return f"{betrag:.2f} €"
+    
+    def _listen_tabelle(self, kopf: List[str], zeilen, spalten: List[float], format_summe,
+                        rechtsbuendig: List[int] = ()) -> UebertragsTabelle:
+        """
+        Tabelle für lange Listen (Zeiteinträge, Material), seitenweise mit Übertrag
+        
+        Args:
+            kopf: Spaltenüberschriften
+            zeilen: Iterable von (Zellen, Betrag der letzten Spalte); wird erst beim Rendern verbraucht
+            spalten: Spaltenbreiten
+            format_summe: Formatiert Übertrag und Zwischensumme
+            rechtsbuendig: Indizes rechtsbündiger Spalten
+        """
+        stil = self.vorlagen['liste_tabelle']
+        if rechtsbuendig:
+            stil = TableStyle([('ALIGN', (i, 1), (i, -1), 'RIGHT') for i in rechtsbuendig], parent=stil)
+        tabelle = UebertragsTabelle(kopf, zeilen, spalten, stil, format_summe, self.schrift_fett)
+        tabelle.hAlign = 'LEFT'
+        return tabelle
+    
+    def _unterschriften(self, links_name: str, links_titel: str, rechts_name: str, rechts_titel: str) -> Table:
+        """Zwei Unterschriftsfelder nebeneinander"""
+        daten = [
+            [links_name, '', rechts_name],
+            [f"Datum, Unterschrift {links_titel}", '', f"Datum, Unterschrift {rechts_titel}"],
+        ]
+        tabelle = Table(daten, colWidths=[75*mm, 20*mm, 75*mm], hAlign='LEFT')
+        tabelle.setStyle(self.vorlagen['unterschrift_tabelle'])
+        return KeepTogether([tabelle])
+    
+    def _baue_dokument(self, ausgabepfad: str, story: list, empfaenger: Optional[Dict[str, Any]],
+                       titel: str, logo_pfad: Optional[str] = None, eingabe_hash: Optional[str] = None,
+                       kopfzeile: Optional[str] = None, e_rechnung: Optional[bytes] = None) -> str:
+        """
+        Layout-Engine für alle Dokumente (DIN 5008)
+        
+        Erste Seite: Briefkopf, Adressfeld und Inhalt ab 105 mm. Folgeseiten:
+        schmale Kopfzeile mit Dokumenttitel und entsprechend mehr Platz.
+        Briefkopf und Fußzeile werden je Dokument nur einmal gezeichnet
+        (siehe _zeichne_formular).
+        
+        Args:
+            ausgabepfad: Pfad für die PDF-Datei
+            story: Flowables des Inhalts
+            empfaenger: Kundendaten für das Adressfeld (None = kein Adressfeld)
+            titel: Dokumenttitel (PDF-Metadaten und Kopfzeile der Folgeseiten)
+            logo_pfad: Optionaler Pfad zum Firmenlogo
+            eingabe_hash: Hash der Eingaben, wird nach dem Schreiben im Manifest vermerkt
+            kopfzeile: Kopfzeile der Folgeseiten (Standard: titel; im Dossier je Abschnitt per _Kopfzeile)
+            e_rechnung: CII-XML, das als ZUGFeRD-Rechnung eingebettet wird (siehe adapter/zugferd.py)
+        
+        Returns:
+            Pfad zur erstellten PDF-Datei
+        """
+        breite = A4[0] - self.RAND_LINKS - self.RAND_RECHTS
+        doc = BaseDocTemplate(
+            ausgabepfad,
+            pagesize=A4,
+            leftMargin=self.RAND_LINKS,
+            rightMargin=self.RAND_RECHTS,
+            topMargin=self.INHALT_OBEN_FOLGESEITE,
+            bottomMargin=self.INHALT_UNTEN,
+            title=titel,
+            author=self.unternehmen.get('name', '')
+        )
+        
+        # Logo nur einmal je Dokument auflösen
+        logo = lade_logo(logo_pfad)
+        
+        def erste_seite_zeichnen(c, d):
+            self._add_header_footer(c, d, d.empfaenger, logo, True)
+            if e_rechnung:
+                from adapter.zugferd import bette_zugferd_ein
+                bette_zugferd_ein(c, e_rechnung, titel)
+        
+        erste_seite = PageTemplate(
+            id='erste',
+            frames=[Frame(self.RAND_LINKS, self.INHALT_UNTEN, breite,
+                          A4[1] - self.INHALT_OBEN_ERSTE_SEITE - self.INHALT_UNTEN, id='inhalt_erste')],
+            onPage=erste_seite_zeichnen,
+            autoNextPageTemplate='folge'
+        )
+        folgeseite = PageTemplate(
+            id='folge',
+            frames=[Frame(self.RAND_LINKS, self.INHALT_UNTEN, breite,
+                          A4[1] - self.INHALT_OBEN_FOLGESEITE - self.INHALT_UNTEN, id='inhalt_folge')],
+            onPage=lambda c, d: self._add_header_footer(c, d, d.empfaenger, logo, False, d.kopfzeile)
+        )
+        doc.addPageTemplates([erste_seite, folgeseite])
+        doc.kopfzeile = kopfzeile or titel
+        # Im Sammel-PDF je Brief umgestellt (siehe _NeuerBrief)
+        doc.empfaenger = empfaenger
+        doc.seitenversatz = 0
+        doc.build(story)
+        if eingabe_hash and self.manifest_schreiben:
+            pdf_manifest.merke(ausgabepfad, eingabe_hash)
         return ausgabepfad
     
-    def _add_header_footer(self, canvas_obj, doc, kunde: Dict[str, Any], logo_pfad: Optional[str], is_first_page: bool):
+    def _zelltext(self, text: str, style: ParagraphStyle, spaltenbreite: float):
+        """Gibt kurzen Text ohne Markup direkt zurück, sonst einen umbrechenden Paragraph
+        
+        Einzeilige Zellen brauchen keinen (teuren) Zeilenumbruch; die Tabelle
+        zeichnet sie mit derselben Schrift und Größe.
+        """
+        if '<' not in text and '&' not in text and '\n' not in text:
+            if pdfmetrics.stringWidth(text, style.fontName, style.fontSize) <= spaltenbreite - 12:
+                return text
+        return Paragraph(text, style)
+    
+    def _add_header_footer(self, canvas_obj, doc, kunde: Optional[Dict[str, Any]], logo: Optional[ImageReader],
+                           is_first_page: bool, titel: str = ""):
         """Fügt Header und Footer hinzu (DIN 5008 konform)"""
         canvas_obj.saveState()
         
+        if not is_first_page and titel:
+            # Kopfzeile der Folgeseiten
+            canvas_obj.setFont(self.schrift, 8)
+            canvas_obj.setFillColor(colors.grey)
+            canvas_obj.drawString(self.RAND_LINKS, A4[1] - 15*mm, f"{self.unternehmen.get('name', '')} – {titel}")
+            canvas_obj.line(self.RAND_LINKS, A4[1] - 17*mm, A4[0] - self.RAND_RECHTS, A4[1] - 17*mm)
+            canvas_obj.setFillColor(colors.black)
+        
         if is_first_page:
             # Logo (rechts oben)
-            if logo_pfad and os.path.exists(logo_pfad):
+            if logo is not None:
                 canvas_obj.drawImage(
-                    logo_pfad,
+                    logo,
                     A4[0] - 70*mm,  # Rechts
                     A4[1] - 35*mm,  # Oben
                     width=50*mm,
@@ -246,35 +1083,12 @@ class PDFGenerator:
                     mask='auto'
                 )
             
-            # Firmenadresse (links oben, klein)
-            canvas_obj.setFont('Helvetica', 7)
-            y_pos = A4[1] - 15*mm
-            canvas_obj.drawString(20*mm, y_pos, self.unternehmen.get('name', ''))
-            y_pos -= 3.5*mm
-            canvas_obj.drawString(20*mm, y_pos, f"{self.unternehmen.get('strasse', '')}")
-            y_pos -= 3.5*mm
-            canvas_obj.drawString(20*mm, y_pos, f"{self.unternehmen.get('plz', '')} {self.unternehmen.get('ort', '')}")
-            
-            # Absenderzeile (DIN 5008 Rücksendeangabe)
-            canvas_obj.setFont('Helvetica', 6)
-            absender_zeile = f"{self.unternehmen.get('name', '')} • {self.unternehmen.get('strasse', '')} • {self.unternehmen.get('plz', '')} {self.unternehmen.get('ort', '')}"
-            
-            # Linie unter Absenderzeile
-            canvas_obj.line(
-                self.ADRESSFELD_VON_LINKS,
-                A4[1] - (self.ADRESSFELD_VON_OBEN - 5*mm),
-                self.ADRESSFELD_VON_LINKS + self.ADRESSFELD_BREITE,
-                A4[1] - (self.ADRESSFELD_VON_OBEN - 5*mm)
-            )
-            
-            canvas_obj.drawString(
-                self.ADRESSFELD_VON_LINKS,
-                A4[1] - (self.ADRESSFELD_VON_OBEN - 3*mm),
-                absender_zeile
-            )
-            
+            # Firmenadresse (links oben, klein) und Absenderzeile sind für alle Dokumente gleich
+            self._zeichne_formular(canvas_obj, "briefkopf", self._zeichne_briefkopf)
+        
+        if is_first_page and kunde:
             # Empfängeradresse (im Sichtfenster)
-            canvas_obj.setFont('Helvetica', 11)
+            canvas_obj.setFont(self.schrift, 11)
             y_pos = A4[1] - self.ADRESSFELD_VON_OBEN - 3*mm
             
             # Firma oder Name
@@ -282,10 +1096,10 @@ class PDFGenerator:
                 canvas_obj.drawString(self.ADRESSFELD_VON_LINKS, y_pos, kunde.get('firma', ''))
                 y_pos -= 5*mm
                 if kunde.get('name'):
-                    canvas_obj.setFont('Helvetica', 10)
+                    canvas_obj.setFont(self.schrift, 10)
                     canvas_obj.drawString(self.ADRESSFELD_VON_LINKS, y_pos, f"z.H. {kunde.get('name', '')}")
                     y_pos -= 5*mm
-                    canvas_obj.setFont('Helvetica', 11)
+                    canvas_obj.setFont(self.schrift, 11)
             else:
                 canvas_obj.drawString(self.ADRESSFELD_VON_LINKS, y_pos, kunde.get('name', ''))
                 y_pos -= 5*mm
@@ -297,31 +1111,64 @@ class PDFGenerator:
             # PLZ und Ort
             canvas_obj.drawString(self.ADRESSFELD_VON_LINKS, y_pos, f"{kunde.get('plz', '')} {kunde.get('ort', '')}")
         
-        # Fußzeile (§14 UStG Pflichtangaben) - auf jeder Seite
-        canvas_obj.setFont('Helvetica', 7)
-        canvas_obj.setFillColor(colors.grey)
-        
-        # Trennlinie
-        canvas_obj.line(20*mm, 25*mm, A4[0] - 20*mm, 25*mm)
-        
-        # Fußzeile Text
-        footer_lines = [
-            f"{self.unternehmen.get('name', '')} • {self.unternehmen.get('strasse', '')} • {self.unternehmen.get('plz', '')} {self.unternehmen.get('ort', '')}",
-            f"Tel: {self.unternehmen.get('telefon', '')} • E-Mail: {self.unternehmen.get('email', '')}",
-            f"USt-IdNr: {self.unternehmen.get('ust_id', '')} • Bank: {self.unternehmen.get('bank', '')} • IBAN: {self.unternehmen.get('iban', '')}"
-        ]
-        
-        y_pos = 22*mm
-        for line in footer_lines:
-            canvas_obj.drawCentredString(A4[0] / 2, y_pos, line)
-            y_pos -= 3*mm
+        # Fußzeile (§14 UStG Pflichtangaben) - auf jeder Seite, nur einmal je Dokument gezeichnet
+        self._zeichne_formular(canvas_obj, "fusszeile", self._zeichne_fusszeile)
         
         # Seitenzahl
-        canvas_obj.setFont('Helvetica', 8)
+        canvas_obj.setFont(self.schrift, 8)
+        canvas_obj.setFillColor(colors.grey)
         canvas_obj.drawRightString(
             A4[0] - 20*mm,
             10*mm,
-            f"Seite {doc.page}"
+            f"Seite {doc.page - doc.seitenversatz}"
         )
         
         canvas_obj.restoreState()
+    
+    def _zeichne_formular(self, canvas_obj, name: str, zeichne):
+        """Zeichnet statischen Inhalt einmal je Dokument als PDF-Formular (XObject) und verwendet es wieder"""
+        formulare = canvas_obj.__dict__.setdefault('_dok_formulare', set())
+        if name not in formulare:
+            canvas_obj.beginForm(name)
+            zeichne(canvas_obj)
+            canvas_obj.endForm()
+            formulare.add(name)
+        canvas_obj.doForm(name)
+    
+    def _zeichne_briefkopf(self, canvas_obj):
+        """Zeichnet Firmenadresse und Absenderzeile"""
+        canvas_obj.setFont(self.schrift, 7)
+        y_pos = A4[1] - 15*mm
+        for zeile in self._briefkopf_zeilen:
+            canvas_obj.drawString(20*mm, y_pos, zeile)
+            y_pos -= 3.5*mm
+        
+        # Absenderzeile (DIN 5008 Rücksendeangabe)
+        canvas_obj.setFont(self.schrift, 6)
+        
+        # Linie unter Absenderzeile
+        canvas_obj.line(
+            self.ADRESSFELD_VON_LINKS,
+            A4[1] - (self.ADRESSFELD_VON_OBEN - 5*mm),
+            self.ADRESSFELD_VON_LINKS + self.ADRESSFELD_BREITE,
+            A4[1] - (self.ADRESSFELD_VON_OBEN - 5*mm)
+        )
+        
+        canvas_obj.drawString(
+            self.ADRESSFELD_VON_LINKS,
+            A4[1] - (self.ADRESSFELD_VON_OBEN - 3*mm),
+            self._absender_zeile
+        )
+    
+    def _zeichne_fusszeile(self, canvas_obj):
+        """Zeichnet Trennlinie und Pflichtangaben der Fußzeile"""
+        canvas_obj.setFont(self.schrift, 7)
+        canvas_obj.setFillColor(colors.grey)
+        
+        # Trennlinie
+        canvas_obj.line(20*mm, 25*mm, A4[0] - 20*mm, 25*mm)
+        
+        y_pos = 22*mm
+        for line in self._fusszeilen:
+            canvas_obj.drawCentredString(A4[0] / 2, y_pos, line)
+            y_pos -= 3*mm
@@ -0,0 +1,90 @@
+"""
+Manifest der erzeugten PDFs (Inhalts-Hash je Datei)
+
+Für jedes erzeugte PDF wird ein Hash aller Eingaben (Dokumentdaten, Kunde,
+relevante Konfiguration, Vorlagenversion, Logo) in einer Datei
+``.pdf_manifest.json`` im selben Ordner abgelegt. Stimmt der Hash beim
+nächsten Lauf überein und existiert das PDF noch, muss es nicht neu
+gerendert werden.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+MANIFEST_DATEI = ".pdf_manifest.json"
+
+_lock = threading.Lock()
+_datei_hashes: Dict[str, Tuple[float, int, str]] = {}
+
+
+def datei_hash(pfad: Optional[str]) -> str:
+    """Gibt den SHA-256 einer Datei zurück (zwischengespeichert nach mtime und Größe, '' wenn nicht vorhanden)"""
+    if not pfad or not os.path.exists(pfad):
+        return ""
+    stat = os.stat(pfad)
+    eintrag = _datei_hashes.get(pfad)
+    if eintrag and eintrag[:2] == (stat.st_mtime, stat.st_size):
+        return eintrag[2]
+    h = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    _datei_hashes[pfad] = (stat.st_mtime, stat.st_size, h.hexdigest())
+    return h.hexdigest()
+
+
+def berechne_hash(eingaben: Dict[str, Any]) -> str:
+    """
+    Berechnet einen kanonischen Hash der Eingaben eines Dokuments
+    
+    Die Eingaben werden mit sortierten Schlüsseln serialisiert, sodass die
+    Reihenfolge in den Dictionaries keine Rolle spielt. Datums- und andere
+    nicht-JSON-Werte werden als Text übernommen.
+    """
+    kanonisch = json.dumps(eingaben, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(kanonisch.encode('utf-8')).hexdigest()
+
+
+def _manifest_pfad(pdf_pfad: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(pdf_pfad)), MANIFEST_DATEI)
+
+
+def _lade(manifest_pfad: str) -> Dict[str, str]:
+    try:
+        with open(manifest_pfad, 'r', encoding='utf-8') as f:
+            daten = json.load(f)
+        return daten if isinstance(daten, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def ist_aktuell(pdf_pfad: str, eingabe_hash: str) -> bool:
+    """Gibt zurück, ob das PDF existiert und mit denselben Eingaben erzeugt wurde"""
+    if not os.path.exists(pdf_pfad):
+        return False
+    return _lade(_manifest_pfad(pdf_pfad)).get(os.path.basename(pdf_pfad)) == eingabe_hash
+
+
+def merke(pdf_pfad: str, eingabe_hash: str):
+    """
+    Trägt den Hash eines erzeugten PDFs ins Manifest ein
+    
+    Das Manifest wird unmittelbar vorher neu gelesen und atomar ersetzt. Worker-
+    Prozesse schreiben es nicht selbst (siehe pdf_stapel), ein abgebrochener
+    Schreibvorgang hinterlässt daher nie ein halbes Manifest.
+    """
+    manifest_pfad = _manifest_pfad(pdf_pfad)
+    with _lock:
+        daten = _lade(manifest_pfad)
+        daten[os.path.basename(pdf_pfad)] = eingabe_hash
+        temp_pfad = f"{manifest_pfad}.{os.getpid()}.tmp"
+        try:
+            with open(temp_pfad, 'w', encoding='utf-8') as f:
+                json.dump(daten, f, indent=2, sort_keys=True)
+            os.replace(temp_pfad, manifest_pfad)
+        except OSError as e:
+            print(f"Warnung: PDF-Manifest konnte nicht geschrieben werden: {e}")
+
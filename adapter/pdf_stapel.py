@@ -0,0 +1,148 @@
+"""
+Stapelverarbeitung für Rechnungs-PDFs
+
+Die Rechnungen werden in einem ProcessPoolExecutor gerendert, jeder Worker-
+Prozess erzeugt beim Start einen eigenen PDFGenerator. Die Aufträge enthalten
+nur serialisierte Daten (Dictionaries), damit sie picklebar sind. PDFs, deren
+Eingaben sich seit dem letzten Lauf nicht geändert haben, werden übersprungen
+(siehe adapter/pdf_manifest.py). Das Manifest schreibt nur der aufrufende
+Prozess, damit sich parallele Worker keine Einträge überschreiben.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from adapter import pdf_manifest
+
+
+# PDFGenerator des Worker-Prozesses (wird von _initialisiere_worker gesetzt)
+_generator = None
+
+
+def erstelle_stapelauftraege(manager, rechnungen) -> List[Dict[str, Any]]:
+    """
+    Serialisiert Rechnungen für die Stapelverarbeitung
+    
+    Args:
+        manager: DatenManager
+        rechnungen: Zu rendernde Rechnungen
+    
+    Returns:
+        Liste von Aufträgen mit rechnung, kunde und ausgabepfad. Rechnungen ohne
+        Kunde oder Auftrag erhalten stattdessen einen Eintrag 'fehler'.
+    """
+    kunden = {k.id: k for k in manager.get_kunden()}
+    auftraege = {a.id: a for a in manager.get_auftraege()}
+    
+    stapel = []
+    for rechnung in rechnungen:
+        kunde = kunden.get(rechnung.kunde_id)
+        auftrag = auftraege.get(rechnung.auftrag_id)
+        eintrag = {"rechnung_id": rechnung.id, "rechnungsnummer": rechnung.rechnungsnummer}
+        if not kunde:
+            eintrag["fehler"] = "Kunde nicht gefunden"
+        elif not auftrag:
+            eintrag["fehler"] = "Auftrag nicht gefunden"
+        else:
+            eintrag["rechnung"] = rechnung.to_dict(auftragsnummer=auftrag.auftragsnummer)
+            eintrag["kunde"] = kunde.to_dict()
+            eintrag["ausgabepfad"] = manager.adapter.get_rechnung_pdf_pfad(
+                auftrag.auftragsnummer, rechnung.rechnungsnummer, rechnung.rechnungsdatum)
+        stapel.append(eintrag)
+    return stapel
+
+
+def _initialisiere_worker(config: Dict[str, Any]):
+    """Erzeugt den PDFGenerator einmal pro Worker-Prozess"""
+    global _generator
+    from adapter.pdf_generator import PDFGenerator
+    _generator = PDFGenerator(config)
+    _generator.manifest_schreiben = False
+
+
+def _rendere(eintrag: Dict[str, Any], erzwingen: bool = False) -> Dict[str, Any]:
+    """Rendert ein PDF im Worker; Fehler werden als Ergebnis zurückgegeben"""
+    ergebnis = {"rechnung_id": eintrag["rechnung_id"], "rechnungsnummer": eintrag["rechnungsnummer"],
+                "pfad": None, "fehler": eintrag.get("fehler"), "uebersprungen": False, "hash": None}
+    if ergebnis["fehler"]:
+        return ergebnis
+    try:
+        os.makedirs(os.path.dirname(eintrag["ausgabepfad"]), exist_ok=True)
+        ergebnis["pfad"] = _generator.rechnung_erstellen(eintrag["rechnung"], eintrag["kunde"],
+                                                         eintrag["ausgabepfad"], erzwingen=erzwingen)
+        ergebnis["uebersprungen"] = _generator.uebersprungen
+        ergebnis["hash"] = _generator.letzter_hash
+    except Exception as e:
+        ergebnis["fehler"] = str(e) or e.__class__.__name__
+    return ergebnis
+
+
+def rendere_stapel(config: Dict[str, Any],
+                   stapel: List[Dict[str, Any]],
+                   max_worker: Optional[int] = None,
+                   bei_fortschritt: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                   abgebrochen: Optional[Callable[[], bool]] = None,
+                   erzwingen: bool = False) -> List[Dict[str, Any]]:
+    """
+    Rendert alle PDFs eines Stapels parallel
+    
+    Args:
+        config: Konfiguration für den PDFGenerator
+        stapel: Aufträge aus erstelle_stapelauftraege()
+        max_worker: Anzahl Prozesse (Standard: Anzahl CPU-Kerne)
+        bei_fortschritt: Wird nach jedem Dokument mit (fertig, gesamt, ergebnis) aufgerufen
+        abgebrochen: Liefert True, wenn noch nicht begonnene Dokumente verworfen werden sollen
+        erzwingen: Auch unveränderte PDFs neu erzeugen
+    
+    Returns:
+        Ein Ergebnis je gerendertem Dokument (rechnung_id, rechnungsnummer, pfad, fehler, uebersprungen)
+    """
+    gesamt = len(stapel)
+    max_worker = max(1, min(max_worker or os.cpu_count() or 1, gesamt))
+    ergebnisse = []
+    
+    def melde(ergebnis):
+        if ergebnis["hash"] and not ergebnis["uebersprungen"]:
+            pdf_manifest.merke(ergebnis["pfad"], ergebnis["hash"])
+        ergebnisse.append(ergebnis)
+        if bei_fortschritt:
+            bei_fortschritt(len(ergebnisse), gesamt, ergebnis)
+    
+    if max_worker == 1:
+        # Kein Prozess-Start für einzelne Dokumente
+        _initialisiere_worker(config)
+        for eintrag in stapel:
+            if abgebrochen and abgebrochen():
+                break
+            melde(_rendere(eintrag, erzwingen))
+        return ergebnisse
+    
+    with ProcessPoolExecutor(max_workers=max_worker, initializer=_initialisiere_worker,
+                             initargs=(config,)) as pool:
+        futures = [pool.submit(_rendere, eintrag, erzwingen) for eintrag in stapel]
+        for future in as_completed(futures):
+            if abgebrochen and abgebrochen():
+                for offen in futures:
+                    offen.cancel()
+                break
+            melde(future.result())
+    return ergebnisse
+
+
+def rendere_rechnungen(manager, rechnungen, erzwingen: bool = False, max_worker: Optional[int] = None,
+                       abgebrochen: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """
+    Rendert die PDFs von Rechnungen ohne Oberfläche (Kommandozeile, Wartungsaufgaben)
+    
+    Returns:
+        {'erstellt', 'uebersprungen', 'fehler': [{'rechnungsnummer', 'fehler'}]}
+    """
+    stapel = erstelle_stapelauftraege(manager, rechnungen)
+    if not stapel:
+        return {"erstellt": 0, "uebersprungen": 0, "fehler": []}
+    ergebnisse = rendere_stapel(manager.adapter.get_config(), stapel, max_worker=max_worker,
+                                abgebrochen=abgebrochen, erzwingen=erzwingen)
+    fehler = [{"rechnungsnummer": e["rechnungsnummer"], "fehler": e["fehler"]} for e in ergebnisse if e["fehler"]]
+    uebersprungen = sum(1 for e in ergebnisse if e["uebersprungen"])
+    return {"erstellt": len(ergebnisse) - len(fehler) - uebersprungen, "uebersprungen": uebersprungen,
+            "fehler": fehler}
@@ -0,0 +1,200 @@
+"""
+Seitenweise aufgebaute Tabellen mit Übertrag für lange Positionslisten
+
+Statt einer einzigen Table mit allen Zeilen, die reportlab beim Seitenumbruch
+wiederholt vermessen und aufteilen muss, entnimmt UebertragsTabelle die
+Zeilen erst beim Umbruch aus einem Iterator und baut je Seite eine kleine
+Table. Im Speicher liegen dadurch nur die Zeilen der aktuellen Seite
+(Paragraphs werden erst dann erzeugt), unabhängig von der Gesamtzahl.
+Seitenübergreifende Tabellen erhalten eine Zwischensumme am Seitenende und
+einen Übertrag am Anfang der Folgeseite.
+"""
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.platypus import Flowable, Table, TableStyle
+
+
+# Eine Tabellenzeile: (Zellen, Betrag für die Summe)
+Zeile = Tuple[List[Any], float]
+
+
+class UebertragsTabelle(Flowable):
+    """Tabelle, die beim Rendern seitenweise aus einem Zeilen-Iterator entsteht"""
+    
+    # Kleinste angenommene Zeilenhöhe (pt) für die erste Schätzung, danach zählt die Vorseite
+    MINDEST_ZEILENHOEHE = 10
+    
+    def __init__(self,
+                 kopf: List[str],
+                 zeilen: Iterable[Zeile],
+                 spalten: List[float],
+                 stil: TableStyle,
+                 format_summe: Callable[[float], str],
+                 schrift_fett: str,
+                 uebertrag: Optional[float] = None,
+                 _puffer: Optional[Deque[Zeile]] = None,
+                 _schaetzung: Optional[int] = None):
+        """
+        Args:
+            kopf: Spaltenüberschriften (werden auf jeder Seite wiederholt)
+            zeilen: Iterable von (Zellen, Betrag); wird erst beim Rendern verbraucht
+            spalten: Spaltenbreiten
+            stil: Tabellenstil (Zeile 0 ist die Kopfzeile)
+            format_summe: Formatiert Übertrag und Zwischensumme für die letzte Spalte
+            schrift_fett: Schrift für Übertrags- und Zwischensummenzeilen
+            uebertrag: Summe der vorigen Seiten (None auf der ersten Seite)
+        """
+        super().__init__()
+        self.kopf = kopf
+        self.spalten = spalten
+        self.stil = stil
+        self.format_summe = format_summe
+        self.schrift_fett = schrift_fett
+        self.uebertrag = uebertrag
+        self._zeilen: Iterator[Zeile] = iter(zeilen)
+        # Gelesene, noch nicht gesetzte Zeilen als [Zellen, Betrag, gemessene Höhe oder None]
+        self._puffer: Deque[list] = _puffer if _puffer is not None else deque()
+        self._schaetzung = _schaetzung
+        # Zuletzt gebaute Seite: (verfügbare Größe, Table, Zeilen der Seite, letzte Seite?)
+        self._seite: Optional[Tuple[Tuple[float, float], Table, List[list], bool]] = None
+        self.width = sum(spalten)
+        self.height = 0
+    
+    def _naechste(self) -> Optional[list]:
+        """Entnimmt die nächste Zeile (erst aus dem Puffer, dann aus dem Iterator)"""
+        if self._puffer:
+            return self._puffer.popleft()
+        zeile = next(self._zeilen, None)
+        return None if zeile is None else [zeile[0], zeile[1], None]
+    
+    def _hat_weitere(self) -> bool:
+        """Prüft, ob noch Zeilen folgen (die gelesene Zeile bleibt im Puffer)"""
+        if self._puffer:
+            return True
+        zeile = self._naechste()
+        if zeile is None:
+            return False
+        self._puffer.append(zeile)
+        return True
+    
+    def _gib_zurueck(self, zeilen: List[list]):
+        """Legt nicht verwendete Zeilen in der ursprünglichen Reihenfolge zurück"""
+        self._puffer.extendleft(reversed(zeilen))
+    
+    def _summen_zeile(self, text: str, betrag: float) -> List[Any]:
+        return [text] + [''] * (len(self.spalten) - 2) + [self.format_summe(betrag)]
+    
+    def _tabelle(self, zeilen: List[list], summe: float, mit_zwischensumme: bool,
+                 zeilen_hoehen: Optional[List[Optional[float]]] = None) -> Table:
+        """Baut die Table einer Seite mit Kopf, Übertrag und Zwischensumme (bekannte Zeilenhöhen optional)"""
+        daten = [self.kopf]
+        summen_zeilen = []
+        if self.uebertrag is not None:
+            summen_zeilen.append(len(daten))
+            daten.append(self._summen_zeile("Übertrag", self.uebertrag))
+        daten.extend(zeile[0] for zeile in zeilen)
+        if mit_zwischensumme:
+            summen_zeilen.append(len(daten))
+            daten.append(self._summen_zeile("Zwischensumme (Übertrag)", summe))
+        
+        tabelle = Table(daten, colWidths=self.spalten, rowHeights=zeilen_hoehen, hAlign=self.hAlign)
+        tabelle.setStyle(self.stil)
+        if summen_zeilen:
+            tabelle.setStyle(TableStyle([
+                cmd for zeile in summen_zeilen for cmd in (
+                    ('SPAN', (0, zeile), (-2, zeile)),
+                    ('ALIGN', (0, zeile), (-1, zeile), 'RIGHT'),
+                    ('FONTNAME', (0, zeile), (-1, zeile), self.schrift_fett),
+                    ('BACKGROUND', (0, zeile), (-1, zeile), colors.Color(0.92, 0.92, 0.92)),
+                )
+            ]))
+        return tabelle
+    
+    def _baue_seite(self, verfuegbar_breite: float, verfuegbar_hoehe: float):
+        """
+        Füllt eine Seite mit so vielen Zeilen wie möglich
+        
+        Misst eine großzügig geschätzte Anzahl Zeilen mit einer Probe-Table,
+        schneidet an der Seitengrenze ab und baut daraus die endgültige Table.
+        Setzt self._seite; bei (0 Zeilen passen) bleibt sie None.
+        """
+        if self._seite is not None:
+            if self._seite[0] == (verfuegbar_breite, verfuegbar_hoehe):
+                return
+            self._gib_zurueck(self._seite[2])
+            self._seite = None
+        
+        anzahl = self._schaetzung or int(verfuegbar_hoehe / self.MINDEST_ZEILENHOEHE) + 1
+        fest = 1 + (self.uebertrag is not None)  # Kopf und ggf. Übertrag
+        kandidaten: List[list] = []
+        while True:
+            while len(kandidaten) < anzahl:
+                zeile = self._naechste()
+                if zeile is None:
+                    break
+                kandidaten.append(zeile)
+            erschoepft = not self._hat_weitere()
+            
+            # Probe mit allen Kandidaten und Zwischensumme, misst nur noch unbekannte Zeilenhöhen
+            probe = self._tabelle(kandidaten, 0.0, True, [None] * fest + [z[2] for z in kandidaten] + [None])
+            probe.wrap(verfuegbar_breite, verfuegbar_hoehe)
+            hoehen = probe._rowHeights
+            for zeile, zeilen_hoehe in zip(kandidaten, hoehen[fest:]):
+                zeile[2] = zeilen_hoehe
+            hoehe = sum(hoehen[:fest])
+            zwischensumme = hoehen[-1]
+            
+            passend = 0
+            for index, zeilen_hoehe in enumerate(hoehen[fest:fest + len(kandidaten)]):
+                letzte = erschoepft and index == len(kandidaten) - 1
+                if hoehe + zeilen_hoehe + (0 if letzte else zwischensumme) > verfuegbar_hoehe:
+                    break
+                hoehe += zeilen_hoehe
+                passend += 1
+            
+            if passend < len(kandidaten) or erschoepft:
+                break
+            # Alle Kandidaten passen und es folgen weitere: Schätzung war zu niedrig
+            anzahl *= 2
+        
+        if passend == 0 and (kandidaten or hoehe > verfuegbar_hoehe):
+            # Nicht einmal eine Zeile (bzw. der Kopf einer leeren Tabelle) passt auf diese Seite
+            self._gib_zurueck(kandidaten)
+            return
+        self._gib_zurueck(kandidaten[passend:])
+        kandidaten = kandidaten[:passend]
+        
+        letzte_seite = not self._hat_weitere()
+        self._schaetzung = passend + passend // 8 + 2
+        summe = (self.uebertrag or 0.0) + sum(zeile[1] for zeile in kandidaten)
+        # Gemessene Höhen übernehmen, damit die Paragraphs nicht erneut umbrochen werden
+        zeilen_hoehen = hoehen[:fest + passend] + ([] if letzte_seite else [zwischensumme])
+        tabelle = self._tabelle(kandidaten, summe, not letzte_seite, zeilen_hoehen)
+        _, self.height = tabelle.wrap(verfuegbar_breite, verfuegbar_hoehe)
+        self._seite = ((verfuegbar_breite, verfuegbar_hoehe), tabelle, kandidaten, letzte_seite)
+    
+    def wrap(self, verfuegbar_breite, verfuegbar_hoehe):
+        self._baue_seite(verfuegbar_breite, verfuegbar_hoehe)
+        if self._seite is None or not self._seite[3]:
+            # Passt nicht oder wird fortgesetzt: split() aufrufen lassen
+            return self.width, verfuegbar_hoehe + 1
+        return self.width, self.height
+    
+    def split(self, verfuegbar_breite, verfuegbar_hoehe):
+        self._baue_seite(verfuegbar_breite, verfuegbar_hoehe)
+        if self._seite is None:
+            return []
+        _, tabelle, zeilen, letzte_seite = self._seite
+        if letzte_seite:
+            return [tabelle]
+        summe = (self.uebertrag or 0.0) + sum(zeile[1] for zeile in zeilen)
+        rest = UebertragsTabelle(self.kopf, self._zeilen, self.spalten, self.stil, self.format_summe,
+                                 self.schrift_fett, uebertrag=summe, _puffer=self._puffer,
+                                 _schaetzung=self._schaetzung)
+        rest.hAlign = self.hAlign
+        return [tabelle, rest]
+    
+    def draw(self):
+        self._seite[1].drawOn(self.canv, 0, 0)
@@ -0,0 +1,222 @@
+"""
+Vorschaubilder (Seiten-Thumbnails) für erzeugte PDFs
+
+Die Seiten werden einmalig als PNG gerastert und in einem Cache-Ordner
+abgelegt. Schlüssel ist der Inhalts-Hash des PDFs (siehe pdf_manifest), ein
+neu erzeugtes, aber inhaltsgleiches PDF verwendet daher die vorhandenen Bilder
+weiter. Tk kann PNG ab Version 8.6 selbst laden, Pillow wird nicht benötigt.
+
+Zum Rastern wird das erste verfügbare Werkzeug verwendet:
+PyMuPDF (``pip install pymupdf``), ``pdftoppm`` (Poppler), ``mutool`` oder
+Ghostscript. Ist keines installiert, liefert ``rasterer()`` None und die
+Oberfläche zeigt statt der Vorschau einen Hinweis.
+"""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Optional
+
+from adapter.pdf_manifest import datei_hash
+
+
+CACHE_ORDNER = ".vorschau"
+STANDARD_BREITE = 200
+MAX_SEITEN = 3
+MAX_EINTRAEGE = 500  # Anzahl der PDFs im Cache, ältere werden verworfen
+TIMEOUT_S = 60
+
+# Breite einer A4-Seite in Zoll (für die Auflösung von Ghostscript)
+_A4_BREITE_ZOLL = 8.27
+# Auf Windows kein Konsolenfenster für die Hilfsprogramme öffnen
+_OHNE_FENSTER = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+_rasterer: Optional[str] = None
+_gesucht = False
+
+
+class VorschauFehler(Exception):
+    """Das PDF konnte nicht gerastert werden"""
+    pass
+
+
+def rasterer() -> Optional[str]:
+    """Gibt das verwendete Rasterwerkzeug zurück ('pymupdf' oder den Programmnamen), None wenn keines installiert ist"""
+    global _rasterer, _gesucht
+    if not _gesucht:
+        try:
+            import fitz  # noqa: F401
+            _rasterer = "pymupdf"
+        except ImportError:
+            for programm in ("pdftoppm", "mutool", "gs", "gswin64c", "gswin32c"):
+                if shutil.which(programm):
+                    _rasterer = programm
+                    break
+        _gesucht = True
+    return _rasterer
+
+
+def cache_ordner(daten_pfad: str) -> str:
+    """Gibt den Cache-Ordner der Vorschaubilder im Datenverzeichnis zurück"""
+    return os.path.join(daten_pfad, CACHE_ORDNER)
+
+
+def _eintrag(ordner: str, pdf_hash: str, breite: int) -> str:
+    return os.path.join(ordner, pdf_hash[:2], f"{pdf_hash}_{breite}")
+
+
+def aus_cache(pdf_pfad: str, ordner: str, breite: int = STANDARD_BREITE) -> Optional[List[str]]:
+    """
+    Gibt die zwischengespeicherten Vorschaubilder eines PDFs zurück
+    
+    Schnell genug für den Tk-Thread: Der Hash des PDFs wird nach mtime und
+    Größe zwischengespeichert, danach ist nur noch eine kleine JSON-Datei zu lesen.
+    
+    Returns:
+        Liste der PNG-Pfade, None wenn (noch) nichts im Cache liegt
+    """
+    pdf_hash = datei_hash(pdf_pfad)
+    if not pdf_hash:
+        return None
+    eintrag = _eintrag(ordner, pdf_hash, breite)
+    try:
+        with open(eintrag + ".json", "r", encoding="utf-8") as f:
+            dateien = json.load(f)["seiten"]
+    except (OSError, ValueError, KeyError):
+        return None
+    bilder = [os.path.join(os.path.dirname(eintrag), d) for d in dateien]
+    if not all(os.path.exists(b) for b in bilder):
+        return None
+    # Zugriffszeit für die Aufräumreihenfolge auffrischen
+    try:
+        os.utime(eintrag + ".json")
+    except OSError:
+        pass
+    return bilder
+
+
+def erstelle_vorschau(pdf_pfad: str, ordner: str, breite: int = STANDARD_BREITE,
+                      max_seiten: int = MAX_SEITEN) -> List[str]:
+    """
+    Rastert die ersten Seiten eines PDFs in den Cache (für den Hintergrund-Worker)
+    
+    Args:
+        pdf_pfad: Pfad zum PDF
+        ordner: Cache-Ordner (siehe cache_ordner())
+        breite: Breite der Vorschaubilder in Pixeln
+        max_seiten: Höchstens so viele Seiten rastern
+    
+    Returns:
+        Liste der PNG-Pfade (aus dem Cache, falls schon vorhanden)
+    
+    Raises:
+        VorschauFehler: Kein Rasterwerkzeug vorhanden oder Rastern fehlgeschlagen
+    """
+    vorhanden = aus_cache(pdf_pfad, ordner, breite)
+    if vorhanden is not None:
+        return vorhanden
+    werkzeug = rasterer()
+    if werkzeug is None:
+        raise VorschauFehler("Kein Rasterwerkzeug installiert (PyMuPDF, Poppler oder Ghostscript)")
+    if not os.path.exists(pdf_pfad):
+        raise VorschauFehler(f"PDF nicht gefunden: {pdf_pfad}")
+    
+    pdf_hash = datei_hash(pdf_pfad)
+    eintrag = _eintrag(ordner, pdf_hash, breite)
+    zielordner = os.path.dirname(eintrag)
+    os.makedirs(zielordner, exist_ok=True)
+    
+    # Erst in einen temporären Ordner rastern und dann verschieben, damit ein
+    # abgebrochener Lauf keine halben Einträge hinterlässt
+    with tempfile.TemporaryDirectory(dir=zielordner) as tmp:
+        if werkzeug == "pymupdf":
+            seiten = _rastere_pymupdf(pdf_pfad, tmp, breite, max_seiten)
+        else:
+            seiten = _rastere_extern(werkzeug, pdf_pfad, tmp, breite, max_seiten)
+        if not seiten:
+            raise VorschauFehler(f"Keine Seite gerastert: {pdf_pfad}")
+        dateien = []
+        for nummer, seite in enumerate(seiten, start=1):
+            name = f"{os.path.basename(eintrag)}_{nummer}.png"
+            os.replace(seite, os.path.join(zielordner, name))
+            dateien.append(name)
+        with open(os.path.join(tmp, "eintrag.json"), "w", encoding="utf-8") as f:
+            json.dump({"pdf": os.path.basename(pdf_pfad), "seiten": dateien}, f)
+        os.replace(os.path.join(tmp, "eintrag.json"), eintrag + ".json")
+    
+    raeume_auf(ordner)
+    return [os.path.join(zielordner, d) for d in dateien]
+
+
+def _rastere_pymupdf(pdf_pfad: str, ziel: str, breite: int, max_seiten: int) -> List[str]:
+    import fitz
+    seiten = []
+    with fitz.open(pdf_pfad) as dokument:
+        for nummer in range(min(max_seiten, dokument.page_count)):
+            seite = dokument.load_page(nummer)
+            zoom = breite / seite.rect.width
+            pfad = os.path.join(ziel, f"seite-{nummer + 1}.png")
+            seite.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).save(pfad)
+            seiten.append(pfad)
+    return seiten
+
+
+def _rastere_extern(programm: str, pdf_pfad: str, ziel: str, breite: int, max_seiten: int) -> List[str]:
+    praefix = os.path.join(ziel, "seite")
+    if programm == "pdftoppm":
+        befehl = ["pdftoppm", "-png", "-scale-to-x", str(breite), "-scale-to-y", "-1",
+                  "-f", "1", "-l", str(max_seiten), pdf_pfad, praefix]
+    elif programm == "mutool":
+        befehl = ["mutool", "draw", "-q", "-w", str(breite), "-o", praefix + "-%d.png",
+                  pdf_pfad, f"1-{max_seiten}"]
+    else:
+        aufloesung = max(1, round(breite / _A4_BREITE_ZOLL))
+        befehl = [programm, "-q", "-dSAFER", "-dBATCH", "-dNOPAUSE", "-sDEVICE=png16m",
+                  f"-r{aufloesung}", "-dTextAlphaBits=4", "-dGraphicsAlphaBits=4",
+                  "-dFirstPage=1", f"-dLastPage={max_seiten}",
+                  f"-sOutputFile={praefix}-%d.png", pdf_pfad]
+    try:
+        subprocess.run(befehl, check=True, capture_output=True, timeout=TIMEOUT_S,
+                       creationflags=_OHNE_FENSTER)
+    except subprocess.CalledProcessError as e:
+        meldung = e.stderr.decode("utf-8", "replace").strip() if e.stderr else str(e)
+        raise VorschauFehler(f"{programm}: {meldung}") from e
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise VorschauFehler(f"{programm}: {e}") from e
+    
+    # pdftoppm füllt die Seitennummer je nach Seitenzahl mit Nullen auf
+    def seitennummer(name: str) -> int:
+        return int(name.rsplit("-", 1)[1].split(".")[0])
+    
+    seiten = sorted((n for n in os.listdir(ziel) if n.startswith("seite-") and n.endswith(".png")),
+                    key=seitennummer)
+    return [os.path.join(ziel, n) for n in seiten[:max_seiten]]
+
+
+def raeume_auf(ordner: str, max_eintraege: int = MAX_EINTRAEGE):
+    """Verwirft die am längsten nicht verwendeten Einträge, wenn der Cache zu groß wird"""
+    try:
+        eintraege = [os.path.join(unterordner.path, d.name)
+                     for unterordner in os.scandir(ordner) if unterordner.is_dir()
+                     for d in os.scandir(unterordner.path) if d.name.endswith(".json")]
+    except OSError:
+        return
+    if len(eintraege) <= max_eintraege:
+        return
+    eintraege.sort(key=lambda p: os.stat(p).st_mtime)
+    for eintrag in eintraege[:len(eintraege) - max_eintraege]:
+        try:
+            with open(eintrag, "r", encoding="utf-8") as f:
+                dateien = json.load(f).get("seiten", [])
+        except (OSError, ValueError):
+            dateien = []
+        for datei in dateien:
+            try:
+                os.remove(os.path.join(os.path.dirname(eintrag), datei))
+            except OSError:
+                pass
+        try:
+            os.remove(eintrag)
+        except OSError:
+            pass
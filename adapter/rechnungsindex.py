@@ -0,0 +1,232 @@
+"""
+Datumsindex der Rechnungen
+
+Die Rechnungen liegen verteilt in den Auftragsordnern (rechnungen.json). Der
+Index hält je Auftrag die Rechnungs- und Zahlungsdaten seiner Rechnungen, damit
+Auswertungen für einen Zeitraum (z.B. der DATEV-Export) nur die betroffenen
+Auftragsordner lesen müssen. Er wird vom DatenAdapter bei jedem Speichern der
+Rechnungen eines Auftrags nachgeführt und nur geschrieben, wenn sich ein Datum
+geändert hat.
+
+Oberfläche, Kommandozeile und Zeitplan halten jeweils eine eigene Kopie im
+Speicher. speichere() liest die Datei daher unter einer Sperrdatei neu und
+wendet nur die eigenen Änderungen darauf an; Einträge anderer Prozesse gehen
+so nicht verloren. Ändert sich die Datei, lesen Abfragen sie neu ein.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+INDEX_DATEI = "rechnungsindex.json"
+VERSION = 1
+
+# Wie lange speichere() auf die Sperrdatei eines anderen Prozesses wartet
+SPERRE_WARTEN_S = 30.0
+
+
+def _tag(wert: Union[str, date, datetime, None]) -> Optional[str]:
+    """ISO-Datum (YYYY-MM-DD) aus einem Datum oder ISO-Zeitstempel"""
+    if not wert:
+        return None
+    if isinstance(wert, (date, datetime)):
+        return wert.isoformat()[:10]
+    return str(wert)[:10]
+
+
+def rechnungsdaten(rechnungen: Iterable[Dict[str, Any]]) -> List[str]:
+    """Sortierte, eindeutige Rechnungs- und Zahlungsdaten der Rechnungen eines Auftrags"""
+    daten = set()
+    for rechnung in rechnungen:
+        daten.add(_tag(rechnung.get("rechnungsdatum")))
+        for zahlung in rechnung.get("zahlungen", []):
+            daten.add(_tag(zahlung.get("datum")))
+    daten.discard(None)
+    return sorted(daten)
+
+
+class Rechnungsindex:
+    """Auftragsnummer -> Rechnungs-/Zahlungsdaten, mit Bereichsabfrage über ein sortiertes Array"""
+    
+    def __init__(self, pfad: str):
+        self.pfad = pfad
+        self._lock = threading.Lock()
+        self._datei_lock = threading.RLock()
+        self._sperrtiefe = 0
+        self._auftraege: Dict[str, List[str]] = {}
+        self._sortiert: Optional[List[Tuple[str, str]]] = None  # (datum, auftragsnummer), lazy
+        # Eigene Änderungen seit dem letzten Schreiben (None = Auftrag entfernt)
+        self._aenderungen: Dict[str, Optional[List[str]]] = {}
+        self._neu_aufgebaut = False
+        self._stand: Optional[int] = None  # mtime der zuletzt gelesenen/geschriebenen Datei
+        auftraege = self._lade()
+        self.vorhanden = auftraege is not None
+        if auftraege is not None:
+            self._auftraege = auftraege
+    
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.pfad).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _lade(self) -> Optional[Dict[str, List[str]]]:
+        """Liest die Indexdatei (None, falls sie fehlt, unlesbar ist oder eine andere Version hat)"""
+        stand = self._mtime()
+        try:
+            with open(self.pfad, "r", encoding="utf-8") as f:
+                daten = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if daten.get("version") != VERSION:
+            return None
+        self._stand = stand
+        return daten.get("auftraege", {})
+    
+    def _mit_aenderungen(self, auftraege: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Wendet die eigenen, noch nicht geschriebenen Änderungen auf einen gelesenen Stand an"""
+        for auftragsnummer, daten in self._aenderungen.items():
+            if daten:
+                auftraege[auftragsnummer] = daten
+            else:
+                auftraege.pop(auftragsnummer, None)
+        return auftraege
+    
+    def _pruefe_datei(self):
+        """Liest die Datei neu, wenn ein anderer Prozess sie seit dem letzten Lesen geschrieben hat"""
+        if self._neu_aufgebaut or self._mtime() == self._stand:
+            return
+        auftraege = self._lade()
+        if auftraege is not None:
+            self._auftraege = self._mit_aenderungen(auftraege)
+            self._sortiert = None
+    
+    @contextmanager
+    def gesperrt(self):
+        """
+        Sperrdatei neben dem Index (auch über Prozessgrenzen), wiedereintrittsfähig
+        
+        Für Abläufe, die den Index lesen und danach schreiben (z.B. Neuaufbau),
+        damit dazwischen kein anderer Prozess speichert.
+        """
+        from adapter.zeitplan import AufgabeLaeuftBereits, Sperre
+        with self._datei_lock:
+            if self._sperrtiefe:
+                self._sperrtiefe += 1
+                try:
+                    yield
+                finally:
+                    self._sperrtiefe -= 1
+                return
+            sperre = Sperre(f"{self.pfad}.lock", max_laufzeit_s=10 * SPERRE_WARTEN_S)
+            frist = time.monotonic() + SPERRE_WARTEN_S
+            while True:
+                try:
+                    sperre.__enter__()
+                    break
+                except AufgabeLaeuftBereits:
+                    if time.monotonic() > frist:
+                        raise
+                    time.sleep(0.05)
+            self._sperrtiefe = 1
+            try:
+                yield
+            finally:
+                self._sperrtiefe = 0
+                sperre.__exit__(None, None, None)
+    
+    def speichere(self):
+        """
+        Schreibt den Index (atomar über eine temporäre Datei)
+        
+        Unter der Sperrdatei wird die Datei neu gelesen und nur die eigenen
+        Änderungen aus aktualisiere() übernommen; nach neu_aufbauen() wird der
+        vollständige eigene Stand geschrieben.
+        """
+        with self.gesperrt(), self._lock:
+            if self._neu_aufgebaut:
+                auftraege = dict(self._auftraege)
+            else:
+                gelesen = self._lade()
+                auftraege = self._mit_aenderungen(gelesen) if gelesen is not None else dict(self._auftraege)
+            inhalt = {"version": VERSION, "auftraege": auftraege}
+            temp_pfad = f"{self.pfad}.{os.getpid()}.tmp"
+            os.makedirs(os.path.dirname(self.pfad) or ".", exist_ok=True)
+            with open(temp_pfad, "w", encoding="utf-8") as f:
+                json.dump(inhalt, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_pfad, self.pfad)
+            self._stand = self._mtime()
+            self._auftraege = auftraege
+            self._sortiert = None
+            self._aenderungen.clear()
+            self._neu_aufgebaut = False
+            self.vorhanden = True
+    
+    def aktualisiere(self, auftragsnummer: str, rechnungen: List[Dict[str, Any]]) -> bool:
+        """
+        Übernimmt die Rechnungen eines Auftrags
+        
+        Returns:
+            True, wenn sich der Index geändert hat (dann sollte speichere() folgen)
+        """
+        daten = rechnungsdaten(rechnungen)
+        with self._lock:
+            self._pruefe_datei()
+            if self._auftraege.get(auftragsnummer, []) == daten:
+                return False
+            if daten:
+                self._auftraege[auftragsnummer] = daten
+            else:
+                self._auftraege.pop(auftragsnummer, None)
+            self._aenderungen[auftragsnummer] = daten or None
+            self._sortiert = None
+            return True
+    
+    def neu_aufbauen(self, eintraege: Iterable[Tuple[str, List[Dict[str, Any]]]]):
+        """Baut den Index aus (Auftragsnummer, Rechnungen)-Paaren neu auf (ersetzt beim Speichern die Datei)"""
+        auftraege = {}
+        for auftragsnummer, rechnungen in eintraege:
+            daten = rechnungsdaten(rechnungen)
+            if daten:
+                auftraege[auftragsnummer] = daten
+        with self._lock:
+            self._auftraege = auftraege
+            self._sortiert = None
+            self._aenderungen.clear()
+            self._neu_aufgebaut = True
+    
+    def auftraege_im_zeitraum(self, von: Union[date, datetime], bis: Union[date, datetime]) -> List[str]:
+        """
+        Aufträge mit einer Rechnung oder Zahlung zwischen von und bis (jeweils einschließlich)
+        
+        Die Aufträge kommen in der Reihenfolge ihres ersten Datums im Zeitraum.
+        """
+        with self._lock:
+            self._pruefe_datei()
+            if self._sortiert is None:
+                self._sortiert = sorted((datum, nummer) for nummer, daten in self._auftraege.items()
+                                        for datum in daten)
+            sortiert = self._sortiert
+        anfang = bisect.bisect_left(sortiert, (_tag(von), ""))
+        ende = bisect.bisect_right(sortiert, (_tag(bis), "\uffff"))
+        return list(dict.fromkeys(nummer for _, nummer in sortiert[anfang:ende]))
+    
+    def abweichungen(self, eintraege: Iterable[Tuple[str, List[Dict[str, Any]]]]) -> List[str]:
+        """Aufträge, deren Eintrag nicht zu den übergebenen (Auftragsnummer, Rechnungen)-Paaren passt"""
+        erwartet = {}
+        for auftragsnummer, rechnungen in eintraege:
+            daten = rechnungsdaten(rechnungen)
+            if daten:
+                erwartet[auftragsnummer] = daten
+        with self._lock:
+            self._pruefe_datei()
+            return sorted(nummer for nummer in erwartet.keys() | self._auftraege.keys()
+                          if erwartet.get(nummer) != self._auftraege.get(nummer))
+    
+    def anzahl(self) -> int:
+        """Anzahl der Aufträge mit Rechnungen"""
+        return len(self._auftraege)
@@ -0,0 +1,220 @@
+"""
+Zeitstrahl des Programmstarts (Phasen und Importzeiten)
+
+Eingeschaltet über die Umgebungsvariable AUFTRAGSVERWALTUNG_STARTPROFIL oder
+python main.py --startprofil [DATEI]:
+    1 (bzw. ohne DATEI)   Zeitstrahl nach dem Start auf stdout ausgeben
+    DATEI                 Chrome-Trace-JSON schreiben (chrome://tracing, Perfetto)
+
+Aufgezeichnet werden die mit phase() markierten Abschnitte (main,
+DatenManager.__init__, lade_alle_daten, Hauptfenster.__init__) und jeder
+Modulimport, der neue Module lädt. Ausgeschaltet gibt phase() einen leeren
+Kontextmanager zurück und der Import-Hook ist nicht installiert.
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+UMGEBUNGSVARIABLE = "AUFTRAGSVERWALTUNG_STARTPROFIL"
+
+# Importe unterhalb dieser Dauer erscheinen nicht im ausgegebenen Zeitstrahl (wohl aber im Trace)
+MINDESTDAUER_AUSGABE_S = 0.001
+
+_lock = threading.Lock()
+_aktiv = False
+_ziel: Optional[str] = None
+_nullpunkt = 0.0
+_originaler_import = None
+# (Name, Kategorie, Start, Ende oder None für Zeitpunkte, Thread-ID, Thread-Name)
+_ereignisse: List[Tuple[str, str, float, Optional[float], int, str]] = []
+_leer = nullcontext()
+
+
+class _Phase:
+    """Misst einen Abschnitt des Starts"""
+    __slots__ = ("name", "kategorie", "start")
+    
+    def __init__(self, name: str, kategorie: str):
+        self.name = name
+        self.kategorie = kategorie
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        _erfasse(self.name, self.kategorie, self.start, time.perf_counter())
+        return False
+
+
+def _erfasse(name: str, kategorie: str, start: float, ende: Optional[float]):
+    thread = threading.current_thread()
+    with _lock:
+        _ereignisse.append((name, kategorie, start, ende, thread.ident, thread.name))
+
+
+def _gemessener_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Ersetzt builtins.__import__; erfasst nur Importe, die neue Module laden"""
+    anzahl = len(sys.modules)
+    start = time.perf_counter()
+    modul = _originaler_import(name, globals, locals, fromlist, level)
+    if len(sys.modules) != anzahl and _aktiv:
+        if level:
+            paket = (globals or {}).get("__package__") or ""
+            name = f"{paket.rsplit('.', level - 1)[0]}.{name}" if name else paket
+        if fromlist and fromlist[0] != "*":
+            namen = ", ".join(fromlist[:3]) + (", …" if len(fromlist) > 3 else "")
+            name = f"{name} ({namen})"
+        _erfasse(name, "import", start, time.perf_counter())
+    return modul
+
+
+# --- Steuerung -------------------------------------------------------------
+
+def ist_aktiv() -> bool:
+    """Gibt zurück, ob der Start gerade aufgezeichnet wird"""
+    return _aktiv
+
+
+def starte(ziel: Optional[str] = None, nullpunkt: Optional[float] = None):
+    """
+    Beginnt die Aufzeichnung und installiert den Import-Hook
+    
+    Args:
+        ziel: Pfad der Chrome-Trace-Datei; None gibt den Zeitstrahl auf stdout aus
+        nullpunkt: time.perf_counter() beim Programmstart (Standard: jetzt)
+    """
+    global _aktiv, _ziel, _nullpunkt, _originaler_import
+    with _lock:
+        _ereignisse.clear()
+        _ziel = ziel
+        _nullpunkt = nullpunkt if nullpunkt is not None else time.perf_counter()
+        if _originaler_import is None:
+            _originaler_import = builtins.__import__
+            builtins.__import__ = _gemessener_import
+        _aktiv = True
+
+
+def starte_aus_umgebung(nullpunkt: Optional[float] = None) -> bool:
+    """Beginnt die Aufzeichnung, wenn AUFTRAGSVERWALTUNG_STARTPROFIL gesetzt ist"""
+    wert = os.environ.get(UMGEBUNGSVARIABLE, "").strip()
+    if wert and wert != "0":
+        starte(None if wert == "1" else wert, nullpunkt)
+    return _aktiv
+
+
+def phase(name: str, kategorie: str = "phase"):
+    """
+    Kontextmanager für einen Abschnitt des Starts
+    
+    Beispiel:
+        with startprofil.phase("Kunden lesen"):
+            kunden_data = self.adapter.lade_kunden()
+    """
+    return _Phase(name, kategorie) if _aktiv else _leer
+
+
+def markiere(name: str):
+    """Vermerkt einen Zeitpunkt (z.B. erstes Bild, Daten geladen)"""
+    if _aktiv:
+        _erfasse(name, "zeitpunkt", time.perf_counter(), None)
+
+
+def beende() -> Optional[str]:
+    """
+    Beendet die Aufzeichnung und gibt den Zeitstrahl aus bzw. schreibt den Trace
+    
+    Mehrfache Aufrufe sind unschädlich; nur der erste gibt etwas aus.
+    
+    Returns:
+        Pfad der geschriebenen Trace-Datei oder None
+    """
+    global _aktiv, _originaler_import
+    with _lock:
+        if not _aktiv:
+            return None
+        _aktiv = False
+        if _originaler_import is not None and builtins.__import__ is _gemessener_import:
+            builtins.__import__ = _originaler_import
+            _originaler_import = None
+    
+    if _ziel is None:
+        print(als_text())
+        return None
+    temp_pfad = f"{_ziel}.tmp"
+    with open(temp_pfad, "w", encoding="utf-8") as f:
+        json.dump(als_chrome_trace(), f, ensure_ascii=False)
+    os.replace(temp_pfad, _ziel)
+    return _ziel
+
+
+# --- Auswertung ------------------------------------------------------------
+
+def ereignisse() -> List[Dict[str, Any]]:
+    """Gibt die aufgezeichneten Ereignisse nach Startzeit sortiert zurück (Zeiten in Sekunden ab Programmstart)"""
+    with _lock:
+        kopie = list(_ereignisse)
+    # Bei gleichem Start zuerst den längeren (umschließenden) Abschnitt
+    kopie.sort(key=lambda e: (e[2], -(e[3] if e[3] is not None else e[2])))
+    return [{
+        "name": name,
+        "kategorie": kategorie,
+        "start_s": start - _nullpunkt,
+        "dauer_s": None if ende is None else ende - start,
+        "thread_id": thread_id,
+        "thread": thread_name,
+    } for name, kategorie, start, ende, thread_id, thread_name in kopie]
+
+
+def als_chrome_trace() -> Dict[str, Any]:
+    """Gibt die Ereignisse im Trace Event Format zurück (Zeiten in Mikrosekunden)"""
+    pid = os.getpid()
+    trace = []
+    threads = {}
+    for e in ereignisse():
+        threads[e["thread_id"]] = e["thread"]
+        eintrag = {"name": e["name"], "cat": e["kategorie"], "ts": round(e["start_s"] * 1e6, 1),
+                   "pid": pid, "tid": e["thread_id"]}
+        if e["dauer_s"] is None:
+            eintrag.update(ph="i", s="p")
+        else:
+            eintrag.update(ph="X", dur=round(e["dauer_s"] * 1e6, 1))
+        trace.append(eintrag)
+    for thread_id, thread_name in threads.items():
+        trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                      "args": {"name": thread_name}})
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def als_text() -> str:
+    """Gibt den Zeitstrahl als eingerückten Text zurück (verschachtelte Abschnitte je Thread)"""
+    zeilen = [f"{'Start':>10}  {'Dauer':>11}  Abschnitt"]
+    offen: Dict[int, List[Tuple[float, str]]] = {}  # (Ende, Kategorie) der umschließenden Abschnitte je Thread
+    importe_gesamt = 0.0
+    for e in ereignisse():
+        stapel = offen.setdefault(e["thread_id"], [])
+        while stapel and stapel[-1][0] <= e["start_s"]:
+            stapel.pop()
+        tiefe = len(stapel)
+        if e["dauer_s"] is None:
+            dauer = ""
+        else:
+            dauer = f"{e['dauer_s'] * 1000:8.1f} ms"
+            if e["kategorie"] == "import" and all(kategorie != "import" for _, kategorie in stapel):
+                importe_gesamt += e["dauer_s"]
+            stapel.append((e["start_s"] + e["dauer_s"], e["kategorie"]))
+        
+        if e["kategorie"] == "import" and e["dauer_s"] < MINDESTDAUER_AUSGABE_S:
+            continue
+        name = f"import {e['name']}" if e["kategorie"] == "import" else e["name"]
+        if e["thread"] != "MainThread":
+            name += f"  [{e['thread']}]"
+        zeilen.append(f"{e['start_s'] * 1000:7.1f} ms  {dauer:>11}  {'  ' * tiefe}{name}")
+    zeilen.append(f"Importe gesamt: {importe_gesamt * 1000:.1f} ms "
+                  f"(kürzer als {MINDESTDAUER_AUSGABE_S * 1000:g} ms nicht einzeln aufgeführt)")
+    return "\n".join(zeilen)
@@ -0,0 +1,154 @@
+"""
+Überwachung überfälliger Rechnungen
+"""
+import heapq
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+class UeberfaelligkeitsTracker:
+    """
+    Index der unbezahlten Rechnungen nach Fälligkeitsdatum
+    
+    Noch nicht fällige Rechnungen liegen in einem Min-Heap, überfällige in einem
+    Dictionary. Änderungen an einer Rechnung ersetzen den Heap-Eintrag nicht,
+    veraltete Einträge werden beim Entnehmen verworfen (lazy deletion).
+    """
+    
+    # Rechnungen mit diesem Status gelten nie als überfällig
+    ERLEDIGTE_STATUS = ("Bezahlt", "Storniert")
+    
+    def __init__(self, heute: Callable[[], date] = date.today):
+        """
+        Args:
+            heute: Liefert das aktuelle Datum (austauschbar für Tests)
+        """
+        self._heute = heute
+        self._lock = threading.RLock()
+        self._heap: List[Tuple[date, str]] = []
+        self._offen: Dict[str, date] = {}  # Unbezahlte Rechnungen: ID -> Fälligkeit
+        self._ueberfaellig: Dict[str, date] = {}
+        self._beobachter: List[Callable[[List[str]], None]] = []
+    
+    @staticmethod
+    def _als_datum(wert: Union[datetime, date]) -> date:
+        """Normalisiert ein Fälligkeitsdatum auf ein date-Objekt"""
+        return wert.date() if isinstance(wert, datetime) else wert
+    
+    def registriere_beobachter(self, beobachter: Callable[[List[str]], None]):
+        """
+        Registriert einen Callback für Änderungen der überfälligen Rechnungen
+        
+        Der Callback erhält die IDs der Rechnungen, die gerade fällig geworden sind
+        (leer, wenn z.B. nur eine Rechnung bezahlt wurde). Er wird im Thread des
+        Aufrufers von aktualisiere()/entferne()/pruefe() ausgeführt.
+        """
+        self._beobachter.append(beobachter)
+    
+    def entferne_beobachter(self, beobachter: Callable[[List[str]], None]):
+        """Entfernt einen registrierten Callback"""
+        if beobachter in self._beobachter:
+            self._beobachter.remove(beobachter)
+    
+    def neu_aufbauen(self, rechnungen: Iterable):
+        """Baut den Index aus allen Rechnungen neu auf (ohne Benachrichtigung)"""
+        with self._lock:
+            self._offen = {r.id: self._als_datum(r.faelligkeitsdatum)
+                           for r in rechnungen if r.status not in self.ERLEDIGTE_STATUS}
+            self._heap = [(faellig, rechnung_id) for rechnung_id, faellig in self._offen.items()]
+            heapq.heapify(self._heap)
+            self._ueberfaellig = {}
+            self._verschiebe_faellige(self._heute())
+    
+    def aktualisiere(self, rechnung):
+        """Übernimmt eine neue oder geänderte Rechnung (O(log n))"""
+        with self._lock:
+            war_ueberfaellig = rechnung.id in self._ueberfaellig
+            self._offen.pop(rechnung.id, None)
+            self._ueberfaellig.pop(rechnung.id, None)
+            
+            if rechnung.status not in self.ERLEDIGTE_STATUS:
+                faellig = self._als_datum(rechnung.faelligkeitsdatum)
+                self._offen[rechnung.id] = faellig
+                heapq.heappush(self._heap, (faellig, rechnung.id))
+            self._kompaktiere()
+            neu = self._verschiebe_faellige(self._heute())
+            ist_ueberfaellig = rechnung.id in self._ueberfaellig
+            if war_ueberfaellig and ist_ueberfaellig:
+                # Rechnung war bereits überfällig, das ist kein neues Ereignis
+                neu.remove(rechnung.id)
+        
+        if neu or war_ueberfaellig != ist_ueberfaellig:
+            self._benachrichtige(neu)
+    
+    def entferne(self, rechnung_id: str):
+        """Entfernt eine gelöschte Rechnung aus dem Index"""
+        with self._lock:
+            self._offen.pop(rechnung_id, None)
+            war_ueberfaellig = self._ueberfaellig.pop(rechnung_id, None) is not None
+        if war_ueberfaellig:
+            self._benachrichtige([])
+    
+    def pruefe(self, heute: Optional[date] = None) -> List[str]:
+        """
+        Verschiebt inzwischen fällig gewordene Rechnungen in die Überfällig-Liste
+        
+        Kostet O(1), solange keine Rechnung ihr Fälligkeitsdatum überschreitet.
+        
+        Returns:
+            IDs der neu überfälligen Rechnungen
+        """
+        with self._lock:
+            neu = self._verschiebe_faellige(heute or self._heute())
+        if neu:
+            self._benachrichtige(neu)
+        return neu
+    
+    def _kompaktiere(self):
+        """Entfernt veraltete Heap-Einträge, wenn sie überhandnehmen (Lock muss gehalten werden)"""
+        if len(self._heap) > 2 * len(self._offen) + 64:
+            self._heap = [(faellig, rechnung_id) for rechnung_id, faellig in self._offen.items()]
+            heapq.heapify(self._heap)
+    
+    def _verschiebe_faellige(self, heute: date) -> List[str]:
+        """Entnimmt alle Heap-Einträge mit Fälligkeit vor heute (Lock muss gehalten werden)"""
+        neu = []
+        while self._heap and self._heap[0][0] < heute:
+            faellig, rechnung_id = heapq.heappop(self._heap)
+            # Veraltete Einträge (Rechnung bezahlt, gelöscht oder Datum geändert) verwerfen
+            if self._offen.get(rechnung_id) != faellig:
+                continue
+            del self._offen[rechnung_id]
+            self._ueberfaellig[rechnung_id] = faellig
+            neu.append(rechnung_id)
+        return neu
+    
+    def _benachrichtige(self, neu: List[str]):
+        """Ruft alle Beobachter auf"""
+        for beobachter in list(self._beobachter):
+            try:
+                beobachter(neu)
+            except Exception as e:
+                print(f"Fehler im Beobachter für überfällige Rechnungen: {e}")
+    
+    def anzahl(self) -> int:
+        """Gibt die Anzahl überfälliger Rechnungen zurück"""
+        return len(self._ueberfaellig)
+    
+    def ist_ueberfaellig(self, rechnung_id: str) -> bool:
+        """Gibt zurück, ob eine Rechnung überfällig ist"""
+        return rechnung_id in self._ueberfaellig
+    
+    def get_ueberfaellige(self) -> List[str]:
+        """Gibt die IDs der überfälligen Rechnungen zurück (älteste Fälligkeit zuerst)"""
+        with self._lock:
+            return sorted(self._ueberfaellig, key=lambda rid: (self._ueberfaellig[rid], rid))
+    
+    def naechste_faelligkeit(self) -> Optional[date]:
+        """Gibt das früheste Fälligkeitsdatum der noch nicht überfälligen Rechnungen zurück"""
+        with self._lock:
+            while self._heap and self._offen.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
@@ -0,0 +1,151 @@
+"""
+Wartungsaufgaben ohne Oberfläche: Datensicherung und Integritätsprüfung
+
+Die Funktionen werden von der Kommandozeile (cli.py) aufgerufen und laufen
+auch neben einer geöffneten Anwendung, da sie die Daten nur lesen bzw. die
+Sicherung erst nach vollständigem Schreiben unter ihrem Namen ablegen.
+"""
+import os
+import zipfile
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from adapter.rechnungsindex import INDEX_DATEI
+
+STANDARD_SICHERUNG_PFAD = "sicherungen"
+STANDARD_BEHALTEN = 14
+SICHERUNG_PRAEFIX = "sicherung_"
+
+# Bereits komprimierte Formate werden unverändert gespeichert (spart die meiste Zeit)
+UNKOMPRIMIERT = (".pdf", ".zip", ".jpg", ".jpeg", ".png", ".gz", ".xlsx", ".docx", ".sqlite", ".db")
+
+
+# --- Datensicherung --------------------------------------------------------
+
+def sicherung_pfad(adapter) -> str:
+    """Gibt den konfigurierten Ordner für Datensicherungen zurück"""
+    return adapter.get_config().get("daten", {}).get("sicherung_pfad") or STANDARD_SICHERUNG_PFAD
+
+
+def erstelle_sicherung(adapter, ziel: Optional[str] = None, behalten: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sichert Datenverzeichnis und Konfiguration in eine ZIP-Datei
+    
+    Args:
+        adapter: DatenAdapter
+        ziel: Ordner für die Sicherung (Standard: daten.sicherung_pfad der Konfiguration)
+        behalten: Anzahl der Sicherungen, die danach erhalten bleiben (0 = alle;
+            Standard: daten.sicherungen_behalten)
+    
+    Returns:
+        {'datei', 'dateien', 'bytes', 'geloescht'}
+    """
+    daten_pfad = os.path.abspath(adapter.get_daten_pfad())
+    ziel = os.path.abspath(ziel or sicherung_pfad(adapter))
+    if behalten is None:
+        behalten = adapter.get_config().get("daten", {}).get("sicherungen_behalten", STANDARD_BEHALTEN)
+    os.makedirs(ziel, exist_ok=True)
+    
+    datei = os.path.join(ziel, f"{SICHERUNG_PRAEFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+    temp_pfad = f"{datei}.{os.getpid()}.tmp"
+    anzahl = 0
+    try:
+        with zipfile.ZipFile(temp_pfad, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archiv:
+            if os.path.exists(adapter.config_path):
+                archiv.write(adapter.config_path, "config.json")
+                anzahl += 1
+            for ordner, unterordner, dateien in os.walk(daten_pfad):
+                # Liegt der Sicherungsordner im Datenverzeichnis, wird er ausgelassen
+                unterordner[:] = sorted(u for u in unterordner if os.path.join(ordner, u) != ziel)
+                for name in sorted(dateien):
+                    if name.endswith((".tmp", ".lock")):
+                        continue
+                    pfad = os.path.join(ordner, name)
+                    arcname = os.path.join("daten", os.path.relpath(pfad, daten_pfad))
+                    art = zipfile.ZIP_STORED if name.lower().endswith(UNKOMPRIMIERT) else zipfile.ZIP_DEFLATED
+                    try:
+                        archiv.write(pfad, arcname, compress_type=art)
+                    except FileNotFoundError:
+                        # Während der Sicherung gelöscht (z.B. ersetzte Datei)
+                        continue
+                    anzahl += 1
+        os.replace(temp_pfad, datei)
+    except BaseException:
+        if os.path.exists(temp_pfad):
+            os.remove(temp_pfad)
+        raise
+    
+    geloescht = []
+    if behalten:
+        vorhandene = sorted(n for n in os.listdir(ziel) if n.startswith(SICHERUNG_PRAEFIX) and n.endswith(".zip"))
+        for name in vorhandene[:-behalten]:
+            os.remove(os.path.join(ziel, name))
+            geloescht.append(name)
+    return {"datei": datei, "dateien": anzahl, "bytes": os.path.getsize(datei), "geloescht": geloescht}
+
+
+# --- Integritätsprüfung ----------------------------------------------------
+
+def _problem(art: str, text: str, id: str = "") -> Dict[str, str]:
+    return {"art": art, "id": id, "text": text}
+
+
+def pruefe_integritaet(manager) -> List[Dict[str, str]]:
+    """
+    Prüft Dateien und Verweise der geladenen Daten
+    
+    Returns:
+        Gefundene Probleme als {'art', 'id', 'text'} (leer, wenn alles stimmt)
+    """
+    adapter = manager.adapter
+    probleme = []
+    
+    # Dateien
+    for pfad, fehler in adapter.pruefe_dateien():
+        probleme.append(_problem("datei", f"{pfad}: {fehler}"))
+    
+    # Eindeutigkeit
+    for art, eintraege, feld in (("kunde", manager.get_kunden(), "id"),
+                                 ("auftrag", manager.get_auftraege(), "id"),
+                                 ("auftrag", manager.get_auftraege(), "auftragsnummer"),
+                                 ("rechnung", manager.get_rechnungen(), "id"),
+                                 ("rechnung", manager.get_rechnungen(), "rechnungsnummer"),
+                                 ("stundennachweis", manager.get_stundennachweise(), "id"),
+                                 ("stueckliste", manager.get_stuecklisten(), "id")):
+        for wert, anzahl in Counter(getattr(e, feld) for e in eintraege).items():
+            if anzahl > 1:
+                probleme.append(_problem(art, f"{feld} {wert} ist {anzahl}-mal vergeben", wert))
+    
+    # Verweise
+    kunden = {k.id for k in manager.get_kunden()}
+    auftraege = {a.id: a for a in manager.get_auftraege()}
+    for auftrag in auftraege.values():
+        if auftrag.kunde_id not in kunden:
+            probleme.append(_problem("auftrag", f"{auftrag.auftragsnummer}: Kunde {auftrag.kunde_id} fehlt", auftrag.id))
+        if not adapter.get_auftragsordner_pfad(auftrag.auftragsnummer):
+            probleme.append(_problem("auftrag", f"{auftrag.auftragsnummer}: Auftragsordner fehlt", auftrag.id))
+    for rechnung in manager.get_rechnungen():
+        if rechnung.kunde_id not in kunden:
+            probleme.append(_problem("rechnung", f"{rechnung.rechnungsnummer}: Kunde {rechnung.kunde_id} fehlt",
+                                     rechnung.id))
+        if rechnung.auftrag_id not in auftraege:
+            probleme.append(_problem("rechnung", f"{rechnung.rechnungsnummer}: Auftrag {rechnung.auftrag_id} fehlt",
+                                     rechnung.id))
+    for art, eintraege in (("stundennachweis", manager.get_stundennachweise()),
+                           ("stueckliste", manager.get_stuecklisten())):
+        for eintrag in eintraege:
+            if eintrag.auftrag_id not in auftraege:
+                probleme.append(_problem(art, f"Auftrag {eintrag.auftrag_id} fehlt", eintrag.id))
+    
+    # Rechnungsindex
+    nach_auftrag = {}
+    for rechnung in manager.get_rechnungen():
+        auftrag = auftraege.get(rechnung.auftrag_id)
+        if auftrag:
+            nach_auftrag.setdefault(auftrag.auftragsnummer, []).append(rechnung.to_dict())
+    abweichend = adapter.get_rechnungsindex().abweichungen(nach_auftrag.items())
+    if abweichend:
+        probleme.append(_problem("index", f"{INDEX_DATEI} weicht bei {len(abweichend)} Auftrag/Aufträgen ab "
+                                 "(neu aufbauen mit 'reindex')", ", ".join(abweichend[:10])))
+    return probleme
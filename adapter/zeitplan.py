@@ -0,0 +1,488 @@
+"""
+Zeitplan für Wartungsaufgaben (Sicherung, Überfällig-Bericht, PDFs, Index, Prüfung, Kompaktierung)
+
+Die Zeitpläne stehen im Abschnitt "zeitplan" der Konfiguration, je Aufgabe
+ein cron-Ausdruck (Minute Stunde Tag Monat Wochentag) und optionale
+Parameter:
+
+    "zeitplan": {"sicherung": {"cron": "0 2 * * *", "behalten": 14}, ...}
+
+Ausgeführt wird entweder von der Kommandozeile (cli.py wartung, z.B. alle
+fünf Minuten per cron oder dauerhaft) oder von der laufenden Anwendung (im
+Thread-Pool des HintergrundAusfuehrer). Eine Sperrdatei je Aufgabe verhindert,
+dass beide dieselbe Aufgabe gleichzeitig ausführen. Jeder Lauf wird mit
+Dauer und Ergebnis in VERLAUF_DATEI protokolliert; daraus ergibt sich auch,
+welche Aufgaben fällig sind. Verpasste Läufe werden einmal nachgeholt.
+
+Die Aufgaben arbeiten mit einem eigenen, frisch geladenen DatenManager und
+schreiben nur Hilfsdateien (Sicherungen, PDFs, Index, Berichte), nie die
+Stammdaten einer geöffneten Anwendung.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+WARTUNG_ORDNER = "wartung"
+VERLAUF_DATEI = "verlauf.jsonl"
+UEBERFAELLIG_DATEI = "ueberfaellig.json"
+VERLAUF_BEHALTEN = 1000
+
+# Sperren älter als das gelten als verwaist (z.B. nach einem Absturz)
+MAX_LAUFZEIT_S = 6 * 3600
+
+_ABKUERZUNGEN = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0",
+                 "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *"}
+
+
+class ZeitplanFehler(Exception):
+    """Ungültiger cron-Ausdruck oder unbekannte Aufgabe"""
+    pass
+
+
+class AufgabeLaeuftBereits(Exception):
+    """Die Sperrdatei der Aufgabe gehört einem anderen, noch laufenden Lauf"""
+    pass
+
+
+# --- cron-Ausdrücke --------------------------------------------------------
+
+def _feld(text: str, minimum: int, maximum: int) -> List[int]:
+    """Werte eines cron-Felds (*, */n, a-b, a-b/n und Listen davon)"""
+    werte = set()
+    for teil in text.split(","):
+        bereich, _, schritt = teil.partition("/")
+        if bereich == "*":
+            von, bis = minimum, maximum
+        elif "-" in bereich:
+            von, bis = (int(x) for x in bereich.split("-", 1))
+        else:
+            von = bis = int(bereich)
+            if schritt:
+                bis = maximum
+        if not (minimum <= von <= bis <= maximum):
+            raise ValueError(f"'{teil}' liegt nicht zwischen {minimum} und {maximum}")
+        werte.update(range(von, bis + 1, int(schritt) if schritt else 1))
+    return sorted(werte)
+
+
+class Cron:
+    """cron-Ausdruck mit Berechnung des nächsten Zeitpunkts"""
+    
+    def __init__(self, ausdruck: str):
+        self.ausdruck = ausdruck
+        felder = _ABKUERZUNGEN.get(ausdruck.strip(), ausdruck).split()
+        if len(felder) != 5:
+            raise ZeitplanFehler(f"'{ausdruck}': erwartet 5 Felder (Minute Stunde Tag Monat Wochentag)")
+        try:
+            self.minuten = _feld(felder[0], 0, 59)
+            self.stunden = _feld(felder[1], 0, 23)
+            self.tage = set(_feld(felder[2], 1, 31))
+            self.monate = set(_feld(felder[3], 1, 12))
+            # 0 und 7 sind Sonntag
+            self.wochentage = {w % 7 for w in _feld(felder[4], 0, 7)}
+        except ValueError as e:
+            raise ZeitplanFehler(f"'{ausdruck}': {e}") from None
+        # Wie bei cron: sind Tag und Wochentag eingeschränkt, genügt einer von beiden
+        self._tag_frei = felder[2] == "*"
+        self._wochentag_frei = felder[4] == "*"
+    
+    def _tag_passt(self, tag: date) -> bool:
+        if tag.month not in self.monate:
+            return False
+        tag_passt = tag.day in self.tage
+        wochentag_passt = (tag.weekday() + 1) % 7 in self.wochentage
+        if self._tag_frei or self._wochentag_frei:
+            return tag_passt and wochentag_passt
+        return tag_passt or wochentag_passt
+    
+    def naechster(self, nach: datetime) -> datetime:
+        """Erster Zeitpunkt des Zeitplans nach 'nach' (minutengenau)"""
+        zeit = nach.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Höchstens bis zum nächsten 29. Februar an einem passenden Wochentag suchen
+        for _ in range(366 * 28):
+            if self._tag_passt(zeit.date()):
+                for stunde in self.stunden:
+                    if stunde < zeit.hour:
+                        continue
+                    for minute in self.minuten:
+                        if stunde > zeit.hour or minute >= zeit.minute:
+                            return zeit.replace(hour=stunde, minute=minute)
+            zeit = (zeit + timedelta(days=1)).replace(hour=0, minute=0)
+        raise ZeitplanFehler(f"'{self.ausdruck}' trifft nie zu")
+
+
+# --- Sperrdateien ----------------------------------------------------------
+
+def _prozess_laeuft(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) würde unter Windows ein CTRL_C_EVENT senden
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Sperre:
+    """Sperrdatei einer Aufgabe (auch über Prozessgrenzen), als Kontextmanager"""
+    
+    def __init__(self, pfad: str, max_laufzeit_s: float = MAX_LAUFZEIT_S):
+        self.pfad = pfad
+        self.max_laufzeit_s = max_laufzeit_s
+    
+    def _verwaist(self) -> bool:
+        try:
+            with open(self.pfad, "r", encoding="utf-8") as f:
+                inhaber = json.load(f)
+            alter = time.time() - inhaber["seit"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unlesbar: gerade im Entstehen oder beschädigt; nur nach Ablauf übernehmen
+            try:
+                alter = time.time() - os.path.getmtime(self.pfad)
+            except OSError:
+                return True
+            return alter > self.max_laufzeit_s
+        if alter > self.max_laufzeit_s:
+            return True
+        return inhaber.get("rechner") == socket.gethostname() and not _prozess_laeuft(inhaber.get("pid", 0))
+    
+    def __enter__(self) -> "Sperre":
+        os.makedirs(os.path.dirname(self.pfad), exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.pfad, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._verwaist():
+                    raise AufgabeLaeuftBereits(os.path.basename(self.pfad)) from None
+                try:
+                    os.remove(self.pfad)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid(), "rechner": socket.gethostname(), "seit": time.time()}, f)
+            return self
+        raise AufgabeLaeuftBereits(os.path.basename(self.pfad))
+    
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.pfad)
+        except FileNotFoundError:
+            pass
+
+
+# --- Aufgaben --------------------------------------------------------------
+
+class Kontext:
+    """Was eine Aufgabe braucht: Konfiguration, Adapter, Manager (lazy) und Abbruch"""
+    
+    def __init__(self, config_path: str, ordner: str, optionen: Dict[str, Any],
+                 abgebrochen: Optional[Callable[[], bool]] = None):
+        self.config_path = config_path
+        self.ordner = ordner
+        self.optionen = optionen
+        self.abgebrochen = abgebrochen or (lambda: False)
+        self._adapter = None
+        self._manager = None
+    
+    def adapter(self):
+        if self._manager is not None:
+            return self._manager.adapter
+        if self._adapter is None:
+            from adapter.datenadapter import DatenAdapter
+            self._adapter = DatenAdapter(self.config_path)
+        return self._adapter
+    
+    def manager(self):
+        if self._manager is None:
+            from adapter.manager import DatenManager
+            self._manager = DatenManager(self.config_path)
+        return self._manager
+
+
+def _sicherung(kontext: Kontext) -> Dict[str, Any]:
+    from adapter.wartung import erstelle_sicherung
+    ergebnis = erstelle_sicherung(kontext.adapter(), kontext.optionen.get("ziel"), kontext.optionen.get("behalten"))
+    return {"datei": ergebnis["datei"], "bytes": ergebnis["bytes"], "geloescht": len(ergebnis["geloescht"])}
+
+
+def _ueberfaellig(kontext: Kontext) -> Dict[str, Any]:
+    """Schreibt den Bericht der überfälligen Rechnungen und zählt die fälligen Mahnungen"""
+    from adapter.mahnwesen import plane_mahnlauf
+    manager = kontext.manager()
+    heute = date.today()
+    manager.ueberfaellig.pruefe(heute)
+    kunden = {k.id: k.get_vollstaendiger_name() for k in manager.get_kunden()}
+    bericht = [{"rechnungsnummer": r.rechnungsnummer, "kunde": kunden.get(r.kunde_id, ""),
+                "faellig": r.faelligkeitsdatum.date().isoformat(), "tage": (heute - r.faelligkeitsdatum.date()).days,
+                "offen": r.offener_betrag, "mahnstufe": r.mahnstufe}
+               for r in manager.get_ueberfaellige_rechnungen()]
+    _schreibe_json(os.path.join(kontext.ordner, UEBERFAELLIG_DATEI), {"stand": heute.isoformat(), "rechnungen": bericht})
+    mahnlauf = plane_mahnlauf(manager, heute)
+    return {"ueberfaellig": len(bericht), "offen": round(sum(e["offen"] for e in bericht), 2),
+            "mahnungen_faellig": len(mahnlauf["mahnungen"]),
+            "mahnungen_uebersprungen": [f"{e['rechnungsnummer']}: {e['grund']}" for e in mahnlauf["uebersprungen"]]}
+
+
+def _pdf(kontext: Kontext) -> Dict[str, Any]:
+    """Erstellt fehlende oder veraltete Rechnungs-PDFs (unveränderte werden übersprungen)"""
+    from adapter.pdf_stapel import rendere_rechnungen
+    manager = kontext.manager()
+    ergebnis = rendere_rechnungen(manager, manager.get_rechnungen(), max_worker=kontext.optionen.get("worker"),
+                                  abgebrochen=kontext.abgebrochen)
+    return dict(ergebnis, fehler=len(ergebnis["fehler"]))
+
+
+def _reindex(kontext: Kontext) -> Dict[str, Any]:
+    return {"auftraege": kontext.adapter().baue_rechnungsindex_neu()}
+
+
+def _pruefen(kontext: Kontext) -> Dict[str, Any]:
+    from adapter.wartung import pruefe_integritaet
+    probleme = pruefe_integritaet(kontext.manager())
+    return {"probleme": len(probleme), "details": probleme[:20]}
+
+
+def _kompaktieren(kontext: Kontext) -> Dict[str, Any]:
+    """Kürzt den Verlauf, entfernt liegengebliebene temporäre Dateien und kompaktiert den Katalog"""
+    from adapter.katalog import Katalog, katalog_pfad
+    ergebnis = {"verlauf_entfernt": kuerze_verlauf(kontext.ordner, kontext.optionen.get("verlauf_behalten",
+                                                                                         VERLAUF_BEHALTEN))}
+    grenze = time.time() - 24 * 3600
+    entfernt = 0
+    for ordner, _, dateien in os.walk(kontext.adapter().get_daten_pfad()):
+        for name in dateien:
+            pfad = os.path.join(ordner, name)
+            if name.endswith(".tmp") and os.path.getmtime(pfad) < grenze:
+                os.remove(pfad)
+                entfernt += 1
+    ergebnis["tmp_entfernt"] = entfernt
+    pfad = katalog_pfad(kontext.adapter().get_daten_pfad())
+    if os.path.exists(pfad):
+        katalog = Katalog(pfad)
+        try:
+            ergebnis["katalog_bytes_frei"] = katalog.kompaktiere()
+        finally:
+            katalog.schliessen()
+    return ergebnis
+
+
+# Name -> (Beschreibung, Funktion)
+AUFGABEN: Dict[str, tuple] = {
+    "sicherung": ("Datensicherung (ZIP)", _sicherung),
+    "ueberfaellig": ("Bericht überfälliger Rechnungen", _ueberfaellig),
+    "pdf": ("Rechnungs-PDFs aktualisieren", _pdf),
+    "reindex": ("Rechnungsindex neu aufbauen", _reindex),
+    "pruefen": ("Integritätsprüfung", _pruefen),
+    "kompaktieren": ("Verlauf kürzen, Katalog kompaktieren", _kompaktieren),
+}
+
+
+# --- Verlauf ---------------------------------------------------------------
+
+def _json_wert(wert: Any) -> Any:
+    if isinstance(wert, Decimal):
+        return float(wert)
+    if isinstance(wert, (date, datetime)):
+        return wert.isoformat()
+    return str(wert)
+
+
+def _schreibe_json(pfad: str, daten: Any):
+    os.makedirs(os.path.dirname(pfad), exist_ok=True)
+    temp_pfad = f"{pfad}.{os.getpid()}.tmp"
+    with open(temp_pfad, "w", encoding="utf-8") as f:
+        json.dump(daten, f, ensure_ascii=False, indent=2, default=_json_wert)
+    os.replace(temp_pfad, pfad)
+
+
+def kuerze_verlauf(ordner: str, behalten: int = VERLAUF_BEHALTEN) -> int:
+    """Behält nur die letzten Einträge des Verlaufs und gibt die Anzahl der entfernten zurück"""
+    pfad = os.path.join(ordner, VERLAUF_DATEI)
+    with Sperre(os.path.join(ordner, "verlauf.lock")):
+        try:
+            with open(pfad, "r", encoding="utf-8") as f:
+                zeilen = f.readlines()
+        except FileNotFoundError:
+            return 0
+        if len(zeilen) <= behalten:
+            return 0
+        temp_pfad = f"{pfad}.{os.getpid()}.tmp"
+        with open(temp_pfad, "w", encoding="utf-8") as f:
+            f.writelines(zeilen[-behalten:])
+        os.replace(temp_pfad, pfad)
+    return len(zeilen) - behalten
+
+
+# --- Planer ----------------------------------------------------------------
+
+class Planer:
+    """Ermittelt fällige Aufgaben und führt sie mit Sperre und Verlauf aus"""
+    
+    def __init__(self, config_path: str = "config/config.json", manager=None):
+        """
+        Args:
+            config_path: Pfad der Konfiguration
+            manager: DatenManager einer laufenden Anwendung; dessen Konfiguration
+                wird verwendet und vor jeder Aufgabe werden ausstehende
+                Speicherungen abgewartet
+        """
+        self.config_path = config_path
+        self.manager = manager
+        self._config = None
+        self._lock = threading.Lock()
+        self._verlauf_stand = None
+        self._letzte: Dict[str, Dict[str, Any]] = {}
+    
+    def config(self) -> Dict[str, Any]:
+        if self.manager is not None:
+            return self.manager.adapter.get_config()
+        if self._config is None:
+            try:
+                with open(self.config_path, "r", encoding="utf-8") as f:
+                    self._config = json.load(f)
+            except FileNotFoundError:
+                self._config = {}
+        return self._config
+    
+    @property
+    def ordner(self) -> str:
+        daten_pfad = self.config().get("daten", {}).get("daten_pfad", "").strip() or "data"
+        return os.path.join(daten_pfad, WARTUNG_ORDNER)
+    
+    def zeitplaene(self) -> Dict[str, Dict[str, Any]]:
+        """Konfigurierte Aufgaben (Name -> Eintrag mit 'cron' und Parametern)"""
+        return {name: eintrag for name, eintrag in self.config().get("zeitplan", {}).items()
+                if isinstance(eintrag, dict) and eintrag.get("aktiv", True)}
+    
+    def letzte_laeufe(self) -> Dict[str, Dict[str, Any]]:
+        """Letzter Verlaufseintrag je Aufgabe (die Datei wird nur nach Änderungen neu gelesen)"""
+        pfad = os.path.join(self.ordner, VERLAUF_DATEI)
+        try:
+            info = os.stat(pfad)
+            stand = (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if stand != self._verlauf_stand:
+                letzte = {}
+                with open(pfad, "r", encoding="utf-8") as f:
+                    for zeile in f:
+                        try:
+                            eintrag = json.loads(zeile)
+                        except ValueError:
+                            continue  # z.B. eine gerade geschriebene, unvollständige Zeile
+                        letzte[eintrag.get("aufgabe")] = eintrag
+                self._letzte, self._verlauf_stand = letzte, stand
+            return dict(self._letzte)
+    
+    def faellige(self, jetzt: Optional[datetime] = None) -> List[str]:
+        """
+        Aufgaben, deren nächster Zeitpunkt seit dem letzten Lauf erreicht ist
+        
+        Aufgaben ohne bisherigen Lauf gelten als fällig, wenn ihr Zeitplan in
+        den letzten 24 Stunden zugetroffen hätte.
+        """
+        jetzt = jetzt or datetime.now()
+        letzte = self.letzte_laeufe()
+        faellig = []
+        for name, eintrag in self.zeitplaene().items():
+            if name not in AUFGABEN or not eintrag.get("cron"):
+                continue
+            try:
+                cron = Cron(eintrag["cron"])
+            except ZeitplanFehler:
+                continue
+            lauf = letzte.get(name)
+            referenz = datetime.fromisoformat(lauf["start"]) if lauf else jetzt - timedelta(days=1)
+            if cron.naechster(referenz) <= jetzt:
+                faellig.append(name)
+        return faellig
+    
+    def status(self, jetzt: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Alle Aufgaben mit Zeitplan, letztem Lauf und nächstem Zeitpunkt"""
+        jetzt = jetzt or datetime.now()
+        zeitplaene = self.zeitplaene()
+        letzte = self.letzte_laeufe()
+        zeilen = []
+        for name, (beschreibung, _) in AUFGABEN.items():
+            eintrag = {"aufgabe": name, "beschreibung": beschreibung, "cron": zeitplaene.get(name, {}).get("cron"),
+                       "naechster": None, "letzter": letzte.get(name)}
+            if eintrag["cron"]:
+                try:
+                    eintrag["naechster"] = Cron(eintrag["cron"]).naechster(jetzt).isoformat(timespec="minutes")
+                except ZeitplanFehler as e:
+                    eintrag["fehler"] = str(e)
+            zeilen.append(eintrag)
+        return zeilen
+    
+    def fuehre_aus(self, name: str, ausloeser: str = "zeitplan",
+                   abgebrochen: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Führt eine Aufgabe aus und protokolliert den Lauf
+        
+        Fehler der Aufgabe werden nicht weitergegeben, sondern stehen im
+        Ergebnis ('ok': False, 'fehler'). Läuft die Aufgabe bereits (in diesem
+        oder einem anderen Prozess), wird nichts protokolliert.
+        
+        Returns:
+            Verlaufseintrag mit aufgabe, start, dauer_s, ok und ergebnis bzw. fehler,
+            oder {'aufgabe', 'uebersprungen': True}
+        """
+        if name not in AUFGABEN:
+            raise ZeitplanFehler(f"Unbekannte Aufgabe '{name}' (bekannt: {', '.join(AUFGABEN)})")
+        ordner = self.ordner
+        try:
+            with Sperre(os.path.join(ordner, f"{name}.lock")):
+                if self.manager is not None:
+                    self.manager.warte_auf_speicherung()
+                kontext = Kontext(self.config_path, ordner, self.zeitplaene().get(name, {}), abgebrochen)
+                start = datetime.now()
+                messung = time.perf_counter()
+                eintrag = {"aufgabe": name, "start": start.isoformat(timespec="seconds"), "ausloeser": ausloeser}
+                try:
+                    eintrag["ergebnis"] = AUFGABEN[name][1](kontext)
+                    eintrag["ok"] = True
+                except Exception as e:
+                    eintrag["ok"] = False
+                    eintrag["fehler"] = str(e) or e.__class__.__name__
+                eintrag["dauer_s"] = round(time.perf_counter() - messung, 3)
+                self._protokolliere(ordner, eintrag)
+                return eintrag
+        except AufgabeLaeuftBereits:
+            return {"aufgabe": name, "uebersprungen": True}
+    
+    def _protokolliere(self, ordner: str, eintrag: Dict[str, Any]):
+        zeile = json.dumps(eintrag, ensure_ascii=False, default=_json_wert) + "\n"
+        os.makedirs(ordner, exist_ok=True)
+        # Kurze Zeilen im Anhängemodus werden am Stück geschrieben
+        with open(os.path.join(ordner, VERLAUF_DATEI), "a", encoding="utf-8") as f:
+            f.write(zeile)
+    
+    def fuehre_faellige_aus(self, jetzt: Optional[datetime] = None, max_worker: int = 2) -> List[Dict[str, Any]]:
+        """Führt alle fälligen Aufgaben parallel in Worker-Threads aus"""
+        faellig = self.faellige(jetzt)
+        if not faellig:
+            return []
+        with ThreadPoolExecutor(max_workers=max_worker, thread_name_prefix="wartung") as pool:
+            return list(pool.map(self.fuehre_aus, faellig))
+    
+    def laufe(self, stopp: Optional[threading.Event] = None,
+              bei_lauf: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Prüft jede Minute auf fällige Aufgaben, bis stopp gesetzt wird (Dienstbetrieb)"""
+        stopp = stopp or threading.Event()
+        while not stopp.is_set():
+            for eintrag in self.fuehre_faellige_aus():
+                if bei_lauf:
+                    bei_lauf(eintrag)
+            # Bis kurz nach Beginn der nächsten Minute warten
+            stopp.wait(60 - datetime.now().second + 1)
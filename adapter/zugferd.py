@@ -0,0 +1,179 @@
+"""
+ZUGFeRD / Factur-X: E-Rechnung in ein Rechnungs-PDF einbetten
+
+Das PDF bleibt die lesbare Rechnung; die CII-Datei (Profil EN 16931, siehe
+adapter/erechnung.py) wird als factur-x.xml angehängt. Für PDF/A-3 kommen
+XMP-Metadaten mit Factur-X-Erweiterungsschema und ein sRGB-Ausgabe-Farbraum
+hinzu. Alles wird während des Renderns in das reportlab-Dokument eingetragen,
+das PDF muss also nicht nachträglich eingelesen und neu geschrieben werden.
+"""
+from typing import Callable, Optional
+from xml.sax.saxutils import escape
+
+from reportlab.pdfbase import pdfdoc
+
+
+# Name der eingebetteten Datei nach ZUGFeRD 2.x / Factur-X
+ZUGFERD_DATEINAME = "factur-x.xml"
+
+_XMP_VORLAGE = """<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about="" xmlns:pdfaid="http://www.aiim.org/pdfa/ns/id/">
+   <pdfaid:part>3</pdfaid:part>
+   <pdfaid:conformance>B</pdfaid:conformance>
+  </rdf:Description>
+  <rdf:Description rdf:about="" xmlns:dc="http://purl.org/dc/elements/1.1/">
+   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">{titel}</rdf:li></rdf:Alt></dc:title>
+   <dc:creator><rdf:Seq><rdf:li>{autor}</rdf:li></rdf:Seq></dc:creator>
+   <dc:description><rdf:Alt><rdf:li xml:lang="x-default">{betreff}</rdf:li></rdf:Alt></dc:description>
+  </rdf:Description>
+  <rdf:Description rdf:about="" xmlns:pdf="http://ns.adobe.com/pdf/1.3/">
+   <pdf:Producer>{hersteller}</pdf:Producer>
+   <pdf:Keywords>{stichworte}</pdf:Keywords>
+  </rdf:Description>
+  <rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/">
+   <xmp:CreatorTool>{programm}</xmp:CreatorTool>
+   <xmp:CreateDate>{datum}</xmp:CreateDate>
+   <xmp:ModifyDate>{datum}</xmp:ModifyDate>
+  </rdf:Description>
+  <rdf:Description rdf:about="" xmlns:fx="urn:factur-x:pdfa:CrossIndustryDocument:invoice:1p0#">
+   <fx:DocumentType>INVOICE</fx:DocumentType>
+   <fx:DocumentFileName>{dateiname}</fx:DocumentFileName>
+   <fx:Version>1.0</fx:Version>
+   <fx:ConformanceLevel>EN 16931</fx:ConformanceLevel>
+  </rdf:Description>
+  <rdf:Description rdf:about="" xmlns:pdfaExtension="http://www.aiim.org/pdfa/ns/extension/"
+    xmlns:pdfaSchema="http://www.aiim.org/pdfa/ns/schema#" xmlns:pdfaProperty="http://www.aiim.org/pdfa/ns/property#">
+   <pdfaExtension:schemas><rdf:Bag><rdf:li rdf:parseType="Resource">
+    <pdfaSchema:schema>Factur-X PDFA Extension Schema</pdfaSchema:schema>
+    <pdfaSchema:namespaceURI>urn:factur-x:pdfa:CrossIndustryDocument:invoice:1p0#</pdfaSchema:namespaceURI>
+    <pdfaSchema:prefix>fx</pdfaSchema:prefix>
+    <pdfaSchema:property><rdf:Seq>
+{eigenschaften}
+    </rdf:Seq></pdfaSchema:property>
+   </rdf:li></rdf:Bag></pdfaExtension:schemas>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="w"?>
+"""
+
+_XMP_EIGENSCHAFTEN = (
+    ("DocumentFileName", "Name of the embedded XML invoice file"),
+    ("DocumentType", "INVOICE"),
+    ("Version", "The actual version of the Factur-X XML schema"),
+    ("ConformanceLevel", "The conformance level of the embedded Factur-X data"),
+)
+
+
+def _srgb_profil() -> Optional[bytes]:
+    """ICC-Profil sRGB für den PDF/A-Ausgabe-Farbraum (benötigt Pillow)"""
+    try:
+        from PIL import ImageCms
+    except ImportError:
+        return None
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+def bette_zugferd_ein(canvas_obj, xml: bytes, betreff: str = ""):
+    """
+    Bettet eine CII-Rechnung als ZUGFeRD/Factur-X in das entstehende PDF ein
+    
+    Wird einmal je Dokument während des Renderns aufgerufen (z.B. beim
+    Zeichnen der ersten Seite). Ergänzt Dateianhang (AFRelationship
+    Alternative), XMP-Metadaten mit PDF/A-3- und Factur-X-Kennung sowie
+    einen sRGB-Ausgabe-Farbraum. PDF/A-3 verlangt zusätzlich eingebettete
+    Schriften; der PDFGenerator verwendet dafür eine TrueType-Schrift.
+    
+    Args:
+        canvas_obj: reportlab-Canvas des Dokuments
+        xml: CII-Rechnung (Profil EN 16931)
+        betreff: Beschreibung für die Metadaten
+    """
+    doc = canvas_obj._doc
+    doc._pdfVersion = max(doc._pdfVersion, (1, 7))
+    zeit = doc._timeStamp
+    jahr, monat, tag, stunde, minute, sekunde = zeit.YMDhms
+    pdf_datum = pdfdoc.PDFDate(ts=zeit)
+    
+    datei = pdfdoc.PDFStream(
+        pdfdoc.PDFDictionary({
+            "Type": pdfdoc.PDFName("EmbeddedFile"),
+            # PDFName maskiert '/' nicht; der Name muss als text#2Fxml im PDF stehen
+            "Subtype": "/text#2Fxml",
+            "Params": pdfdoc.PDFDictionary({"Size": len(xml), "ModDate": pdf_datum}),
+        }),
+        content=xml,
+        filters=[pdfdoc.PDFZCompress]
+    )
+    dateiverweis = doc.Reference(datei)
+    dateiname = pdfdoc.PDFString(ZUGFERD_DATEINAME)
+    anhang = doc.Reference(pdfdoc.PDFDictionary({
+        "Type": pdfdoc.PDFName("Filespec"),
+        "F": dateiname,
+        "UF": dateiname,
+        "EF": pdfdoc.PDFDictionary({"F": dateiverweis, "UF": dateiverweis}),
+        "Desc": pdfdoc.PDFString("Factur-X Invoice"),
+        "AFRelationship": pdfdoc.PDFName("Alternative"),
+    }))
+    
+    katalog = doc.Catalog
+    # AF und OutputIntents kennt PDFCatalog nicht; als zusätzliche Einträge dieser Instanz freigeben
+    katalog.__NoDefault__ = list(katalog.__NoDefault__) + ["AF", "OutputIntents"]
+    katalog.Names = pdfdoc.PDFDictionary({
+        "EmbeddedFiles": pdfdoc.PDFDictionary({"Names": pdfdoc.PDFArray([dateiname, anhang])})
+    })
+    katalog.AF = pdfdoc.PDFArray([anhang])
+    
+    profil = _srgb_profil()
+    if profil:
+        icc = doc.Reference(pdfdoc.PDFStream(pdfdoc.PDFDictionary({"N": 3}), content=profil,
+                                             filters=[pdfdoc.PDFZCompress]))
+        katalog.OutputIntents = pdfdoc.PDFArray([pdfdoc.PDFDictionary({
+            "Type": pdfdoc.PDFName("OutputIntent"),
+            "S": pdfdoc.PDFName("GTS_PDFA1"),
+            "OutputConditionIdentifier": pdfdoc.PDFString("sRGB IEC61966-2.1"),
+            "Info": pdfdoc.PDFString("sRGB IEC61966-2.1"),
+            "DestOutputProfile": icc,
+        })])
+    else:
+        print("Warnung: Pillow nicht installiert, ZUGFeRD-PDF ohne Ausgabe-Farbraum (nicht PDF/A-konform)")
+    
+    info = doc.info
+    info.subject = betreff or info.subject
+    info.keywords = "ZUGFeRD, Factur-X, E-Rechnung"
+    verschiebung = f"{zeit.dhh:+03d}:{zeit.dmm:02d}"
+    
+    def xmp_inhalt() -> bytes:
+        # Erst beim Speichern erzeugen, damit Titel und Autor mit dem Info-Dictionary übereinstimmen
+        eigenschaften = "\n".join(
+            "     <rdf:li rdf:parseType=\"Resource\">"
+            f"<pdfaProperty:name>{name}</pdfaProperty:name>"
+            "<pdfaProperty:valueType>Text</pdfaProperty:valueType>"
+            "<pdfaProperty:category>external</pdfaProperty:category>"
+            f"<pdfaProperty:description>{beschreibung}</pdfaProperty:description></rdf:li>"
+            for name, beschreibung in _XMP_EIGENSCHAFTEN
+        )
+        return _XMP_VORLAGE.format(
+            titel=escape(info.title), autor=escape(info.author), betreff=escape(info.subject),
+            hersteller=escape(info.producer), stichworte=escape(info.keywords), programm=escape(info.creator),
+            datum=f"{jahr:04d}-{monat:02d}-{tag:02d}T{stunde:02d}:{minute:02d}:{sekunde:02d}{verschiebung}",
+            dateiname=ZUGFERD_DATEINAME, eigenschaften=eigenschaften,
+        ).encode("utf-8")
+    
+    katalog.Metadata = _XmpStrom(xmp_inhalt)
+
+
+class _XmpStrom(pdfdoc.PDFObject):
+    """Unkomprimierter Metadaten-Stream (PDF/A verbietet Filter am XMP-Stream), Inhalt erst beim Speichern"""
+    __RefOnly__ = 1
+    
+    def __init__(self, inhalt: Callable[[], bytes]):
+        self.inhalt = inhalt
+    
+    def format(self, document):
+        daten = self.inhalt()
+        kopf = pdfdoc.PDFDictionary({"Type": pdfdoc.PDFName("Metadata"), "Subtype": pdfdoc.PDFName("XML"),
+                                     "Length": len(daten)})
+        return pdfdoc.format(kopf, document) + b"\nstream\n" + daten + b"endstream\n"
@@ -0,0 +1,6 @@
+"""
+Benchmarks (ohne Oberfläche lauffähig, importieren kein tkinter)
+
+Aufruf aus dem Projektverzeichnis, z.B.:
+    python -m benchmarks.pdf_rendering
+"""
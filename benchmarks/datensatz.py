@@ -0,0 +1,380 @@
+"""
+Synthetischer Datenbestand für Last- und Leistungstests
+
+Erzeugt reproduzierbar (fester Seed, festes Stichtagsdatum) Kunden, Aufträge
+mit Positionen, Rechnungen je Auftrag, Stundennachweise und Stücklisten über
+mehrere Jahre. Geschrieben wird über den DatenAdapter, also genau in der
+Ordnerstruktur der Anwendung (<Daten>/<Jahr>/<Auftragsnummer>/...), dazu eine
+config.json, die auf den neuen Datenordner zeigt.
+
+Gleiche Parameter ergeben Byte für Byte dieselben Dateien, die Messungen
+verschiedener Commits sind damit vergleichbar.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.datensatz /tmp/zehn_jahre                 # 10 Jahre, Standardgröße
+    python -m benchmarks.datensatz /tmp/gross --jahre 15 --auftraege-pro-jahr 1000
+    python -m benchmarks.datensatz /tmp/klein --jahre 1 --kunden 50 --auftraege-pro-jahr 40
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import date, datetime, time as uhrzeit, timedelta
+from typing import Any, Dict, List, Optional
+
+# Pfad zum Hauptprojekt hinzufügen (Aufruf auch als Skript)
+PROJEKT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT)
+
+from adapter.datenadapter import DatenAdapter
+from model.auftrag import Auftrag, Position
+from model.kunde import Kunde
+from model.rechnung import Rechnung
+from model.stueckliste import Stueckliste, StuecklistenEintrag
+from model.stundennachweis import Stundennachweis, Zeiteintrag
+
+STANDARD_JAHRE = 10
+STANDARD_KUNDEN = 600
+STANDARD_AUFTRAEGE_PRO_JAHR = 300
+STANDARD_SEED = 1
+# Fester Stichtag, damit Status (bezahlt, überfällig, in Arbeit) nicht vom Tag des Aufrufs abhängen
+STANDARD_STICHTAG = date(2025, 12, 31)
+
+FIRMEN = ["Bau", "Haustechnik", "Immobilien", "Hausverwaltung", "Wohnbau", "Gebäudeservice", "Dach",
+          "Elektro", "Sanitär", "Holzbau", "Projektentwicklung", "Facility Management"]
+RECHTSFORMEN = ["GmbH", "GmbH & Co. KG", "KG", "AG", "e.K.", "GbR"]
+NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz",
+             "Hoffmann", "Schäfer", "Koch", "Bauer", "Richter", "Klein", "Wolf", "Schröder", "Neumann",
+             "Schwarz", "Zimmermann", "Braun", "Krüger", "Hofmann", "Hartmann", "Lange", "Huber", "Kiermeier"]
+VORNAMEN = ["Anna", "Maria", "Thomas", "Michael", "Andreas", "Stefan", "Sabine", "Petra", "Jürgen", "Monika",
+            "Klaus", "Claudia", "Markus", "Julia", "Alexander", "Katharina", "Franz", "Josef"]
+ORTE = [("80331", "München"), ("85049", "Ingolstadt"), ("93047", "Regensburg"), ("84028", "Landshut"),
+        ("86150", "Augsburg"), ("85354", "Freising"), ("84503", "Altötting"), ("83022", "Rosenheim"),
+        ("94032", "Passau"), ("85221", "Dachau"), ("82256", "Fürstenfeldbruck"), ("85435", "Erding")]
+STRASSEN = ["Hauptstraße", "Bahnhofstraße", "Gartenweg", "Am Anger", "Kirchplatz", "Industriestraße",
+            "Lindenallee", "Mühlweg", "Schulstraße", "Gewerbering", "Bergstraße", "Am Bach"]
+
+# (Bezeichnung, Einheit, Preis von, Preis bis, Menge von, Menge bis)
+LEISTUNGEN = [
+    ("Trockenbauwand erstellen, doppelt beplankt", "m²", 38.0, 65.0, 5, 180),
+    ("Malerarbeiten Innenwände, zweifacher Anstrich", "m²", 8.5, 16.0, 20, 600),
+    ("Fliesenarbeiten Boden, Feinsteinzeug 60x60", "m²", 55.0, 95.0, 4, 120),
+    ("Estrich verlegen, Zementestrich 50 mm", "m²", 22.0, 38.0, 10, 300),
+    ("Regiestunden Facharbeiter", "Std", 52.0, 68.0, 2, 80),
+    ("Regiestunden Helfer", "Std", 38.0, 48.0, 2, 80),
+    ("Abbrucharbeiten inkl. Entsorgung", "psch", 350.0, 4800.0, 1, 1),
+    ("Baustelleneinrichtung", "psch", 180.0, 1500.0, 1, 1),
+    ("Türzarge setzen und Innentür montieren", "Stk", 180.0, 420.0, 1, 24),
+    ("Dachrinne erneuern, Titanzink", "m", 42.0, 78.0, 6, 60),
+    ("Wärmedämmverbundsystem 140 mm", "m²", 88.0, 135.0, 30, 400),
+    ("Elektroinstallation Steckdose/Schalter", "Stk", 45.0, 95.0, 4, 80),
+]
+MATERIAL = [
+    ("Gipskartonplatte 12,5 mm", "Stk", 5.8, 8.9), ("CW-Profil 75 mm, 2,60 m", "Stk", 3.2, 5.1),
+    ("Schnellbauschrauben 3,5x25, 1000 Stk", "Pak", 9.5, 14.0), ("Mineralwolle 60 mm", "m²", 3.9, 6.8),
+    ("Fliesenkleber flexibel, 25 kg", "Sack", 14.0, 23.0), ("Fugenmörtel grau, 5 kg", "Eimer", 8.0, 13.5),
+    ("Dispersionsfarbe weiß, 12,5 l", "Eimer", 38.0, 72.0), ("Tiefengrund, 10 l", "Kanister", 18.0, 31.0),
+    ("Zementestrich CT-C25-F4, 40 kg", "Sack", 4.2, 6.9), ("Randdämmstreifen 8 mm, 25 m", "Rolle", 6.0, 11.0),
+    ("Acryl-Dichtstoff weiß", "Kart", 2.8, 5.5), ("Kabel NYM-J 3x1,5, 50 m", "Ring", 38.0, 64.0),
+]
+BEARBEITER = ["R. Kiermeier", "M. Huber", "S. Bauer", "T. Wagner", "F. Maier"]
+
+
+def _geld(wert: float) -> float:
+    return round(wert, 2)
+
+
+def _id(praefix: str, nummer: int) -> str:
+    return f"{praefix}{nummer:07d}"
+
+
+def erzeuge_kunden(zufall: random.Random, anzahl: int, beginn: date) -> List[Kunde]:
+    """Erzeugt Firmen- und Privatkunden (etwa 60 % Firmen)"""
+    kunden = []
+    for i in range(1, anzahl + 1):
+        plz, ort = zufall.choice(ORTE)
+        nachname = zufall.choice(NACHNAMEN)
+        firma = ""
+        if zufall.random() < 0.6:
+            firma = f"{nachname} {zufall.choice(FIRMEN)} {zufall.choice(RECHTSFORMEN)}"
+        kunde = Kunde(
+            name=nachname,
+            vorname=zufall.choice(VORNAMEN),
+            firma=firma,
+            strasse=f"{zufall.choice(STRASSEN)} {zufall.randint(1, 120)}",
+            plz=plz,
+            ort=ort,
+            telefon=f"0{zufall.randint(800, 999)} {zufall.randint(10000, 9999999)}",
+            email=f"{nachname.lower().replace('ü', 'ue').replace('ö', 'oe').replace('ä', 'ae')}{i}@example.de",
+            ust_id=f"DE{zufall.randint(100000000, 999999999)}" if firma else "",
+            skonto=2.0 if firma and zufall.random() < 0.15 else 0.0,
+            kunde_id=_id("K", i),
+            erstellt_am=datetime.combine(beginn + timedelta(days=zufall.randint(0, 365)), uhrzeit(8, 0)),
+        )
+        kunden.append(kunde)
+    return kunden
+
+
+def _positionen(zufall: random.Random, auftrag_nr: int, status: str) -> List[Position]:
+    """Positionen eines Auftrags; jeder 40. Auftrag ist ein großes Leistungsverzeichnis"""
+    anzahl = zufall.randint(40, 250) if auftrag_nr % 40 == 0 else zufall.randint(1, 8)
+    positionen = []
+    for j in range(1, anzahl + 1):
+        bezeichnung, einheit, preis_von, preis_bis, menge_von, menge_bis = zufall.choice(LEISTUNGEN)
+        menge = menge_von if menge_von == menge_bis else round(zufall.uniform(menge_von, menge_bis), 1)
+        positionen.append(Position(
+            bezeichnung=bezeichnung,
+            menge=menge,
+            einheit=einheit,
+            einzelpreis=_geld(zufall.uniform(preis_von, preis_bis)),
+            status=status,
+            position_id=f"P{auftrag_nr:07d}{j:03d}",
+            oz=f"01.{j:04d}" if anzahl > 8 else "",
+        ))
+    return positionen
+
+
+def _stundennachweis(zufall: random.Random, auftrag: Auftrag, position: Position, datum: date,
+                     nummer: int) -> Stundennachweis:
+    nachweis = Stundennachweis(
+        auftrag_id=auftrag.id,
+        position_id=position.id,
+        projekt=auftrag.bezeichnung,
+        kunde_id=auftrag.kunde_id,
+        auftragsnummer=auftrag.auftragsnummer,
+        bearbeiter=zufall.choice(BEARBEITER),
+        reisestrecke_km=float(zufall.randint(3, 60)),
+        anzahl_fahrten=zufall.randint(1, 10),
+        ort=auftrag.beschreibung,
+        datum=datum,
+        nachweis_id=_id("SN", nummer),
+        erstellt_am=datetime.combine(datum, uhrzeit(17, 0)),
+    )
+    for k in range(zufall.randint(1, 12)):
+        tag = datum + timedelta(days=k)
+        nachweis.add_zeiteintrag(Zeiteintrag(
+            datum=tag,
+            bearbeiter=nachweis.bearbeiter,
+            startzeit_1=uhrzeit(7, zufall.choice((0, 15, 30))),
+            endzeit_1=uhrzeit(12, 0),
+            startzeit_2=uhrzeit(12, 30),
+            endzeit_2=uhrzeit(zufall.randint(15, 17), zufall.choice((0, 30))),
+            taetigkeitsbeschreibung=position.bezeichnung,
+            zeiteintrag_id=f"ZE{nummer:07d}{k:02d}",
+        ))
+    return nachweis
+
+
+def _stueckliste(zufall: random.Random, auftrag: Auftrag, position: Position, datum: date,
+                 nummer: int) -> Stueckliste:
+    stueckliste = Stueckliste(
+        auftrag_id=auftrag.id,
+        position_id=position.id,
+        projekt=auftrag.bezeichnung,
+        kunde_id=auftrag.kunde_id,
+        auftragsnummer=auftrag.auftragsnummer,
+        stueckliste_id=_id("SL", nummer),
+        stuecklisten_nummer=f"SL{datum:%Y%m%d}{nummer:05d}",
+        erstellt_am=datetime.combine(datum, uhrzeit(16, 0)),
+    )
+    for k in range(zufall.randint(3, 25)):
+        material, einheit, preis_von, preis_bis = zufall.choice(MATERIAL)
+        stueckliste.add_eintrag(StuecklistenEintrag(
+            material=material,
+            menge=float(zufall.randint(1, 60)),
+            einheit=einheit,
+            einzelpreis=_geld(zufall.uniform(preis_von, preis_bis)),
+            eintrag_id=f"SE{nummer:07d}{k:02d}",
+        ))
+    return stueckliste
+
+
+def _rechnungen(zufall: random.Random, auftrag: Auftrag, fertig: date, stichtag: date,
+                naechste_nummer: int) -> List[Rechnung]:
+    """Rechnungen eines abgerechneten Auftrags (etwa jeder siebte mit Abschlagsrechnungen)"""
+    anzahl = min(zufall.randint(2, 3) if zufall.random() < 0.15 else 1, len(auftrag.positionen))
+    rechnungen = []
+    for teil in range(anzahl):
+        datum = min(fertig + timedelta(days=7 + 21 * teil), stichtag)
+        rechnungsdatum = datetime.combine(datum, uhrzeit(0, 0))
+        rechnung = Rechnung(
+            auftrag_id=auftrag.id,
+            kunde_id=auftrag.kunde_id,
+            rechnungsnummer=f"RE{naechste_nummer + teil}",
+            rechnungsdatum=rechnungsdatum,
+            leistungsdatum=datetime.combine(fertig, uhrzeit(0, 0)),
+            mwst_satz=auftrag.mwst_satz,
+            rechnung_id=_id("R", naechste_nummer + teil),
+        )
+        # Abschläge teilen die Positionen auf, die Schlussrechnung bekommt den Rest
+        for position in auftrag.positionen[teil::anzahl]:
+            rechnung.add_position(position)
+        
+        alter = (stichtag - datum).days
+        if alter > 60 or (alter > 14 and zufall.random() < 0.7):
+            if zufall.random() < 0.96:
+                eingang = rechnungsdatum + timedelta(days=zufall.randint(3, 30))
+                rechnung.add_zahlung(eingang, _geld(rechnung.bruttobetrag), f"BANK{rechnung.id}",
+                                     f"Rechnung {rechnung.rechnungsnummer}")
+            else:
+                # Säumige Zahler: gemahnt, ein Teil davon später doch bezahlt
+                for stufe in range(1, zufall.randint(1, 3) + 1):
+                    rechnung.add_mahnung(stufe, rechnungsdatum + timedelta(days=14 + 14 * stufe), 5.0 * (stufe - 1))
+        rechnungen.append(rechnung)
+    return rechnungen
+
+
+def erzeuge_datensatz(ziel: str, jahre: int = STANDARD_JAHRE, kunden: int = STANDARD_KUNDEN,
+                      auftraege_pro_jahr: int = STANDARD_AUFTRAEGE_PRO_JAHR, seed: int = STANDARD_SEED,
+                      stichtag: date = STANDARD_STICHTAG, teilordner: bool = False) -> Dict[str, Any]:
+    """
+    Erzeugt einen vollständigen Datenbestand in `ziel` (vorhandene Daten dort werden ersetzt)
+    
+    Args:
+        ziel: Ordner für config.json und den Datenordner "data"
+        jahre: Anzahl der Jahre bis zum Stichtag
+        kunden: Anzahl der Kunden
+        auftraege_pro_jahr: Aufträge je Jahr (fortlaufende Nummern YYYY-NNNN)
+        seed: Startwert des Zufallsgenerators
+        stichtag: Letzter Tag des Datenbestands (bestimmt bezahlt/offen/in Arbeit)
+        teilordner: Auch die Teilauftragsordner (Dokumentation, Rechnungen) je Position anlegen
+    
+    Returns:
+        Parameter, Anzahl je Entität und Größe des Datenordners
+    """
+    start = time.perf_counter()
+    zufall = random.Random(seed)
+    ziel = os.path.abspath(ziel)
+    daten_pfad = os.path.join(ziel, "data")
+    if os.path.exists(daten_pfad):
+        shutil.rmtree(daten_pfad)
+    os.makedirs(ziel, exist_ok=True)
+    
+    with open(os.path.join(PROJEKT, "config", "config.example.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("daten", {})["daten_pfad"] = daten_pfad
+    config_pfad = os.path.join(ziel, "config.json")
+    with open(config_pfad, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    adapter = DatenAdapter(config_pfad)
+    
+    beginn = date(stichtag.year - jahre + 1, 1, 1)
+    kundenliste = erzeuge_kunden(zufall, kunden, beginn - timedelta(days=365))
+    # Wenige Stammkunden haben viele Aufträge (gewichtete Auswahl)
+    gewichte = list(itertools.accumulate(1.0 / (1 + i % 50) for i in range(len(kundenliste))))
+    
+    auftraege: List[Auftrag] = []
+    anzahl = {"rechnungen": 0, "stundennachweise": 0, "stuecklisten": 0, "positionen": 0}
+    rechnungsnummer = 10000
+    nachweis_nr = stueckliste_nr = 0
+    auftrag_nr = 0
+    for jahr in range(beginn.year, stichtag.year + 1):
+        tage = (min(date(jahr, 12, 31), stichtag) - date(jahr, 1, 1)).days
+        for lfd in range(1, auftraege_pro_jahr + 1):
+            auftrag_nr += 1
+            # Aufträge des Jahres in zeitlicher Reihenfolge der Nummern
+            erstellt = date(jahr, 1, 1) + timedelta(days=tage * (lfd - 1) // auftraege_pro_jahr)
+            dauer = zufall.randint(5, 90)
+            fertig = erstellt + timedelta(days=dauer)
+            kunde = zufall.choices(kundenliste, cum_weights=gewichte)[0]
+            
+            storniert = zufall.random() < 0.02
+            if storniert:
+                status, positions_status = "Storniert", "zur Freigabe"
+            elif fertig <= stichtag - timedelta(days=7):
+                status, positions_status = "Abgeschlossen", "Abgeschlossen"
+            elif fertig <= stichtag:
+                # Fertig, aber noch nicht abgerechnet (für 'abrechnen')
+                status, positions_status = "In Bearbeitung", "Rechnung"
+            else:
+                status, positions_status = zufall.choice((("Bestätigt", "Freigegeben"),
+                                                          ("In Bearbeitung", "in Bearbeitung")))
+            
+            auftrag = Auftrag(
+                kunde_id=kunde.id,
+                bezeichnung=f"{zufall.choice(LEISTUNGEN)[0].split(',')[0]} {zufall.choice(STRASSEN)}",
+                beschreibung=f"{kunde.plz} {kunde.ort}",
+                auftragsnummer=f"{jahr}-{lfd:04d}",
+                faellig_am=datetime.combine(fertig, uhrzeit(0, 0)),
+                status=status,
+                auftrag_id=_id("A", auftrag_nr),
+                erstellt_am=datetime.combine(erstellt, uhrzeit(9, 0)),
+            )
+            auftrag.positionen = _positionen(zufall, auftrag_nr, positions_status)
+            auftraege.append(auftrag)
+            anzahl["positionen"] += len(auftrag.positionen)
+            
+            adapter.erstelle_auftragsordnerstruktur(auftrag.auftragsnummer)
+            if teilordner:
+                adapter.erstelle_teilauftrag_ordnerstrukturen(auftrag.auftragsnummer,
+                                                              [p.bezeichnung for p in auftrag.positionen])
+            if storniert:
+                continue
+            
+            nachweise, stuecklisten = [], []
+            for position in auftrag.positionen[:20]:
+                if position.einheit == "Std" or zufall.random() < 0.15:
+                    nachweis_nr += 1
+                    nachweise.append(_stundennachweis(zufall, auftrag, position, erstellt, nachweis_nr))
+                if position.einheit in ("m²", "Stk") and zufall.random() < 0.35:
+                    stueckliste_nr += 1
+                    stuecklisten.append(_stueckliste(zufall, auftrag, position, erstellt, stueckliste_nr))
+            if nachweise:
+                adapter.speichere_stundennachweise_fuer_auftrag(auftrag.auftragsnummer, [n.to_dict() for n in nachweise])
+            if stuecklisten:
+                adapter.speichere_stuecklisten_fuer_auftrag(auftrag.auftragsnummer, [s.to_dict() for s in stuecklisten])
+            anzahl["stundennachweise"] += len(nachweise)
+            anzahl["stuecklisten"] += len(stuecklisten)
+            
+            if status == "Abgeschlossen":
+                rechnungen = _rechnungen(zufall, auftrag, fertig, stichtag, rechnungsnummer)
+                rechnungsnummer += len(rechnungen)
+                anzahl["rechnungen"] += len(rechnungen)
+                adapter.speichere_rechnungen_fuer_auftraege(
+                    {auftrag.auftragsnummer: [r.to_dict(auftragsnummer=auftrag.auftragsnummer) for r in rechnungen]})
+    
+    adapter.speichere_kunden([k.to_dict() for k in kundenliste])
+    adapter.speichere_auftraege([a.to_dict() for a in auftraege])
+    # Index aus den geschriebenen Ordnern (wie nach einem Update einer älteren Version)
+    adapter.baue_rechnungsindex_neu()
+    
+    groesse = dateien = 0
+    for ordner, _, namen in os.walk(daten_pfad):
+        for name in namen:
+            groesse += os.path.getsize(os.path.join(ordner, name))
+            dateien += 1
+    return {
+        "config": config_pfad,
+        "parameter": {"jahre": jahre, "kunden": kunden, "auftraege_pro_jahr": auftraege_pro_jahr, "seed": seed,
+                      "stichtag": stichtag.isoformat(), "teilordner": teilordner},
+        "anzahl": {"kunden": len(kundenliste), "auftraege": len(auftraege), **anzahl},
+        "dateien": dateien,
+        "bytes": groesse,
+        "sekunden": round(time.perf_counter() - start, 2),
+    }
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetischen Datenbestand erzeugen (reproduzierbar)")
+    parser.add_argument("ziel", help="Ordner für config.json und den Datenordner (data wird ersetzt)")
+    parser.add_argument("--jahre", type=int, default=STANDARD_JAHRE)
+    parser.add_argument("--kunden", type=int, default=STANDARD_KUNDEN)
+    parser.add_argument("--auftraege-pro-jahr", type=int, default=STANDARD_AUFTRAEGE_PRO_JAHR)
+    parser.add_argument("--seed", type=int, default=STANDARD_SEED)
+    parser.add_argument("--stichtag", type=date.fromisoformat, default=STANDARD_STICHTAG, help="JJJJ-MM-TT")
+    parser.add_argument("--teilordner", action="store_true", help="Teilauftragsordner je Position anlegen")
+    args = parser.parse_args(argumente)
+    
+    ergebnis = erzeuge_datensatz(args.ziel, args.jahre, args.kunden, args.auftraege_pro_jahr, args.seed,
+                                 args.stichtag, args.teilordner)
+    json.dump(ergebnis, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
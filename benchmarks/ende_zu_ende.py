@@ -0,0 +1,370 @@
+"""
+Ende-zu-Ende-Benchmark auf einem synthetischen Datenbestand
+
+Misst auf dem reproduzierbaren Datenbestand aus benchmarks/datensatz.py
+(Standard: 10 Jahre) die Abläufe, die Anwender als langsam erleben:
+
+    start_laden              DatenManager erzeugen und alle Daten laden
+    start_lesen              davon nur das Lesen der JSON-Dateien (DatenAdapter)
+    speichern_kunde          einen Kunden ändern (speichert alle Daten)
+    speichern_rechnung       eine Rechnung ändern (nur deren Auftragsdatei)
+    speichern_stundennachweis einen Stundennachweis ändern
+    ansicht_rechnungen       Zeilen der Rechnungsliste aufbauen, filtern, sortieren (leerer Cache)
+    ansicht_rechnungen_warm  dasselbe mit gefülltem Sortierschlüssel-Cache
+    ansicht_kunden           Kundenliste aufbauen und sortieren
+    suche_kunden             Suchfeld der Kundenliste (je Suchbegriff)
+    suche_zeitraum           Rechnungen eines Monats über den Rechnungsindex laden
+    rechnung_erstellen       eine Rechnung aus einem abrechnungsbereiten Auftrag
+    abrechnen_stapel         alle übrigen abrechnungsbereiten Aufträge auf einmal
+
+Die Ansichten werden ohne Oberfläche gemessen (dieselben Schritte wie in
+view/rechnungen_view.py bzw. view/kunden_view.py, ohne Treeview). Gemessen
+wird auf einer Kopie des Datenbestands; der Bestand selbst wird einmal
+erzeugt und danach wiederverwendet. Laufzeiten werden wie beim PDF-Benchmark
+relativ zur Kalibrierung mit der Baseline benchmarks/baseline_e2e.json
+verglichen; Regressionen beenden das Programm mit Exit-Code 1.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.ende_zu_ende                    # messen und vergleichen
+    python -m benchmarks.ende_zu_ende --aktualisieren    # Baseline neu schreiben
+    python -m benchmarks.ende_zu_ende --json bericht.json --nur start_laden speichern_kunde
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+# Pfad zum Hauptprojekt hinzufügen (Aufruf auch als Skript)
+PROJEKT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT)
+
+from adapter.manager import DatenManager
+from adapter.mahnwesen import lade_stufen
+from benchmarks import datensatz
+from benchmarks.kalibrierung import kalibriere
+from view.sortschluessel import SortschluesselCache, kunde_schluessel, normalisiere_text, rechnung_schluessel, sortiere
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_e2e.json")
+SCHWELLE = 0.25  # 25 % langsamer gilt als Regression
+MINDEST_DIFFERENZ_S = 0.02  # Kleinere absolute Abweichungen sind Messrauschen
+SUCHBEGRIFFE = ["müller", "gmbh", "regensburg", "k0000042", "0871", "hausverwaltung", "xyz"]
+ANZAHL_EINZELRECHNUNGEN = 3
+
+
+def _bestes(funktion: Callable[[], Any], wiederholungen: int) -> float:
+    """Führt die Funktion mehrmals aus und gibt die kürzeste Laufzeit zurück"""
+    beste = float("inf")
+    for _ in range(wiederholungen):
+        # Müll früherer Durchläufe (z.B. ganzer Datenbestände) nicht in die Messung einrechnen
+        gc.collect()
+        start = time.perf_counter()
+        funktion()
+        beste = min(beste, time.perf_counter() - start)
+    return beste
+
+
+def _datensatz_ordner(parameter: Dict[str, Any]) -> str:
+    """Zwischengespeicherter Datenbestand je Parametersatz (im Temp-Verzeichnis)"""
+    schluessel = hashlib.sha1(json.dumps(parameter, sort_keys=True).encode()).hexdigest()[:10]
+    return os.path.join(tempfile.gettempdir(), f"auftragsverwaltung_benchmark_{schluessel}")
+
+
+def bereite_datensatz(ordner: Optional[str], parameter: Dict[str, Any]) -> Dict[str, Any]:
+    """Erzeugt den Datenbestand, falls er für diese Parameter noch nicht vorliegt"""
+    ordner = ordner or _datensatz_ordner(parameter)
+    info_pfad = os.path.join(ordner, "datensatz.json")
+    if os.path.exists(info_pfad):
+        with open(info_pfad, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get("parameter") == parameter:
+            return info
+    print(f"Erzeuge Datenbestand in {ordner} ...", flush=True)
+    info = datensatz.erzeuge_datensatz(ordner, parameter["jahre"], parameter["kunden"],
+                                       parameter["auftraege_pro_jahr"], parameter["seed"],
+                                       date.fromisoformat(parameter["stichtag"]), parameter["teilordner"])
+    with open(info_pfad, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+
+def _kopiere_datensatz(info: Dict[str, Any], ziel: str) -> str:
+    """Kopiert den Datenbestand und gibt den Pfad der angepassten config.json zurück"""
+    with open(info["config"], "r", encoding="utf-8") as f:
+        config = json.load(f)
+    daten_pfad = os.path.join(ziel, "data")
+    shutil.copytree(config["daten"]["daten_pfad"], daten_pfad)
+    config["daten"]["daten_pfad"] = daten_pfad
+    config_pfad = os.path.join(ziel, "config.json")
+    with open(config_pfad, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config_pfad
+
+
+# --- Ansichten (wie in den Views, ohne Treeview) ---------------------------
+
+def rechnungen_zeilen(manager: DatenManager, cache: SortschluesselCache, jahr: Optional[str] = None) -> List[tuple]:
+    """Zeilen der Rechnungsliste wie RechnungenView._lade_rechnungen und _wende_filter_an (nach Datum absteigend)"""
+    mahnstufen = [s["bezeichnung"] for s in lade_stufen(manager.adapter.get_config())]
+    zeilen = {}
+    for rechnung in manager.get_rechnungen():
+        kunde = manager.get_kunde(rechnung.kunde_id)
+        auftrag = manager.get_auftrag(rechnung.auftrag_id)
+        status = rechnung.status
+        if rechnung.mahnstufe:
+            status += f" ({mahnstufen[min(rechnung.mahnstufe, len(mahnstufen)) - 1]})"
+        zeilen[rechnung.id] = (rechnung.rechnungsnummer, kunde.get_vollstaendiger_name() if kunde else "Unbekannt",
+                               auftrag.auftragsnummer if auftrag else "Unbekannt",
+                               rechnung.rechnungsdatum.strftime("%d.%m.%Y"),
+                               rechnung.faelligkeitsdatum.strftime("%d.%m.%Y"), status,
+                               f"{rechnung.bruttobetrag:.2f} €",
+                               manager.ueberfaellig.ist_ueberfaellig(rechnung.id))
+    sichtbar = [r for r in manager.get_rechnungen()
+                if jahr is None or cache.get(r, rechnung_schluessel)["jahr"] == jahr]
+    sichtbar = sortiere(sichtbar, lambda r: cache.get(r, rechnung_schluessel)["datum"], absteigend=True)
+    return [zeilen[r.id] for r in sichtbar]
+
+
+def kunden_zeilen(manager: DatenManager, cache: SortschluesselCache, suche: str = "") -> List[tuple]:
+    """Zeilen der Kundenliste wie KundenView._lade_kunden und _suche_kunden (nach Firma sortiert)"""
+    suche = normalisiere_text(suche)
+    sichtbar = [k for k in manager.get_kunden() if suche in cache.get(k, kunde_schluessel)["suchtext"]]
+    sichtbar = sortiere(sichtbar, lambda k: cache.get(k, kunde_schluessel)["firma"])
+    return [(k.id, f"{k.vorname} {k.name}".strip() if not k.firma else "", k.firma,
+             f"{k.plz} {k.ort}".strip(), k.telefon, k.email) for k in sichtbar]
+
+
+def rechnungen_im_zeitraum(manager: DatenManager, von: date, bis: date) -> List[Dict[str, Any]]:
+    """Rechnungen eines Zeitraums direkt aus den Auftragsordnern (wie DATEV-Export und Kommandozeile)"""
+    adapter = manager.adapter
+    rechnungen = []
+    for auftragsnummer in adapter.get_rechnungsindex().auftraege_im_zeitraum(von, bis):
+        for rechnung in adapter.lade_rechnungen_fuer_auftrag(auftragsnummer):
+            if von.isoformat() <= rechnung.get("rechnungsdatum", "")[:10] <= bis.isoformat():
+                rechnungen.append(rechnung)
+    return rechnungen
+
+
+# --- Messung ---------------------------------------------------------------
+
+def messe(config_pfad: str, wiederholungen: int, nur: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Führt alle Messungen auf dem Datenbestand der Konfiguration aus (verändert ihn)
+    
+    Returns:
+        Name -> {'sekunden', 'anzahl'}
+    """
+    ergebnisse = {}
+    
+    def aktiv(name: str) -> bool:
+        return not nur or name in nur
+    
+    def erfasse(name: str, sekunden: float, anzahl: Optional[int] = None):
+        ergebnisse[name] = {"sekunden": round(sekunden, 5)}
+        if anzahl is not None:
+            ergebnisse[name]["anzahl"] = anzahl
+    
+    # Aufwärmen: Module importiert, Dateien im Cache des Betriebssystems wie beim zweiten Start
+    manager = DatenManager(config_pfad)
+    
+    if aktiv("start_laden"):
+        erfasse("start_laden", _bestes(lambda: DatenManager(config_pfad), wiederholungen),
+                len(manager.get_rechnungen()))
+    if aktiv("start_lesen"):
+        adapter = manager.adapter
+        
+        def lesen():
+            adapter.lade_kunden()
+            for auftrag in adapter.lade_auftraege():
+                adapter.lade_rechnungen_fuer_auftrag(auftrag["auftragsnummer"])
+            adapter.lade_stundennachweise()
+            adapter.lade_stuecklisten()
+        erfasse("start_lesen", _bestes(lesen, wiederholungen))
+    
+    # Ansichten und Suche
+    jahr = str(max(r.rechnungsdatum.year for r in manager.get_rechnungen()))
+    if aktiv("ansicht_rechnungen"):
+        erfasse("ansicht_rechnungen", _bestes(lambda: rechnungen_zeilen(manager, SortschluesselCache(manager), jahr),
+                                              wiederholungen),
+                len(rechnungen_zeilen(manager, SortschluesselCache(manager), jahr)))
+    cache = SortschluesselCache(manager)
+    rechnungen_zeilen(manager, cache, jahr)
+    kunden_zeilen(manager, cache)
+    if aktiv("ansicht_rechnungen_warm"):
+        erfasse("ansicht_rechnungen_warm", _bestes(lambda: rechnungen_zeilen(manager, cache, jahr), wiederholungen))
+    if aktiv("ansicht_kunden"):
+        erfasse("ansicht_kunden", _bestes(lambda: kunden_zeilen(manager, SortschluesselCache(manager)), wiederholungen),
+                len(manager.get_kunden()))
+    if aktiv("suche_kunden"):
+        gesamt = _bestes(lambda: [kunden_zeilen(manager, cache, begriff) for begriff in SUCHBEGRIFFE], wiederholungen)
+        erfasse("suche_kunden", gesamt / len(SUCHBEGRIFFE), len(SUCHBEGRIFFE))
+    if aktiv("suche_zeitraum"):
+        # Letzter vollständiger Monat mit Rechnungen
+        letzte = max(r.rechnungsdatum for r in manager.get_rechnungen()).date()
+        bis = letzte.replace(day=1) - timedelta(days=1)
+        von = bis.replace(day=1)
+        erfasse("suche_zeitraum", _bestes(lambda: rechnungen_im_zeitraum(manager, von, bis), wiederholungen),
+                len(rechnungen_im_zeitraum(manager, von, bis)))
+    
+    # Einzelne Änderungen speichern (synchron, wie die Hintergrundspeicherung sie ausführt)
+    if aktiv("speichern_kunde"):
+        kunde = manager.get_kunden()[len(manager.get_kunden()) // 2]
+        erfasse("speichern_kunde", _bestes(lambda: manager.update_kunde(kunde), wiederholungen))
+    if aktiv("speichern_rechnung"):
+        rechnung = manager.get_rechnungen()[len(manager.get_rechnungen()) // 2]
+        erfasse("speichern_rechnung", _bestes(lambda: manager.update_rechnung(rechnung), wiederholungen))
+    if aktiv("speichern_stundennachweis") and manager.get_stundennachweise():
+        nachweis = manager.get_stundennachweise()[len(manager.get_stundennachweise()) // 2]
+        erfasse("speichern_stundennachweis", _bestes(lambda: manager.update_stundennachweis(nachweis), wiederholungen))
+    
+    # Rechnungen erstellen (zuletzt, verändert den Bestand dauerhaft)
+    abrechenbar = [a.id for a in manager.get_abrechenbare_auftraege()]
+    if aktiv("rechnung_erstellen") and abrechenbar:
+        einzeln = abrechenbar[:ANZAHL_EINZELRECHNUNGEN]
+        beste = float("inf")
+        for auftrag_id in einzeln:
+            gc.collect()
+            start = time.perf_counter()
+            manager.erstelle_rechnung_aus_auftrag(auftrag_id)
+            beste = min(beste, time.perf_counter() - start)
+        erfasse("rechnung_erstellen", beste, len(einzeln))
+        abrechenbar = abrechenbar[len(einzeln):]
+    if aktiv("abrechnen_stapel") and abrechenbar:
+        gc.collect()
+        start = time.perf_counter()
+        erstellt, _ = manager.erstelle_rechnungen_aus_auftraegen(abrechenbar)
+        erfasse("abrechnen_stapel", time.perf_counter() - start, len(erstellt))
+    return ergebnisse
+
+
+def _commit() -> Optional[str]:
+    """Aktueller git-Commit (falls im Repository aufgerufen)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJEKT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def fuehre_aus(parameter: Dict[str, Any], wiederholungen: int = 5, daten: Optional[str] = None,
+               nur: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Bereitet den Datenbestand vor, misst und gibt den Bericht im Baseline-Format zurück"""
+    info = bereite_datensatz(daten, parameter)
+    kalibrierung = kalibriere()
+    with tempfile.TemporaryDirectory() as ordner:
+        ergebnisse = messe(_kopiere_datensatz(info, ordner), wiederholungen, nur)
+    # Vorher und nachher kalibrieren, damit kurzzeitige Last auf dem Rechner weniger ins Gewicht fällt
+    kalibrierung = min(kalibrierung, kalibriere())
+    for e in ergebnisse.values():
+        e["relativ"] = round(e["sekunden"] / kalibrierung, 4)
+    return {
+        "version": 1,
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plattform": platform.platform(terse=True),
+        "kalibrierung_s": round(kalibrierung, 4),
+        "datensatz": {k: info[k] for k in ("parameter", "anzahl", "dateien", "bytes")},
+        "ergebnisse": ergebnisse,
+    }
+
+
+def vergleiche(aktuell: Dict[str, Any], baseline: Dict[str, Any], schwelle: float) -> List[str]:
+    """
+    Vergleicht einen Bericht mit der Baseline (Laufzeiten relativ zur Kalibrierung)
+    
+    Returns:
+        Beschreibung jeder Regression (leer, wenn keine)
+    """
+    if baseline.get("datensatz", {}).get("parameter") != aktuell["datensatz"]["parameter"]:
+        return ["Datenbestand der Baseline hat andere Parameter, Vergleich nicht möglich"]
+    regressionen = []
+    for name, e in aktuell["ergebnisse"].items():
+        alt = baseline.get("ergebnisse", {}).get(name)
+        if not alt:
+            continue
+        erwartet = alt["relativ"] * aktuell["kalibrierung_s"]
+        if e["sekunden"] > erwartet * (1 + schwelle) and e["sekunden"] - erwartet > MINDEST_DIFFERENZ_S:
+            regressionen.append(f"{name}: {e['sekunden']:.4f} s statt erwartet {erwartet:.4f} s "
+                                f"(+{(e['sekunden'] / erwartet - 1) * 100:.0f} %)")
+    return regressionen
+
+
+def drucke_tabelle(aktuell: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    """Gibt die Messwerte mit Abweichung zur Baseline aus"""
+    anzahl = aktuell["datensatz"]["anzahl"]
+    print(f"Datenbestand: {anzahl['kunden']} Kunden, {anzahl['auftraege']} Aufträge, {anzahl['rechnungen']} Rechnungen, "
+          f"{aktuell['datensatz']['dateien']} Dateien, {aktuell['datensatz']['bytes'] / 2**20:.1f} MiB")
+    print(f"Kalibrierung: {aktuell['kalibrierung_s']:.4f} s"
+          + (f" (Baseline {baseline['kalibrierung_s']:.4f} s, Commit {baseline.get('commit') or '-'})"
+             if baseline else ""))
+    print(f"{'Messung':<26} {'Sekunden':>10} {'Erwartet':>10} {'Δ':>7} {'Anzahl':>7}")
+    for name, e in aktuell["ergebnisse"].items():
+        alt = (baseline or {}).get("ergebnisse", {}).get(name)
+        erwartet = alt["relativ"] * aktuell["kalibrierung_s"] if alt else None
+        differenz = f"{(e['sekunden'] / erwartet - 1) * 100:+.0f} %" if erwartet else "-"
+        print(f"{name:<26} {e['sekunden']:>10.4f} {(f'{erwartet:.4f}' if erwartet else '-'):>10} {differenz:>7} "
+              f"{e.get('anzahl', ''):>7}")
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ende-zu-Ende-Benchmark auf einem synthetischen Datenbestand")
+    parser.add_argument("--jahre", type=int, default=datensatz.STANDARD_JAHRE)
+    parser.add_argument("--kunden", type=int, default=datensatz.STANDARD_KUNDEN)
+    parser.add_argument("--auftraege-pro-jahr", type=int, default=datensatz.STANDARD_AUFTRAEGE_PRO_JAHR)
+    parser.add_argument("--seed", type=int, default=datensatz.STANDARD_SEED)
+    parser.add_argument("--daten", metavar="ORDNER", help="Ordner des Datenbestands (Standard: im Temp-Verzeichnis)")
+    parser.add_argument("--wiederholungen", type=int, default=5, help="Durchläufe je Messung (bester zählt)")
+    parser.add_argument("--nur", nargs="+", metavar="MESSUNG", help="Nur diese Messungen ausführen")
+    parser.add_argument("--schwelle", type=float, default=SCHWELLE, help="Erlaubte Verschlechterung (0.25 = 25 %%)")
+    parser.add_argument("--baseline", default=BASELINE, help="Pfad der Baseline-Datei")
+    parser.add_argument("--aktualisieren", action="store_true", help="Messung als neue Baseline speichern")
+    parser.add_argument("--json", metavar="DATEI", help="Bericht zusätzlich als JSON schreiben")
+    args = parser.parse_args(argumente)
+    
+    parameter = {"jahre": args.jahre, "kunden": args.kunden, "auftraege_pro_jahr": args.auftraege_pro_jahr,
+                 "seed": args.seed, "stichtag": datensatz.STANDARD_STICHTAG.isoformat(), "teilordner": False}
+    aktuell = fuehre_aus(parameter, args.wiederholungen, args.daten, args.nur)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.aktualisieren:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    drucke_tabelle(aktuell, baseline)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(aktuell, f, ensure_ascii=False, indent=2)
+    if "tkinter" in sys.modules:
+        print("Fehler: Der Benchmark hat tkinter importiert und läuft damit nicht ohne Oberfläche.")
+        return 2
+    
+    if args.aktualisieren:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(aktuell, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"Keine Baseline gefunden ({args.baseline}), mit --aktualisieren anlegen.")
+        return 0
+    
+    regressionen = vergleiche(aktuell, baseline, args.schwelle)
+    if regressionen:
+        print(f"\nRegressionen (Schwelle {args.schwelle * 100:.0f} %):")
+        for text in regressionen:
+            print(f"  {text}")
+        return 1
+    print(f"\nKeine Regression (Schwelle {args.schwelle * 100:.0f} %).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
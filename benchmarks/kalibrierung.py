@@ -0,0 +1,27 @@
+"""
+Kalibrierung der Benchmarks
+
+Ein fester Referenzlauf macht Laufzeiten auf unterschiedlich schnellen
+Rechnern vergleichbar: Verglichen wird die Laufzeit relativ zur Kalibrierung.
+"""
+import time
+import zlib
+
+
+def kalibriere(wiederholungen: int = 5) -> float:
+    """
+    Misst einen festen, reinen Python-Referenzlauf (bestes von mehreren)
+    
+    Der Lauf ähnelt der Arbeit beim Rendern (Zeichenketten formatieren,
+    Dictionaries, Komprimierung), hängt aber nicht vom Projektcode ab.
+    """
+    beste = float('inf')
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        teile = []
+        for i in range(60000):
+            zeile = {'nr': i, 'text': f"Position {i}", 'betrag': i * 1.5}
+            teile.append(f"{zeile['nr']:>6} {zeile['text']:<30} {zeile['betrag']:>12.2f}")
+        zlib.compress("\n".join(teile).encode('utf-8'), 6)
+        beste = min(beste, time.perf_counter() - start)
+    return beste
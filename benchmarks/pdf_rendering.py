@@ -0,0 +1,241 @@
+"""
+Benchmark und Regressionstest für PDFGenerator.rechnung_erstellen
+
+Rendert synthetische Rechnungen mit 1, 10, 100, 1000 und 10000 Positionen,
+misst Laufzeit (bestes von mehreren Durchläufen) und Speicherspitze
+(tracemalloc, in einem eigenen Durchlauf) und vergleicht mit der gespeicherten
+Baseline benchmarks/baseline_pdf.json. Liegt ein Wert mehr als die Schwelle
+über der Baseline, endet das Programm mit Exit-Code 1.
+
+Damit Baselines auf unterschiedlich schnellen Rechnern vergleichbar bleiben,
+wird vor der Messung ein fester Referenzlauf (Kalibrierung) gemessen und die
+Laufzeit relativ dazu verglichen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.pdf_rendering                  # messen und vergleichen
+    python -m benchmarks.pdf_rendering --aktualisieren  # Baseline neu schreiben
+    python -m benchmarks.pdf_rendering --groessen 1 10 100 --schwelle 0.3
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Pfad zum Hauptprojekt hinzufügen (Aufruf auch als Skript)
+PROJEKT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT)
+
+import reportlab
+
+from adapter.pdf_generator import PDFGenerator
+from benchmarks.kalibrierung import kalibriere
+
+
+GROESSEN = [1, 10, 100, 1000, 10000]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_pdf.json")
+SCHWELLE = 0.25  # 25 % langsamer bzw. mehr Speicher gilt als Regression
+# Kleinere absolute Abweichungen sind Messrauschen (Sekunden bzw. MiB)
+MINDEST_DIFFERENZ_S = 0.01
+MINDEST_DIFFERENZ_MIB = 0.5
+# Ab dieser Positionszahl nur ein Zeitdurchlauf (dauert jeweils mehrere Sekunden)
+GROSS = 5000
+
+KUNDE = {'id': 'K-001', 'firma': 'Musterfirma GmbH', 'name': 'Max Mustermann',
+         'strasse': 'Musterstraße 123', 'plz': '12345', 'ort': 'Musterstadt'}
+
+
+def erstelle_rechnung(anzahl: int) -> Dict[str, Any]:
+    """Erstellt Rechnungsdaten mit `anzahl` Positionen (jede fünfte mit langer Beschreibung)"""
+    positionen = []
+    for i in range(1, anzahl + 1):
+        if i % 5 == 0:
+            beschreibung = (f"Trockenbauwand Pos. {i}, doppelt beplankt, inkl. Dämmung, "
+                            "Spachtelung Qualitätsstufe Q3 und Anschlussarbeiten")
+        else:
+            beschreibung = f"Schnellbauschraube 3,5 x 25 mm, Paket {i}"
+        positionen.append({
+            'beschreibung': beschreibung,
+            'menge': 2.0,
+            'einheit': 'Stk',
+            'einzelpreis': 1.50,
+            'gesamtpreis': 3.00
+        })
+    netto = 3.00 * anzahl
+    return {
+        'rechnungsnummer': f'RE-BENCH-{anzahl}',
+        'rechnungsdatum': '2025-01-15T00:00:00',
+        'leistungsdatum': '2025-01-15T00:00:00',
+        'faelligkeitsdatum': '2025-01-29T00:00:00',
+        'positionen': positionen,
+        'nettobetrag': netto,
+        'mwst_satz': 19.0,
+        'mwst_betrag': round(netto * 0.19, 2),
+        'bruttobetrag': round(netto * 1.19, 2),
+        'notizen': ''
+    }
+
+
+def lade_config() -> Dict[str, Any]:
+    """Beispielkonfiguration (unabhängig von einer lokalen config.json)"""
+    with open(os.path.join(PROJEKT, 'config', 'config.example.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def messe(generator: PDFGenerator, anzahl: int, ordner: str, wiederholungen: int,
+          speicher: bool = True) -> Dict[str, Any]:
+    """
+    Rendert eine Rechnung mit `anzahl` Positionen und misst Laufzeit und Speicherspitze
+    
+    Die Speicherspitze wird in einem eigenen Durchlauf mit tracemalloc gemessen,
+    da tracemalloc die Laufzeit stark verfälscht. Die Eingabedaten werden vor
+    der Messung erzeugt und zählen nicht mit.
+    """
+    rechnung = erstelle_rechnung(anzahl)
+    ausgabepfad = os.path.join(ordner, f'rechnung_{anzahl}.pdf')
+    
+    zeiten = []
+    for _ in range(wiederholungen if anzahl < GROSS else 1):
+        start = time.perf_counter()
+        generator.rechnung_erstellen(rechnung, KUNDE, ausgabepfad, erzwingen=True)
+        zeiten.append(time.perf_counter() - start)
+    
+    spitze = None
+    if speicher:
+        tracemalloc.start()
+        generator.rechnung_erstellen(rechnung, KUNDE, ausgabepfad, erzwingen=True)
+        _, spitze = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    return {
+        'positionen': anzahl,
+        'sekunden': round(min(zeiten), 4),
+        'speicher_spitze_mib': round(spitze / 2**20, 2) if spitze is not None else None,
+        'pdf_kib': os.path.getsize(ausgabepfad) // 1024,
+    }
+
+
+def fuehre_aus(groessen: List[int], wiederholungen: int = 3, speicher: bool = True) -> Dict[str, Any]:
+    """Führt Kalibrierung und alle Messungen aus und gibt das Ergebnis im Baseline-Format zurück"""
+    generator = PDFGenerator(lade_config())
+    kalibrierung = kalibriere()
+    ergebnisse = {}
+    with tempfile.TemporaryDirectory() as ordner:
+        # Aufwärmen: Schriften, Stile und Formulare liegen danach im Cache wie im Betrieb
+        generator.rechnung_erstellen(erstelle_rechnung(1), KUNDE, os.path.join(ordner, 'warm.pdf'), erzwingen=True)
+        for anzahl in groessen:
+            ergebnisse[str(anzahl)] = messe(generator, anzahl, ordner, wiederholungen, speicher)
+    # Vorher und nachher kalibrieren, damit kurzzeitige Last auf dem Rechner weniger ins Gewicht fällt
+    kalibrierung = min(kalibrierung, kalibriere())
+    for e in ergebnisse.values():
+        e['relativ'] = round(e['sekunden'] / kalibrierung, 3)
+    return {
+        'version': 1,
+        'erstellt': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'reportlab': reportlab.Version,
+        'kalibrierung_s': round(kalibrierung, 4),
+        'ergebnisse': ergebnisse,
+    }
+
+
+def vergleiche(aktuell: Dict[str, Any], baseline: Dict[str, Any], schwelle: float) -> List[str]:
+    """
+    Vergleicht eine Messung mit der Baseline
+    
+    Laufzeiten werden relativ zur Kalibrierung verglichen, der Speicher absolut.
+    
+    Returns:
+        Beschreibung jeder Regression (leer, wenn keine)
+    """
+    regressionen = []
+    kalibrierung = aktuell['kalibrierung_s']
+    for anzahl, e in aktuell['ergebnisse'].items():
+        alt = baseline.get('ergebnisse', {}).get(anzahl)
+        if not alt:
+            continue
+        # Erwartete Laufzeit auf diesem Rechner
+        erwartet = alt['relativ'] * kalibrierung
+        if e['sekunden'] > erwartet * (1 + schwelle) and e['sekunden'] - erwartet > MINDEST_DIFFERENZ_S:
+            regressionen.append(f"{anzahl} Positionen: {e['sekunden']:.3f} s statt erwartet {erwartet:.3f} s "
+                                f"(+{(e['sekunden'] / erwartet - 1) * 100:.0f} %)")
+        neu_mib, alt_mib = e.get('speicher_spitze_mib'), alt.get('speicher_spitze_mib')
+        if neu_mib is not None and alt_mib is not None:
+            if neu_mib > alt_mib * (1 + schwelle) and neu_mib - alt_mib > MINDEST_DIFFERENZ_MIB:
+                regressionen.append(f"{anzahl} Positionen: Speicherspitze {neu_mib:.1f} MiB statt {alt_mib:.1f} MiB "
+                                    f"(+{(neu_mib / alt_mib - 1) * 100:.0f} %)")
+    return regressionen
+
+
+def _differenz(neu: Optional[float], alt: Optional[float]) -> str:
+    if neu is None or not alt:
+        return "-"
+    return f"{(neu / alt - 1) * 100:+.0f} %"
+
+
+def drucke_tabelle(aktuell: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    """Gibt die Messwerte mit Abweichung zur Baseline aus"""
+    print(f"Kalibrierung: {aktuell['kalibrierung_s']:.4f} s"
+          + (f" (Baseline {baseline['kalibrierung_s']:.4f} s)" if baseline else ""))
+    print(f"{'Positionen':>10} {'Sekunden':>9} {'Δ Zeit':>8} {'Speicher (MiB)':>15} {'Δ Speicher':>11} {'PDF (KiB)':>10}")
+    for anzahl, e in aktuell['ergebnisse'].items():
+        alt = (baseline or {}).get('ergebnisse', {}).get(anzahl, {})
+        erwartet = alt['relativ'] * aktuell['kalibrierung_s'] if alt else None
+        spitze = e['speicher_spitze_mib']
+        print(f"{anzahl:>10} {e['sekunden']:>9.3f} {_differenz(e['sekunden'], erwartet):>8} "
+              f"{(f'{spitze:.1f}' if spitze is not None else '-'):>15} "
+              f"{_differenz(spitze, alt.get('speicher_spitze_mib')):>11} {e['pdf_kib']:>10}")
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark für das Rendern von Rechnungs-PDFs")
+    parser.add_argument('--groessen', type=int, nargs='+', default=GROESSEN, help="Anzahl Positionen je Rechnung")
+    parser.add_argument('--wiederholungen', type=int, default=3, help="Zeitdurchläufe je Größe (bester zählt)")
+    parser.add_argument('--schwelle', type=float, default=SCHWELLE, help="Erlaubte Verschlechterung (0.25 = 25 %%)")
+    parser.add_argument('--baseline', default=BASELINE, help="Pfad der Baseline-Datei")
+    parser.add_argument('--aktualisieren', action='store_true', help="Messung als neue Baseline speichern")
+    parser.add_argument('--ohne-speicher', action='store_true', help="Speicherspitze nicht messen")
+    parser.add_argument('--json', metavar='DATEI', help="Messergebnis zusätzlich als JSON schreiben")
+    args = parser.parse_args(argumente)
+    
+    aktuell = fuehre_aus(args.groessen, args.wiederholungen, not args.ohne_speicher)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.aktualisieren:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    drucke_tabelle(aktuell, baseline)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(aktuell, f, indent=2)
+    if 'tkinter' in sys.modules:
+        print("Fehler: Der Benchmark hat tkinter importiert und läuft damit nicht ohne Oberfläche.")
+        return 2
+    
+    if args.aktualisieren:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(aktuell, f, indent=2)
+            f.write("\n")
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"Keine Baseline gefunden ({args.baseline}), mit --aktualisieren anlegen.")
+        return 0
+    
+    regressionen = vergleiche(aktuell, baseline, args.schwelle)
+    if regressionen:
+        print(f"\nRegressionen (Schwelle {args.schwelle * 100:.0f} %):")
+        for text in regressionen:
+            print(f"  {text}")
+        return 1
+    print(f"\nKeine Regression (Schwelle {args.schwelle * 100:.0f} %).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Kommandozeile für Stapel- und Wartungsaufgaben (ohne Oberfläche)
+
+Alle Befehle geben JSON auf stdout aus und beenden sich mit 0 (Erfolg) oder 1
+(Fehler bzw. bei 'pruefen' gefundene Probleme), z.B. für cron:
+    
+    python cli.py liste rechnungen --filter status=Offen
+    python cli.py abrechnen --pdf
+    python cli.py sicherung --behalten 30
+    python cli.py wartung                  # alle fünf Minuten per cron
+
+tkinter wird nie importiert. Die Module der einzelnen Befehle werden erst bei
+Bedarf geladen, und Befehle, die nur Dateien lesen oder schreiben (sicherung,
+reindex, export datev, import katalog), laden den Datenbestand nicht.
+"""
+import argparse
+import json
+import sys
+import traceback
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+# Befehl 'liste': Art -> Methode des DatenManagers
+LISTEN = {
+    "kunden": "get_kunden",
+    "auftraege": "get_auftraege",
+    "rechnungen": "get_rechnungen",
+    "ueberfaellig": "get_ueberfaellige_rechnungen",
+    "stundennachweise": "get_stundennachweise",
+    "stuecklisten": "get_stuecklisten",
+}
+
+
+def _json_wert(wert: Any) -> Any:
+    """Wandelt Werte um, die json nicht kennt"""
+    if isinstance(wert, Decimal):
+        return float(wert)
+    if isinstance(wert, (date, datetime)):
+        return wert.isoformat()
+    if isinstance(wert, (set, tuple)):
+        return list(wert)
+    return str(wert)
+
+
+def _ausgabe(daten: Any):
+    json.dump(daten, sys.stdout, ensure_ascii=False, indent=2, default=_json_wert)
+    sys.stdout.write("\n")
+
+
+def _manager(args):
+    from adapter.manager import DatenManager
+    return DatenManager(args.config)
+
+
+def _adapter(args):
+    from adapter.datenadapter import DatenAdapter
+    return DatenAdapter(args.config)
+
+
+def _zeitraum(args) -> tuple:
+    """(von, bis) aus --monat bzw. --von/--bis, sonst der Vormonat"""
+    from adapter.datev import vormonat
+    if args.monat:
+        von = date.fromisoformat(args.monat + "-01")
+        return von, vormonat((von + timedelta(days=32)).replace(day=1))[1]
+    if args.von or args.bis:
+        if not (args.von and args.bis):
+            raise ValueError("--von und --bis gehören zusammen")
+        if args.bis < args.von:
+            raise ValueError("--bis liegt vor --von")
+        return args.von, args.bis
+    return vormonat()
+
+
+# --- Befehle ---------------------------------------------------------------
+
+def liste(args) -> int:
+    manager = _manager(args)
+    bedingungen = []
+    for angabe in args.filter:
+        feld, _, wert = angabe.partition("=")
+        bedingungen.append((feld, wert))
+    suche = args.suche.casefold() if args.suche else None
+    felder = [f.strip() for f in args.felder.split(",")] if args.felder else None
+    
+    eintraege = []
+    for objekt in getattr(manager, LISTEN[args.art])():
+        eintrag = objekt.to_dict()
+        if any(str(eintrag.get(feld)) != wert for feld, wert in bedingungen):
+            continue
+        if suche and suche not in json.dumps(eintrag, ensure_ascii=False, default=_json_wert).casefold():
+            continue
+        eintraege.append({f: eintrag.get(f) for f in felder} if felder else eintrag)
+        if args.anzahl and len(eintraege) >= args.anzahl:
+            break
+    _ausgabe(eintraege)
+    return 0
+
+
+def importiere(args) -> int:
+    if args.art == "katalog":
+        from adapter.katalog import Katalog, katalog_pfad
+        katalog = Katalog(katalog_pfad(_adapter(args).get_daten_pfad()))
+        _ausgabe([dict(katalog.importiere(datei, args.lieferant), datei=datei) for datei in args.dateien])
+        return 0
+    
+    manager = _manager(args)
+    if args.art == "kunden":
+        from adapter import kunden_import
+        ergebnisse = [dict(kunden_import.importiere(manager, datei, probelauf=args.probelauf), datei=datei)
+                      for datei in args.dateien]
+    else:
+        from adapter import kontoauszug
+        ergebnis = kontoauszug.importiere(manager, args.dateien, args.probelauf)
+        ergebnisse = {
+            "umsaetze": ergebnis["umsaetze"],
+            "gutschriften": ergebnis["gutschriften"],
+            "gebucht": len(ergebnis["buchungen"]),
+            "summe": sum((u["betrag"] for u, _, _ in ergebnis["buchungen"]), Decimal(0)),
+            "zu_klaeren": len(ergebnis["klaerung"]),
+            "doppelt": ergebnis["doppelt"],
+        }
+    manager.warte_auf_speicherung()
+    _ausgabe(ergebnisse)
+    return 0
+
+
+def exportiere(args) -> int:
+    if args.art == "datev":
+        from adapter import datev
+        adapter = _adapter(args)
+        von, bis = _zeitraum(args)
+        ergebnis = datev.exportiere(adapter, args.ausgabe or datev.standard_ziel(adapter, von, bis), von, bis,
+                                    mit_zahlungen=not args.ohne_zahlungen)
+        _ausgabe(dict(ergebnis, von=von, bis=bis))
+        return 0
+    
+    from adapter.erechnung import exportiere_stapel
+    from adapter.pdf_stapel import erstelle_stapelauftraege
+    manager = _manager(args)
+    config = manager.adapter.get_config()
+    stapel = erstelle_stapelauftraege(manager, _waehle_rechnungen(manager, args))
+    ergebnisse = exportiere_stapel(config, stapel, args.ausgabe,
+                                   syntax=config.get("rechnung", {}).get("erechnung_syntax", "cii"))
+    _ausgabe(ergebnisse)
+    return 0 if not any(e["fehler"] for e in ergebnisse) else 1
+
+
+def _waehle_rechnungen(manager, args) -> list:
+    """Rechnungen nach --rechnung (ID oder Nummer) und --status"""
+    rechnungen = manager.get_rechnungen()
+    if args.rechnung:
+        gesucht = set(args.rechnung)
+        rechnungen = [r for r in rechnungen if r.id in gesucht or r.rechnungsnummer in gesucht]
+    if args.status:
+        rechnungen = [r for r in rechnungen if r.status == args.status]
+    return rechnungen
+
+
+def pdf(args) -> int:
+    from adapter.pdf_stapel import rendere_rechnungen
+    manager = _manager(args)
+    ergebnis = rendere_rechnungen(manager, _waehle_rechnungen(manager, args), args.erzwingen, args.worker)
+    _ausgabe(ergebnis)
+    return 0 if not ergebnis["fehler"] else 1
+
+
+def abrechnen(args) -> int:
+    manager = _manager(args)
+    auftraege = manager.get_abrechenbare_auftraege()
+    if args.auftrag:
+        gesucht = set(args.auftrag)
+        auftraege = [a for a in auftraege if a.id in gesucht or a.auftragsnummer in gesucht]
+    if args.probelauf:
+        _ausgabe({"auftraege": [a.auftragsnummer for a in auftraege]})
+        return 0
+    
+    zahlungsziel = args.zahlungsziel or manager.adapter.get_config().get("rechnung", {}).get("zahlungsziel_tage", 14)
+    rechnungen, fehler = manager.erstelle_rechnungen_aus_auftraegen([a.id for a in auftraege], zahlungsziel)
+    manager.warte_auf_speicherung()
+    ergebnis = {
+        "rechnungen": [{"auftrag_id": r.auftrag_id, "rechnungsnummer": r.rechnungsnummer, "brutto": r.bruttobetrag}
+                       for r in rechnungen],
+        "fehler": [{"auftrag_id": auftrag_id, "fehler": text} for auftrag_id, text in fehler.items()],
+    }
+    if args.pdf and rechnungen:
+        from adapter.pdf_stapel import rendere_rechnungen
+        ergebnis["pdf"] = rendere_rechnungen(manager, rechnungen)
+    _ausgabe(ergebnis)
+    return 0 if not fehler else 1
+
+
+def reindex(args) -> int:
+    _ausgabe({"rechnungsindex": _adapter(args).baue_rechnungsindex_neu()})
+    return 0
+
+
+def pruefen(args) -> int:
+    from adapter.wartung import pruefe_integritaet
+    probleme = pruefe_integritaet(_manager(args))
+    _ausgabe({"probleme": probleme})
+    return 1 if probleme else 0
+
+
+def sicherung(args) -> int:
+    from adapter.wartung import erstelle_sicherung
+    _ausgabe(erstelle_sicherung(_adapter(args), args.ziel, args.behalten))
+    return 0
+
+
+def wartung(args) -> int:
+    from adapter.zeitplan import Planer
+    planer = Planer(args.config)
+    if args.status:
+        _ausgabe(planer.status())
+        return 0
+    if args.dauerhaft:
+        # Jeden Lauf sofort als eine JSON-Zeile ausgeben (für Logdateien)
+        def melde(eintrag):
+            print(json.dumps(eintrag, ensure_ascii=False, default=_json_wert), flush=True)
+        try:
+            planer.laufe(bei_lauf=melde)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.aufgabe:
+        laeufe = [planer.fuehre_aus(name, ausloeser="manuell") for name in args.aufgabe]
+    else:
+        laeufe = planer.fuehre_faellige_aus()
+    _ausgabe(laeufe)
+    return 0 if all(lauf.get("ok", True) for lauf in laeufe) else 1
+
+
+# --- Aufruf ----------------------------------------------------------------
+
+def erstelle_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Auftragsverwaltung ohne Oberfläche (Ausgabe als JSON)")
+    parser.add_argument("--config", default="config/config.json", help="Pfad der Konfiguration")
+    parser.add_argument("--messung", metavar="DATEI",
+                        help="Laufzeiten von DatenManager/DatenAdapter messen und nach DATEI schreiben "
+                             "(.prom: Prometheus-Textformat, sonst JSON)")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+    
+    p = befehle.add_parser("liste", help="Kunden, Aufträge, Rechnungen usw. auflisten und filtern")
+    p.add_argument("art", choices=list(LISTEN))
+    p.add_argument("--filter", nargs="+", default=[], metavar="FELD=WERT", help="z.B. status=Offen kunde_id=K1")
+    p.add_argument("--suche", help="Text, der irgendwo im Eintrag vorkommt")
+    p.add_argument("--felder", help="Nur diese Felder ausgeben (kommagetrennt)")
+    p.add_argument("--anzahl", type=int, help="Höchstens so viele Einträge")
+    p.set_defaults(funktion=liste)
+    
+    p = befehle.add_parser("import", help="Kunden (CSV/XLSX), Kontoauszüge oder Lieferantenkataloge importieren")
+    p.add_argument("art", choices=["kunden", "kontoauszug", "katalog"])
+    p.add_argument("dateien", nargs="+")
+    p.add_argument("--probelauf", action="store_true", help="Nur prüfen, nichts übernehmen (kunden, kontoauszug)")
+    p.add_argument("--lieferant", help="Name des Lieferanten (katalog)")
+    p.set_defaults(funktion=importiere)
+    
+    p = befehle.add_parser("export", help="DATEV-Buchungsstapel oder E-Rechnungen exportieren")
+    p.add_argument("art", choices=["datev", "erechnung"])
+    p.add_argument("--ausgabe", help="Zieldatei (datev) bzw. Zielordner (erechnung); Standard: im Datenverzeichnis")
+    p.add_argument("--monat", help="Monat (JJJJ-MM, datev; Standard: Vormonat)")
+    p.add_argument("--von", type=date.fromisoformat, help="Erster Tag (JJJJ-MM-TT, datev)")
+    p.add_argument("--bis", type=date.fromisoformat, help="Letzter Tag (JJJJ-MM-TT, datev)")
+    p.add_argument("--ohne-zahlungen", action="store_true", help="Nur Rechnungsausgang exportieren (datev)")
+    p.add_argument("--rechnung", nargs="+", help="Rechnungs-IDs oder -nummern (erechnung; Standard: alle)")
+    p.add_argument("--status", help="Nur Rechnungen mit diesem Status (erechnung)")
+    p.set_defaults(funktion=exportiere)
+    
+    p = befehle.add_parser("abrechnen", help="Rechnungen für alle abrechnungsbereiten Aufträge erstellen")
+    p.add_argument("--auftrag", nargs="+", help="Nur diese Aufträge (ID oder Auftragsnummer)")
+    p.add_argument("--zahlungsziel", type=int, help="Zahlungsziel in Tagen (Standard: Konfiguration)")
+    p.add_argument("--pdf", action="store_true", help="PDFs der neuen Rechnungen gleich erstellen")
+    p.add_argument("--probelauf", action="store_true", help="Nur die Aufträge ausgeben")
+    p.set_defaults(funktion=abrechnen)
+    
+    p = befehle.add_parser("pdf", help="Rechnungs-PDFs im Stapel erstellen (unveränderte werden übersprungen)")
+    p.add_argument("--rechnung", nargs="+", help="Rechnungs-IDs oder -nummern (Standard: alle)")
+    p.add_argument("--status", help="Nur Rechnungen mit diesem Status")
+    p.add_argument("--erzwingen", action="store_true", help="Auch unveränderte PDFs neu erstellen")
+    p.add_argument("--worker", type=int, help="Anzahl Prozesse (Standard: Anzahl CPU-Kerne)")
+    p.set_defaults(funktion=pdf)
+    
+    p = befehle.add_parser("reindex", help="Rechnungsindex aus den Auftragsordnern neu aufbauen")
+    p.set_defaults(funktion=reindex)
+    
+    p = befehle.add_parser("pruefen", help="Dateien und Verweise prüfen (Rückgabewert 1 bei Problemen)")
+    p.set_defaults(funktion=pruefen)
+    
+    p = befehle.add_parser("sicherung", help="Datenverzeichnis und Konfiguration als ZIP sichern")
+    p.add_argument("--ziel", help="Zielordner (Standard: daten.sicherung_pfad der Konfiguration)")
+    p.add_argument("--behalten", type=int, help="Nur die neuesten N Sicherungen behalten (0 = alle)")
+    p.set_defaults(funktion=sicherung)
+    
+    p = befehle.add_parser("wartung", help="Fällige Wartungsaufgaben nach dem Zeitplan der Konfiguration ausführen")
+    p.add_argument("aufgabe", nargs="*", help="Diese Aufgaben sofort ausführen (sicherung, ueberfaellig, pdf, "
+                   "reindex, pruefen, kompaktieren)")
+    p.add_argument("--status", action="store_true", help="Zeitplan, letzten und nächsten Lauf je Aufgabe ausgeben")
+    p.add_argument("--dauerhaft", action="store_true", help="Weiterlaufen und jede Minute prüfen (Dienstbetrieb)")
+    p.set_defaults(funktion=wartung)
+    return parser
+
+
+def main(argumente: Optional[List[str]] = None) -> int:
+    args = erstelle_parser().parse_args(argumente)
+    if args.messung:
+        from adapter import messung
+        messung.aktiviere()
+    try:
+        return args.funktion(args)
+    except Exception as e:
+        # Auch Fehler als JSON ausgeben; die Details gehen nach stderr ins cron-Log
+        traceback.print_exc(file=sys.stderr)
+        _ausgabe({"fehler": str(e) or e.__class__.__name__, "typ": e.__class__.__name__})
+        return 1
+    finally:
+        if args.messung:
+            if args.messung.endswith(".prom"):
+                messung.speichere_prometheus(args.messung)
+            else:
+                messung.speichere_json(args.messung)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Benchmark: Rechnung mit sehr vielen Positionen (Laufzeit und Speicherbedarf)
+
+Aufruf aus dem Projektverzeichnis:
+    python examples/lange_rechnung_benchmark.py [--ohne-speicher] [Anzahl ...]
+
+Die Positionstabelle wird seitenweise mit Übertrag gerendert (UebertragsTabelle).
+Der Speicherbedarf der Tabellenobjekte bleibt dadurch unabhängig von der Anzahl
+der Positionen; es wächst nur das (komprimierte) PDF selbst mit der Seitenzahl.
+
+Für Vergleiche mit einer gespeicherten Baseline siehe benchmarks/pdf_rendering.py.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Pfad zum Hauptprojekt hinzufügen
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapter.pdf_generator import PDFGenerator
+from benchmarks.pdf_rendering import erstelle_rechnung
+
+
+def messe(generator: PDFGenerator, anzahl: int, ordner: str, speicher: bool = True) -> dict:
+    """
+    Rendert eine Rechnung und misst Laufzeit und Speicherspitze (ohne die Eingabedaten)
+    
+    Die Speicherspitze wird in einem zweiten Durchlauf mit tracemalloc gemessen,
+    da tracemalloc die Laufzeit stark verfälscht.
+    """
+    rechnung = erstelle_rechnung(anzahl)
+    kunde = {'id': 'K-001', 'firma': 'Musterfirma GmbH', 'name': 'Max Mustermann',
+             'strasse': 'Musterstraße 123', 'plz': '12345', 'ort': 'Musterstadt'}
+    ausgabepfad = os.path.join(ordner, f'rechnung_{anzahl}.pdf')
+    
+    start = time.perf_counter()
+    generator.rechnung_erstellen(rechnung, kunde, ausgabepfad, erzwingen=True)
+    dauer = time.perf_counter() - start
+    
+    spitze = None
+    if speicher:
+        tracemalloc.start()
+        generator.rechnung_erstellen(rechnung, kunde, ausgabepfad, erzwingen=True)
+        _, spitze = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    return {
+        'positionen': anzahl,
+        'sekunden': round(dauer, 2),
+        'speicher_spitze_mib': round(spitze / 2**20, 1) if spitze is not None else None,
+        'pdf_kib': os.path.getsize(ausgabepfad) // 1024,
+    }
+
+
+def main():
+    argumente = sys.argv[1:]
+    speicher = '--ohne-speicher' not in argumente
+    anzahlen = [int(a) for a in argumente if a != '--ohne-speicher'] or [100, 1000, 10000]
+    
+    with open('config/config.example.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    generator = PDFGenerator(config)
+    
+    with tempfile.TemporaryDirectory() as ordner:
+        print(f"{'Positionen':>10} {'Sekunden':>9} {'Speicher (MiB)':>15} {'PDF (KiB)':>10}")
+        for anzahl in anzahlen:
+            e = messe(generator, anzahl, ordner, speicher)
+            spitze = f"{e['speicher_spitze_mib']:.1f}" if speicher else "-"
+            print(f"{e['positionen']:>10} {e['sekunden']:>9.2f} {spitze:>15} {e['pdf_kib']:>10}")
+
+
+if __name__ == '__main__':
+    main()
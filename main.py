@@ -1,25 +1,63 @@
 """
 Hauptanwendung für Auftragsverwaltung
+
+    python main.py [--startprofil [DATEI]]
+
+--startprofil zeichnet den Programmstart auf (siehe adapter/startprofil.py):
+ohne DATEI wird der Zeitstrahl ausgegeben, sonst als Chrome-Trace-JSON gespeichert.
 """
-import tkinter as tk
-from adapter.manager import DatenManager
-from view.hauptfenster import Hauptfenster
+import time
+_STARTZEIT = time.perf_counter()  # Vor allen weiteren Imports messen
+
+import sys
+from typing import List
+from adapter import startprofil
+
+
+def _starte_profil(argumente: List[str]) -> bool:
+    """Wertet --startprofil [DATEI] aus (ohne argparse, das beim Start Zeit kostet)"""
+    for i, argument in enumerate(argumente):
+        if argument.startswith("--startprofil="):
+            startprofil.starte(argument.split("=", 1)[1] or None, _STARTZEIT)
+            return True
+        if argument == "--startprofil":
+            ziel = argumente[i + 1] if i + 1 < len(argumente) and not argumente[i + 1].startswith("-") else None
+            startprofil.starte(ziel, _STARTZEIT)
+            return True
+    return startprofil.starte_aus_umgebung(_STARTZEIT)
+
+
+_starte_profil(sys.argv[1:])
+
+with startprofil.phase("Importe"):
+    import tkinter as tk
+    from adapter.manager import DatenManager
+    from view.hauptfenster import Hauptfenster
 
 
 def main():
     """Startet die Anwendung"""
-    # Datenmanager initialisieren
-    manager = DatenManager("config/config.json")
+    # Datenmanager initialisieren (Daten werden im Hintergrund geladen,
+    # damit das Hauptfenster sofort erscheint)
+    with startprofil.phase("DatenManager erzeugen"):
+        manager = DatenManager("config/config.json", sofort_laden=False)
     
     # GUI erstellen
-    root = tk.Tk()
-    app = Hauptfenster(root, manager)
+    with startprofil.phase("Tk erzeugen"):
+        root = tk.Tk()
+    with startprofil.phase("Hauptfenster erzeugen"):
+        app = Hauptfenster(root, manager, daten_laden=True, startzeit=_STARTZEIT)
     
     # Hauptschleife starten
     root.mainloop()
+    
+    # Ausstehende Hintergrundarbeit abschließen, bevor der Prozess endet
+    app.ausfuehrer.beenden()
+    manager.warte_auf_speicherung()
+    
+    # Falls das Fenster vor dem Ende des Starts geschlossen wurde
+    startprofil.beende()
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -15,7 +15,8 @@ class Position:
                  einheit: str = "Stk",
                  einzelpreis: float = 0.0,
                  status: str = "zur Freigabe",
-                 position_id: Optional[str] = None):
+                 position_id: Optional[str] = None,
+                 oz: str = ""):
         self.id = position_id or self._generate_id()
         self.bezeichnung = bezeichnung
         self.menge = float(menge)
@@ -23,6 +24,7 @@ class Position:
         self.einzelpreis = float(einzelpreis)
         self.gesamtpreis = self.menge * self.einzelpreis
         self.status = status
+        self.oz = oz  # Ordnungszahl aus einem GAEB-Leistungsverzeichnis
     
     def _generate_id(self) -> str:
         """Generiert eine eindeutige ID"""
@@ -30,7 +32,7 @@ class Position:
     
     def to_dict(self) -> Dict[str, Any]:
         """Konvertiert Position zu Dictionary"""
-        return {
+        daten = {
             "id": self.id,
             "bezeichnung": self.bezeichnung,
             "menge": self.menge,
@@ -39,6 +41,9 @@ class Position:
             "gesamtpreis": self.gesamtpreis,
             "status": self.status
         }
+        if self.oz:
+            daten["oz"] = self.oz
+        return daten
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Position':
@@ -49,7 +54,8 @@ class Position:
             einheit=data.get("einheit", "Stk"),
             einzelpreis=data.get("einzelpreis", 0.0),
             status=data.get("status", "zur Freigabe"),
-            position_id=data["id"]
+            position_id=data["id"],
+            oz=data.get("oz", "")
         )
 
 
@@ -149,9 +155,9 @@ class Auftrag:
         if data.get("erstellt_am"):
             auftrag.erstellt_am = datetime.fromisoformat(data["erstellt_am"])
         
-        # Positionen hinzufügen
-        for pos_data in data.get("positionen", []):
-            auftrag.add_position(Position.from_dict(pos_data))
+        # Positionen hinzufügen (ohne Neuberechnung je Position, Leistungsverzeichnisse
+        # haben oft Tausende Positionen)
+        auftrag.positionen = [Position.from_dict(pos_data) for pos_data in data.get("positionen", [])]
         
         # Stelle sicher, dass Preise berechnet sind (auch wenn keine Positionen vorhanden)
         # Dies stellt sicher, dass endpreis, gesamtpreis und mwst_betrag immer gesetzt sind
@@ -2,9 +2,38 @@
 Model-Klasse für Rechnungsverwaltung
 """
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from model.auftrag import Position
 
+CENT = Decimal("0.01")
+
+
+def auf_cent(wert: Any) -> Decimal:
+    """Rundet einen Betrag kaufmännisch auf Cent (float über str, ohne Binärrundungsfehler)"""
+    return Decimal(str(wert or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def steueranteile(positionen: Iterable[Tuple[Any, Any]]) -> Dict[Decimal, Tuple[Decimal, Decimal]]:
+    """
+    Netto und Steuer je Steuersatz
+    
+    Jeder Positionsbetrag wird auf Cent gerundet und je Satz summiert, die Steuer
+    wird je Satz auf Cent gerundet. Rechnungsbetrag, PDF, E-Rechnung und
+    DATEV-Export beruhen alle auf dieser Rundung.
+    
+    Args:
+        positionen: (Steuersatz, Positionsbetrag) je Position
+    
+    Returns:
+        Steuersatz -> (Netto, Steuer)
+    """
+    netto: Dict[Decimal, Decimal] = {}
+    for satz, betrag in positionen:
+        satz = Decimal(str(satz))
+        netto[satz] = netto.get(satz, Decimal(0)) + auf_cent(betrag)
+    return {satz: (summe, auf_cent(summe * satz / 100)) for satz, summe in netto.items()}
+
 
 class Rechnung:
     """Repräsentiert eine Rechnung"""
@@ -36,6 +65,11 @@ class Rechnung:
         self.mwst_satz = float(mwst_satz)
         self.notizen = notizen
         self.pauschal = pauschal
+        # Mahnwesen: erreichte Mahnstufe (0 = nicht gemahnt) und versandte Mahnungen
+        self.mahnstufe = 0
+        self.mahnungen: List[Dict[str, Any]] = []
+        # Zahlungseingänge (z.B. aus dem Kontoauszug-Import)
+        self.zahlungen: List[Dict[str, Any]] = []
     
     def _generate_id(self) -> str:
         """Generiert eine eindeutige ID"""
@@ -55,11 +89,46 @@ class Rechnung:
         self.positionen = [p for p in self.positionen if p.id != position_id]
         self._berechnen()
     
+    def add_mahnung(self, stufe: int, datum: datetime, gebuehr: float = 0.0):
+        """Vermerkt eine versandte Mahnung und erhöht die Mahnstufe"""
+        self.mahnungen.append({"stufe": stufe, "datum": datum.isoformat(), "gebuehr": float(gebuehr)})
+        self.mahnstufe = stufe
+    
+    @property
+    def letzte_mahnung(self) -> Optional[datetime]:
+        """Datum der letzten Mahnung (None, wenn noch nicht gemahnt)"""
+        return datetime.fromisoformat(self.mahnungen[-1]["datum"]) if self.mahnungen else None
+    
+    @property
+    def mahngebuehren(self) -> float:
+        """Summe der bisher berechneten Mahngebühren"""
+        return sum(m.get("gebuehr", 0.0) for m in self.mahnungen)
+    
+    def add_zahlung(self, datum: datetime, betrag: float, referenz: str = "", text: str = ""):
+        """Vermerkt einen Zahlungseingang; ist der offene Betrag beglichen, gilt die Rechnung als bezahlt"""
+        self.zahlungen.append({"datum": datum.isoformat(), "betrag": float(betrag), "referenz": referenz, "text": text})
+        if self.offener_betrag < 0.005:
+            self.status = "Bezahlt"
+    
+    @property
+    def bezahlter_betrag(self) -> float:
+        """Summe der Zahlungseingänge"""
+        return sum(z.get("betrag", 0.0) for z in self.zahlungen)
+    
+    @property
+    def offener_betrag(self) -> float:
+        """Noch offener Betrag einschließlich Mahngebühren"""
+        self._berechnen()
+        return round(self.bruttobetrag + self.mahngebuehren - self.bezahlter_betrag, 2)
+    
     def _berechnen(self):
-        """Berechnet Rechnungsbeträge"""
-        self.nettobetrag = sum(p.gesamtpreis for p in self.positionen)
-        self.mwst_betrag = self.nettobetrag * (self.mwst_satz / 100)
-        self.bruttobetrag = self.nettobetrag + self.mwst_betrag
+        """Berechnet Rechnungsbeträge (auf Cent gerundet, siehe steueranteile)"""
+        anteile = steueranteile((self.mwst_satz, p.gesamtpreis) for p in self.positionen).values()
+        netto = sum((n for n, _ in anteile), Decimal(0))
+        steuer = sum((s for _, s in anteile), Decimal(0))
+        self.nettobetrag = float(netto)
+        self.mwst_betrag = float(steuer)
+        self.bruttobetrag = float(netto + steuer)
     
     def to_dict(self, auftragsnummer: Optional[str] = None) -> Dict[str, Any]:
         """Konvertiert Rechnung zu Dictionary"""
@@ -82,6 +151,11 @@ class Rechnung:
             "notizen": self.notizen,
             "pauschal": self.pauschal
         }
+        if self.mahnungen:
+            result["mahnstufe"] = self.mahnstufe
+            result["mahnungen"] = self.mahnungen
+        if self.zahlungen:
+            result["zahlungen"] = self.zahlungen
         if auftragsnummer:
             result["auftragsnummer"] = auftragsnummer
         return result
@@ -104,6 +178,10 @@ class Rechnung:
             rechnung_id=data["id"]
         )
         
+        rechnung.mahnstufe = data.get("mahnstufe", 0)
+        rechnung.mahnungen = list(data.get("mahnungen", []))
+        rechnung.zahlungen = list(data.get("zahlungen", []))
+        
         # Positionen hinzufügen
         for pos_data in data.get("positionen", []):
             rechnung.add_position(Position.from_dict(pos_data))
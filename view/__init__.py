@@ -1,6 +1,11 @@
 """View-Package"""
-from view.hauptfenster import Hauptfenster
 
 __all__ = ["Hauptfenster"]
 
 
+def __getattr__(name):
+    # Erst bei Bedarf importieren: view.sortschluessel ist auch ohne tkinter nutzbar
+    if name == "Hauptfenster":
+        from view.hauptfenster import Hauptfenster
+        return Hauptfenster
+    raise AttributeError(f"module 'view' has no attribute {name!r}")
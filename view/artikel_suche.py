@@ -0,0 +1,106 @@
+"""
+Autovervollständigung für Artikel aus den Lieferantenkatalogen
+"""
+import tkinter as tk
+from typing import Any, Callable, Dict, List
+
+from adapter.katalog import Katalog
+
+
+class ArtikelVervollstaendigung:
+    """Zeigt unter einem Eingabefeld passende Katalogartikel zur Auswahl an"""
+    
+    VERZOEGERUNG_MS = 80  # Erst suchen, wenn kurz nicht getippt wurde
+    MIN_ZEICHEN = 2
+    ZEILEN = 10
+    
+    def __init__(self, entry: tk.Entry, katalog: Katalog, bei_auswahl: Callable[[Dict[str, Any]], None]):
+        """
+        Args:
+            entry: Eingabefeld (Artikelnummer oder Bezeichnung)
+            katalog: Katalog aus Katalog.fuer_manager()
+            bei_auswahl: Callback mit dem gewählten Artikel (Zeile aus dem Katalog)
+        """
+        self.entry = entry
+        self.katalog = katalog
+        self.bei_auswahl = bei_auswahl
+        self._treffer: List[Dict[str, Any]] = []
+        self._geplant = None
+        self._popup = None
+        self._liste = None
+        
+        entry.bind("<KeyRelease>", self._taste, add="+")
+        entry.bind("<Down>", self._in_liste, add="+")
+        entry.bind("<Escape>", lambda e: self._schliessen(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(150, self._fokus_pruefen), add="+")
+    
+    def _taste(self, event):
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        if self._geplant is not None:
+            self.entry.after_cancel(self._geplant)
+        self._geplant = self.entry.after(self.VERZOEGERUNG_MS, self._suche)
+    
+    def _suche(self):
+        self._geplant = None
+        text = self.entry.get().strip()
+        if len(text) < self.MIN_ZEICHEN:
+            self._schliessen()
+            return
+        self._treffer = self.katalog.suche(text, limit=self.ZEILEN * 2)
+        if not self._treffer:
+            self._schliessen()
+            return
+        self._zeige()
+    
+    def _zeige(self):
+        if self._popup is None:
+            self._popup = tk.Toplevel(self.entry)
+            self._popup.wm_overrideredirect(True)
+            self._liste = tk.Listbox(self._popup, height=self.ZEILEN, activestyle="dotbox", exportselection=False)
+            self._liste.pack(fill=tk.BOTH, expand=True)
+            self._liste.bind("<Return>", lambda e: self._uebernehmen())
+            self._liste.bind("<Double-Button-1>", lambda e: self._uebernehmen())
+            self._liste.bind("<Escape>", lambda e: self._schliessen())
+            self._liste.bind("<FocusOut>", lambda e: self.entry.after(150, self._fokus_pruefen))
+        self._liste.delete(0, tk.END)
+        for artikel in self._treffer:
+            self._liste.insert(tk.END, f"{artikel['artikelnummer']}  {artikel['kurztext']}  "
+                                       f"({artikel['preis']:.2f} €/{artikel['einheit']}, {artikel['lieferant']})")
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        breite = max(self.entry.winfo_width(), 500)
+        self._popup.geometry(f"{breite}x{self._liste.winfo_reqheight()}+{x}+{y}")
+        self._popup.lift()
+    
+    def _in_liste(self, event=None):
+        if self._popup is None:
+            return
+        self._liste.focus_set()
+        self._liste.selection_clear(0, tk.END)
+        self._liste.selection_set(0)
+        self._liste.activate(0)
+        return "break"
+    
+    def _uebernehmen(self):
+        auswahl = self._liste.curselection() if self._liste is not None else ()
+        if auswahl:
+            artikel = self._treffer[auswahl[0]]
+            self._schliessen()
+            self.entry.focus_set()
+            self.bei_auswahl(artikel)
+    
+    def _fokus_pruefen(self):
+        """Schließt die Liste, wenn weder Eingabefeld noch Liste den Fokus haben"""
+        try:
+            fokus = self.entry.focus_get()
+        except (KeyError, tk.TclError):
+            fokus = None
+        if fokus not in (self.entry, self._liste):
+            self._schliessen()
+    
+    def _schliessen(self):
+        if self._popup is not None:
+            self._popup.destroy()
+            self._popup = None
+            self._liste = None
@@ -2,19 +2,37 @@
 View für Auftragsverwaltung
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import os
 import platform
+from datetime import datetime
 from adapter.manager import DatenManager
+from view.hintergrund import HintergrundAusfuehrer
+from view.tabellen import SortschluesselCache, Spaltensortierung, Filterleiste, auftrag_schluessel
 
 
 class AuftraegeView:
     """View für Auftragsverwaltung"""
     
+    # Anzahl Aufträge, die pro Seite in einen Jahresknoten eingefügt werden
+    SEITENGROESSE = 100
+    # Jahre, deren Aufträge alle einen dieser Status haben, bleiben eingeklappt
+    ABGESCHLOSSENE_STATUS = ("Abgeschlossen", "Storniert")
+    PLATZHALTER_SUFFIX = "_platzhalter"
+    MEHR_SUFFIX = "_mehr"
+    # Sortierbare Spalten der Auftragszeilen -> Schlüssel in auftrag_schluessel()
+    SORTIERSCHLUESSEL = {"#0": "nummer", "Info1": None, "Info2": "status",
+                         "Info3": "datum", "Info4": "endpreis"}
+    
     def __init__(self, parent: tk.Widget, manager: DatenManager, hauptfenster=None):
         self.parent = parent
         self.manager = manager
         self.hauptfenster = hauptfenster
+        self.schluessel = SortschluesselCache.fuer_manager(manager)
+        
+        # Aufträge je Jahr und Anzahl bereits eingefügter Aufträge je Jahr
+        self._jahr_auftraege = {}
+        self._geladen_pro_jahr = {}
         
         self._erstelle_ui()
         self._lade_auftraege()
@@ -29,17 +47,26 @@ class AuftraegeView:
         ttk.Button(toolbar, text="Bearbeiten", command=self._bearbeite_auftrag).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Löschen", command=self._loesche_auftrag).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Rechnung erstellen", command=self._erstelle_rechnung).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="GAEB importieren", command=self._importiere_gaeb).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Aktualisieren", command=self._lade_auftraege).pack(side=tk.LEFT, padx=2)
         
+        # Filter
+        self.filter = Filterleiste(self.parent, self._lade_auftraege)
+        self.filter.pack(fill=tk.X, padx=5)
+        self.filter.add_auswahl("status", "Status", breite=14)
+        self.filter.add_auswahl("jahr", "Jahr", breite=6)
+        self.filter.add_auswahl("kunde", "Kunde", breite=30)
+        ttk.Button(self.filter, text="Filter zurücksetzen", command=self.filter.zuruecksetzen).pack(side=tk.LEFT, padx=10)
+        
         # Treeview für Auftragsliste
         tree_frame = ttk.Frame(self.parent)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        vsb = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
+        self.vsb = vsb = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         hsb = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL)
         
         self.tree = ttk.Treeview(tree_frame, columns=("Info1", "Info2", "Info3", "Info4", "Info5"), 
-                                 show="tree headings", yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+                                 show="tree headings", yscrollcommand=self._on_scroll, xscrollcommand=hsb.set)
         
         vsb.config(command=self.tree.yview)
         hsb.config(command=self.tree.xview)
@@ -67,6 +94,11 @@ class AuftraegeView:
         
         self.tree.bind("<Double-1>", self._on_double_click)
         self.tree.bind("<Button-1>", self._on_tree_click)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        
+        # Klick auf Spaltenkopf sortiert die Aufträge innerhalb der Jahre
+        self.sortierung = Spaltensortierung(self.tree, self.SORTIERSCHLUESSEL, self._lade_auftraege)
         
         # Status-Optionen
         self.status_optionen = ["zur Freigabe", "Freigegeben", "in Bearbeitung", "Rechnung", "Abgeschlossen"]
@@ -78,6 +110,8 @@ class AuftraegeView:
         self.context_menu.add_command(label="Rechnung erstellen", command=self._erstelle_rechnung)
         self.context_menu.add_command(label="Stundennachweis verwalten", command=self._verwalte_stundennachweis)
         self.context_menu.add_command(label="Stückliste verwalten", command=self._verwalte_stueckliste)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Als GAEB X84 exportieren...", command=self._exportiere_gaeb)
         
         self.tree.bind("<Button-3>", self._zeige_kontextmenue)  # Rechtsklick
         if platform.system() == "Darwin":  # macOS
@@ -85,35 +119,195 @@ class AuftraegeView:
             self.tree.bind("<Control-1>", self._zeige_kontextmenue)
     
     def _lade_auftraege(self):
-        """Lädt Aufträge in die hierarchische Tree-View"""
+        """Lädt Aufträge in die hierarchische Tree-View
+        
+        Die Aufträge werden nach Jahr gruppiert. Jahresknoten werden erst beim
+        Aufklappen befüllt, Aufträge seitenweise eingefügt und Positionen erst
+        beim Aufklappen eines Auftrags als Child-Nodes angelegt.
+        """
+        # Zustand merken, damit ein Neuladen aufgeklappte Knoten erhält
+        offene_knoten = {iid for iid in self._alle_knoten() if self.tree.item(iid, "open")}
+        geladene_seiten = dict(self._geladen_pro_jahr)
+        bekannte_jahre = set(self.tree.get_children())
+        
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        auftraege = self.manager.get_auftraege()
+        auftraege = self._filtere_auftraege(self.manager.get_auftraege())
+        
+        # Aufträge nach Jahr gruppieren (wie die Ordnerstruktur YYYY/YYYY-XXXX)
+        self._jahr_auftraege = {}
         for auftrag in auftraege:
-            kunde = self.manager.get_kunde(auftrag.kunde_id)
-            kunde_name = kunde.get_vollstaendiger_name() if kunde else "Unbekannt"
+            self._jahr_auftraege.setdefault(self._get_jahr(auftrag), []).append(auftrag)
+        self._geladen_pro_jahr = {}
+        
+        aktuelles_jahr = str(datetime.now().year)
+        for jahr in sorted(self._jahr_auftraege, reverse=True):
+            auftraege = self._jahr_auftraege[jahr]
+            jahr_iid = f"jahr_{jahr}"
+            self.tree.insert("", tk.END, iid=jahr_iid, text=f"{jahr} ({len(auftraege)} Aufträge)",
+                             values=("", "", "", "", ""))
             
-            # Hauptauftrag als Root-Node einfügen
-            # Text: Auftragsnummer + Bezeichnung
-            auftrag_text = f"{auftrag.auftragsnummer} {auftrag.bezeichnung}"
-            auftrag_node = self.tree.insert("", tk.END, iid=auftrag.id, 
-                                          text=auftrag_text,
-                                          values=(kunde_name, auftrag.status, 
-                                                  auftrag.erstellt_am.strftime("%d.%m.%Y"),
-                                                  f"{auftrag.endpreis:.2f} €", ""))
+            if jahr_iid not in bekannte_jahre:
+                # Aktuelles Jahr und Jahre mit laufenden Aufträgen aufklappen,
+                # abgeschlossene/alte Jahre bleiben eingeklappt
+                aufklappen = jahr == aktuelles_jahr or any(
+                    a.status not in self.ABGESCHLOSSENE_STATUS for a in auftraege)
+            else:
+                aufklappen = jahr_iid in offene_knoten
             
-            # Positionen als Child-Nodes einfügen
-            for index, position in enumerate(auftrag.positionen, start=1):
-                # Format: 01_Bezeichnung (wie in der Ordnerstruktur)
-                position_text = f"{index:02d}_{position.bezeichnung}"
-                position_id = f"{auftrag.id}_pos_{position.id}"
-                self.tree.insert(auftrag_node, tk.END, iid=position_id,
-                               text=position_text,
-                               values=(f"{position.menge:.2f}", position.einheit,
-                                      f"{position.einzelpreis:.2f} €",
-                                      f"{position.gesamtpreis:.2f} €",
-                                      position.status))
+            if aufklappen:
+                self._lade_seite(jahr, geladene_seiten.get(jahr, self.SEITENGROESSE))
+                self.tree.item(jahr_iid, open=True)
+            else:
+                self._fuege_platzhalter_ein(jahr_iid)
+        
+        # Vorher aufgeklappte Aufträge wiederherstellen
+        for iid in offene_knoten:
+            if self.tree.exists(iid) and self.manager.get_auftrag(iid):
+                self._lade_positionen(iid)
+                self.tree.item(iid, open=True)
+    
+    def _filtere_auftraege(self, auftraege) -> list:
+        """Aktualisiert die Filterwerte, filtert und sortiert die Aufträge"""
+        kunden_namen = {k.id: k.get_vollstaendiger_name() for k in self.manager.get_kunden()}
+        self.filter.setze_werte("status", sorted({a.status for a in auftraege}))
+        self.filter.setze_werte("jahr", sorted({self._get_jahr(a) for a in auftraege}, reverse=True))
+        kunden_ids = {a.kunde_id for a in auftraege if a.kunde_id in kunden_namen}
+        self.filter.setze_werte("kunde", sorted(kunden_ids, key=lambda k: kunden_namen[k].casefold()),
+                                anzeige=kunden_namen.get)
+        
+        status = self.filter.get("status")
+        jahr = self.filter.get("jahr")
+        kunde_id = self.filter.get("kunde")
+        gefiltert = [a for a in auftraege
+                     if (status is None or a.status == status)
+                     and (jahr is None or self._get_jahr(a) == jahr)
+                     and (kunde_id is None or a.kunde_id == kunde_id)]
+        
+        if self.sortierung.spalte == "Info1":
+            namen = self.schluessel.kunden_namen()
+            return self.sortierung.sortiere(gefiltert, lambda a, s: namen.get(a.kunde_id))
+        return self.sortierung.sortiere(
+            gefiltert, lambda a, s: self.schluessel.get(a, auftrag_schluessel)[self.SORTIERSCHLUESSEL[s]])
+    
+    def _get_jahr(self, auftrag) -> str:
+        """Gibt das Jahr eines Auftrags zurück (aus Auftragsnummer YYYY-XXXX)"""
+        jahr = auftrag.auftragsnummer.split("-")[0] if auftrag.auftragsnummer else ""
+        if len(jahr) == 4 and jahr.isdigit():
+            return jahr
+        return str(auftrag.erstellt_am.year)
+    
+    def _alle_knoten(self):
+        """Gibt alle Jahres- und Auftragsknoten der Tree-View zurück"""
+        for jahr_iid in self.tree.get_children():
+            yield jahr_iid
+            yield from self.tree.get_children(jahr_iid)
+    
+    def _fuege_platzhalter_ein(self, parent_iid: str):
+        """Fügt einen leeren Platzhalter ein, damit der Knoten aufklappbar ist"""
+        self.tree.insert(parent_iid, tk.END, iid=f"{parent_iid}{self.PLATZHALTER_SUFFIX}", text="…")
+    
+    def _entferne_platzhalter(self, parent_iid: str) -> bool:
+        """Entfernt den Platzhalter eines Knotens, gibt True zurück falls vorhanden"""
+        platzhalter = f"{parent_iid}{self.PLATZHALTER_SUFFIX}"
+        if self.tree.exists(platzhalter):
+            self.tree.delete(platzhalter)
+            return True
+        return False
+    
+    def _lade_seite(self, jahr: str, anzahl: int = None):
+        """Fügt die nächste Seite von Aufträgen eines Jahres ein"""
+        jahr_iid = f"jahr_{jahr}"
+        self._entferne_platzhalter(jahr_iid)
+        mehr_iid = f"{jahr_iid}{self.MEHR_SUFFIX}"
+        if self.tree.exists(mehr_iid):
+            self.tree.delete(mehr_iid)
+        
+        auftraege = self._jahr_auftraege.get(jahr, [])
+        start = self._geladen_pro_jahr.get(jahr, 0)
+        ende = min(start + (anzahl or self.SEITENGROESSE), len(auftraege))
+        
+        for auftrag in auftraege[start:ende]:
+            self._fuege_auftrag_ein(jahr_iid, auftrag)
+        self._geladen_pro_jahr[jahr] = ende
+        
+        if ende < len(auftraege):
+            self.tree.insert(jahr_iid, tk.END, iid=mehr_iid,
+                             text=f"Weitere {len(auftraege) - ende} Aufträge laden …",
+                             values=("", "", "", "", ""))
+    
+    def _fuege_auftrag_ein(self, jahr_iid: str, auftrag):
+        """Fügt einen Auftrag als Knoten ein, Positionen folgen beim Aufklappen"""
+        kunde = self.manager.get_kunde(auftrag.kunde_id)
+        kunde_name = kunde.get_vollstaendiger_name() if kunde else "Unbekannt"
+        
+        # Text: Auftragsnummer + Bezeichnung
+        auftrag_text = f"{auftrag.auftragsnummer} {auftrag.bezeichnung}"
+        self.tree.insert(jahr_iid, tk.END, iid=auftrag.id,
+                         text=auftrag_text,
+                         values=(kunde_name, auftrag.status,
+                                 auftrag.erstellt_am.strftime("%d.%m.%Y"),
+                                 f"{auftrag.endpreis:.2f} €", ""))
+        if auftrag.positionen:
+            self._fuege_platzhalter_ein(auftrag.id)
+    
+    def _lade_positionen(self, auftrag_id: str):
+        """Fügt die Positionen eines Auftrags als Child-Nodes ein (nur einmal)"""
+        if not self._entferne_platzhalter(auftrag_id):
+            return
+        
+        auftrag = self.manager.get_auftrag(auftrag_id)
+        if not auftrag:
+            return
+        
+        for index, position in enumerate(auftrag.positionen, start=1):
+            # Format: 01_Bezeichnung (wie in der Ordnerstruktur)
+            position_text = f"{index:02d}_{position.bezeichnung}"
+            position_iid = f"{auftrag.id}_pos_{position.id}"
+            self.tree.insert(auftrag_id, tk.END, iid=position_iid,
+                             text=position_text,
+                             values=self._position_values(position))
+    
+    def _position_values(self, position) -> tuple:
+        """Gibt die Spaltenwerte einer Position zurück"""
+        return (f"{position.menge:.2f}", position.einheit,
+                f"{position.einzelpreis:.2f} €",
+                f"{position.gesamtpreis:.2f} €",
+                position.status)
+    
+    def _on_tree_open(self, event):
+        """Befüllt Jahres- und Auftragsknoten beim Aufklappen"""
+        item = self.tree.focus()
+        if not item:
+            return
+        if item.startswith("jahr_") and not item.endswith(self.MEHR_SUFFIX):
+            jahr = item[len("jahr_"):]
+            if self._geladen_pro_jahr.get(jahr, 0) == 0:
+                self._lade_seite(jahr)
+        elif self.manager.get_auftrag(item):
+            self._lade_positionen(item)
+    
+    def _on_tree_select(self, event):
+        """Lädt die nächste Seite, wenn der 'Weitere laden'-Eintrag gewählt wird"""
+        selection = self.tree.selection()
+        if selection and selection[0].endswith(self.MEHR_SUFFIX):
+            jahr = selection[0][len("jahr_"):-len(self.MEHR_SUFFIX)]
+            self.tree.selection_remove(selection[0])
+            self._lade_seite(jahr)
+    
+    def _on_scroll(self, first, last):
+        """Scrollbar aktualisieren und beim Erreichen des Endes nachladen"""
+        self.vsb.set(first, last)
+        if float(last) < 0.95:
+            return
+        # Sichtbare 'Weitere laden'-Einträge automatisch auflösen
+        for jahr_iid in self.tree.get_children():
+            mehr_iid = f"{jahr_iid}{self.MEHR_SUFFIX}"
+            if self.tree.exists(mehr_iid) and self.tree.item(jahr_iid, "open") and self.tree.bbox(mehr_iid):
+                # Nachladen entkoppeln, da wir uns im Scroll-Callback befinden
+                self.tree.after_idle(self._lade_seite, jahr_iid[len("jahr_"):])
+                break
     
     def _neuer_auftrag(self):
         """Öffnet Dialog für neuen Auftrag"""
@@ -159,8 +353,8 @@ class AuftraegeView:
         """Behandelt Doppelklick - öffnet Bearbeitungsdialog nur für Aufträge"""
         item = self.tree.identify_row(event.y)
         if item:
-            # Prüfe, ob es ein Auftrag ist (keine Position)
-            if "_pos_" not in item:
+            # Prüfe, ob es ein Auftrag ist (keine Position, kein Jahresknoten)
+            if "_pos_" not in item and self.manager.get_auftrag(item):
                 self._bearbeite_auftrag()
     
     def _bearbeite_auftrag(self):
@@ -225,47 +419,154 @@ class AuftraegeView:
         
         try:
             rechnung = self.manager.erstelle_rechnung_aus_auftrag(auftrag_id, stuecklisten_anhaengen=stuecklisten_anhaengen)
-            if rechnung:
-                # Erstelle PDF direkt nach Erstellung
-                try:
-                    from adapter.pdf_generator import PDFGenerator
-                    generator = PDFGenerator(self.manager)
-                    pdf_path = generator.erstelle_rechnung_pdf(rechnung)
-                    
-                    nachricht = f"Rechnung {rechnung.rechnungsnummer} wurde erstellt."
-                    if rechnung.pauschal:
-                        nachricht += "\n\nDie Rechnung wurde als PAUSCHAL markiert."
-                    nachricht += f"\n\nPDF gespeichert unter:\n{pdf_path}"
-                    messagebox.showinfo("Erfolg", nachricht)
-                except Exception as e:
-                    messagebox.showwarning(
-                        "Rechnung erstellt, PDF-Fehler",
-                        f"Rechnung {rechnung.rechnungsnummer} wurde erstellt, aber das PDF konnte nicht erstellt werden:\n{str(e)}"
-                    )
-                
-                # Wechsle zu Rechnungen-Tab und aktualisiere Übersicht
-                if self.hauptfenster:
-                    # Aktualisiere Übersicht
-                    self.hauptfenster.aktualisiere_uebersicht()
-                    # Wechsle zu Rechnungen-Tab (Index 3)
-                    self.hauptfenster.notebook.select(3)
-                else:
-                    # Fallback: Versuche über parent.master das Notebook zu finden
-                    try:
-                        notebook = self.parent.master
-                        if notebook and hasattr(notebook, 'select'):
-                            notebook.select(3)
-                    except:
-                        pass
         except ValueError as e:
             # Fehler bei Status-Prüfung
             messagebox.showerror("Rechnung kann nicht erstellt werden", str(e))
+            return
+        
+        if rechnung:
+            # Erstelle PDF direkt nach Erstellung - im Hintergrund, damit das Fenster bedienbar bleibt
+            self._erstelle_rechnung_pdf(rechnung)
+            
+            # Wechsle zu Rechnungen-Tab und aktualisiere Übersicht
+            if self.hauptfenster:
+                # Aktualisiere Übersicht
+                self.hauptfenster.aktualisiere_uebersicht()
+                # Wechsle zu Rechnungen-Tab (Index 3)
+                self.hauptfenster.notebook.select(3)
+            else:
+                # Fallback: Versuche über parent.master das Notebook zu finden
+                try:
+                    notebook = self.parent.master
+                    if notebook and hasattr(notebook, 'select'):
+                        notebook.select(3)
+                except:
+                    pass
+    
+    def _erstelle_rechnung_pdf(self, rechnung):
+        """Erstellt das PDF einer neuen Rechnung im Hintergrund"""
+        # Daten im Tk-Thread serialisieren, der Worker arbeitet nur mit Kopien
+        try:
+            from adapter.pdf_generator import PDFGenerator
+            daten = PDFGenerator(self.manager).rechnung_daten(rechnung)
+        except ImportError:
+            messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
+            return
+        except (ValueError, OSError) as e:
+            messagebox.showwarning(
+                "Rechnung erstellt, PDF-Fehler",
+                f"Rechnung {rechnung.rechnungsnummer} wurde erstellt, aber das PDF konnte nicht erstellt werden:\n{str(e)}"
+            )
+            return
+        config = self.manager.adapter.get_config()
+        
+        def erstelle_pdf():
+            generator = PDFGenerator(config)
+            return generator.rechnung_erstellen(daten['rechnung'], daten['kunde'], daten['ausgabepfad'])
+        
+        def bei_erfolg(pdf_path):
+            nachricht = f"Rechnung {rechnung.rechnungsnummer} wurde erstellt."
+            if rechnung.pauschal:
+                nachricht += "\n\nDie Rechnung wurde als PAUSCHAL markiert."
+            nachricht += f"\n\nPDF gespeichert unter:\n{pdf_path}"
+            messagebox.showinfo("Erfolg", nachricht)
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showwarning(
+                "Rechnung erstellt, PDF-Fehler",
+                f"Rechnung {rechnung.rechnungsnummer} wurde erstellt, aber das PDF konnte nicht erstellt werden:\n{str(e)}"
+            )
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            erstelle_pdf,
+            beschreibung=f"Erstelle PDF für {rechnung.rechnungsnummer}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler
+        )
+    
+    def _importiere_gaeb(self):
+        """Legt einen Auftrag aus einem GAEB-Leistungsverzeichnis (X83/X84) an"""
+        pfad = filedialog.askopenfilename(
+            title="GAEB-Leistungsverzeichnis importieren",
+            filetypes=[("GAEB DA XML", "*.x83 *.x84 *.x86 *.X83 *.X84 *.X86"), ("Alle Dateien", "*.*")]
+        )
+        if not pfad:
+            return
+        
+        from adapter import gaeb
+        try:
+            kopf = gaeb.lese_kopf(pfad)
+        except (gaeb.GaebFehler, OSError) as e:
+            messagebox.showerror("Fehler", f"Datei kann nicht gelesen werden:\n{str(e)}")
+            return
+        
+        from view.gaeb_import_dialog import GaebImportDialog
+        dialog = GaebImportDialog(self.parent, self.manager, pfad, kopf)
+        if not dialog.result:
+            return
+        kunde_id, bezeichnung, mwst_satz = dialog.result
+        
+        # Lesen im Hintergrund, Übernehmen in den Manager im Tk-Thread
+        def lese(aufgabe):
+            return gaeb.importiere_lv(pfad, kunde_id, bezeichnung, mwst_satz,
+                                      bei_fortschritt=aufgabe.melde_fortschritt,
+                                      abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(ergebnis):
+            auftrag, lv = ergebnis
+            gaeb.uebernehme_lv(self.manager, auftrag, lv, pfad)
+            self._lade_auftraege()
+            messagebox.showinfo("GAEB importieren",
+                                f"Auftrag {auftrag.auftragsnummer} mit {len(auftrag.positionen)} Positionen angelegt.")
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showerror("Fehler", f"Fehler beim GAEB-Import:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            lese,
+            beschreibung=f"Lese {os.path.basename(pfad)}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _exportiere_gaeb(self):
+        """Exportiert den ausgewählten Auftrag als bepreistes LV (GAEB X84)"""
+        auftrag_id = self._get_selected_auftrag_id()
+        auftrag = self.manager.get_auftrag(auftrag_id) if auftrag_id else None
+        if not auftrag:
+            messagebox.showwarning("Keine Auswahl", "Bitte wählen Sie einen Auftrag aus.")
+            return
+        if not auftrag.positionen:
+            messagebox.showwarning("Keine Positionen", "Der Auftrag hat keine Positionen.")
+            return
+        
+        ziel = filedialog.asksaveasfilename(
+            title="GAEB X84 exportieren",
+            defaultextension=".x84",
+            initialfile=f"{auftrag.auftragsnummer}.x84",
+            filetypes=[("GAEB Angebotsabgabe", "*.x84"), ("Alle Dateien", "*.*")]
+        )
+        if not ziel:
+            return
+        
+        from adapter import gaeb
+        lv = gaeb.lade_lv_daten(self.manager.adapter, auftrag.auftragsnummer)
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            gaeb.schreibe_x84, ziel, auftrag, lv, self.manager.adapter.get_config(),
+            beschreibung=f"Exportiere {auftrag.auftragsnummer} als X84",
+            bei_erfolg=lambda summe: messagebox.showinfo(
+                "GAEB exportieren", f"Angebot ({summe:.2f} {lv.get('waehrung', 'EUR')} netto) gespeichert unter:\n{ziel}"),
+            bei_fehler=lambda e: messagebox.showerror("Fehler", f"Fehler beim GAEB-Export:\n{str(e)}")
+        )
     
     def _zeige_kontextmenue(self, event):
         """Zeigt das Kontextmenü bei Rechtsklick"""
         # Prüfe, ob ein Eintrag ausgewählt wurde
         item = self.tree.identify_row(event.y)
-        if item:
+        # Jahresknoten, Platzhalter und 'Weitere laden' haben kein Kontextmenü
+        if item and ("_pos_" in item or self.manager.get_auftrag(item)):
             # Stelle sicher, dass der Eintrag ausgewählt ist
             self.tree.selection_set(item)
             
@@ -423,7 +724,11 @@ class AuftraegeView:
         # Auftrag speichern
         self.manager.update_auftrag(auftrag)
         
-        # Tree-View aktualisieren
-        self._lade_auftraege()
+        # Nur die betroffene Zeile aktualisieren statt den ganzen Baum neu aufzubauen
+        position_iid = f"{auftrag_id}_pos_{position_id}"
+        if self.tree.exists(position_iid):
+            self.tree.item(position_iid, values=self._position_values(position))
+        else:
+            self._lade_auftraege()
 
 
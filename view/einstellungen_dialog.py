@@ -6,6 +6,7 @@ from tkinter import ttk, messagebox, filedialog
 import os
 import shutil
 from adapter.manager import DatenManager
+from view.hintergrund import HintergrundAusfuehrer
 
 
 class EinstellungenDialog:
@@ -14,6 +15,7 @@ class EinstellungenDialog:
     def __init__(self, parent: tk.Widget, manager: DatenManager):
         self.manager = manager
         self.result = False
+        self.migration = None  # Laufende Migrationsaufgabe
         
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Einstellungen")
@@ -56,6 +58,13 @@ class EinstellungenDialog:
                     "automatisch in das neue Verzeichnis kopiert. Das alte Verzeichnis bleibt erhalten.")
         ttk.Label(info_frame, text=info_text, wraplength=550, foreground="gray").pack(anchor=tk.W)
         
+        # Fortschritt der Migration (nur während der Migration sichtbar)
+        self.migration_frame = ttk.Frame(main_frame)
+        self.migration_label = ttk.Label(self.migration_frame, text="")
+        self.migration_label.pack(anchor=tk.W)
+        self.migration_balken = ttk.Progressbar(self.migration_frame, mode="determinate", maximum=1.0)
+        self.migration_balken.pack(fill=tk.X)
+        
         # Unternehmensdaten
         unternehmen_frame = ttk.LabelFrame(main_frame, text="Unternehmensdaten", padding=10)
         unternehmen_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -104,7 +113,8 @@ class EinstellungenDialog:
         button_frame.pack(fill=tk.X, padx=10, pady=10)
         
         ttk.Button(button_frame, text="Abbrechen", command=self._abbrechen).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(button_frame, text="Speichern", command=self._speichern).pack(side=tk.RIGHT, padx=5)
+        self.speichern_button = ttk.Button(button_frame, text="Speichern", command=self._speichern)
+        self.speichern_button.pack(side=tk.RIGHT, padx=5)
     
     def _lade_einstellungen(self):
         """Lädt die aktuellen Einstellungen"""
@@ -138,31 +148,50 @@ class EinstellungenDialog:
         if verzeichnis:
             self.neuer_pfad_var.set(verzeichnis)
     
-    def _migriere_daten(self, alter_pfad: str, neuer_pfad: str) -> bool:
-        """Migriert Daten vom alten zum neuen Pfad"""
-        try:
-            # Erstelle neues Verzeichnis
-            os.makedirs(neuer_pfad, exist_ok=True)
-            
-            # Dateien die kopiert werden sollen
-            dateien = ["kunden.json", "auftraege.json", "rechnungen.json"]
-            
-            for datei in dateien:
-                alter_datei_pfad = os.path.join(alter_pfad, datei)
-                neuer_datei_pfad = os.path.join(neuer_pfad, datei)
-                
-                # Nur kopieren wenn Datei existiert
-                if os.path.exists(alter_datei_pfad):
-                    shutil.copy2(alter_datei_pfad, neuer_datei_pfad)
-            
-            return True
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Migrieren der Daten:\n{str(e)}")
-            return False
+    def _migriere_daten(self, alter_pfad: str, neuer_pfad: str, aufgabe=None) -> int:
+        """
+        Migriert Daten vom alten zum neuen Pfad (läuft im Hintergrund)
+        
+        Kopiert die Stammdaten sowie alle Jahres-/Auftragsordner.
+        
+        Returns:
+            Anzahl kopierter Dateien
+        """
+        # Erstelle neues Verzeichnis
+        os.makedirs(neuer_pfad, exist_ok=True)
+        
+        # Dateien die kopiert werden sollen
+        kopien = []
+        for datei in ["kunden.json", "auftraege.json", "rechnungen.json"]:
+            alter_datei_pfad = os.path.join(alter_pfad, datei)
+            # Nur kopieren wenn Datei existiert
+            if os.path.exists(alter_datei_pfad):
+                kopien.append((alter_datei_pfad, os.path.join(neuer_pfad, datei)))
+        
+        # Jahresordner (YYYY/YYYY-XXXX/...) inkl. leerer Unterordner
+        if os.path.isdir(alter_pfad):
+            for eintrag in os.listdir(alter_pfad):
+                jahresordner = os.path.join(alter_pfad, eintrag)
+                if not (eintrag.isdigit() and os.path.isdir(jahresordner)):
+                    continue
+                for wurzel, _, dateien in os.walk(jahresordner):
+                    ziel_ordner = os.path.join(neuer_pfad, os.path.relpath(wurzel, alter_pfad))
+                    os.makedirs(ziel_ordner, exist_ok=True)
+                    for datei in dateien:
+                        kopien.append((os.path.join(wurzel, datei), os.path.join(ziel_ordner, datei)))
+        
+        for index, (quelle, ziel) in enumerate(kopien, start=1):
+            if aufgabe:
+                aufgabe.pruefe_abbruch()
+                aufgabe.melde_fortschritt(index / len(kopien), f"{index}/{len(kopien)} Dateien")
+            shutil.copy2(quelle, ziel)
+        
+        return len(kopien)
     
     def _speichern(self):
         """Speichert die Einstellungen"""
-        config = self.manager.adapter.get_config()
+        if self.migration is not None:
+            return
         
         # Neuer Datenpfad
         neuer_pfad = self.neuer_pfad_var.get().strip()
@@ -180,14 +209,62 @@ class EinstellungenDialog:
                 # Migriere Daten
                 if messagebox.askyesno("Daten migrieren", 
                                      f"Möchten Sie die vorhandenen Daten nach\n{neuer_pfad}\nmigrieren?"):
-                    if not self._migriere_daten(alter_pfad, neuer_pfad):
-                        return
+                    self._starte_migration(alter_pfad, neuer_pfad)
+                    return
                 
-                # Setze neuen Pfad
-                self.manager.adapter.setze_daten_pfad(neuer_pfad)
-                # Lade Daten neu
-                self.manager.lade_alle_daten()
-                messagebox.showinfo("Erfolg", f"Datenverzeichnis wurde auf\n{neuer_pfad}\ngeändert.")
+                self._wechsle_daten_pfad(neuer_pfad)
+        
+        self._speichere_unternehmensdaten()
+    
+    def _starte_migration(self, alter_pfad: str, neuer_pfad: str):
+        """Startet die Datenmigration im Hintergrund und zeigt den Fortschritt an"""
+        # Ausstehende Schreibvorgänge abschließen, damit der aktuelle Stand kopiert wird
+        self.manager.warte_auf_speicherung()
+        
+        self.speichern_button.config(state="disabled")
+        self.migration_label.config(text="Migriere Daten …")
+        self.migration_balken.config(value=0)
+        self.migration_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        def bei_erfolg(anzahl: int):
+            self.migration = None
+            self._wechsle_daten_pfad(neuer_pfad)
+            self._speichere_unternehmensdaten()
+        
+        def bei_fehler(e: BaseException):
+            self._migration_beendet()
+            messagebox.showerror("Fehler", f"Fehler beim Migrieren der Daten:\n{str(e)}")
+        
+        def bei_fortschritt(wert, text):
+            self.migration_balken.config(value=wert or 0)
+            self.migration_label.config(text=f"Migriere Daten … {text}")
+        
+        self.migration = HintergrundAusfuehrer.fuer_widget(self.dialog).starte(
+            self._migriere_daten, alter_pfad, neuer_pfad,
+            beschreibung="Migriere Daten",
+            mit_aufgabe=True,
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            bei_fortschritt=bei_fortschritt,
+            bei_abbruch=self._migration_beendet
+        )
+    
+    def _migration_beendet(self):
+        """Setzt die Oberfläche nach Fehler oder Abbruch der Migration zurück"""
+        self.migration = None
+        self.migration_frame.pack_forget()
+        self.speichern_button.config(state="normal")
+    
+    def _wechsle_daten_pfad(self, neuer_pfad: str):
+        """Setzt den neuen Datenpfad und lädt die Daten neu"""
+        self.manager.adapter.setze_daten_pfad(neuer_pfad)
+        # Lade Daten neu
+        self.manager.lade_alle_daten()
+        messagebox.showinfo("Erfolg", f"Datenverzeichnis wurde auf\n{neuer_pfad}\ngeändert.")
+    
+    def _speichere_unternehmensdaten(self):
+        """Speichert die Unternehmensdaten und schließt den Dialog"""
+        config = self.manager.adapter.get_config()
         
         # Unternehmensdaten speichern
         config.setdefault("unternehmen", {})
@@ -207,6 +284,9 @@ class EinstellungenDialog:
         self.dialog.destroy()
     
     def _abbrechen(self):
-        """Bricht den Dialog ab"""
+        """Bricht den Dialog ab (bzw. zuerst eine laufende Migration)"""
+        if self.migration is not None:
+            self.migration.abbrechen()
+            return
         self.dialog.destroy()
 
@@ -0,0 +1,77 @@
+"""
+Dialog für den Import eines GAEB-Leistungsverzeichnisses als Auftrag
+"""
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox
+from typing import Any, Dict
+
+from adapter.manager import DatenManager
+
+
+class GaebImportDialog:
+    """Fragt Kunde, Bezeichnung und MwSt-Satz für den Auftrag aus einem LV ab"""
+    
+    def __init__(self, parent: tk.Widget, manager: DatenManager, pfad: str, kopf: Dict[str, Any]):
+        self.manager = manager
+        self.result = None  # (kunde_id, bezeichnung, mwst_satz) nach "Importieren"
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"GAEB importieren - {os.path.basename(pfad)}")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self._erstelle_ui(kopf)
+        
+        self.dialog.wait_window()
+    
+    def _erstelle_ui(self, kopf: Dict[str, Any]):
+        """Erstellt die Benutzeroberfläche"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        projekt = " - ".join(t for t in (kopf.get("projekt"), kopf.get("bezeichnung")) if t)
+        ttk.Label(main_frame, text=f"Projekt: {projekt or '(ohne Angabe)'}").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+        
+        ttk.Label(main_frame, text="Kunde:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.kunden = sorted(self.manager.get_kunden(), key=lambda k: k.get_vollstaendiger_name().casefold())
+        self.kunde_var = tk.StringVar()
+        ttk.Combobox(main_frame, textvariable=self.kunde_var, state="readonly", width=40,
+                     values=[k.get_vollstaendiger_name() for k in self.kunden]).grid(row=1, column=1, sticky=tk.EW, pady=2)
+        
+        ttk.Label(main_frame, text="Bezeichnung:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.bezeichnung_var = tk.StringVar(value=kopf.get("bezeichnung") or kopf.get("projekt") or "")
+        ttk.Entry(main_frame, textvariable=self.bezeichnung_var, width=42).grid(row=2, column=1, sticky=tk.EW, pady=2)
+        
+        ttk.Label(main_frame, text="MwSt-Satz (%):").grid(row=3, column=0, sticky=tk.W, pady=2)
+        self.mwst_var = tk.StringVar(value="19")
+        ttk.Entry(main_frame, textvariable=self.mwst_var, width=8).grid(row=3, column=1, sticky=tk.W, pady=2)
+        
+        main_frame.grid_columnconfigure(1, weight=1)
+        
+        # Buttons
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="Abbrechen", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Importieren", command=self._importieren).pack(side=tk.RIGHT, padx=5)
+    
+    def _importieren(self):
+        """Prüft die Eingaben und schließt den Dialog"""
+        namen = [k.get_vollstaendiger_name() for k in self.kunden]
+        if self.kunde_var.get() not in namen:
+            messagebox.showwarning("Fehler", "Bitte wählen Sie einen Kunden aus.", parent=self.dialog)
+            return
+        if not self.bezeichnung_var.get().strip():
+            messagebox.showwarning("Fehler", "Bitte geben Sie eine Bezeichnung ein.", parent=self.dialog)
+            return
+        try:
+            mwst_satz = float(self.mwst_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Fehler", "Ungültiger MwSt-Satz.", parent=self.dialog)
+            return
+        
+        kunde = self.kunden[namen.index(self.kunde_var.get())]
+        self.result = (kunde.id, self.bezeichnung_var.get().strip(), mwst_satz)
+        self.dialog.destroy()
@@ -1,22 +1,91 @@
 """
 Hauptfenster der Anwendung
 """
+import json
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from typing import Callable, Optional
+from adapter import messung, startprofil
 from adapter.manager import DatenManager
+from view.hintergrund import HintergrundAusfuehrer, Statusleiste
 
 
 class Hauptfenster:
     """Hauptfenster der Auftragsverwaltung"""
     
-    def __init__(self, root: tk.Tk, manager: DatenManager):
+    # Intervall, in dem auf neu fällig gewordene Rechnungen geprüft wird
+    FAELLIGKEIT_PRUEFINTERVALL_MS = 60 * 1000
+    
+    # Intervall, in dem der Zeitplan der Wartungsaufgaben geprüft wird
+    WARTUNG_PRUEFINTERVALL_MS = 60 * 1000
+    
+    # Protokoll der Startzeiten (eine JSON-Zeile pro Programmstart)
+    STARTZEITEN_DATEI = os.path.join("logs", "startzeiten.jsonl")
+    
+    def __init__(self, root: tk.Tk, manager: DatenManager, daten_laden: bool = False,
+                 startzeit: Optional[float] = None):
+        """
+        Args:
+            root: Tk-Hauptfenster
+            manager: Datenmanager
+            daten_laden: Wenn True, werden die Daten im Hintergrund geladen
+                (Manager wurde mit sofort_laden=False erzeugt)
+            startzeit: time.perf_counter() beim Programmstart (für Startzeit-Messung)
+        """
         self.root = root
         self.manager = manager
         self.root.title("Auftragsverwaltung - R. W. Kiermeier")
         self.root.geometry("1200x800")
         
-        self._erstelle_menue()
-        self._erstelle_ui()
+        # Laufzeitmessung (diagnose.messung der Konfiguration) vor dem Laden der Daten einschalten
+        messung.aktiviere_aus_config(self.manager.adapter.get_config())
+        
+        self.startzeit = startzeit if startzeit is not None else time.perf_counter()
+        self.startmetriken = {}
+        self.daten_geladen = not daten_laden
+        
+        # Views werden erst beim ersten Öffnen des jeweiligen Tabs erstellt
+        self.kunden_view = None
+        self.auftraege_view = None
+        self.rechnungen_view = None
+        
+        # Gemeinsamer Hintergrund-Ausführer für blockierende Aktionen
+        with startprofil.phase("Hintergrund-Ausführer"):
+            self.ausfuehrer = HintergrundAusfuehrer.fuer_widget(self.root)
+        
+        # Wartungsaufgaben nach Zeitplan (laufen im Thread-Pool des Ausführers)
+        self.planer = None
+        self._laufende_wartung = set()
+        self.manager.aktiviere_hintergrund_speicherung(bei_fehler=self._melde_speicherfehler)
+        
+        with startprofil.phase("Menü erstellen"):
+            self._erstelle_menue()
+        with startprofil.phase("Oberfläche erstellen"):
+            self._erstelle_ui()
+        
+        # Tab-Badge für überfällige Rechnungen
+        self.manager.ueberfaellig.registriere_beobachter(lambda _: self._aktualisiere_rechnungen_tab())
+        self.root.after(self.FAELLIGKEIT_PRUEFINTERVALL_MS, self._pruefe_faelligkeiten)
+        self.root.after(self.WARTUNG_PRUEFINTERVALL_MS, self._pruefe_wartung)
+        
+        # Zeit bis zur ersten Darstellung messen: das erste <Expose> kommt, wenn das
+        # Fenster sichtbar ist (after_idle könnte schon vor dem Einblenden laufen)
+        self._expose_bindung = self.root.bind("<Expose>", self._erstes_bild_gezeichnet, add="+")
+        
+        if daten_laden:
+            self._lade_daten()
+    
+    def _lade_daten(self):
+        """Lädt die Daten im Hintergrund (beim Start und nach einem Ladefehler)"""
+        self.ausfuehrer.starte(
+            self.manager.lade_alle_daten,
+            beschreibung="Lade Daten",
+            bei_erfolg=lambda _: self._daten_geladen(),
+            bei_fehler=self._daten_ladefehler
+        )
     
     def _erstelle_menue(self):
         """Erstellt die Menüleiste"""
@@ -27,6 +96,10 @@ class Hauptfenster:
         datei_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Datei", menu=datei_menu)
         datei_menu.add_command(label="Einstellungen...", command=self._oeffne_einstellungen)
+        datei_menu.add_command(label="Lieferantenkatalog importieren...", command=self._importiere_katalog)
+        datei_menu.add_command(label="DATEV-Export...", command=self._exportiere_datev)
+        datei_menu.add_command(label="Wartungsaufgaben...", command=self._oeffne_wartung)
+        datei_menu.add_command(label="Messwerte...", command=self._oeffne_messwerte)
         datei_menu.add_separator()
         datei_menu.add_command(label="Beenden", command=self.root.quit)
         
@@ -39,6 +112,10 @@ class Hauptfenster:
     
     def _erstelle_ui(self):
         """Erstellt die Benutzeroberfläche"""
+        # Statusleiste mit Beschäftigt-Anzeige (unten)
+        self.statusleiste = Statusleiste(self.root, self.ausfuehrer, self.manager)
+        self.statusleiste.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
+        
         # Notebook für Tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -46,25 +123,194 @@ class Hauptfenster:
         # Übersichts-Tab
         self.uebersicht_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.uebersicht_frame, text="Übersicht")
-        self._erstelle_uebersicht()
         
-        # Kunden-Tab
+        # Kunden-, Aufträge- und Rechnungen-Tab (Inhalt wird beim ersten Öffnen erstellt)
         self.kunden_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.kunden_frame, text="Kunden")
-        self._erstelle_kunden_ui()
         
-        # Aufträge-Tab
         self.auftraege_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.auftraege_frame, text="Aufträge")
-        self._erstelle_auftraege_ui()
         
-        # Rechnungen-Tab
         self.rechnungen_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.rechnungen_frame, text="Rechnungen")
-        self._erstelle_rechnungen_ui()
         
-        # Speichere Referenz zur RechnungenView für spätere Updates
-        self.rechnungen_view = None
+        self._tab_erbauer = {
+            str(self.kunden_frame): self._erstelle_kunden_ui,
+            str(self.auftraege_frame): self._erstelle_auftraege_ui,
+            str(self.rechnungen_frame): self._erstelle_rechnungen_ui,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_gewechselt)
+        
+        if self.daten_geladen:
+            self._erstelle_uebersicht()
+            self._aktualisiere_rechnungen_tab()
+        else:
+            self._erstelle_ladeanzeige()
+    
+    def _erstelle_ladeanzeige(self):
+        """Zeigt eine Ladeanzeige, solange die Daten im Hintergrund geladen werden"""
+        for index in (1, 2, 3):
+            self.notebook.tab(index, state="disabled")
+        for kind in self.uebersicht_frame.winfo_children():
+            kind.destroy()
+        
+        lade_frame = ttk.Frame(self.uebersicht_frame, padding=20)
+        lade_frame.pack(fill=tk.X)
+        ttk.Label(lade_frame, text="Daten werden geladen …", font=("Arial", 12)).pack(anchor=tk.W)
+        balken = ttk.Progressbar(lade_frame, mode="indeterminate", length=300)
+        balken.pack(anchor=tk.W, pady=10)
+        balken.start(15)
+    
+    def _daten_geladen(self):
+        """Wird im Tk-Thread aufgerufen, sobald die Daten geladen sind"""
+        self.daten_geladen = True
+        self.startmetriken["daten_geladen_s"] = round(time.perf_counter() - self.startzeit, 3)
+        startprofil.markiere("Daten geladen")
+        
+        with startprofil.phase("Übersicht aufbauen"):
+            for index in (1, 2, 3):
+                self.notebook.tab(index, state="normal")
+            self.aktualisiere_uebersicht()
+            self._aktualisiere_rechnungen_tab()
+            # Falls bereits ein Tab ausgewählt ist, dessen Inhalt jetzt erstellen
+            self._on_tab_gewechselt()
+        self._protokolliere_startzeiten()
+    
+    def _daten_ladefehler(self, fehler: BaseException):
+        """
+        Zeigt einen Fehler beim Laden der Daten an
+        
+        Die Tabs bleiben gesperrt: Der Manager ist nur teilweise gefüllt, und ein
+        Speichern würde die vorhandenen Dateien mit diesem Stand überschreiben.
+        """
+        messagebox.showerror("Fehler", f"Die Daten konnten nicht geladen werden:\n{fehler}")
+        for kind in self.uebersicht_frame.winfo_children():
+            kind.destroy()
+        
+        fehler_frame = ttk.Frame(self.uebersicht_frame, padding=20)
+        fehler_frame.pack(fill=tk.X)
+        ttk.Label(fehler_frame, text="Die Daten konnten nicht geladen werden.",
+                  font=("Arial", 12, "bold")).pack(anchor=tk.W)
+        ttk.Label(fehler_frame, text=str(fehler), wraplength=800).pack(anchor=tk.W, pady=(5, 10))
+        
+        button_frame = ttk.Frame(fehler_frame)
+        button_frame.pack(anchor=tk.W)
+        ttk.Button(button_frame, text="Erneut versuchen", command=self._erneut_laden).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Beenden", command=self.root.quit).pack(side=tk.LEFT)
+    
+    def _erneut_laden(self):
+        """Startet das Laden der Daten nach einem Fehler erneut"""
+        self._erstelle_ladeanzeige()
+        self._lade_daten()
+    
+    def _aktualisiere_rechnungen_tab(self):
+        """Zeigt die Anzahl überfälliger Rechnungen im Tab-Text an"""
+        anzahl = self.manager.ueberfaellig.anzahl()
+        tab_text = f"Rechnungen ⚠{anzahl}" if anzahl > 0 else "Rechnungen"
+        self.notebook.tab(self.rechnungen_frame, text=tab_text)
+    
+    def _pruefe_faelligkeiten(self):
+        """Prüft regelmäßig, ob Rechnungen während der Sitzung fällig geworden sind"""
+        if self.daten_geladen:
+            # Benachrichtigt bei Änderungen Badge und Rechnungen-View
+            self.manager.ueberfaellig.pruefe()
+        self.root.after(self.FAELLIGKEIT_PRUEFINTERVALL_MS, self._pruefe_faelligkeiten)
+    
+    def _pruefe_wartung(self):
+        """Startet regelmäßig die laut Zeitplan fälligen Wartungsaufgaben"""
+        if self.daten_geladen:
+            for name in self.get_planer().faellige():
+                self.starte_wartungsaufgabe(name)
+        self.root.after(self.WARTUNG_PRUEFINTERVALL_MS, self._pruefe_wartung)
+    
+    def get_planer(self):
+        """Gibt den Planer der Wartungsaufgaben zurück (wird bei Bedarf erzeugt)"""
+        if self.planer is None:
+            from adapter.zeitplan import Planer
+            self.planer = Planer(self.manager.adapter.config_path, manager=self.manager)
+        return self.planer
+    
+    def wartung_laeuft(self, name: str) -> bool:
+        """Gibt zurück, ob die Wartungsaufgabe gerade in dieser Sitzung läuft"""
+        return name in self._laufende_wartung
+    
+    def starte_wartungsaufgabe(self, name: str, ausloeser: str = "zeitplan",
+                               bei_fertig: Optional[Callable[[dict], None]] = None):
+        """
+        Führt eine Wartungsaufgabe im Hintergrund aus (nie im Tk-Thread)
+        
+        Args:
+            name: Name der Aufgabe (siehe adapter.zeitplan.AUFGABEN)
+            ausloeser: "zeitplan" oder "manuell" (für den Verlauf)
+            bei_fertig: Callback mit dem Verlaufseintrag (im Tk-Thread)
+        """
+        if name in self._laufende_wartung:
+            return
+        self._laufende_wartung.add(name)
+        planer = self.get_planer()
+        
+        def fuehre_aus(aufgabe):
+            return planer.fuehre_aus(name, ausloeser, abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(eintrag):
+            self._laufende_wartung.discard(name)
+            if eintrag.get("ok") is False and ausloeser == "zeitplan":
+                messagebox.showwarning("Wartung", f"Die Wartungsaufgabe '{name}' ist fehlgeschlagen:\n"
+                                                  f"{eintrag.get('fehler')}")
+            if bei_fertig:
+                bei_fertig(eintrag)
+        
+        def bei_fehler(e: BaseException):
+            self._laufende_wartung.discard(name)
+            messagebox.showerror("Fehler", f"Fehler bei der Wartungsaufgabe '{name}':\n{str(e)}")
+        
+        self.ausfuehrer.starte(
+            fuehre_aus,
+            beschreibung=f"Wartung: {name}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            bei_abbruch=lambda: self._laufende_wartung.discard(name),
+            mit_aufgabe=True
+        )
+    
+    def _erstes_bild_gezeichnet(self, event=None):
+        """Misst die Zeit vom Programmstart bis zur ersten Darstellung des Fensters"""
+        if "erstes_bild_s" in self.startmetriken:
+            return
+        self.root.unbind("<Expose>", self._expose_bindung)
+        # Ausstehendes Layout und Neuzeichnen abschließen, dann gilt das Fenster als gezeichnet
+        self.root.update_idletasks()
+        self.startmetriken["erstes_bild_s"] = round(time.perf_counter() - self.startzeit, 3)
+        startprofil.markiere("erstes Bild")
+        if self.daten_geladen:
+            self._protokolliere_startzeiten()
+    
+    def _protokolliere_startzeiten(self):
+        """Hängt die Startzeiten an das Protokoll an (sobald beide Messwerte vorliegen)"""
+        if "erstes_bild_s" not in self.startmetriken or self.startmetriken.get("protokolliert"):
+            return
+        self.startmetriken["protokolliert"] = True
+        # Der Start ist abgeschlossen: Zeitstrahl ausgeben bzw. Trace schreiben (falls eingeschaltet)
+        try:
+            startprofil.beende()
+        except OSError as e:
+            print(f"Warnung: Startprofil konnte nicht geschrieben werden: {e}")
+        eintrag = {"zeitpunkt": datetime.now().isoformat(timespec="seconds")}
+        eintrag.update({k: v for k, v in self.startmetriken.items() if k != "protokolliert"})
+        try:
+            os.makedirs(os.path.dirname(self.STARTZEITEN_DATEI), exist_ok=True)
+            with open(self.STARTZEITEN_DATEI, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(eintrag) + "\n")
+        except OSError as e:
+            print(f"Warnung: Startzeiten konnten nicht protokolliert werden: {e}")
+    
+    def _on_tab_gewechselt(self, event=None):
+        """Erstellt den Inhalt eines Tabs beim ersten Öffnen"""
+        if not self.daten_geladen:
+            return
+        erbauer = self._tab_erbauer.pop(self.notebook.select(), None)
+        if erbauer:
+            erbauer()
     
     def _erstelle_uebersicht(self):
         """Erstellt die Übersichtsseite"""
@@ -90,7 +336,7 @@ class Hauptfenster:
     def _erstelle_kunden_ui(self):
         """Erstellt die Kunden-UI"""
         from view.kunden_view import KundenView
-        KundenView(self.kunden_frame, self.manager)
+        self.kunden_view = KundenView(self.kunden_frame, self.manager)
     
     def _erstelle_auftraege_ui(self):
         """Erstellt die Aufträge-UI"""
@@ -102,29 +348,131 @@ class Hauptfenster:
         from view.rechnungen_view import RechnungenView
         self.rechnungen_view = RechnungenView(self.rechnungen_frame, self.manager)
     
+    def _melde_speicherfehler(self, fehler: BaseException):
+        """Zeigt Fehler der Hintergrundspeicherung an (wird aus dem Speicher-Thread aufgerufen)"""
+        self.ausfuehrer.im_tk_thread(
+            messagebox.showerror, "Fehler beim Speichern",
+            f"Die Daten konnten nicht gespeichert werden:\n{fehler}"
+        )
+    
     def _oeffne_kunden(self):
         """Öffnet den Kunden-Tab"""
-        self.notebook.select(1)
+        if self.daten_geladen:
+            self.notebook.select(1)
     
     def _oeffne_auftraege(self):
         """Öffnet den Aufträge-Tab"""
-        self.notebook.select(2)
+        if self.daten_geladen:
+            self.notebook.select(2)
     
     def _oeffne_rechnungen(self):
         """Öffnet den Rechnungen-Tab"""
-        self.notebook.select(3)
+        if self.daten_geladen:
+            self.notebook.select(3)
     
     def _oeffne_einstellungen(self):
         """Öffnet den Einstellungsdialog"""
+        if not self.daten_geladen:
+            return
         from view.einstellungen_dialog import EinstellungenDialog
         dialog = EinstellungenDialog(self.root, self.manager)
         if dialog.result:
             self.aktualisiere_uebersicht()
     
+    def _oeffne_wartung(self):
+        """Öffnet die Übersicht der Wartungsaufgaben"""
+        if not self.daten_geladen:
+            return
+        from view.wartung_dialog import WartungDialog
+        WartungDialog(self.root, self)
+    
+    def _oeffne_messwerte(self):
+        """Öffnet die Messwerte von Datenmanager und Datenadapter"""
+        from view.messung_dialog import MessungDialog
+        MessungDialog(self.root)
+    
+    def _importiere_katalog(self):
+        """Importiert einen Lieferantenkatalog (Datanorm/BMEcat) für die Artikelsuche der Stücklisten"""
+        if not self.daten_geladen:
+            return
+        pfad = filedialog.askopenfilename(
+            title="Lieferantenkatalog importieren",
+            filetypes=[("Datanorm und BMEcat", "*.0* *.xml *.bmecat"), ("Alle Dateien", "*.*")]
+        )
+        if not pfad:
+            return
+        
+        from adapter import katalog
+        try:
+            format = katalog.erkenne_format(pfad)
+        except (katalog.KatalogFehler, OSError) as e:
+            messagebox.showerror("Fehler", str(e))
+            return
+        lieferant = None
+        if format == "datanorm":
+            # Datanorm-Dateien enthalten keinen eindeutigen Lieferantennamen
+            lieferant = simpledialog.askstring("Lieferant", "Name des Lieferanten:",
+                                               initialvalue=katalog.standard_lieferant(pfad, format),
+                                               parent=self.root)
+            if not lieferant:
+                return
+        ziel = katalog.katalog_pfad(self.manager.adapter.get_daten_pfad())
+        
+        def importiere(aufgabe):
+            # Eigene Verbindung im Worker-Thread
+            return katalog.Katalog(ziel).importiere(pfad, lieferant, format,
+                                                    bei_fortschritt=aufgabe.melde_fortschritt,
+                                                    abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(ergebnis):
+            messagebox.showinfo("Lieferantenkatalog", katalog.zusammenfassung(ergebnis))
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showerror("Fehler", f"Fehler beim Import des Katalogs:\n{str(e)}")
+        
+        self.ausfuehrer.starte(
+            importiere,
+            beschreibung=f"Importiere Katalog {os.path.basename(pfad)}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _exportiere_datev(self):
+        """Exportiert Rechnungen und Zahlungen eines Monats als DATEV-Buchungsstapel"""
+        if not self.daten_geladen:
+            return
+        from adapter import datev
+        von, bis = datev.vormonat()
+        eingabe = simpledialog.askstring("DATEV-Export", "Monat (MM.JJJJ):",
+                                         initialvalue=von.strftime("%m.%Y"), parent=self.root)
+        if not eingabe:
+            return
+        try:
+            von = datetime.strptime(eingabe.strip(), "%m.%Y").date()
+        except ValueError:
+            messagebox.showerror("Fehler", "Bitte den Monat im Format MM.JJJJ angeben.")
+            return
+        bis = datev.vormonat((von + timedelta(days=32)).replace(day=1))[1]
+        adapter = self.manager.adapter
+        
+        def exportiere():
+            # Ausstehende Schreibvorgänge abwarten, damit der Export den aktuellen Stand liest
+            self.manager.warte_auf_speicherung()
+            return datev.exportiere(adapter, datev.standard_ziel(adapter, von, bis), von, bis)
+        
+        self.ausfuehrer.starte(
+            exportiere,
+            beschreibung=f"DATEV-Export {eingabe}",
+            bei_erfolg=lambda ergebnis: messagebox.showinfo("DATEV-Export", datev.zusammenfassung(ergebnis)),
+            bei_fehler=lambda e: messagebox.showerror("Fehler", f"Fehler beim DATEV-Export:\n{str(e)}")
+        )
+    
     def aktualisiere_uebersicht(self):
         """Aktualisiert die Übersicht"""
-        self.notebook.forget(0)
-        self.uebersicht_frame = ttk.Frame(self.notebook)
-        self.notebook.insert(0, self.uebersicht_frame, text="Übersicht")
+        # Inhalt an Ort und Stelle neu aufbauen: forget() des ausgewählten Tabs
+        # würde den nächsten Tab auswählen (und dessen Inhalt erstellen)
+        for kind in self.uebersicht_frame.winfo_children():
+            kind.destroy()
         self._erstelle_uebersicht()
 
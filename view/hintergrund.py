@@ -0,0 +1,284 @@
+"""
+Hintergrundausführung für blockierende Aktionen der Views
+
+Arbeit (PDF-Erstellung, Dateikopien, ...) läuft in einem Thread- bzw.
+Prozess-Pool. Ergebnisse, Fehler und Fortschrittsmeldungen werden über eine
+Queue zurückgegeben, die per ``root.after`` im Tk-Hauptthread abgearbeitet
+wird. Callbacks dürfen daher gefahrlos auf Widgets zugreifen.
+"""
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import Callable, Optional, List, Any
+
+
+class AufgabeAbgebrochen(Exception):
+    """Wird ausgelöst, wenn eine Aufgabe auf Wunsch des Benutzers abbricht"""
+    pass
+
+
+class Aufgabe:
+    """Handle für eine laufende Hintergrundaufgabe"""
+    
+    def __init__(self, ausfuehrer: 'HintergrundAusfuehrer', beschreibung: str, abbrechbar: bool):
+        self._ausfuehrer = ausfuehrer
+        self.beschreibung = beschreibung
+        self.abbrechbar = abbrechbar
+        self.fortschritt: Optional[float] = None  # 0.0 - 1.0, None = unbestimmt
+        self.fortschritt_text = ""
+        self.future = None
+        self._abbruch = threading.Event()
+    
+    @property
+    def abgebrochen(self) -> bool:
+        """Gibt zurück, ob ein Abbruch angefordert wurde"""
+        return self._abbruch.is_set()
+    
+    def abbrechen(self):
+        """Fordert den Abbruch an (wirkt sofort, falls die Aufgabe noch wartet)"""
+        self._abbruch.set()
+        if self.future is not None:
+            self.future.cancel()
+    
+    def pruefe_abbruch(self):
+        """Wirft AufgabeAbgebrochen, falls ein Abbruch angefordert wurde (im Worker aufrufen)"""
+        if self._abbruch.is_set():
+            raise AufgabeAbgebrochen(self.beschreibung)
+    
+    def melde_fortschritt(self, wert: Optional[float], text: str = ""):
+        """Meldet Fortschritt aus dem Worker (threadsicher)"""
+        self._ausfuehrer._queue.put(("fortschritt", self, (wert, text)))
+
+
+class HintergrundAusfuehrer:
+    """Thread-/Prozess-Pool mit Tk-sicherer Rückgabe der Ergebnisse"""
+    
+    POLL_INTERVALL_MS = 50
+    
+    def __init__(self, root: tk.Misc, max_worker: Optional[int] = None):
+        self.root = root
+        self._threads = ThreadPoolExecutor(max_workers=max_worker or min(8, (os.cpu_count() or 1) + 2),
+                                           thread_name_prefix="hintergrund")
+        self._prozesse = None  # Wird erst bei Bedarf gestartet
+        self._queue: "queue.Queue" = queue.Queue()
+        self._aufgaben: List[Aufgabe] = []
+        self._beobachter: List[Callable[[List[Aufgabe]], None]] = []
+        self._beendet = False
+        self.root.after(self.POLL_INTERVALL_MS, self._verarbeite_queue)
+    
+    @classmethod
+    def fuer_widget(cls, widget: tk.Misc) -> 'HintergrundAusfuehrer':
+        """Gibt den Ausführer des Hauptfensters zurück (wird bei Bedarf erzeugt)"""
+        root = widget._root()
+        ausfuehrer = getattr(root, "_hintergrund_ausfuehrer", None)
+        if ausfuehrer is None:
+            ausfuehrer = cls(root)
+            root._hintergrund_ausfuehrer = ausfuehrer
+        return ausfuehrer
+    
+    def starte(self,
+               funktion: Callable[..., Any],
+               *args,
+               beschreibung: str = "",
+               bei_erfolg: Optional[Callable[[Any], None]] = None,
+               bei_fehler: Optional[Callable[[BaseException], None]] = None,
+               bei_fortschritt: Optional[Callable[[Optional[float], str], None]] = None,
+               bei_abbruch: Optional[Callable[[], None]] = None,
+               mit_aufgabe: bool = False,
+               prozess: bool = False,
+               **kwargs) -> Aufgabe:
+        """
+        Führt eine Funktion im Hintergrund aus
+        
+        Args:
+            funktion: Auszuführende Funktion
+            beschreibung: Text für die Statusanzeige
+            bei_erfolg: Callback mit dem Rückgabewert (im Tk-Thread)
+            bei_fehler: Callback mit der Exception (im Tk-Thread)
+            bei_fortschritt: Callback mit (wert, text) (im Tk-Thread)
+            bei_abbruch: Callback nach einem Abbruch (im Tk-Thread)
+            mit_aufgabe: Übergibt das Aufgabe-Objekt als Keyword ``aufgabe`` an die
+                Funktion (für Fortschritt und Abbruch)
+            prozess: Im Prozess-Pool ausführen (für CPU-lastige Arbeit; Funktion
+                und Argumente müssen picklebar sein, kein Fortschritt möglich)
+        
+        Returns:
+            Das Aufgabe-Handle
+        """
+        aufgabe = Aufgabe(self, beschreibung, abbrechbar=mit_aufgabe or not prozess)
+        aufgabe._callbacks = (bei_erfolg, bei_fehler, bei_fortschritt, bei_abbruch)
+        
+        if prozess:
+            if mit_aufgabe:
+                raise ValueError("Fortschritt/Abbruch ist im Prozess-Pool nicht verfügbar")
+            if self._prozesse is None:
+                # Erst bei Bedarf importieren (multiprocessing verlängert den Programmstart)
+                from concurrent.futures import ProcessPoolExecutor
+                self._prozesse = ProcessPoolExecutor()
+            aufgabe.future = self._prozesse.submit(funktion, *args, **kwargs)
+        else:
+            if mit_aufgabe:
+                kwargs["aufgabe"] = aufgabe
+            aufgabe.future = self._threads.submit(funktion, *args, **kwargs)
+        
+        aufgabe.future.add_done_callback(lambda f: self._queue.put(("fertig", aufgabe, f)))
+        self._aufgaben.append(aufgabe)
+        self._benachrichtige()
+        return aufgabe
+    
+    def im_tk_thread(self, funktion: Callable[..., Any], *args):
+        """Führt eine Funktion (threadsicher aufrufbar) im Tk-Hauptthread aus"""
+        self._queue.put(("aufruf", None, (funktion, args)))
+    
+    def get_aktive_aufgaben(self) -> List[Aufgabe]:
+        """Gibt alle noch laufenden Aufgaben zurück"""
+        return list(self._aufgaben)
+    
+    def ist_beschaeftigt(self) -> bool:
+        """Gibt zurück, ob Aufgaben laufen"""
+        return bool(self._aufgaben)
+    
+    def registriere_beobachter(self, beobachter: Callable[[List[Aufgabe]], None]):
+        """Registriert einen Callback, der bei Änderungen der Aufgabenliste aufgerufen wird"""
+        self._beobachter.append(beobachter)
+    
+    def beenden(self, warten: bool = True):
+        """Beendet die Pools (beim Schließen der Anwendung)"""
+        self._beendet = True
+        for aufgabe in self._aufgaben:
+            aufgabe.abbrechen()
+        self._threads.shutdown(wait=warten)
+        if self._prozesse is not None:
+            self._prozesse.shutdown(wait=warten)
+    
+    def _benachrichtige(self):
+        """Informiert alle Beobachter über die aktuelle Aufgabenliste"""
+        for beobachter in self._beobachter:
+            try:
+                beobachter(self.get_aktive_aufgaben())
+            except tk.TclError:
+                pass
+    
+    def _verarbeite_queue(self):
+        """Arbeitet Ergebnisse und Fortschrittsmeldungen im Tk-Thread ab"""
+        try:
+            geaendert = False
+            while True:
+                try:
+                    art, aufgabe, daten = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                geaendert = True
+                self._verarbeite_meldung(art, aufgabe, daten)
+            
+            if geaendert:
+                self._benachrichtige()
+        finally:
+            # Auch wenn ein Callback fehlschlägt, muss die Queue weiter abgearbeitet werden
+            if not self._beendet:
+                self.root.after(self.POLL_INTERVALL_MS, self._verarbeite_queue)
+    
+    def _verarbeite_meldung(self, art: str, aufgabe: Aufgabe, daten: Any):
+        """Ruft die passenden Callbacks für eine Meldung aus der Queue auf"""
+        if art == "aufruf":
+            funktion, args = daten
+            funktion(*args)
+            return
+        
+        bei_erfolg, bei_fehler, bei_fortschritt, bei_abbruch = aufgabe._callbacks
+        if art == "fortschritt":
+            aufgabe.fortschritt, aufgabe.fortschritt_text = daten
+            if bei_fortschritt:
+                bei_fortschritt(*daten)
+            return
+        
+        # Aufgabe ist fertig
+        if aufgabe in self._aufgaben:
+            self._aufgaben.remove(aufgabe)
+        try:
+            ergebnis = daten.result()
+        except (CancelledError, AufgabeAbgebrochen):
+            if bei_abbruch:
+                bei_abbruch()
+            return
+        except Exception as e:
+            if bei_fehler:
+                bei_fehler(e)
+            else:
+                print(f"Fehler in Hintergrundaufgabe '{aufgabe.beschreibung}': {e}")
+            return
+        if bei_erfolg:
+            bei_erfolg(ergebnis)
+
+
+class Statusleiste(ttk.Frame):
+    """Statusleiste mit Beschäftigt-Anzeige, Fortschritt und Abbrechen-Button"""
+    
+    def __init__(self, parent: tk.Widget, ausfuehrer: HintergrundAusfuehrer, manager=None):
+        super().__init__(parent)
+        self.ausfuehrer = ausfuehrer
+        self.manager = manager
+        
+        self.text_label = ttk.Label(self, text="Bereit")
+        self.text_label.pack(side=tk.LEFT, padx=5)
+        
+        self.abbrechen_button = ttk.Button(self, text="Abbrechen", command=self._abbrechen)
+        self.fortschritt_balken = ttk.Progressbar(self, length=200, mode="indeterminate")
+        
+        ausfuehrer.registriere_beobachter(self._aktualisiere)
+        self._pruefe_speicherung()
+    
+    def _aktualisiere(self, aufgaben: List[Aufgabe]):
+        """Aktualisiert die Anzeige anhand der laufenden Aufgaben"""
+        if not aufgaben:
+            self.fortschritt_balken.stop()
+            self.fortschritt_balken.pack_forget()
+            self.abbrechen_button.pack_forget()
+            self.text_label.config(text="Bereit")
+            self.winfo_toplevel().config(cursor="")
+            return
+        
+        aktuell = aufgaben[-1]
+        text = aktuell.beschreibung or "Bitte warten …"
+        if aktuell.fortschritt_text:
+            text += f" – {aktuell.fortschritt_text}"
+        if len(aufgaben) > 1:
+            text += f" (+{len(aufgaben) - 1} weitere)"
+        self.text_label.config(text=text)
+        
+        if not self.fortschritt_balken.winfo_ismapped():
+            self.fortschritt_balken.pack(side=tk.RIGHT, padx=5)
+        if aktuell.fortschritt is None:
+            if str(self.fortschritt_balken.cget("mode")) != "indeterminate":
+                self.fortschritt_balken.config(mode="indeterminate")
+            self.fortschritt_balken.start(15)
+        else:
+            self.fortschritt_balken.stop()
+            self.fortschritt_balken.config(mode="determinate", maximum=1.0, value=aktuell.fortschritt)
+        
+        if any(a.abbrechbar for a in aufgaben):
+            if not self.abbrechen_button.winfo_ismapped():
+                self.abbrechen_button.pack(side=tk.RIGHT, padx=5)
+        else:
+            self.abbrechen_button.pack_forget()
+        self.winfo_toplevel().config(cursor="watch")
+    
+    def _pruefe_speicherung(self):
+        """Zeigt an, ob der Manager noch Daten im Hintergrund speichert"""
+        if not self.ausfuehrer.ist_beschaeftigt():
+            if self.manager is not None and self.manager.hat_offene_speicherungen():
+                self.text_label.config(text="Speichere …")
+            else:
+                self.text_label.config(text="Bereit")
+        self.after(250, self._pruefe_speicherung)
+    
+    def _abbrechen(self):
+        """Bricht die zuletzt gestartete abbrechbare Aufgabe ab"""
+        for aufgabe in reversed(self.ausfuehrer.get_aktive_aufgaben()):
+            if aufgabe.abbrechbar:
+                aufgabe.abbrechen()
+                break
+
@@ -0,0 +1,68 @@
+"""
+Dialog für die Spaltenzuordnung beim Kundenimport
+"""
+import os
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List
+
+
+class KundenImportDialog:
+    """Zeigt die erkannte Spaltenzuordnung einer Importdatei zum Anpassen an"""
+    
+    FELDER = [("name", "Name"), ("vorname", "Vorname"), ("firma", "Firma"), ("strasse", "Straße"),
+              ("plz", "PLZ"), ("ort", "Ort"), ("telefon", "Telefon"), ("email", "E-Mail"),
+              ("ust_id", "USt-ID"), ("notizen", "Notizen"), ("skonto", "Skonto (%)"),
+              ("abschlag", "Abschlag (%)"), ("rabatt", "Rabatt (%)"), ("kunde_id", "Kunden-ID")]
+    OHNE = "(nicht importieren)"
+    
+    def __init__(self, parent: tk.Widget, pfad: str, kopfzeile: List[str], zuordnung: Dict[str, str]):
+        self.result = None  # (zuordnung, probelauf) nach "Importieren"
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Kunden importieren - {os.path.basename(pfad)}")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self._erstelle_ui(kopfzeile, zuordnung)
+        
+        self.dialog.wait_window()
+    
+    def _erstelle_ui(self, kopfzeile: List[str], zuordnung: Dict[str, str]):
+        """Erstellt die Benutzeroberfläche"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(main_frame, text="Spalten der Datei den Kundenfeldern zuordnen:").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+        
+        auswahl = [self.OHNE] + [k for k in kopfzeile if k]
+        self.vars: Dict[str, tk.StringVar] = {}
+        for zeile, (feld, bezeichnung) in enumerate(self.FELDER, start=1):
+            ttk.Label(main_frame, text=f"{bezeichnung}:").grid(row=zeile, column=0, sticky=tk.W, pady=2)
+            var = tk.StringVar(value=zuordnung.get(feld, self.OHNE))
+            ttk.Combobox(main_frame, textvariable=var, values=auswahl, state="readonly", width=35).grid(
+                row=zeile, column=1, sticky=tk.EW, pady=2)
+            self.vars[feld] = var
+        
+        self.probelauf_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Nur prüfen (Probelauf, nichts übernehmen)",
+                        variable=self.probelauf_var).grid(
+            row=len(self.FELDER) + 1, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
+        main_frame.grid_columnconfigure(1, weight=1)
+        
+        # Buttons
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="Abbrechen", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Importieren", command=self._importieren).pack(side=tk.RIGHT, padx=5)
+    
+    def _importieren(self):
+        """Übernimmt die Zuordnung und schließt den Dialog"""
+        # Nicht zugeordnete Felder als leer angeben, damit die automatische
+        # Erkennung sie nicht wieder belegt
+        zuordnung = {feld: ("" if var.get() == self.OHNE else var.get()) for feld, var in self.vars.items()}
+        self.result = (zuordnung, self.probelauf_var.get())
+        self.dialog.destroy()
@@ -2,17 +2,25 @@
 View für Kundenverwaltung
 """
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from adapter.manager import DatenManager
 from model.kunde import Kunde
+from view.hintergrund import HintergrundAusfuehrer
+from view.tabellen import SortschluesselCache, Spaltensortierung, kunde_schluessel, normalisiere_text
 
 
 class KundenView:
     """View für Kundenverwaltung"""
     
+    # Spalte -> Schlüssel in kunde_schluessel()
+    SORTIERSCHLUESSEL = {"#0": "id", "Name": "name", "Firma": "firma", "Ort": "ort",
+                         "Telefon": "telefon", "Email": "email"}
+    
     def __init__(self, parent: tk.Widget, manager: DatenManager):
         self.parent = parent
         self.manager = manager
+        self.schluessel = SortschluesselCache.fuer_manager(manager)
+        self._kunden = []
         
         self._erstelle_ui()
         self._lade_kunden()
@@ -26,6 +34,7 @@ class KundenView:
         ttk.Button(toolbar, text="Neuer Kunde", command=self._neuer_kunde).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Bearbeiten", command=self._bearbeite_kunde).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Löschen", command=self._loesche_kunde).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="📥 Importieren", command=self._importiere_kunden).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Aktualisieren", command=self._lade_kunden).pack(side=tk.LEFT, padx=2)
         
         # Suchleiste
@@ -73,33 +82,39 @@ class KundenView:
         tree_frame.grid_columnconfigure(0, weight=1)
         
         self.tree.bind("<Double-1>", lambda e: self._bearbeite_kunde())
+        
+        # Klick auf Spaltenkopf sortiert
+        self.sortierung = Spaltensortierung(self.tree, self.SORTIERSCHLUESSEL, self._suche_kunden)
     
     def _lade_kunden(self):
         """Lädt Kunden in die Liste"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Von der Suche abgehängte Zeilen liefert get_children() nicht mit
+        zeilen = set(self.tree.get_children()) | {k.id for k in self._kunden if self.tree.exists(k.id)}
+        if zeilen:
+            self.tree.delete(*zeilen)
         
-        kunden = self.manager.get_kunden()
-        for kunde in kunden:
+        self._kunden = list(self.manager.get_kunden())
+        for kunde in self._kunden:
             name = f"{kunde.vorname} {kunde.name}".strip() if not kunde.firma else ""
             self.tree.insert("", tk.END, iid=kunde.id, text=kunde.id,
                            values=(name, kunde.firma, f"{kunde.plz} {kunde.ort}".strip(), 
                                   kunde.telefon, kunde.email))
+        
+        self._suche_kunden()
     
     def _suche_kunden(self):
-        """Filtert Kunden nach Suchbegriff"""
-        suche = self.search_var.get().lower()
-        for item in self.tree.get_children():
-            values = self.tree.item(item, "values")
-            text = " ".join([str(v) for v in values]).lower()
-            if suche in text or suche in self.tree.item(item, "text").lower():
-                self.tree.set(item, "", "")
-            else:
-                self.tree.detach(item)
-        
-        # Wieder einfügen wenn Suche leer
-        if not suche:
-            self._lade_kunden()
+        """Filtert und sortiert die Kunden (ausgeblendete Zeilen werden nur abgehängt)"""
+        suche = normalisiere_text(self.search_var.get())
+        sichtbar = [k for k in self._kunden
+                    if suche in self.schluessel.get(k, kunde_schluessel)["suchtext"]]
+        sichtbar = self.sortierung.sortiere(
+            sichtbar, lambda k, spalte: self.schluessel.get(k, kunde_schluessel)[self.SORTIERSCHLUESSEL[spalte]])
+        
+        sichtbare_ids = {k.id for k in sichtbar}
+        ausgeblendet = [k.id for k in self._kunden if k.id not in sichtbare_ids]
+        if ausgeblendet:
+            self.tree.detach(*ausgeblendet)
+        self.sortierung.ordne_zeilen([k.id for k in sichtbar])
     
     def _neuer_kunde(self):
         """Öffnet Dialog für neuen Kunden"""
@@ -142,5 +157,62 @@ class KundenView:
             
             self.manager.delete_kunde(kunde_id)
             self._lade_kunden()
-
-
+    
+    def _importiere_kunden(self):
+        """Importiert Kunden aus einer CSV- oder Excel-Datei"""
+        pfad = filedialog.askopenfilename(
+            title="Kunden importieren",
+            filetypes=[("CSV und Excel", "*.csv *.txt *.xlsx"), ("CSV", "*.csv *.txt"), ("Excel", "*.xlsx"),
+                       ("Alle Dateien", "*.*")]
+        )
+        if not pfad:
+            return
+        
+        from adapter import kunden_import
+        try:
+            kopfzeile = kunden_import.lese_kopfzeile(pfad)
+        except (kunden_import.ImportFehler, OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Fehler", f"Datei kann nicht gelesen werden:\n{str(e)}")
+            return
+        if not kopfzeile:
+            messagebox.showerror("Fehler", "Die Datei enthält keine Spaltenköpfe.")
+            return
+        
+        from view.kunden_import_dialog import KundenImportDialog
+        dialog = KundenImportDialog(self.parent, pfad, kopfzeile, kunden_import.erkenne_zuordnung(kopfzeile))
+        if not dialog.result:
+            return
+        zuordnung, probelauf = dialog.result
+        
+        # Momentaufnahme im Tk-Thread, Lesen und Prüfen laufen im Hintergrund
+        bestand = kunden_import.bestand(self.manager)
+        
+        def pruefe(aufgabe):
+            return kunden_import.pruefe_datei(pfad, bestand, zuordnung,
+                                              bei_fortschritt=aufgabe.melde_fortschritt,
+                                              abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(ergebnis):
+            if probelauf:
+                ergebnis.pop("bloecke")
+            else:
+                kunden_import.uebernehme(self.manager, ergebnis)
+                self._lade_kunden()
+            text = kunden_import.zusammenfassung(ergebnis, probelauf)
+            if ergebnis["meldungen"]:
+                text += "\n\n" + "\n".join(f"Zeile {zeile}: {meldung}"
+                                            for zeile, meldung in ergebnis["meldungen"][:15])
+                if len(ergebnis["meldungen"]) > 15:
+                    text += "\n..."
+            messagebox.showinfo("Kunden importieren", text)
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showerror("Fehler", f"Fehler beim Import:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            pruefe,
+            beschreibung="Prüfe Kundenimport",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
@@ -0,0 +1,135 @@
+"""
+Fenster mit den Messwerten von DatenManager und DatenAdapter (Diagnose)
+"""
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+
+from adapter import messung
+
+
+class MessungDialog:
+    """Zeigt Summen je Methode und die letzten Aufrufe; aktualisiert sich selbst"""
+    
+    AKTUALISIERUNG_MS = 2000
+    LETZTE_AUFRUFE = 500
+    
+    def __init__(self, parent: tk.Widget):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Messwerte")
+        self.dialog.geometry("1000x520")
+        self.dialog.transient(parent)
+        
+        self.aktiv_var = tk.BooleanVar(value=messung.ist_aktiv())
+        
+        self._erstelle_ui()
+        self._aktualisiere()
+    
+    def _erstelle_ui(self):
+        """Erstellt die Benutzeroberfläche"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        kopf = ttk.Frame(main_frame)
+        kopf.pack(fill=tk.X, pady=(0, 5))
+        ttk.Checkbutton(kopf, text="Messung aktiv", variable=self.aktiv_var,
+                        command=self._umschalten).pack(side=tk.LEFT)
+        self.seit_label = ttk.Label(kopf, text="")
+        self.seit_label.pack(side=tk.RIGHT)
+        
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True)
+        
+        # Summen je Methode
+        spalten = ("Methode", "Aufrufe", "Gesamt (s)", "Mittel (ms)", "Max (ms)",
+                   "Gelesen (KiB)", "Geschrieben (KiB)", "Dateien", "Fehler")
+        self.summen_tree = self._erstelle_tabelle(notebook, spalten, (260, 70, 80, 80, 80, 100, 110, 70, 60))
+        notebook.add(self.summen_tree.master, text="Summen je Methode")
+        
+        # Ringpuffer
+        spalten = ("Zeit", "Methode", "Dauer (ms)", "Gelesen (KiB)", "Geschrieben (KiB)", "Dateien", "Thread")
+        self.aufrufe_tree = self._erstelle_tabelle(notebook, spalten, (90, 300, 80, 100, 110, 70, 160))
+        notebook.add(self.aufrufe_tree.master, text="Letzte Aufrufe")
+        
+        # Buttons
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="Schließen", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Prometheus-Export...", command=self._exportiere_prometheus).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Als JSON speichern...", command=self._speichere_json).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Zurücksetzen", command=self._zuruecksetzen).pack(side=tk.RIGHT, padx=5)
+    
+    @staticmethod
+    def _erstelle_tabelle(parent, spalten, breiten) -> ttk.Treeview:
+        frame = ttk.Frame(parent)
+        tree = ttk.Treeview(frame, columns=spalten, show="headings")
+        for spalte, breite in zip(spalten, breiten):
+            tree.heading(spalte, text=spalte)
+            tree.column(spalte, width=breite, anchor=tk.W if spalte in ("Methode", "Thread") else tk.E)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+    
+    def _aktualisiere(self):
+        """Aktualisiert die Tabellen regelmäßig, solange das Fenster offen ist"""
+        if not self.dialog.winfo_exists():
+            return
+        self._fuelle_tabellen()
+        self.dialog.after(self.AKTUALISIERUNG_MS, self._aktualisiere)
+    
+    def _fuelle_tabellen(self):
+        """Füllt beide Tabellen neu"""
+        daten = messung.als_json(mit_aufrufen=False)
+        self.seit_label.config(text=f"Gemessen seit {daten['seit'].replace('T', ' ')}")
+        
+        self.summen_tree.delete(*self.summen_tree.get_children())
+        for methode, s in daten["summen"].items():
+            self.summen_tree.insert("", tk.END, values=(
+                methode, s["aufrufe"], f"{s['dauer_s']:.3f}", f"{s['dauer_s'] / s['aufrufe'] * 1000:.2f}",
+                f"{s['max_s'] * 1000:.2f}", f"{s['bytes_gelesen'] / 1024:.1f}",
+                f"{s['bytes_geschrieben'] / 1024:.1f}", s["dateien"], s["fehler"]))
+        
+        self.aufrufe_tree.delete(*self.aufrufe_tree.get_children())
+        for eintrag in reversed(messung.letzte_aufrufe(self.LETZTE_AUFRUFE)):
+            self.aufrufe_tree.insert("", tk.END, values=(
+                datetime.fromtimestamp(eintrag["zeit"]).strftime("%H:%M:%S"),
+                "  " * eintrag["tiefe"] + eintrag["methode"] + (f" ({eintrag['fehler']})" if "fehler" in eintrag else ""),
+                f"{eintrag['dauer_s'] * 1000:.2f}", f"{eintrag['bytes_gelesen'] / 1024:.1f}",
+                f"{eintrag['bytes_geschrieben'] / 1024:.1f}", eintrag["dateien"], eintrag["thread"]))
+    
+    def _umschalten(self):
+        if self.aktiv_var.get():
+            messung.aktiviere()
+        else:
+            messung.deaktiviere()
+    
+    def _zuruecksetzen(self):
+        messung.zuruecksetzen()
+        self._fuelle_tabellen()
+    
+    def _speichere_json(self):
+        """Speichert Summen und Ringpuffer als JSON-Datei"""
+        pfad = filedialog.asksaveasfilename(
+            parent=self.dialog, title="Messwerte speichern", defaultextension=".json",
+            initialfile=f"messwerte_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON", "*.json"), ("Alle Dateien", "*.*")])
+        if pfad:
+            self._schreibe(messung.speichere_json, pfad)
+    
+    def _exportiere_prometheus(self):
+        """Speichert die Summen im Prometheus-Textformat"""
+        pfad = filedialog.asksaveasfilename(
+            parent=self.dialog, title="Prometheus-Export", defaultextension=".prom",
+            initialfile="auftragsverwaltung.prom",
+            filetypes=[("Prometheus-Text", "*.prom"), ("Alle Dateien", "*.*")])
+        if pfad:
+            self._schreibe(messung.speichere_prometheus, pfad)
+    
+    def _schreibe(self, funktion, pfad: str):
+        try:
+            funktion(pfad)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Datei konnte nicht geschrieben werden:\n{str(e)}", parent=self.dialog)
@@ -117,9 +117,10 @@ class PositionDialog:
             einzelpreis=einzelpreis
         )
         
-        # ID von alter Position übernehmen, falls vorhanden
+        # ID (und OZ aus einem Leistungsverzeichnis) von alter Position übernehmen, falls vorhanden
         if self.position and hasattr(self, '_old_position') and self._old_position:
             self.position.id = self._old_position.id
+            self.position.oz = self._old_position.oz
         
         self.result = True
         self.dialog.destroy()
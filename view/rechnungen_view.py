@@ -4,22 +4,31 @@ View für Rechnungsverwaltung
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
-from datetime import datetime, date
+from datetime import datetime
 from adapter.manager import DatenManager
+from view.hintergrund import HintergrundAusfuehrer
+from view.tabellen import SortschluesselCache, Spaltensortierung, Filterleiste, rechnung_schluessel
 
 
 class RechnungenView:
     """View für Rechnungsverwaltung"""
     
+    SORTIERBARE_SPALTEN = ("#0", "Kunde", "Auftrag", "Datum", "Fällig", "Status", "Bruttobetrag")
+    # Spalte -> Schlüssel in rechnung_schluessel()
+    SORTIERSCHLUESSEL = {"#0": "nummer", "Datum": "datum", "Fällig": "faellig",
+                         "Status": "status", "Bruttobetrag": "betrag"}
+    
     def __init__(self, parent: tk.Widget, manager: DatenManager):
         self.parent = parent
         self.manager = manager
+        self.schluessel = SortschluesselCache.fuer_manager(manager)
+        self._rechnungen = []
         
         self._erstelle_ui()
         self._lade_rechnungen()
         
-        # Aktualisiere Tab-Text nach Initialisierung
-        self._aktualisiere_tab_text()
+        # Hervorhebung aktualisieren, wenn Rechnungen während der Sitzung fällig werden
+        self.manager.ueberfaellig.registriere_beobachter(self._on_ueberfaellig_geaendert)
     
     def _erstelle_ui(self):
         """Erstellt die Benutzeroberfläche"""
@@ -31,11 +40,29 @@ class RechnungenView:
         ttk.Button(toolbar, text="Als bezahlt markieren", command=self._markiere_bezahlt).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="📄 PDF erstellen", command=self._pdf_erstellen).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Drucken/Exportieren", command=self._drucke_rechnung).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="📚 Dossier erstellen", command=self._erstelle_dossier).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="📄 PDFs für Filter erstellen", command=self._pdf_stapel_erstellen).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="🧾 E-Rechnung exportieren", command=self._erechnung_exportieren).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="📨 Mahnlauf", command=self._mahnlauf).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="🏦 Kontoauszug", command=self._importiere_kontoauszug).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Zahlungen klären", command=self._klaere_zahlungen).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Aktualisieren", command=self._lade_rechnungen).pack(side=tk.LEFT, padx=2)
         
+        # Filter
+        self.filter = Filterleiste(self.parent, self._wende_filter_an)
+        self.filter.pack(fill=tk.X, padx=5)
+        self.filter.add_auswahl("status", "Status", breite=12)
+        self.filter.add_auswahl("jahr", "Jahr", breite=6)
+        self.filter.add_auswahl("kunde", "Kunde", breite=30)
+        ttk.Button(self.filter, text="Filter zurücksetzen", command=self.filter.zuruecksetzen).pack(side=tk.LEFT, padx=10)
+        
+        # Rechnungsliste links, Vorschau rechts (Breite per Trenner verstellbar)
+        paned = ttk.PanedWindow(self.parent, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
         # Treeview für Rechnungsliste
-        tree_frame = ttk.Frame(self.parent)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree_frame = ttk.Frame(paned)
+        paned.add(tree_frame, weight=1)
         
         vsb = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         hsb = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL)
@@ -73,6 +100,12 @@ class RechnungenView:
         self.tree.tag_configure("ueberfaellig", background="#ffcccc")
         
         self.tree.bind("<Double-1>", lambda e: self._bearbeite_rechnung())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._zeige_vorschau())
+        
+        self._erstelle_vorschau(paned)
+        
+        # Klick auf Spaltenkopf sortiert
+        self.sortierung = Spaltensortierung(self.tree, self.SORTIERBARE_SPALTEN, self._wende_filter_an)
         
         # Kontextmenü für Rechtsklick
         self.context_menu = tk.Menu(self.tree, tearoff=0)
@@ -80,6 +113,8 @@ class RechnungenView:
         self.context_menu.add_command(label="Als bezahlt markieren", command=self._markiere_bezahlt)
         self.context_menu.add_command(label="📄 PDF erstellen", command=self._pdf_erstellen)
         self.context_menu.add_command(label="Drucken/Exportieren", command=self._drucke_rechnung)
+        self.context_menu.add_command(label="📚 Dossier erstellen", command=self._erstelle_dossier)
+        self.context_menu.add_command(label="🧾 E-Rechnung exportieren", command=self._erechnung_exportieren)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="Löschen", command=self._loesche_rechnung, foreground="red")
         
@@ -89,36 +124,198 @@ class RechnungenView:
             self.tree.bind("<Button-2>", self._zeige_kontextmenue)  # Ctrl+Click auf macOS
             self.tree.bind("<Control-1>", self._zeige_kontextmenue)
     
+    def _erstelle_vorschau(self, paned: ttk.PanedWindow):
+        """Erstellt den Vorschaubereich mit den Seiten des Rechnungs-PDFs"""
+        from adapter.pdf_vorschau import STANDARD_BREITE
+        rahmen = ttk.LabelFrame(paned, text="Vorschau")
+        paned.add(rahmen, weight=0)
+        
+        self.vorschau_canvas = tk.Canvas(rahmen, width=STANDARD_BREITE + 20, highlightthickness=0)
+        vsb = ttk.Scrollbar(rahmen, orient=tk.VERTICAL, command=self.vorschau_canvas.yview)
+        self.vorschau_canvas.configure(yscrollcommand=vsb.set)
+        self.vorschau_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self._vorschau_bilder = []  # Referenzen halten, sonst verwirft Tk die Bilder
+        self._vorschau_pdf = None  # PDF, dessen Vorschau gerade angezeigt werden soll
+        self._vorschau_laeuft = set()  # PDFs, die gerade im Hintergrund gerastert werden
+        self._zeige_vorschau_text("Keine Rechnung ausgewählt")
+    
+    def _zeige_vorschau_text(self, text: str):
+        """Zeigt statt der Seiten einen Hinweis im Vorschaubereich"""
+        self.vorschau_canvas.delete("all")
+        self._vorschau_bilder = []
+        breite = max(self.vorschau_canvas.winfo_width(), int(self.vorschau_canvas.cget("width")))
+        self.vorschau_canvas.create_text(breite // 2, 20, text=text, anchor=tk.N,
+                                         width=breite - 10, justify=tk.CENTER, fill="gray40")
+        self.vorschau_canvas.configure(scrollregion=(0, 0, 0, 0))
+    
+    def _zeige_vorschau_bilder(self, bilder):
+        """Zeigt die Vorschaubilder untereinander an"""
+        self.vorschau_canvas.delete("all")
+        self._vorschau_bilder = []
+        y = 5
+        try:
+            for pfad in bilder:
+                bild = tk.PhotoImage(file=pfad)
+                self._vorschau_bilder.append(bild)
+                self.vorschau_canvas.create_image(10, y, image=bild, anchor=tk.NW)
+                y += bild.height() + 10
+        except tk.TclError as e:
+            # z.B. Tk < 8.6 ohne PNG-Unterstützung
+            self._zeige_vorschau_text(f"Vorschau kann nicht angezeigt werden:\n{e}")
+            return
+        self.vorschau_canvas.configure(scrollregion=(0, 0, 0, y))
+        self.vorschau_canvas.yview_moveto(0)
+    
+    def _vorschau_pdf_pfad(self, rechnung):
+        """Gibt den Standard-Pfad des Rechnungs-PDFs zurück (None ohne Auftrag)"""
+        auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
+        if not auftrag:
+            return None
+        return self.manager.adapter.get_rechnung_pdf_pfad(
+            auftrag.auftragsnummer, rechnung.rechnungsnummer, rechnung.rechnungsdatum)
+    
+    def _zeige_vorschau(self):
+        """Zeigt die Vorschau der ausgewählten Rechnung (aus dem Cache oder im Hintergrund gerastert)"""
+        from adapter import pdf_vorschau
+        selection = self.tree.selection()
+        rechnung = self.manager.get_rechnung(selection[0]) if len(selection) == 1 else None
+        if rechnung is None:
+            self._vorschau_pdf = None
+            self._zeige_vorschau_text("Keine Rechnung ausgewählt" if not selection else
+                                      f"{len(selection)} Rechnungen ausgewählt")
+            return
+        
+        pdf_pfad = self._vorschau_pdf_pfad(rechnung)
+        self._vorschau_pdf = pdf_pfad
+        if not pdf_pfad or not Path(pdf_pfad).exists():
+            self._zeige_vorschau_text("Noch kein PDF vorhanden\n(„Drucken/Exportieren“ erstellt es im Auftragsordner)")
+            return
+        
+        ordner = pdf_vorschau.cache_ordner(self.manager.adapter.get_daten_pfad())
+        bilder = pdf_vorschau.aus_cache(pdf_pfad, ordner)
+        if bilder is not None:
+            self._zeige_vorschau_bilder(bilder)
+            return
+        if pdf_vorschau.rasterer() is None:
+            self._zeige_vorschau_text("Keine Vorschau verfügbar.\n\nZum Anzeigen PyMuPDF (pip install pymupdf), "
+                                      "Poppler (pdftoppm) oder Ghostscript installieren.")
+            return
+        
+        self._zeige_vorschau_text("Vorschau wird erstellt …")
+        if pdf_pfad in self._vorschau_laeuft:
+            return
+        self._vorschau_laeuft.add(pdf_pfad)
+        
+        def fertig():
+            self._vorschau_laeuft.discard(pdf_pfad)
+            # Nur anzeigen, wenn die Rechnung noch ausgewählt ist
+            return self._vorschau_pdf == pdf_pfad
+        
+        def bei_erfolg(bilder):
+            if fertig():
+                self._zeige_vorschau_bilder(bilder)
+        
+        def bei_fehler(e: BaseException):
+            if fertig():
+                self._zeige_vorschau_text(f"Vorschau fehlgeschlagen:\n{e}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            pdf_vorschau.erstelle_vorschau, pdf_pfad, ordner,
+            beschreibung=f"Erstelle Vorschau für {rechnung.rechnungsnummer}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            bei_abbruch=fertig
+        )
+    
     def _lade_rechnungen(self):
         """Lädt Rechnungen in die Liste"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Vom Filter abgehängte Zeilen liefert get_children() nicht mit
+        zeilen = set(self.tree.get_children()) | {r.id for r in self._rechnungen if self.tree.exists(r.id)}
+        if zeilen:
+            self.tree.delete(*zeilen)
         
-        rechnungen = self.manager.get_rechnungen()
-        heute = date.today()
+        rechnungen = self._rechnungen = list(self.manager.get_rechnungen())
+        ueberfaellig = self.manager.ueberfaellig
+        kunden_namen = {}
+        from adapter.mahnwesen import lade_stufen
+        mahnstufen = [s["bezeichnung"] for s in lade_stufen(self.manager.adapter.get_config())]
         
         for rechnung in rechnungen:
             kunde = self.manager.get_kunde(rechnung.kunde_id)
             kunde_name = kunde.get_vollstaendiger_name() if kunde else "Unbekannt"
+            kunden_namen[rechnung.kunde_id] = kunde_name
             
             auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
             auftrag_nr = auftrag.auftragsnummer if auftrag else "Unbekannt"
             
-            # Prüfe ob Rechnung überfällig ist
-            faellig_datum = rechnung.faelligkeitsdatum.date() if hasattr(rechnung.faelligkeitsdatum, 'date') else rechnung.faelligkeitsdatum
-            is_ueberfaellig = faellig_datum < heute and rechnung.status != "Bezahlt"
-            
             # Tags für überfällige Rechnungen
-            tags = ["ueberfaellig"] if is_ueberfaellig else []
+            tags = ["ueberfaellig"] if ueberfaellig.ist_ueberfaellig(rechnung.id) else []
+            status = rechnung.status
+            if rechnung.mahnstufe:
+                status += f" ({mahnstufen[min(rechnung.mahnstufe, len(mahnstufen)) - 1]})"
             
             self.tree.insert("", tk.END, iid=rechnung.id, text=rechnung.rechnungsnummer,
                            values=(kunde_name, auftrag_nr, rechnung.rechnungsdatum.strftime("%d.%m.%Y"),
-                                  rechnung.faelligkeitsdatum.strftime("%d.%m.%Y"), rechnung.status,
+                                  rechnung.faelligkeitsdatum.strftime("%d.%m.%Y"), status,
                                   f"{rechnung.bruttobetrag:.2f} €"),
                            tags=tags)
         
-        # Aktualisiere Tab-Text im Hauptfenster
-        self._aktualisiere_tab_text()
+        # Filterwerte aus den vorhandenen Rechnungen
+        self.filter.setze_werte("status", sorted({r.status for r in rechnungen}))
+        self.filter.setze_werte("jahr", sorted({str(r.rechnungsdatum.year) for r in rechnungen}, reverse=True))
+        self.filter.setze_werte("kunde", sorted(kunden_namen, key=lambda k: kunden_namen[k].casefold()),
+                                anzeige=kunden_namen.get)
+        self._wende_filter_an()
+    
+    def _wende_filter_an(self):
+        """Filtert und sortiert die Rechnungen (ausgeblendete Zeilen werden nur abgehängt)"""
+        status = self.filter.get("status")
+        jahr = self.filter.get("jahr")
+        kunde_id = self.filter.get("kunde")
+        
+        sichtbar = []
+        for rechnung in self._rechnungen:
+            schluessel = self.schluessel.get(rechnung, rechnung_schluessel)
+            if status is not None and rechnung.status != status:
+                continue
+            if jahr is not None and schluessel["jahr"] != jahr:
+                continue
+            if kunde_id is not None and rechnung.kunde_id != kunde_id:
+                continue
+            sichtbar.append(rechnung)
+        
+        spalte = self.sortierung.spalte
+        if spalte == "Kunde":
+            namen = self.schluessel.kunden_namen()
+            sortierschluessel = lambda r, s: namen.get(r.kunde_id)
+        elif spalte == "Auftrag":
+            nummern = {a.id: a.auftragsnummer for a in self.manager.get_auftraege()}
+            sortierschluessel = lambda r, s: nummern.get(r.auftrag_id)
+        else:
+            sortierschluessel = lambda r, s: self.schluessel.get(r, rechnung_schluessel)[self.SORTIERSCHLUESSEL[s]]
+        sichtbar = self.sortierung.sortiere(sichtbar, sortierschluessel)
+        
+        sichtbare_ids = {r.id for r in sichtbar}
+        ausgeblendet = [r.id for r in self._rechnungen if r.id not in sichtbare_ids]
+        if ausgeblendet:
+            self.tree.detach(*ausgeblendet)
+        self.sortierung.ordne_zeilen([r.id for r in sichtbar])
+    
+    def _on_ueberfaellig_geaendert(self, neu_ueberfaellig):
+        """Passt die Hervorhebung an, wenn sich die überfälligen Rechnungen ändern"""
+        ueberfaellig = self.manager.ueberfaellig
+        try:
+            for item in self.tree.tag_has("ueberfaellig"):
+                if not ueberfaellig.ist_ueberfaellig(item):
+                    self.tree.item(item, tags=())
+            for rechnung_id in neu_ueberfaellig:
+                if self.tree.exists(rechnung_id):
+                    self.tree.item(rechnung_id, tags=("ueberfaellig",))
+        except tk.TclError:
+            # View wurde bereits zerstört
+            ueberfaellig.entferne_beobachter(self._on_ueberfaellig_geaendert)
     
     def _bearbeite_rechnung(self):
         """Bearbeitet ausgewählte Rechnung"""
@@ -148,7 +345,6 @@ class RechnungenView:
             rechnung.status = "Bezahlt"
             self.manager.update_rechnung(rechnung)
             self._lade_rechnungen()
-            self._aktualisiere_tab_text()
             messagebox.showinfo("Erfolg", "Rechnung wurde als bezahlt markiert.")
     
     def _pdf_erstellen(self):
@@ -177,21 +373,257 @@ class RechnungenView:
         )
         
         if pfad:
-            try:
-                from adapter.pdf_generator import PDFGenerator
-                pdf_gen = PDFGenerator(self.manager.adapter.config)
-                auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
-                auftragsnummer = auftrag.auftragsnummer if auftrag else None
-                pdf_gen.rechnung_erstellen(
-                    rechnung.to_dict(auftragsnummer=auftragsnummer), 
-                    kunde.to_dict(), 
-                    pfad
-                )
-                messagebox.showinfo("Erfolg", f"PDF erstellt:\n{pfad}")
-            except ImportError:
+            self._erstelle_pdf_im_hintergrund(rechnung, kunde, pfad, "PDF erstellt")
+    
+    def _erstelle_pdf_im_hintergrund(self, rechnung, kunde, pfad: str, erfolgstext: str, erzwingen: bool = False):
+        """Erstellt das Rechnungs-PDF im Hintergrund und meldet das Ergebnis (unveränderte PDFs nur auf Nachfrage)"""
+        auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
+        auftragsnummer = auftrag.auftragsnummer if auftrag else None
+        # Daten im Tk-Thread serialisieren, der Worker arbeitet nur mit Kopien
+        rechnung_dict = rechnung.to_dict(auftragsnummer=auftragsnummer)
+        kunde_dict = kunde.to_dict()
+        config = self.manager.adapter.get_config()
+        
+        def erstelle_pdf():
+            from adapter.pdf_generator import PDFGenerator
+            generator = PDFGenerator(config)
+            pdf_pfad = generator.rechnung_erstellen(rechnung_dict, kunde_dict, pfad, erzwingen=erzwingen)
+            return pdf_pfad, generator.uebersprungen
+        
+        def bei_erfolg(ergebnis):
+            pdf_pfad, uebersprungen = ergebnis
+            if not uebersprungen:
+                self._zeige_vorschau()
+                messagebox.showinfo("Erfolg", f"{erfolgstext}:\n{pdf_pfad}")
+            elif messagebox.askyesno(
+                "PDF unverändert",
+                f"Das PDF ist bereits aktuell:\n{pdf_pfad}\n\nTrotzdem neu erstellen?"
+            ):
+                self._erstelle_pdf_im_hintergrund(rechnung, kunde, pfad, erfolgstext, erzwingen=True)
+        
+        def bei_fehler(e: BaseException):
+            if isinstance(e, ImportError):
                 messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
-            except Exception as e:
+            else:
                 messagebox.showerror("Fehler", f"Fehler beim Erstellen des PDFs:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            erstelle_pdf,
+            beschreibung=f"Erstelle PDF für {rechnung.rechnungsnummer}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler
+        )
+    
+    def _pdf_stapel_erstellen(self):
+        """Erstellt die PDFs aller aktuell angezeigten (gefilterten) Rechnungen in den Auftragsordnern"""
+        rechnungen = [r for r in (self.manager.get_rechnung(iid) for iid in self.tree.get_children()) if r]
+        if not rechnungen:
+            messagebox.showwarning("Keine Rechnungen", "Es werden keine Rechnungen angezeigt.")
+            return
+        antwort = messagebox.askyesnocancel(
+            "PDFs erstellen",
+            f"Für {len(rechnungen)} Rechnung(en) werden PDFs im Ordner 'Rechnungen' des jeweiligen "
+            "Auftrags erstellt.\n\n"
+            "Ja: Nur geänderte Rechnungen erstellen (unveränderte PDFs bleiben erhalten)\n"
+            "Nein: Alle PDFs neu erstellen und vorhandene Dateien überschreiben"
+        )
+        if antwort is None:
+            return
+        erzwingen = not antwort
+        
+        from adapter.pdf_stapel import erstelle_stapelauftraege, rendere_stapel
+        # Daten im Tk-Thread serialisieren, die Worker-Prozesse arbeiten nur mit Kopien
+        stapel = erstelle_stapelauftraege(self.manager, rechnungen)
+        config = self.manager.adapter.get_config()
+        
+        def rendere(aufgabe):
+            def fortschritt(fertig, gesamt, ergebnis):
+                aufgabe.melde_fortschritt(fertig / gesamt, f"{fertig}/{gesamt} ({ergebnis['rechnungsnummer']})")
+            return rendere_stapel(config, stapel, bei_fortschritt=fortschritt,
+                                  abgebrochen=lambda: aufgabe.abgebrochen, erzwingen=erzwingen)
+        
+        def bei_erfolg(ergebnisse):
+            fehler = [e for e in ergebnisse if e["fehler"]]
+            uebersprungen = sum(1 for e in ergebnisse if e["uebersprungen"])
+            self._zeige_vorschau()
+            nachricht = f"{len(ergebnisse) - len(fehler) - uebersprungen} von {len(stapel)} PDFs wurden erstellt."
+            if uebersprungen:
+                nachricht += f"\n{uebersprungen} PDF(s) waren unverändert und wurden übersprungen."
+            if fehler:
+                nachricht += "\n\nFehler:\n" + "\n".join(
+                    f"{e['rechnungsnummer']}: {e['fehler']}" for e in fehler[:10])
+                if len(fehler) > 10:
+                    nachricht += f"\n… und {len(fehler) - 10} weitere"
+                messagebox.showwarning("PDFs erstellt", nachricht)
+            else:
+                messagebox.showinfo("PDFs erstellt", nachricht)
+        
+        def bei_fehler(e: BaseException):
+            if isinstance(e, ImportError):
+                messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
+            else:
+                messagebox.showerror("Fehler", f"Fehler beim Erstellen der PDFs:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            rendere,
+            beschreibung=f"Erstelle {len(stapel)} Rechnungs-PDFs",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _erechnung_exportieren(self):
+        """Exportiert die ausgewählten (sonst alle angezeigten) Rechnungen als XRechnung in einen Ordner"""
+        auswahl = self.tree.selection() or self.tree.get_children()
+        rechnungen = [r for r in (self.manager.get_rechnung(iid) for iid in auswahl) if r]
+        if not rechnungen:
+            messagebox.showwarning("Keine Rechnungen", "Es werden keine Rechnungen angezeigt.")
+            return
+        ordner = filedialog.askdirectory(title=f"Zielordner für {len(rechnungen)} E-Rechnung(en)")
+        if not ordner:
+            return
+        
+        from adapter.erechnung import exportiere_stapel
+        from adapter.pdf_stapel import erstelle_stapelauftraege
+        stapel = erstelle_stapelauftraege(self.manager, rechnungen)
+        config = self.manager.adapter.get_config()
+        syntax = config.get("rechnung", {}).get("erechnung_syntax", "cii")
+        
+        def exportiere(aufgabe):
+            def fortschritt(fertig, gesamt, ergebnis):
+                aufgabe.melde_fortschritt(fertig / gesamt, f"{fertig}/{gesamt} ({ergebnis['rechnungsnummer']})")
+            return exportiere_stapel(config, stapel, ordner, syntax=syntax, bei_fortschritt=fortschritt,
+                                     abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(ergebnisse):
+            fehler = [e for e in ergebnisse if e["fehler"]]
+            nachricht = f"{len(ergebnisse) - len(fehler)} von {len(stapel)} E-Rechnungen wurden exportiert:\n{ordner}"
+            # Fehlende Stammdaten betreffen meist alle Rechnungen, daher jeden Hinweis nur einmal nennen
+            hinweise = list(dict.fromkeys(h for e in ergebnisse for h in e["hinweise"]))
+            if hinweise:
+                nachricht += "\n\nBitte Stammdaten prüfen:\n" + "\n".join(hinweise)
+            if fehler:
+                nachricht += "\n\nFehler:\n" + "\n".join(
+                    f"{e['rechnungsnummer']}: {e['fehler']}" for e in fehler[:10])
+                if len(fehler) > 10:
+                    nachricht += f"\n… und {len(fehler) - 10} weitere"
+            if fehler or hinweise:
+                messagebox.showwarning("E-Rechnungen exportiert", nachricht)
+            else:
+                messagebox.showinfo("E-Rechnungen exportiert", nachricht)
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showerror("Fehler", f"Fehler beim Export der E-Rechnungen:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            exportiere,
+            beschreibung=f"Exportiere {len(stapel)} E-Rechnungen",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _mahnlauf(self):
+        """Erstellt die Mahnschreiben aller fälligen Mahnungen und vermerkt die Mahnstufen"""
+        from adapter import mahnwesen
+        mahnlauf = mahnwesen.plane_mahnlauf(self.manager)
+        mahnungen = mahnlauf["mahnungen"]
+        uebersprungen = ""
+        if mahnlauf["uebersprungen"]:
+            uebersprungen = "\n\nOhne Mahnschreiben:\n" + "\n".join(
+                f"{e['rechnungsnummer']}: {e['grund']}" for e in mahnlauf["uebersprungen"][:10])
+            if len(mahnlauf["uebersprungen"]) > 10:
+                uebersprungen += f"\n… und {len(mahnlauf['uebersprungen']) - 10} weitere"
+        if not mahnungen:
+            if uebersprungen:
+                messagebox.showwarning("Mahnlauf", "Derzeit sind keine Mahnungen erstellbar." + uebersprungen)
+            else:
+                messagebox.showinfo("Mahnlauf", "Derzeit sind keine Mahnungen fällig.")
+            return
+        uebersicht = "\n".join(f"{bezeichnung}: {anzahl}"
+                               for bezeichnung, anzahl in mahnwesen.zusammenfassung(mahnungen).items())
+        if not messagebox.askyesno(
+            "Mahnlauf",
+            f"{len(mahnungen)} Mahnung(en) sind fällig:\n{uebersicht}{uebersprungen}\n\n"
+            "Mahnschreiben erstellen und die Mahnstufen an den Rechnungen vermerken?"
+        ):
+            return
+        
+        config = self.manager.adapter.get_config()
+        pfad = mahnwesen.mahnlauf_pfad(self.manager)
+        
+        def rendere(aufgabe):
+            def fortschritt(fertig, gesamt):
+                aufgabe.melde_fortschritt(fertig / gesamt, f"Teil {fertig}/{gesamt}")
+            pfade = mahnwesen.rendere_mahnlauf(config, mahnungen, pfad, bei_fortschritt=fortschritt,
+                                               abgebrochen=lambda: aufgabe.abgebrochen)
+            # Abgebrochene Läufe nicht verbuchen (die erstellten Teile sind gelöscht), die Mahnungen bleiben fällig
+            aufgabe.pruefe_abbruch()
+            return pfade
+        
+        def bei_erfolg(pfade):
+            anzahl = mahnwesen.buche_mahnlauf(self.manager, mahnungen)
+            self._lade_rechnungen()
+            messagebox.showinfo("Mahnlauf", f"{anzahl} Mahnschreiben wurden erstellt:\n" + "\n".join(pfade))
+        
+        def bei_fehler(e: BaseException):
+            if isinstance(e, ImportError):
+                messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
+            else:
+                messagebox.showerror("Fehler", f"Fehler beim Mahnlauf:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            rendere,
+            beschreibung=f"Erstelle {len(mahnungen)} Mahnschreiben",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _importiere_kontoauszug(self):
+        """Liest Kontoauszüge (CAMT.053/MT940) und bucht die eindeutig zuordenbaren Zahlungseingänge"""
+        pfade = filedialog.askopenfilenames(
+            title="Kontoauszüge importieren",
+            filetypes=[("Kontoauszüge", "*.xml *.sta *.mt940 *.txt *.zip"), ("Alle Dateien", "*.*")]
+        )
+        if not pfade:
+            return
+        
+        from adapter import kontoauszug
+        # Momentaufnahme im Tk-Thread, die Zuordnung läuft im Hintergrund
+        offene, referenzen = kontoauszug.rechnungen_fuer_zuordnung(self.manager)
+        
+        def gleiche_ab(aufgabe):
+            return kontoauszug.gleiche_ab(list(pfade), offene, referenzen,
+                                          bei_fortschritt=aufgabe.melde_fortschritt,
+                                          abgebrochen=lambda: aufgabe.abgebrochen)
+        
+        def bei_erfolg(ergebnis):
+            offen = kontoauszug.uebernehme(self.manager, ergebnis)
+            self._lade_rechnungen()
+            text = kontoauszug.zusammenfassung(ergebnis)
+            if offen and messagebox.askyesno("Kontoauszug", f"{text}\n\n{offen} Zahlung(en) jetzt klären?"):
+                self._klaere_zahlungen()
+            elif not offen:
+                messagebox.showinfo("Kontoauszug", text)
+        
+        def bei_fehler(e: BaseException):
+            messagebox.showerror("Fehler", f"Fehler beim Import der Kontoauszüge:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            gleiche_ab,
+            beschreibung="Lese Kontoauszüge",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler,
+            mit_aufgabe=True
+        )
+    
+    def _klaere_zahlungen(self):
+        """Öffnet die Liste der nicht sicher zugeordneten Zahlungseingänge"""
+        from view.zahlungsklaerung_dialog import ZahlungsklaerungDialog
+        dialog = ZahlungsklaerungDialog(self.parent, self.manager)
+        if dialog.gebucht:
+            self._lade_rechnungen()
     
     def _drucke_rechnung(self):
         """Druckt/Exportiert Rechnung"""
@@ -203,53 +635,82 @@ class RechnungenView:
         rechnung_id = selection[0]
         rechnung = self.manager.get_rechnung(rechnung_id)
         if rechnung:
-            try:
-                from adapter.pdf_generator import PDFGenerator
-                generator = PDFGenerator(self.manager.adapter.config)
-                # Verwende die neue rechnung_erstellen Methode
-                kunde = self.manager.get_kunde(rechnung.kunde_id)
-                if kunde:
-                    # Standard-Pfad im Rechnungen-Ordner des Auftrags
-                    auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
-                    if auftrag:
-                        auftragsordner = self.manager.adapter.get_auftragsordner_pfad(auftrag.auftragsnummer)
-                        if auftragsordner:
-                            rechnungen_ordner = Path(auftragsordner) / "Rechnungen"
-                            rechnungen_ordner.mkdir(parents=True, exist_ok=True)
-                            datum_str = rechnung.rechnungsdatum.strftime("%Y%m%d")
-                            dateiname = f"Rechnung_{rechnung.rechnungsnummer}_{datum_str}.pdf"
-                            output_path = str(rechnungen_ordner / dateiname)
-                        else:
-                            # Fallback: Dateidialog
-                            output_path = filedialog.asksaveasfilename(
-                                defaultextension=".pdf",
-                                filetypes=[("PDF", "*.pdf")],
-                                initialfile=f"Rechnung_{rechnung.rechnungsnummer}.pdf"
-                            )
-                            if not output_path:
-                                return
-                    else:
-                        # Fallback: Dateidialog
-                        output_path = filedialog.asksaveasfilename(
-                            defaultextension=".pdf",
-                            filetypes=[("PDF", "*.pdf")],
-                            initialfile=f"Rechnung_{rechnung.rechnungsnummer}.pdf"
-                        )
-                        if not output_path:
-                            return
-                    
-                    auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
-                    auftragsnummer = auftrag.auftragsnummer if auftrag else None
-                    generator.rechnung_erstellen(
-                        rechnung.to_dict(auftragsnummer=auftragsnummer),
-                        kunde.to_dict(),
-                        output_path
+            kunde = self.manager.get_kunde(rechnung.kunde_id)
+            if kunde:
+                # Standard-Pfad im Rechnungen-Ordner des Auftrags
+                output_path = None
+                auftrag = self.manager.get_auftrag(rechnung.auftrag_id)
+                if auftrag:
+                    auftragsordner = self.manager.adapter.get_auftragsordner_pfad(auftrag.auftragsnummer)
+                    if auftragsordner:
+                        rechnungen_ordner = Path(auftragsordner) / "Rechnungen"
+                        rechnungen_ordner.mkdir(parents=True, exist_ok=True)
+                        datum_str = rechnung.rechnungsdatum.strftime("%Y%m%d")
+                        dateiname = f"Rechnung_{rechnung.rechnungsnummer}_{datum_str}.pdf"
+                        output_path = str(rechnungen_ordner / dateiname)
+                
+                if not output_path:
+                    # Fallback: Dateidialog
+                    output_path = filedialog.asksaveasfilename(
+                        defaultextension=".pdf",
+                        filetypes=[("PDF", "*.pdf")],
+                        initialfile=f"Rechnung_{rechnung.rechnungsnummer}.pdf"
                     )
-                    messagebox.showinfo("Erfolg", f"PDF wurde erstellt:\n{output_path}")
-            except ImportError:
+                    if not output_path:
+                        return
+                
+                self._erstelle_pdf_im_hintergrund(rechnung, kunde, output_path, "PDF wurde erstellt")
+    
+    def _erstelle_dossier(self, erzwingen: bool = False):
+        """Erstellt ein PDF mit Rechnung, Stundennachweisen und Stücklisten des Auftrags"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Keine Auswahl", "Bitte wählen Sie eine Rechnung aus.")
+            return
+        
+        rechnung = self.manager.get_rechnung(selection[0])
+        if not rechnung:
+            messagebox.showerror("Fehler", "Rechnung nicht gefunden.")
+            return
+        
+        # Daten im Tk-Thread serialisieren, der Worker arbeitet nur mit Kopien
+        try:
+            from adapter.pdf_generator import PDFGenerator
+            dossier = PDFGenerator(self.manager).dossier_daten(rechnung)
+        except ImportError:
+            messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
+            return
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Fehler", f"Fehler beim Erstellen des Dossiers:\n{str(e)}")
+            return
+        config = self.manager.adapter.get_config()
+        
+        def erstelle_pdf():
+            generator = PDFGenerator(config)
+            return generator.dossier_erstellen(dossier, erzwingen=erzwingen), generator.uebersprungen
+        
+        def bei_erfolg(ergebnis):
+            pdf_pfad, uebersprungen = ergebnis
+            if not uebersprungen:
+                messagebox.showinfo("Erfolg", f"Dossier wurde erstellt:\n{pdf_pfad}")
+            elif messagebox.askyesno(
+                "Dossier unverändert",
+                f"Das Dossier ist bereits aktuell:\n{pdf_pfad}\n\nTrotzdem neu erstellen?"
+            ):
+                self._erstelle_dossier(erzwingen=True)
+        
+        def bei_fehler(e: BaseException):
+            if isinstance(e, ImportError):
                 messagebox.showerror("Fehler", "PDF-Generator konnte nicht geladen werden. Bitte installieren Sie reportlab:\npip install reportlab")
-            except Exception as e:
-                messagebox.showerror("Fehler", f"Fehler beim Erstellen des PDFs:\n{str(e)}")
+            else:
+                messagebox.showerror("Fehler", f"Fehler beim Erstellen des Dossiers:\n{str(e)}")
+        
+        HintergrundAusfuehrer.fuer_widget(self.parent).starte(
+            erstelle_pdf,
+            beschreibung=f"Erstelle Dossier für {rechnung.rechnungsnummer}",
+            bei_erfolg=bei_erfolg,
+            bei_fehler=bei_fehler
+        )
     
     def _zeige_kontextmenue(self, event):
         """Zeigt das Kontextmenü bei Rechtsklick"""
@@ -298,33 +759,8 @@ class RechnungenView:
                 # Lösche Rechnung aus der Datenbank
                 if self.manager.delete_rechnung(rechnung_id):
                     self._lade_rechnungen()
-                    self._aktualisiere_tab_text()
                     messagebox.showinfo("Erfolg", "Rechnung wurde gelöscht.")
                 else:
                     messagebox.showerror("Fehler", "Rechnung konnte nicht gelöscht werden.")
-    
-    def _aktualisiere_tab_text(self):
-        """Aktualisiert den Tab-Text mit Anzahl überfälliger Rechnungen"""
-        # Finde das Hauptfenster über parent
-        parent = self.parent
-        while parent and not hasattr(parent, 'notebook'):
-            parent = parent.master
-        
-        if parent and hasattr(parent, 'notebook'):
-            # Zähle überfällige Rechnungen
-            rechnungen = self.manager.get_rechnungen()
-            heute = date.today()
-            ueberfaellige = [r for r in rechnungen 
-                           if (r.faelligkeitsdatum.date() if hasattr(r.faelligkeitsdatum, 'date') else r.faelligkeitsdatum) < heute 
-                           and r.status != "Bezahlt"]
-            
-            anzahl = len(ueberfaellige)
-            if anzahl > 0:
-                # Tab-Text mit Anzahl (visuell auffällig)
-                tab_text = f"Rechnungen ⚠{anzahl}"
-                # Aktualisiere Tab-Text (Index 3 für Rechnungen-Tab)
-                parent.notebook.tab(3, text=tab_text)
-            else:
-                parent.notebook.tab(3, text="Rechnungen")
 
 
@@ -0,0 +1,101 @@
+"""
+Sortierschlüssel der Listen (ohne tkinter, auch für Benchmarks nutzbar)
+
+Sortierschlüssel (Datumswerte, Beträge, normalisierte Namen) werden je Entität
+einmal berechnet und zwischengespeichert. Der Cache wird über den
+Änderungsstand des DatenManagers (get_revision) invalidiert, sodass beim
+Umsortieren keine formatierten Zellentexte erneut geparst werden müssen.
+"""
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def normalisiere_text(text: Optional[str]) -> str:
+    """Normalisiert Text für Sortierung und Suche (Groß-/Kleinschreibung, Umlaute)"""
+    if not text:
+        return ""
+    zerlegt = unicodedata.normalize("NFKD", text)
+    return "".join(z for z in zerlegt if not unicodedata.combining(z)).casefold().strip()
+
+
+def kunde_schluessel(kunde) -> Dict[str, Any]:
+    """Berechnet die Sortier- und Suchschlüssel eines Kunden"""
+    name = f"{kunde.vorname} {kunde.name}".strip() if not kunde.firma else ""
+    return {
+        "id": kunde.id,
+        "name": normalisiere_text(name),
+        "firma": normalisiere_text(kunde.firma),
+        "anzeigename": normalisiere_text(kunde.get_vollstaendiger_name()),
+        "ort": normalisiere_text(f"{kunde.ort} {kunde.plz}"),
+        "telefon": kunde.telefon or "",
+        "email": normalisiere_text(kunde.email),
+        "suchtext": normalisiere_text(" ".join([kunde.id, name, kunde.firma, kunde.plz, kunde.ort,
+                                                kunde.telefon, kunde.email])),
+    }
+
+
+def auftrag_schluessel(auftrag) -> Dict[str, Any]:
+    """Berechnet die Sortierschlüssel eines Auftrags"""
+    return {
+        "nummer": auftrag.auftragsnummer or "",
+        "bezeichnung": normalisiere_text(auftrag.bezeichnung),
+        "status": normalisiere_text(auftrag.status),
+        "datum": auftrag.erstellt_am,
+        "endpreis": auftrag.endpreis,
+    }
+
+
+def rechnung_schluessel(rechnung) -> Dict[str, Any]:
+    """Berechnet die Sortierschlüssel einer Rechnung"""
+    return {
+        "nummer": rechnung.rechnungsnummer or "",
+        "datum": rechnung.rechnungsdatum,
+        "faellig": rechnung.faelligkeitsdatum,
+        "status": normalisiere_text(rechnung.status),
+        "betrag": rechnung.bruttobetrag,
+        "jahr": str(rechnung.rechnungsdatum.year),
+    }
+
+
+class SortschluesselCache:
+    """Zwischenspeicher für Sortierschlüssel, invalidiert über den Änderungsstand im Manager"""
+    
+    def __init__(self, manager):
+        self.manager = manager
+        self._eintraege: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    
+    @classmethod
+    def fuer_manager(cls, manager) -> 'SortschluesselCache':
+        """Gibt den gemeinsamen Cache aller Views eines Managers zurück"""
+        cache = getattr(manager, "_sortschluessel_cache", None)
+        if cache is None:
+            cache = cls(manager)
+            manager._sortschluessel_cache = cache
+        return cache
+    
+    def get(self, entitaet, berechne: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """Gibt die Schlüssel einer Entität zurück (berechnet sie nur nach Änderungen neu)"""
+        revision = self.manager.get_revision(entitaet.id)
+        eintrag = self._eintraege.get(entitaet.id)
+        if eintrag is None or eintrag[0] != revision:
+            eintrag = (revision, berechne(entitaet))
+            self._eintraege[entitaet.id] = eintrag
+        return eintrag[1]
+    
+    def kunden_namen(self) -> Dict[str, str]:
+        """Gibt die normalisierten Anzeigenamen aller Kunden zurück (Kunden-ID -> Name)"""
+        return {k.id: self.get(k, kunde_schluessel)["anzeigename"] for k in self.manager.get_kunden()}
+
+
+def sortiere(elemente: List, schluessel: Callable[[Any], Any], absteigend: bool = False) -> List:
+    """
+    Sortiert Elemente nach einem Schlüssel; leere Werte stehen immer am Ende
+    
+    Returns:
+        Sortierte Liste (die Eingabe wird nicht verändert)
+    """
+    paare = [(schluessel(e), e) for e in elemente]
+    vorhanden = [p for p in paare if p[0] is not None and p[0] != ""]
+    leer = [e for k, e in paare if k is None or k == ""]
+    vorhanden.sort(key=lambda p: p[0], reverse=absteigend)
+    return [e for _, e in vorhanden] + leer
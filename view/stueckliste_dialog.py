@@ -6,6 +6,7 @@ from tkinter import ttk, messagebox
 from datetime import datetime
 from typing import Optional
 from adapter.manager import DatenManager
+from adapter.katalog import Katalog
 from model.stueckliste import Stueckliste, StuecklistenEintrag
 from model.auftrag import Auftrag
 from model.kunde import Kunde
@@ -39,6 +40,9 @@ class StuecklisteDialog:
                 auftragsnummer=auftrag.auftragsnummer
             )
         
+        # Lieferantenkatalog für die Artikelsuche (None, solange keiner importiert ist)
+        self.katalog = Katalog.fuer_manager(manager)
+        
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(f"Stückliste - {self.position.bezeichnung}")
         self.dialog.geometry("1000x600")
@@ -136,6 +140,15 @@ class StuecklisteDialog:
         ttk.Button(eintraege_button_frame, text="Eintrag bearbeiten", command=self._eintrag_bearbeiten).pack(side=tk.LEFT, padx=2)
         ttk.Button(eintraege_button_frame, text="Eintrag löschen", command=self._eintrag_loeschen).pack(side=tk.LEFT, padx=2)
         
+        # Schnellerfassung aus dem Lieferantenkatalog
+        if self.katalog:
+            from view.artikel_suche import ArtikelVervollstaendigung
+            self.artikel_suche_var = tk.StringVar()
+            suche_entry = ttk.Entry(eintraege_button_frame, textvariable=self.artikel_suche_var, width=40)
+            suche_entry.pack(side=tk.RIGHT, padx=2)
+            ttk.Label(eintraege_button_frame, text="Artikel aus Katalog:").pack(side=tk.RIGHT, padx=2)
+            ArtikelVervollstaendigung(suche_entry, self.katalog, self._artikel_hinzufuegen)
+        
         # Gesamtbetrag
         gesamt_frame = ttk.Frame(eintraege_frame)
         gesamt_frame.pack(fill=tk.X, pady=5)
@@ -199,11 +212,17 @@ class StuecklisteDialog:
     
     def _eintrag_hinzufuegen(self):
         """Fügt einen neuen Eintrag hinzu"""
-        dialog = StuecklistenEintragDialog(self.dialog)
+        dialog = StuecklistenEintragDialog(self.dialog, katalog=self.katalog)
         if dialog.result and dialog.eintrag:
             self.stueckliste.add_eintrag(dialog.eintrag)
             self._aktualisiere_eintraege_liste()
     
+    def _artikel_hinzufuegen(self, artikel):
+        """Übernimmt einen Katalogartikel als neuen Eintrag (Menge 1)"""
+        self.stueckliste.add_eintrag(eintrag_aus_artikel(artikel))
+        self.artikel_suche_var.set("")
+        self._aktualisiere_eintraege_liste()
+    
     def _eintrag_bearbeiten(self):
         """Bearbeitet einen ausgewählten Eintrag"""
         selection = self.eintraege_tree.selection()
@@ -215,7 +234,7 @@ class StuecklisteDialog:
         eintrag = next((e for e in self.stueckliste.eintraege if e.id == eintrag_id), None)
         
         if eintrag:
-            dialog = StuecklistenEintragDialog(self.dialog, eintrag)
+            dialog = StuecklistenEintragDialog(self.dialog, eintrag, katalog=self.katalog)
             if dialog.result and dialog.eintrag:
                 # Eintrag aktualisieren
                 for i, e in enumerate(self.stueckliste.eintraege):
@@ -277,11 +296,31 @@ class StuecklisteDialog:
         self.dialog.destroy()
 
 
+def artikel_beschreibung(artikel) -> str:
+    """Beschreibung eines Eintrags aus einem Katalogartikel"""
+    beschreibung = f"Art.-Nr. {artikel['artikelnummer']} ({artikel['lieferant']})"
+    if artikel.get("langtext"):
+        beschreibung += f"\n{artikel['langtext']}"
+    return beschreibung
+
+
+def eintrag_aus_artikel(artikel, menge: float = 1.0) -> StuecklistenEintrag:
+    """Erstellt einen Stücklisten-Eintrag aus einem Katalogartikel"""
+    return StuecklistenEintrag(
+        material=artikel["kurztext"] or artikel["artikelnummer"],
+        menge=menge,
+        einheit=artikel["einheit"] or "Stk",
+        einzelpreis=artikel["preis"],
+        beschreibung=artikel_beschreibung(artikel)
+    )
+
+
 class StuecklistenEintragDialog:
     """Dialog zum Erstellen/Bearbeiten von Stücklisten-Einträgen"""
     
-    def __init__(self, parent: tk.Widget, eintrag: StuecklistenEintrag = None):
+    def __init__(self, parent: tk.Widget, eintrag: StuecklistenEintrag = None, katalog: Optional[Katalog] = None):
         self.eintrag = eintrag
+        self.katalog = katalog
         self.result = False
         
         self.dialog = tk.Toplevel(parent)
@@ -305,7 +344,12 @@ class StuecklistenEintragDialog:
         # Material
         ttk.Label(main_frame, text="Material *:").grid(row=0, column=0, sticky=tk.W, pady=5)
         self.material_var = tk.StringVar()
-        ttk.Entry(main_frame, textvariable=self.material_var, width=40).grid(row=0, column=1, pady=5, sticky=tk.EW)
+        material_entry = ttk.Entry(main_frame, textvariable=self.material_var, width=40)
+        material_entry.grid(row=0, column=1, pady=5, sticky=tk.EW)
+        if self.katalog:
+            # Tippen sucht im Lieferantenkatalog (Artikelnummer oder Bezeichnung)
+            from view.artikel_suche import ArtikelVervollstaendigung
+            ArtikelVervollstaendigung(material_entry, self.katalog, self._artikel_uebernehmen)
         
         # Menge
         ttk.Label(main_frame, text="Menge *:").grid(row=1, column=0, sticky=tk.W, pady=5)
@@ -336,6 +380,14 @@ class StuecklistenEintragDialog:
         ttk.Button(button_frame, text="Abbrechen", command=self._abbrechen).pack(side=tk.RIGHT, padx=5)
         ttk.Button(button_frame, text="Speichern", command=self._speichern).pack(side=tk.RIGHT, padx=5)
     
+    def _artikel_uebernehmen(self, artikel):
+        """Füllt die Felder mit einem Katalogartikel"""
+        self.material_var.set(artikel["kurztext"] or artikel["artikelnummer"])
+        self.einheit_var.set(artikel["einheit"] or "Stk")
+        self.einzelpreis_var.set(str(artikel["preis"]))
+        self.beschreibung_text.delete("1.0", tk.END)
+        self.beschreibung_text.insert("1.0", artikel_beschreibung(artikel))
+    
     def _lade_eintrag(self):
         """Lädt Eintragsdaten in die Felder"""
         if not self.eintrag:
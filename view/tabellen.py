@@ -0,0 +1,126 @@
+"""
+Sortierung und Filter für die Treeviews der Views
+
+Die Sortierschlüssel und ihr Cache liegen in view/sortschluessel.py (ohne
+tkinter) und werden hier für die Views mit exportiert.
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from view.sortschluessel import (normalisiere_text, kunde_schluessel, auftrag_schluessel,
+                                 rechnung_schluessel, SortschluesselCache, sortiere)
+
+
+ALLE = "Alle"
+
+
+class Spaltensortierung:
+    """Macht die Spaltenköpfe einer Treeview klickbar und merkt sich die Sortierung"""
+    
+    PFEIL_AUF = " ▲"
+    PFEIL_AB = " ▼"
+    
+    def __init__(self, tree: ttk.Treeview, spalten: Iterable[str], bei_aenderung: Callable[[], None]):
+        """
+        Args:
+            tree: Treeview, deren Spaltenköpfe klickbar werden
+            spalten: Sortierbare Spalten ("#0" für die Baumspalte)
+            bei_aenderung: Wird nach jedem Klick auf einen Spaltenkopf aufgerufen
+        """
+        self.tree = tree
+        self.bei_aenderung = bei_aenderung
+        self.spalte: Optional[str] = None
+        self.absteigend = False
+        self._titel = {}
+        for spalte in spalten:
+            self._titel[spalte] = tree.heading(spalte, "text")
+            tree.heading(spalte, command=lambda s=spalte: self._on_klick(s))
+    
+    def _on_klick(self, spalte: str):
+        """Wechselt die Sortierung: aufsteigend, absteigend"""
+        if self.spalte == spalte:
+            self.absteigend = not self.absteigend
+        else:
+            self.spalte = spalte
+            self.absteigend = False
+        
+        for s, titel in self._titel.items():
+            if s == self.spalte:
+                titel += self.PFEIL_AB if self.absteigend else self.PFEIL_AUF
+            self.tree.heading(s, text=titel)
+        self.bei_aenderung()
+    
+    def sortiere(self, elemente: List, schluessel: Callable[[Any, str], Any]) -> List:
+        """
+        Sortiert Elemente nach der aktuellen Spalte
+        
+        Args:
+            elemente: Zu sortierende Elemente (werden nicht verändert)
+            schluessel: Liefert den Sortierschlüssel eines Elements für eine Spalte
+        
+        Returns:
+            Sortierte Liste; leere Werte stehen immer am Ende
+        """
+        if self.spalte is None:
+            return list(elemente)
+        spalte = self.spalte
+        return sortiere(elemente, lambda e: schluessel(e, spalte), self.absteigend)
+    
+    def ordne_zeilen(self, iids: List[str], parent: str = ""):
+        """Ordnet bereits eingefügte Zeilen in der angegebenen Reihenfolge an"""
+        for index, iid in enumerate(iids):
+            self.tree.move(iid, parent, index)
+
+
+class Filterleiste(ttk.Frame):
+    """Leiste mit Auswahlfiltern (Combobox je Filter, erster Eintrag 'Alle')"""
+    
+    def __init__(self, parent: tk.Widget, bei_aenderung: Callable[[], None]):
+        super().__init__(parent)
+        self.bei_aenderung = bei_aenderung
+        self._variablen: Dict[str, tk.StringVar] = {}
+        self._comboboxen: Dict[str, ttk.Combobox] = {}
+        self._werte: Dict[str, Dict[str, Any]] = {}
+    
+    def add_auswahl(self, name: str, beschriftung: str, breite: int = 18):
+        """Fügt einen Auswahlfilter hinzu (Werte über setze_werte)"""
+        ttk.Label(self, text=f"{beschriftung}:").pack(side=tk.LEFT, padx=(10, 2))
+        variable = tk.StringVar(value=ALLE)
+        combobox = ttk.Combobox(self, textvariable=variable, state="readonly", width=breite, values=[ALLE])
+        combobox.pack(side=tk.LEFT, padx=2)
+        combobox.bind("<<ComboboxSelected>>", lambda e: self.bei_aenderung())
+        self._variablen[name] = variable
+        self._comboboxen[name] = combobox
+        self._werte[name] = {}
+    
+    def setze_werte(self, name: str, werte: Iterable, anzeige: Optional[Callable[[Any], str]] = None):
+        """
+        Setzt die auswählbaren Werte eines Filters
+        
+        Args:
+            name: Name des Filters
+            werte: Filterwerte (z.B. Status, Jahr, Kunden-ID)
+            anzeige: Liefert den angezeigten Text eines Werts (Standard: str)
+        """
+        zuordnung = {}
+        for wert in werte:
+            text = anzeige(wert) if anzeige else str(wert)
+            if text in zuordnung and zuordnung[text] != wert:
+                text = f"{text} ({wert})"
+            zuordnung[text] = wert
+        self._werte[name] = zuordnung
+        self._comboboxen[name].config(values=[ALLE] + list(zuordnung))
+        if self._variablen[name].get() not in zuordnung:
+            self._variablen[name].set(ALLE)
+    
+    def get(self, name: str) -> Optional[Any]:
+        """Gibt den gewählten Filterwert zurück (None bei 'Alle')"""
+        return self._werte[name].get(self._variablen[name].get())
+    
+    def zuruecksetzen(self):
+        """Setzt alle Filter auf 'Alle' zurück"""
+        for variable in self._variablen.values():
+            variable.set(ALLE)
+        self.bei_aenderung()
+
@@ -0,0 +1,78 @@
+"""
+Dialog mit den Wartungsaufgaben: Zeitplan, letzter Lauf und manueller Start
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class WartungDialog:
+    """Zeigt alle Wartungsaufgaben; der Zeitplan steht im Abschnitt "zeitplan" der Konfiguration"""
+    
+    def __init__(self, parent: tk.Widget, hauptfenster):
+        self.hauptfenster = hauptfenster
+        self.planer = hauptfenster.get_planer()
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Wartungsaufgaben")
+        self.dialog.geometry("900x320")
+        self.dialog.transient(parent)
+        
+        self._erstelle_ui()
+        self._lade_liste()
+    
+    def _erstelle_ui(self):
+        """Erstellt die Benutzeroberfläche"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        spalten = ("Aufgabe", "Zeitplan", "Letzter Lauf", "Dauer", "Ergebnis", "Nächster Lauf")
+        self.tree = ttk.Treeview(main_frame, columns=spalten, show="headings", selectmode="browse")
+        for spalte, breite in zip(spalten, (200, 100, 130, 70, 250, 130)):
+            self.tree.heading(spalte, text=spalte)
+            self.tree.column(spalte, width=breite, anchor=tk.E if spalte == "Dauer" else tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        # Buttons
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="Schließen", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Aktualisieren", command=self._lade_liste).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Jetzt ausführen", command=self._ausfuehren).pack(side=tk.RIGHT, padx=5)
+    
+    @staticmethod
+    def _ergebnis_text(lauf) -> str:
+        if not lauf:
+            return ""
+        if not lauf.get("ok"):
+            return f"Fehler: {lauf.get('fehler', '')}"
+        return ", ".join(f"{k}: {v}" for k, v in (lauf.get("ergebnis") or {}).items() if not isinstance(v, list))
+    
+    def _lade_liste(self):
+        """Füllt die Liste aus Zeitplan und Verlauf"""
+        if not self.dialog.winfo_exists():
+            return
+        auswahl = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        for eintrag in self.planer.status():
+            lauf = eintrag["letzter"]
+            laeuft = self.hauptfenster.wartung_laeuft(eintrag["aufgabe"])
+            self.tree.insert("", tk.END, iid=eintrag["aufgabe"], values=(
+                eintrag["beschreibung"],
+                eintrag["cron"] or "-",
+                "läuft …" if laeuft else (lauf["start"].replace("T", " ")[:16] if lauf else "-"),
+                f"{lauf['dauer_s']:.1f} s" if lauf else "",
+                eintrag.get("fehler") or self._ergebnis_text(lauf),
+                (eintrag["naechster"] or "").replace("T", " ")))
+        if auswahl and self.tree.exists(auswahl[0]):
+            self.tree.selection_set(auswahl[0])
+    
+    def _ausfuehren(self):
+        """Startet die gewählte Aufgabe sofort im Hintergrund"""
+        auswahl = self.tree.selection()
+        if not auswahl:
+            messagebox.showwarning("Keine Auswahl", "Bitte wählen Sie eine Aufgabe aus.", parent=self.dialog)
+            return
+        self.hauptfenster.starte_wartungsaufgabe(auswahl[0], ausloeser="manuell",
+                                                 bei_fertig=lambda _: self._lade_liste())
+        self._lade_liste()
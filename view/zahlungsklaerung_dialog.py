@@ -0,0 +1,125 @@
+"""
+Dialog zum Klären von Zahlungseingängen, die der Kontoauszug-Import nicht sicher zuordnen konnte
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+from typing import Dict
+
+from adapter import kontoauszug
+from adapter.manager import DatenManager
+
+
+class ZahlungsklaerungDialog:
+    """Zeigt die Klärungsliste; je Umsatz kann eine Rechnung zugeordnet oder der Umsatz ignoriert werden"""
+    
+    def __init__(self, parent: tk.Widget, manager: DatenManager):
+        self.manager = manager
+        self.eintraege = kontoauszug.lade_klaerung(manager.adapter)
+        self.gebucht = 0
+        self._auswahl = []  # Rechnungen in der Reihenfolge der Combobox
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Zahlungen klären")
+        self.dialog.geometry("950x520")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self._erstelle_ui()
+        self._lade_liste()
+        
+        self.dialog.wait_window()
+    
+    def _erstelle_ui(self):
+        """Erstellt die Benutzeroberfläche"""
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        spalten = ("Datum", "Betrag", "Auftraggeber", "Verwendungszweck", "Grund")
+        self.tree = ttk.Treeview(main_frame, columns=spalten, show="headings", selectmode="browse")
+        for spalte, breite in zip(spalten, (80, 90, 180, 360, 200)):
+            self.tree.heading(spalte, text=spalte)
+            self.tree.column(spalte, width=breite, anchor=tk.E if spalte == "Betrag" else tk.W)
+        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, columnspan=3, sticky=tk.NSEW)
+        scrollbar.grid(row=0, column=3, sticky=tk.NS)
+        self.tree.bind("<<TreeviewSelect>>", self._on_auswahl)
+        
+        ttk.Label(main_frame, text="Rechnung:").grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        self.rechnung_var = tk.StringVar()
+        self.rechnung_combo = ttk.Combobox(main_frame, textvariable=self.rechnung_var, width=60)
+        self.rechnung_combo.grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
+        
+        main_frame.grid_rowconfigure(0, weight=1)
+        main_frame.grid_columnconfigure(1, weight=1)
+        
+        # Buttons
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="Schließen", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Ignorieren", command=self._ignorieren).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Zuordnen", command=self._zuordnen).pack(side=tk.RIGHT, padx=5)
+    
+    def _lade_liste(self):
+        """Füllt die Liste der offenen Einträge"""
+        self.tree.delete(*self.tree.get_children())
+        for nummer, eintrag in enumerate(self.eintraege):
+            if eintrag.get("ignoriert"):
+                continue
+            self.tree.insert("", tk.END, iid=str(nummer), values=(
+                eintrag["datum"], f"{float(eintrag['betrag']):.2f} €", eintrag["name"], eintrag["text"],
+                eintrag["grund"]))
+        self.rechnung_var.set("")
+        self.rechnung_combo["values"] = ()
+    
+    @staticmethod
+    def _rechnung_text(rechnung, namen: Dict[str, str]) -> str:
+        return f"{rechnung.rechnungsnummer} - {namen.get(rechnung.kunde_id, '')} - offen {rechnung.offener_betrag:.2f} €"
+    
+    def _on_auswahl(self, event=None):
+        """Bietet die Kandidaten des gewählten Umsatzes an (danach alle offenen Rechnungen)"""
+        eintrag = self._gewaehlt()
+        if eintrag is None:
+            return
+        kandidaten = [r for r in (self.manager.get_rechnung(i) for i in eintrag.get("kandidaten", [])) if r]
+        uebrige = [r for r in self.manager.get_rechnungen()
+                   if r.status not in ("Bezahlt", "Storniert") and r not in kandidaten]
+        self._auswahl = kandidaten + uebrige
+        namen = {k.id: k.get_vollstaendiger_name() for k in self.manager.get_kunden()}
+        texte = [self._rechnung_text(r, namen) for r in self._auswahl]
+        self.rechnung_combo["values"] = texte
+        self.rechnung_var.set(texte[0] if kandidaten else "")
+    
+    def _gewaehlt(self):
+        auswahl = self.tree.selection()
+        return self.eintraege[int(auswahl[0])] if auswahl else None
+    
+    def _zuordnen(self):
+        """Bucht den gewählten Umsatz auf die gewählte Rechnung"""
+        eintrag = self._gewaehlt()
+        if eintrag is None:
+            messagebox.showwarning("Keine Auswahl", "Bitte wählen Sie einen Umsatz aus.", parent=self.dialog)
+            return
+        texte = list(self.rechnung_combo["values"])
+        if self.rechnung_var.get() not in texte:
+            messagebox.showwarning("Keine Rechnung", "Bitte wählen Sie eine Rechnung aus.", parent=self.dialog)
+            return
+        rechnung = self._auswahl[texte.index(self.rechnung_var.get())]
+        anzahl, _ = kontoauszug.buche(self.manager, [(kontoauszug.klaerung_als_umsatz(eintrag), [rechnung.id], "manuell")])
+        if not anzahl:
+            messagebox.showwarning("Nicht gebucht", "Die Rechnung ist inzwischen erledigt.", parent=self.dialog)
+            return
+        self.gebucht += 1
+        self.eintraege.remove(eintrag)
+        kontoauszug.speichere_klaerung(self.manager.adapter, self.eintraege)
+        self._lade_liste()
+    
+    def _ignorieren(self):
+        """Markiert den gewählten Umsatz als erledigt, ohne ihn zu buchen"""
+        eintrag = self._gewaehlt()
+        if eintrag is None:
+            return
+        eintrag["ignoriert"] = True
+        kontoauszug.speichere_klaerung(self.manager.adapter, self.eintraege)
+        self._lade_liste()